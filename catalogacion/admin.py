@@ -1,6 +1,7 @@
 """
 Configuración del Admin de Django organizado por tipo de plantilla MARC21
 """
+from django import forms
 from django.contrib import admin
 from django.core.exceptions import ValidationError
 from django.utils.html import format_html
@@ -61,6 +62,8 @@ from .models import (
     URL856,
 )
 from .formatters import MARCFormatter
+from .services.marc_exportacion import FORMATOS, iter_exportacion
+from .services.marc_importacion import detectar_formato, importar_marc
 
 
 # ============================================
@@ -771,6 +774,22 @@ FIELDSETS_OBRA_IMPRESA = (
 )
 
 
+class ImportarMARCForm(forms.Form):
+    """Carga de un archivo MARC21 para importar obras desde el admin"""
+
+    archivo = forms.FileField(
+        label='Archivo MARC21',
+        help_text='ISO 2709 (.mrc) o MARCXML en UTF-8. Para archivos grandes use '
+                  'el comando importar_marc.',
+    )
+    simular = forms.BooleanField(
+        label='Solo validar (dry-run)',
+        required=False,
+        initial=True,
+        help_text='Reporta los errores de mapeo sin crear obras ni autoridades.',
+    )
+
+
 # ============================================
 # ADMIN PRINCIPAL
 # ============================================
@@ -817,7 +836,7 @@ class ObraGeneralAdmin(InlineValidationMixin, admin.ModelAdmin):
         'preview_marc',
     ]
 
-    actions = ['exportar_marc', 'duplicar_obras']
+    actions = ['exportar_marc', 'exportar_iso2709', 'exportar_marcxml', 'duplicar_obras']
 
     # Inlines para campos repetibles (organizados por bloque MARC)
     inlines = [
@@ -977,21 +996,28 @@ class ObraGeneralAdmin(InlineValidationMixin, admin.ModelAdmin):
 
     # Acciones
 
-    def exportar_marc(self, request, queryset):
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type='text/plain; charset=utf-8')
-        response['Content-Disposition'] = 'attachment; filename="obras_marc.txt"'
-
-        for obra in queryset:
-            formatter = MARCFormatter(obra)
-            response.write(formatter.format_full_record())
-            response.write("\n\n" + "="*80 + "\n\n")
+    def _exportar(self, queryset, formato, nombre):
+        from django.http import StreamingHttpResponse
 
-        self.message_user(request, f"{queryset.count()} obras exportadas correctamente.")
+        # Por lotes y en streaming: la selección puede ser el catálogo entero
+        response = StreamingHttpResponse(
+            iter_exportacion(queryset, formato), content_type=FORMATOS[formato][1]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
         return response
+
+    def exportar_marc(self, request, queryset):
+        return self._exportar(queryset, "mrk", "obras_marc.mrk")
     exportar_marc.short_description = "📥 Exportar como MARC21"
 
+    def exportar_iso2709(self, request, queryset):
+        return self._exportar(queryset, "mrc", "obras.mrc")
+    exportar_iso2709.short_description = "📥 Exportar como MARC21 binario (.mrc)"
+
+    def exportar_marcxml(self, request, queryset):
+        return self._exportar(queryset, "marcxml", "obras.xml")
+    exportar_marcxml.short_description = "📥 Exportar como MARCXML"
+
     def duplicar_obras(self, request, queryset):
         contador = 0
         for obra in queryset:
@@ -1003,6 +1029,62 @@ class ObraGeneralAdmin(InlineValidationMixin, admin.ModelAdmin):
         self.message_user(request, f"✅ {contador} obra(s) duplicada(s) correctamente.")
     duplicar_obras.short_description = "📋 Duplicar obras"
 
+    # Importación
+
+    def get_urls(self):
+        from django.urls import path
+
+        urls = [
+            path(
+                'importar-marc/',
+                self.admin_site.admin_view(self.importar_marc_view),
+                name='catalogacion_obrageneral_importar_marc',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def importar_marc_view(self, request):
+        from django.core.exceptions import PermissionDenied
+        from django.shortcuts import render
+
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        resultado = None
+        if request.method == 'POST':
+            form = ImportarMARCForm(request.POST, request.FILES)
+            if form.is_valid():
+                archivo = form.cleaned_data['archivo']
+                formato = detectar_formato(archivo.name, archivo.read(64))
+                archivo.seek(0)
+                resultado = importar_marc(
+                    archivo,
+                    formato=formato,
+                    simular=form.cleaned_data['simular'],
+                    usuario=request.user,
+                )
+                if not form.cleaned_data['simular']:
+                    self.message_user(
+                        request,
+                        f"✅ {resultado.importados} obra(s) importada(s) sin publicar; "
+                        f"{resultado.omitidos} registro(s) con errores.",
+                    )
+        else:
+            form = ImportarMARCForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Importar registros MARC21',
+            'form': form,
+            'resultado': resultado,
+            # Counter devuelve 0 para claves faltantes: .items no funcionaría en la plantilla
+            'autoridades_nuevas': sorted(resultado.autoridades_nuevas.items()) if resultado else [],
+            'etiquetas_ignoradas': sorted(resultado.etiquetas_ignoradas.items()) if resultado else [],
+            'simulado': request.method == 'POST' and form.is_valid() and form.cleaned_data['simular'],
+        }
+        return render(request, 'admin/catalogacion/obrageneral/importar_marc.html', context)
+
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
 
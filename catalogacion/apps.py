@@ -8,3 +8,4 @@ class CatalogacionConfig(AppConfig):
     def ready(self):
         """Importar señales cuando la app esté lista"""
         import catalogacion.models.signals  # noqa: F401
+        import catalogacion.models.signals_busqueda  # noqa: F401
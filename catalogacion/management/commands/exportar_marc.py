@@ -0,0 +1,104 @@
+"""
+Comando para exportar el catálogo en MARC21 (volcados completos o
+incrementales para catálogos colectivos y RISM).
+
+Uso:
+    python manage.py exportar_marc --formato=mrc --gzip --salida=catalogo.mrc.gz
+    python manage.py exportar_marc --formato=marcxml --since=2025-01-01
+    python manage.py exportar_marc --formato=jsonl --fragmento=2/4   # un proceso de cuatro
+    python manage.py exportar_marc --id-desde=1 --id-hasta=5000 --salida=-
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalogacion.services.marc_exportacion import (
+    FORMATOS,
+    TAMANO_LOTE,
+    exportar_a_archivo,
+    interpretar_fecha,
+    iter_exportacion,
+    obras_exportables,
+    rango_fragmento,
+)
+
+
+class Command(BaseCommand):
+    help = "Exporta las obras en MARCXML, MARC21 binario (.mrc), JSONL o mnemónico"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--formato", choices=sorted(FORMATOS), default="marcxml", help="Formato de salida"
+        )
+        parser.add_argument(
+            "--salida",
+            default=None,
+            help="Archivo de salida ('-' para la salida estándar; default: catalogo.<ext>[.gz])",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Comprimir la salida con gzip")
+        parser.add_argument(
+            "--since",
+            default=None,
+            help="Solo obras modificadas desde esta fecha (AAAA-MM-DD o ISO 8601)",
+        )
+        parser.add_argument("--id-desde", type=int, default=None, help="Primer id a exportar")
+        parser.add_argument("--id-hasta", type=int, default=None, help="Último id a exportar")
+        parser.add_argument(
+            "--fragmento",
+            default=None,
+            help="K/N: exportar el tramo K de N del rango de ids (para repartir entre procesos)",
+        )
+        parser.add_argument(
+            "--incluir-no-publicadas",
+            action="store_true",
+            help="Incluir obras no publicadas en el catálogo público",
+        )
+        parser.add_argument(
+            "--lote", type=int, default=TAMANO_LOTE, help="Obras cargadas por consulta"
+        )
+
+    def handle(self, *args, **options):
+        formato = options["formato"]
+        comprimir = options["gzip"]
+        desde = None
+        if options["since"]:
+            desde = interpretar_fecha(options["since"])
+            if desde is None:
+                raise CommandError(f"Fecha inválida para --since: {options['since']}")
+
+        qs = obras_exportables(
+            desde=desde,
+            id_desde=options["id_desde"],
+            id_hasta=options["id_hasta"],
+            solo_publicadas=not options["incluir_no_publicadas"],
+        )
+
+        if options["fragmento"]:
+            try:
+                fragmento, total = (int(n) for n in options["fragmento"].split("/"))
+                rango = rango_fragmento(qs, fragmento, total)
+            except ValueError as e:
+                raise CommandError(f"--fragmento inválido ({options['fragmento']}): {e}")
+            if rango is None:
+                qs = qs.none()
+            else:
+                qs = qs.filter(pk__gte=rango[0], pk__lte=rango[1])
+                self.stderr.write(f"Fragmento {fragmento}/{total}: ids {rango[0]}-{rango[1]}")
+
+        salida = options["salida"]
+        if salida == "-":
+            for trozo in iter_exportacion(qs, formato, comprimir, options["lote"]):
+                sys.stdout.buffer.write(trozo)
+            sys.stdout.buffer.flush()
+            return
+
+        if salida is None:
+            salida = f"catalogo.{FORMATOS[formato][0]}{'.gz' if comprimir else ''}"
+        total_obras = qs.count()
+        escritos = exportar_a_archivo(salida, qs, formato, comprimir, options["lote"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total_obras} obras exportadas en {salida} ({escritos / 1024 / 1024:.1f} MB)"
+            )
+        )
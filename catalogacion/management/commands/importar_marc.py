@@ -0,0 +1,109 @@
+"""
+Comando para importar registros MARC21 (ISO 2709 o MARCXML) como obras nuevas.
+
+Todos los registros reciben un número de control nuevo y quedan sin publicar.
+Los archivos deben estar en UTF-8 (MARC-8 no está soportado: los registros
+que no se puedan decodificar se reportan como errores).
+
+Uso:
+    python manage.py importar_marc catalogo_antiguo.mrc --dry-run
+    python manage.py importar_marc exportacion.xml --formato=marcxml --usuario=catalogador@unl.edu.ec
+    python manage.py importar_marc catalogo.mrc --lote=500 -v 2   # con avisos detallados
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from catalogacion.services.marc_importacion import (
+    TAMANO_LOTE,
+    detectar_formato,
+    importar_marc,
+)
+
+
+class Command(BaseCommand):
+    help = "Importa obras desde un archivo MARC21 (.mrc ISO 2709 o MARCXML)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Archivo .mrc o MARCXML a importar")
+        parser.add_argument(
+            "--formato",
+            choices=["mrc", "marcxml"],
+            default=None,
+            help="Formato del archivo (default: según la extensión o el contenido)",
+        )
+        parser.add_argument(
+            "--lote", type=int, default=TAMANO_LOTE, help="Registros por transacción"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo validar el mapeo y reportar errores, sin escribir",
+        )
+        parser.add_argument(
+            "--usuario", default=None, help="Email del catalogador al que se atribuyen las obras"
+        )
+        parser.add_argument(
+            "--centro",
+            default="UNL",
+            help="Centro catalogador para registros sin 003 ni 040 (default: UNL)",
+        )
+
+    def handle(self, *args, **options):
+        usuario = None
+        if options["usuario"]:
+            try:
+                usuario = get_user_model().objects.get_by_natural_key(options["usuario"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No existe el usuario {options['usuario']}")
+
+        try:
+            archivo = open(options["archivo"], "rb")
+        except OSError as e:
+            raise CommandError(f"No se puede abrir {options['archivo']}: {e}")
+
+        with archivo:
+            formato = options["formato"] or detectar_formato(options["archivo"], archivo.peek(64))
+            simular = options["dry_run"]
+            self.stdout.write(
+                f"{'Validando' if simular else 'Importando'} {options['archivo']} ({formato})..."
+            )
+            resultado = importar_marc(
+                archivo,
+                formato=formato,
+                simular=simular,
+                tamano_lote=options["lote"],
+                centro_por_defecto=options["centro"],
+                usuario=usuario,
+            )
+
+        for posicion, control, mensaje in resultado.errores:
+            self.stderr.write(f"  Registro {posicion} ({control or 'sin 001'}): {mensaje}")
+        if options["verbosity"] >= 2:
+            for posicion, control, mensaje in resultado.avisos:
+                self.stdout.write(f"  Aviso registro {posicion} ({control or 'sin 001'}): {mensaje}")
+        for posicion, control, enlace in resultado.enlaces_sin_resolver:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"  Registro {posicion} ({control or 'sin 001'}): $w {enlace} no encontrado"
+                )
+            )
+
+        if resultado.etiquetas_ignoradas:
+            ignoradas = ", ".join(
+                f"{tag} ({n})" for tag, n in sorted(resultado.etiquetas_ignoradas.items())
+            )
+            self.stdout.write(f"Campos no importados: {ignoradas}")
+        if resultado.autoridades_nuevas:
+            nuevas = ", ".join(
+                f"{modelo}: {n}" for modelo, n in sorted(resultado.autoridades_nuevas.items())
+            )
+            self.stdout.write(f"Autoridades {'a crear' if simular else 'creadas'}: {nuevas}")
+
+        resumen = (
+            f"{resultado.leidos} registros leídos, "
+            f"{resultado.importados} {'válidos' if simular else 'importados'}, "
+            f"{resultado.omitidos} con errores, {len(resultado.avisos)} avisos"
+        )
+        estilo = self.style.SUCCESS if not resultado.errores else self.style.WARNING
+        self.stdout.write(estilo(resumen))
@@ -0,0 +1,24 @@
+"""
+Comando para reconstruir el índice de búsqueda de texto completo.
+Necesario tras la migración que crea el índice o después de cargas masivas
+que no disparan señales.
+
+Uso:
+    python manage.py reconstruir_indice_busqueda
+"""
+
+from django.core.management.base import BaseCommand
+
+from catalogacion.services.busqueda import motor_busqueda, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de texto completo de todas las obras"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Motor de búsqueda: {motor_busqueda()}")
+        self.stdout.write("Reindexando obras...")
+
+        total = reconstruir_indice()
+
+        self.stdout.write(self.style.SUCCESS(f"Obras indexadas: {total}"))
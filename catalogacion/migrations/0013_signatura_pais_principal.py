@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+def poblar_signaturas(apps, schema_editor):
+    """Calcular pais_principal y signatura de las obras existentes."""
+    ObraGeneral = apps.get_model('catalogacion', 'ObraGeneral')
+    CodigoPaisEntidad = apps.get_model('catalogacion', 'CodigoPaisEntidad')
+
+    # Primer 044 por obra (menor id)
+    primer_pais = {}
+    for obra_id, codigo in CodigoPaisEntidad.objects.order_by('obra_id', 'id').values_list('obra_id', 'codigo_pais'):
+        primer_pais.setdefault(obra_id, codigo)
+
+    obras = list(ObraGeneral.objects.only('id', 'centro_catalogador', 'tipo_registro', 'num_control'))
+    for obra in obras:
+        pais = (primer_pais.get(obra.id) or 'EC').upper()
+        obra.pais_principal = pais
+        if obra.centro_catalogador and obra.num_control:
+            ms_imp = 'Ms' if obra.tipo_registro == 'd' else 'Imp'
+            obra.signatura = f"{obra.centro_catalogador}-BLMP-{pais}-{ms_imp}-{obra.num_control}"
+    ObraGeneral.objects.bulk_update(obras, ['pais_principal', 'signatura'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogacion', '0012_default_solista_piano'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='obrageneral',
+            name='pais_principal',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Primer código de país (044 $a) en mayúsculas', max_length=5),
+        ),
+        migrations.AddField(
+            model_name='obrageneral',
+            name='signatura',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Signatura completa almacenada (ej: UNL-BLMP-EC-Ms-M000001)', max_length=60),
+        ),
+        migrations.RunPython(poblar_signaturas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+TABLA = 'catalogacion_indicebusquedaobra'
+TABLA_FTS = 'catalogacion_indicebusquedaobra_fts'
+COLUMNAS = 'titulos, autores, materias, contenido, signaturas'
+NUEVAS = 'new.titulos, new.autores, new.materias, new.contenido, new.signaturas'
+VIEJAS = 'old.titulos, old.autores, old.materias, old.contenido, old.signaturas'
+
+SQL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE {TABLA_FTS} USING fts5(
+        {COLUMNAS}, content='{TABLA}', content_rowid='obra_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {TABLA_FTS}_ai AFTER INSERT ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, {COLUMNAS}) VALUES (new.obra_id, {NUEVAS});
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_ad AFTER DELETE ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, {COLUMNAS}) VALUES ('delete', old.obra_id, {VIEJAS});
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_au AFTER UPDATE ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, {COLUMNAS}) VALUES ('delete', old.obra_id, {VIEJAS});
+        INSERT INTO {TABLA_FTS}(rowid, {COLUMNAS}) VALUES (new.obra_id, {NUEVAS});
+    END""",
+]
+
+SQL_POSTGRESQL = [
+    f"""ALTER TABLE {TABLA} ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', titulos), 'A') ||
+        setweight(to_tsvector('simple', signaturas), 'A') ||
+        setweight(to_tsvector('spanish', autores), 'B') ||
+        setweight(to_tsvector('spanish', materias), 'C') ||
+        setweight(to_tsvector('spanish', contenido), 'D')
+    ) STORED""",
+    f"CREATE INDEX {TABLA}_vector_gin ON {TABLA} USING GIN (vector)",
+]
+
+
+def crear_motor_busqueda(apps, schema_editor):
+    """FTS5 en SQLite o tsvector + GIN en PostgreSQL. Otros motores: búsqueda básica."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return  # SQLite sin FTS5: se usa la búsqueda básica
+        sentencias = SQL_SQLITE
+    elif vendor == 'postgresql':
+        sentencias = SQL_POSTGRESQL
+    else:
+        return
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def eliminar_motor_busqueda(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA_FTS}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"ALTER TABLE {TABLA} DROP COLUMN IF EXISTS vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogacion', '0013_signatura_pais_principal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusquedaObra',
+            fields=[
+                ('obra', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='indice_busqueda', serialize=False, to='catalogacion.obrageneral')),
+                ('titulos', models.TextField(blank=True, default='', help_text='245, 246, 130 y 240')),
+                ('autores', models.TextField(blank=True, default='', help_text='100, 700 y 710')),
+                ('materias', models.TextField(blank=True, default='', help_text='650 y 655')),
+                ('contenido', models.TextField(blank=True, default='', help_text='505 y 520')),
+                ('signaturas', models.TextField(blank=True, default='', help_text='001, signatura 092 y 852')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Índice de búsqueda',
+                'verbose_name_plural': 'Índice de búsqueda',
+            },
+        ),
+        # Poblar después con: python manage.py reconstruir_indice_busqueda
+        migrations.RunPython(crear_motor_busqueda, eliminar_motor_busqueda),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogacion', '0014_indice_busqueda_obra'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='borradorobra',
+            name='catalogacio_fecha_m_0af39e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='obrageneral',
+            name='catalogacio_fecha_c_1c88ca_idx',
+        ),
+        migrations.AddIndex(
+            model_name='borradorobra',
+            index=models.Index(fields=['-fecha_modificacion', 'id'], name='catalogacio_fecha_m_6faaaf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='obrageneral',
+            index=models.Index(fields=['-fecha_creacion_sistema', 'id'], name='catalogacio_fecha_c_42e12a_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogacion', '0015_indices_paginacion_cursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='obrageneral',
+            index=models.Index(fields=['fecha_modificacion_sistema', 'id'], name='catalogacio_fecha_m_8948ab_idx'),
+        ),
+    ]
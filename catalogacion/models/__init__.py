@@ -130,6 +130,11 @@ from .bloque_8xx import (
 )
 from .borradores import BorradorObra
 
+# ============================================
+# BÚSQUEDA
+# ============================================
+from .busqueda import IndiceBusquedaObra
+
 # ============================================
 # UTILIDADES / MANAGERS
 # ============================================
@@ -257,6 +262,10 @@ __all__ = [
     "URL856",
     "TextoEnlace856",
     # -------------------------------
+    # BÚSQUEDA
+    # -------------------------------
+    "IndiceBusquedaObra",
+    # -------------------------------
     # UTILIDADES
     # -------------------------------
     "ObraGeneralManager",
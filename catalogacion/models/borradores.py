@@ -96,7 +96,7 @@ class BorradorObra(models.Model):
         verbose_name_plural = "Borradores de Obras MARC21"
         ordering = ["-fecha_modificacion"]
         indexes = [
-            models.Index(fields=["-fecha_modificacion"]),
+            models.Index(fields=["-fecha_modificacion", "id"]),
             models.Index(fields=["tipo_obra"]),
             models.Index(fields=["tipo_registro"]),
             models.Index(fields=["estado"]),
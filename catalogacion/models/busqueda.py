@@ -0,0 +1,50 @@
+"""
+Índice de búsqueda de texto completo de las obras.
+
+Cada fila guarda el texto normalizado (minúsculas, sin tildes) de los campos
+buscables de una obra, agrupado por peso de relevancia. Sobre esta tabla la
+migración crea el índice propio del motor:
+- SQLite: tabla virtual FTS5 sincronizada por triggers
+- PostgreSQL: columna tsvector generada con índice GIN
+
+La mantiene catalogacion.services.busqueda desde las señales de
+catalogacion/models/signals_busqueda.py.
+"""
+
+from django.db import models
+
+
+class IndiceBusquedaObra(models.Model):
+    """Documento de búsqueda de una obra (una fila por ObraGeneral)"""
+
+    obra = models.OneToOneField(
+        "ObraGeneral",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="indice_busqueda",
+    )
+
+    titulos = models.TextField(
+        blank=True, default="", help_text="245, 246, 130 y 240"
+    )
+    autores = models.TextField(
+        blank=True, default="", help_text="100, 700 y 710"
+    )
+    materias = models.TextField(
+        blank=True, default="", help_text="650 y 655"
+    )
+    contenido = models.TextField(
+        blank=True, default="", help_text="505 y 520"
+    )
+    signaturas = models.TextField(
+        blank=True, default="", help_text="001, signatura 092 y 852"
+    )
+
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Índice de búsqueda"
+        verbose_name_plural = "Índice de búsqueda"
+
+    def __str__(self):
+        return f"Índice obra {self.obra_id}"
@@ -23,9 +23,11 @@ from .constantes import (
 from .managers import ObraGeneralManager
 from .utils import (
     actualizar_fecha_hora_transaccion,
+    calcular_pais_principal,
     generar_codigo_informacion,
     generar_numero_control,
     generar_signatura_completa,
+    signatura_para_archivo,
 )
 from .validadores import obtener_validador
 
@@ -461,6 +463,23 @@ class ObraGeneral(SoftDeleteMixin, models.Model):
         help_text="Fecha y hora en que se publicó la obra",
     )
 
+    # Signatura desnormalizada (092); la mantienen save() y la señal del 044
+    pais_principal = models.CharField(
+        max_length=5,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Primer código de país (044 $a) en mayúsculas",
+    )
+    signatura = models.CharField(
+        max_length=60,
+        blank=True,
+        default="",
+        db_index=True,
+        editable=False,
+        help_text="Signatura completa almacenada (ej: UNL-BLMP-EC-Ms-M000001)",
+    )
+
     # Manager personalizado
     objects = ObraGeneralManager()
 
@@ -477,7 +496,8 @@ class ObraGeneral(SoftDeleteMixin, models.Model):
             models.Index(fields=["tipo_registro"]),
             models.Index(fields=["nivel_bibliografico"]),
             models.Index(fields=["tipo_registro", "nivel_bibliografico"]),
-            models.Index(fields=["-fecha_creacion_sistema"]),
+            models.Index(fields=["-fecha_creacion_sistema", "id"]),
+            models.Index(fields=["fecha_modificacion_sistema", "id"]),
             models.Index(fields=["titulo_principal"]),
         ]
 
@@ -769,13 +789,9 @@ class ObraGeneral(SoftDeleteMixin, models.Model):
         Retorna la signatura de la colección padre via 773 $w.
         Si la obra pertenece a una colección, devuelve la signatura de esa colección.
         """
-        from catalogacion.models import NumeroControl773
-
-        # Buscar el primer enlace 773 que tenga obra_relacionada
-        for enlace in self.enlaces_documento_fuente_773.all():
-            numero_control = enlace.numeros_control.select_related("obra_relacionada").first()
-            if numero_control and numero_control.obra_relacionada:
-                return numero_control.obra_relacionada.signatura_publica_display
+        obra_padre = self.obra_coleccion_padre
+        if obra_padre:
+            return obra_padre.signatura_publica_display
         return None
 
     @property
@@ -784,10 +800,14 @@ class ObraGeneral(SoftDeleteMixin, models.Model):
         Retorna la obra padre (colección) via 773 $w.
         Útil para obtener otros datos del padre.
         """
-        from catalogacion.models import NumeroControl773
-
+        # Buscar el primer enlace 773 que tenga obra_relacionada; si la vista
+        # precargó enlaces_documento_fuente_773__numeros_control__obra_relacionada
+        # no se hace ninguna consulta
         for enlace in self.enlaces_documento_fuente_773.all():
-            numero_control = enlace.numeros_control.select_related("obra_relacionada").first()
+            if "numeros_control" in getattr(enlace, "_prefetched_objects_cache", {}):
+                numero_control = next(iter(enlace.numeros_control.all()), None)
+            else:
+                numero_control = enlace.numeros_control.select_related("obra_relacionada").first()
             if numero_control and numero_control.obra_relacionada:
                 return numero_control.obra_relacionada
         return None
@@ -917,16 +937,30 @@ class ObraGeneral(SoftDeleteMixin, models.Model):
         # Generar fecha/hora de última transacción (005)
         self.fecha_hora_ultima_transaccion = actualizar_fecha_hora_transaccion()
 
+        # Sin 044 todavía: país por defecto (la señal del 044 lo actualiza)
+        if not self.pais_principal:
+            self.pais_principal = "EC"
+
     def generar_leader(self):
         """
         Genera la cabecera MARC21 completa (24 caracteres)
-        Formato: |||||[estado][tipo][nivel]||||||||||||4500
+        Formato: 00000[estado][tipo][nivel] a2200000 i 4500
+
+        Longitud del registro (00-04) y dirección base de los datos (12-16)
+        quedan en cero: dependen del registro serializado y las calcula
+        catalogacion.services.marc_serializacion al escribirlo.
         """
-        leader = "|" * 5  # Posiciones 00-04 (longitud del registro, calculado después)
+        leader = "0" * 5  # Posiciones 00-04 (longitud del registro)
         leader += self.estado_registro or "n"  # Posición 05
-        leader += self.tipo_registro or "|"  # Posición 06
-        leader += self.nivel_bibliografico or "|"  # Posición 07
-        leader += "|" * 12  # Posiciones 08-19 (datos técnicos)
+        leader += self.tipo_registro or "d"  # Posición 06
+        leader += self.nivel_bibliografico or "m"  # Posición 07
+        leader += " "  # Posición 08 (tipo de control: no especificado)
+        leader += "a"  # Posición 09 (codificación: UCS/Unicode)
+        leader += "22"  # Posiciones 10-11 (indicadores y código de subcampo)
+        leader += "0" * 5  # Posiciones 12-16 (dirección base de los datos)
+        leader += " "  # Posición 17 (nivel de codificación: completo)
+        leader += "i"  # Posición 18 (puntuación ISBD)
+        leader += " "  # Posición 19 (registro no multiparte)
         leader += "4500"  # Posiciones 20-23 (constante MARC21)
 
         return leader
@@ -971,6 +1005,17 @@ class ObraGeneral(SoftDeleteMixin, models.Model):
         else:
             # En actualización, solo actualizar campo 005
             self.fecha_hora_ultima_transaccion = actualizar_fecha_hora_transaccion()
+            # Releer el país de la BD: la instancia puede traer un valor
+            # anterior a cambios de sus códigos de país (044)
+            self.pais_principal = calcular_pais_principal(self.pk)
+            self.__dict__.pop("_pais_principal_cache", None)
+
+        # Mantener la signatura almacenada (centro, tipo o número pueden cambiar)
+        self.signatura = signatura_para_archivo(self) or ""
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields:
+            kwargs["update_fields"] = {*update_fields, "pais_principal", "signatura"}
 
         # Guardar
         super().save(*args, **kwargs)
@@ -19,63 +19,46 @@ from .autoridades import AutoridadTituloUniforme
 def actualizar_signatura_por_cambio_pais(sender, instance, **kwargs):
     """
     Actualiza automáticamente la signatura de la obra cuando se cambia un código de país.
-    
+
     Esta señal se dispara cuando:
     - Se crea un nuevo código de país (post_save)
-    - Se modifica un código de país existente (post_save)  
+    - Se modifica un código de país existente (post_save)
     - Se elimina un código de país (post_delete)
-    
+
+    Recalcula las columnas almacenadas ObraGeneral.pais_principal y
+    ObraGeneral.signatura, y refresca la instancia de la obra en memoria
+    (la que usan formsets y vistas tras guardar).
+
     Args:
         sender: Modelo CodigoPaisEntidad
         instance: Instancia del código de país modificado
         **kwargs: Argumentos adicionales de la señal
     """
-    print(f"🚀 SEÑAL DISPARADA: {sender.__name__} - País: {instance.codigo_pais} - Obra: {instance.obra.num_control if instance.obra else 'None'}")
-    
+    import logging
+
+    logger = logging.getLogger("catalogacion")
+
     try:
-        obra = instance.obra
-        
-        # Verificar que la obra tenga los campos necesarios para generar signatura
-        if obra.centro_catalogador and obra.num_control:
-            # Importamos aquí para evitar importación circular
-            from .utils import generar_signatura_completa, obtener_pais_principal
-            
-            # Generar nueva signatura con el país actualizado
-            nueva_signatura = generar_signatura_completa(obra)
-            pais_actual = obtener_pais_principal(obra)
-            
-            print(f"🔍 DEBUG: País actual = {pais_actual}")
-            print(f"🔍 DEBUG: Nueva signatura = {nueva_signatura}")
-            print(f"🔍 DEBUG: signatura_publica_display = {obra.signatura_publica_display}")
-            
-            # Forzar la recalculación de properties relacionadas con el país
-            # Esto asegura que las views y templates obtengan el valor actualizado
-            
-            # Invalidar caché de properties si existe
-            if hasattr(obra, '_signatura_completa_cache'):
-                delattr(obra, '_signatura_completa_cache')
-            if hasattr(obra, '_signatura_publica_display_cache'):
-                delattr(obra, '_signatura_publica_display_cache')
-            
-            # Log para debugging
-            import logging
-            logger = logging.getLogger('marc21')
-            logger.info(
-                f"✅ Signatura actualizada automáticamente por cambio de país: "
-                f"Obra {obra.num_control} - Nueva signatura: {nueva_signatura}"
-            )
-            
-        else:
-            print(f"❌ Obra sin campos necesarios: centro={obra.centro_catalogador}, num_control={obra.num_control}")
+        # Importamos aquí para evitar importación circular
+        from .utils import actualizar_signatura_almacenada
+
+        pais, signatura = actualizar_signatura_almacenada(instance.obra_id)
+        if pais is None:
+            return
+
+        if CodigoPaisEntidad.obra.is_cached(instance):
+            obra = instance.obra
+            obra.pais_principal = pais
+            obra.signatura = signatura
+            obra.__dict__.pop("_pais_principal_cache", None)
+
+        logger.debug(
+            f"Signatura actualizada por cambio de país: obra {instance.obra_id} - {signatura}"
+        )
 
     except Exception as e:
         # Log del error pero sin interrumpir la operación
-        print(f"❌ ERROR en señal: {str(e)}")
-        import logging
-        logger = logging.getLogger('marc21')
-        logger.error(
-            f"❌ Error al actualizar signatura por cambio de país: {str(e)}"
-        )
+        logger.error(f"Error al actualizar signatura por cambio de país: {str(e)}")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
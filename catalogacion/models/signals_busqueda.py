@@ -0,0 +1,98 @@
+"""
+Señales que mantienen el índice de búsqueda (IndiceBusquedaObra) al día.
+Cada handler solo programa la reindexación de la obra (on_commit, agrupada).
+"""
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalogacion.services.busqueda import (
+    programar_actualizacion_indice,
+    programar_actualizacion_indices,
+)
+
+from .autoridades import (
+    AutoridadEntidad,
+    AutoridadFormaMusical,
+    AutoridadMateria,
+    AutoridadPersona,
+    AutoridadTituloUniforme,
+)
+from .bloque_0xx import CodigoPaisEntidad
+from .bloque_2xx import TituloAlternativo
+from .bloque_5xx import Contenido505, Sumario520
+from .bloque_6xx import Materia650, MateriaGenero655
+from .bloque_7xx import EntidadRelacionada710, NombreRelacionado700
+from .bloque_8xx import Ubicacion852
+from .obra_general import ObraGeneral
+
+
+@receiver(post_save, sender=ObraGeneral)
+def indexar_obra(sender, instance, **kwargs):
+    programar_actualizacion_indice(instance.pk)
+
+
+@receiver(post_save, sender=TituloAlternativo)
+@receiver(post_delete, sender=TituloAlternativo)
+@receiver(post_save, sender=NombreRelacionado700)
+@receiver(post_delete, sender=NombreRelacionado700)
+@receiver(post_save, sender=EntidadRelacionada710)
+@receiver(post_delete, sender=EntidadRelacionada710)
+@receiver(post_save, sender=Materia650)
+@receiver(post_delete, sender=Materia650)
+@receiver(post_save, sender=MateriaGenero655)
+@receiver(post_delete, sender=MateriaGenero655)
+@receiver(post_save, sender=Contenido505)
+@receiver(post_delete, sender=Contenido505)
+@receiver(post_save, sender=Sumario520)
+@receiver(post_delete, sender=Sumario520)
+@receiver(post_save, sender=Ubicacion852)
+@receiver(post_delete, sender=Ubicacion852)
+@receiver(post_save, sender=CodigoPaisEntidad)
+@receiver(post_delete, sender=CodigoPaisEntidad)
+def indexar_obra_por_campo(sender, instance, **kwargs):
+    """Reindexa la obra cuando cambia un campo repetible buscable (o el 044 de la signatura)."""
+    programar_actualizacion_indice(instance.obra_id)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Autoridades: al renombrar se reindexan las obras que las usan
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _reindexar(filtro, created):
+    if created:
+        return
+    programar_actualizacion_indices(
+        ObraGeneral.objects.filter(filtro).values_list("id", flat=True)
+    )
+
+
+@receiver(post_save, sender=AutoridadPersona)
+def indexar_por_persona(sender, instance, created, **kwargs):
+    _reindexar(
+        Q(compositor=instance) | Q(nombres_relacionados_700__persona=instance),
+        created,
+    )
+
+
+@receiver(post_save, sender=AutoridadEntidad)
+def indexar_por_entidad(sender, instance, created, **kwargs):
+    _reindexar(Q(entidades_relacionadas_710__entidad=instance), created)
+
+
+@receiver(post_save, sender=AutoridadTituloUniforme)
+def indexar_por_titulo_uniforme(sender, instance, created, **kwargs):
+    _reindexar(Q(titulo_uniforme=instance) | Q(titulo_240=instance), created)
+
+
+@receiver(post_save, sender=AutoridadFormaMusical)
+def indexar_por_forma(sender, instance, created, **kwargs):
+    _reindexar(
+        Q(forma_130=instance) | Q(forma_240=instance) | Q(materias_655__materia=instance),
+        created,
+    )
+
+
+@receiver(post_save, sender=AutoridadMateria)
+def indexar_por_materia(sender, instance, created, **kwargs):
+    _reindexar(Q(materias_650__materia=instance), created)
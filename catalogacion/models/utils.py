@@ -41,6 +41,42 @@ def generar_numero_control(tipo_registro):
     return f"{tipo_abrev}{str(siguiente_numero).zfill(6)}"
 
 
+def reservar_numeros_control(tipo_registro, cantidad):
+    """
+    Reserva `cantidad` números de control consecutivos con una sola
+    actualización de la secuencia (importaciones masivas).
+
+    Args:
+        tipo_registro: 'c' (impreso) o 'd' (manuscrito)
+        cantidad: Números a reservar
+
+    Returns:
+        list[str]: Números de control en orden
+    """
+    from django.apps import apps
+
+    NumeroControlSecuencia = apps.get_model("catalogacion", "NumeroControlSecuencia")
+
+    tipo_abrev = "M" if tipo_registro == "d" else "I"
+    if cantidad <= 0:
+        return []
+
+    with transaction.atomic():
+        secuencia, created = (
+            NumeroControlSecuencia.objects.select_for_update().get_or_create(
+                tipo_registro=tipo_registro, defaults={"ultimo_numero": 0}
+            )
+        )
+        primero = secuencia.ultimo_numero + 1
+        secuencia.ultimo_numero += cantidad
+        secuencia.save()
+
+    return [
+        f"{tipo_abrev}{str(numero).zfill(6)}"
+        for numero in range(primero, primero + cantidad)
+    ]
+
+
 def generar_codigo_informacion():
     """
     Genera el campo 008 (40 posiciones)
@@ -65,26 +101,68 @@ def actualizar_fecha_hora_transaccion():
     return now.strftime("%d%m%Y%H%M%S")
 
 
+def calcular_pais_principal(obra_id):
+    """
+    Consulta el país principal (primer 044 $a por id) directamente en la BD.
+
+    Args:
+        obra_id: ID de ObraGeneral
+
+    Returns:
+        str: Código del país en mayúsculas o 'EC' por defecto
+    """
+    from .bloque_0xx import CodigoPaisEntidad
+
+    codigo = (
+        CodigoPaisEntidad.objects.filter(obra_id=obra_id)
+        .order_by("id")
+        .values_list("codigo_pais", flat=True)
+        .first()
+    )
+    return (codigo or "EC").upper()
+
+
 def obtener_pais_principal(obra):
     """
     Obtiene el código del país principal de una obra.
 
+    Orden de resolución (sin consultas salvo el último caso):
+    1. Valor ya resuelto en esta instancia
+    2. codigos_pais_entidad precargado con prefetch_related
+    3. Columna almacenada ObraGeneral.pais_principal
+    4. Consulta a la BD (obras anteriores a la columna)
+
     Args:
         obra: Instancia de ObraGeneral
 
     Returns:
         str: Código del país en mayúsculas o 'EC' por defecto
     """
-    try:
-        paises = obra.codigos_pais_entidad.all()
-        #print(f"🔍 DEBUG: Países encontrados para obra {obra.num_control}: {[p.codigo_pais for p in paises]}")
-        primer_pais = obra.codigos_pais_entidad.order_by("id").first()
-        resultado = (primer_pais.codigo_pais if primer_pais else "EC").upper()
-        #print(f"🔍 DEBUG: País seleccionado: {resultado}")
-        return resultado
-    except Exception as e:
-        print(f"❌ ERROR en obtener_pais_principal: {e}")
-        return "EC"
+    pais = obra.__dict__.get("_pais_principal_cache")
+    if pais:
+        return pais
+
+    prefetch = getattr(obra, "_prefetched_objects_cache", {})
+    if "codigos_pais_entidad" in prefetch:
+        primer_pais = min(prefetch["codigos_pais_entidad"], key=lambda c: c.id, default=None)
+        pais = ((primer_pais.codigo_pais if primer_pais else "") or "EC").upper()
+    elif getattr(obra, "pais_principal", ""):
+        pais = obra.pais_principal
+    elif obra.pk:
+        pais = calcular_pais_principal(obra.pk)
+    else:
+        pais = "EC"
+
+    obra._pais_principal_cache = pais
+    return pais
+
+
+def formatear_signatura(centro_catalogador, tipo_registro, num_control, pais):
+    """
+    Arma la signatura en formato UNL-BLMP-EC-Ms-M000001.
+    """
+    ms_imp = "Ms" if tipo_registro == "d" else "Imp"
+    return f"{centro_catalogador}-BLMP-{pais}-{ms_imp}-{num_control}"
 
 
 def generar_signatura_completa(obra):
@@ -105,13 +183,12 @@ def generar_signatura_completa(obra):
     ):
         return "Pendiente de generar"
 
-    # Determinar Ms o Imp según tipo_registro
-    ms_imp = "Ms" if obra.tipo_registro == "d" else "Imp"
-
-    # Obtener país
-    pais = obtener_pais_principal(obra)
-
-    return f"{obra.centro_catalogador}-BLMP-{pais}-{ms_imp}-{obra.num_control}"
+    return formatear_signatura(
+        obra.centro_catalogador,
+        obra.tipo_registro,
+        obra.num_control,
+        obtener_pais_principal(obra),
+    )
 
 
 def signatura_para_archivo(obra):
@@ -127,10 +204,49 @@ def signatura_para_archivo(obra):
     if not all([obra.centro_catalogador, obra.num_control]):
         return None
 
-    ms_imp = "Ms" if obra.tipo_registro == "d" else "Imp"
-    pais = obtener_pais_principal(obra)
+    return formatear_signatura(
+        obra.centro_catalogador,
+        obra.tipo_registro,
+        obra.num_control,
+        obtener_pais_principal(obra),
+    )
+
+
+def actualizar_signatura_almacenada(obra_id):
+    """
+    Recalcula y guarda pais_principal y signatura de una obra con un UPDATE
+    (sin save(), para no disparar señales ni tocar fechas de modificación).
+
+    Args:
+        obra_id: ID de ObraGeneral
+
+    Returns:
+        tuple: (pais, signatura)
+    """
+    from .obra_general import ObraGeneral
+
+    datos = (
+        ObraGeneral.objects.filter(pk=obra_id)
+        .values("centro_catalogador", "tipo_registro", "num_control")
+        .first()
+    )
+    if datos is None:
+        return None, ""
+
+    pais = calcular_pais_principal(obra_id)
+    signatura = ""
+    if datos["centro_catalogador"] and datos["num_control"]:
+        signatura = formatear_signatura(
+            datos["centro_catalogador"],
+            datos["tipo_registro"],
+            datos["num_control"],
+            pais,
+        )
 
-    return f"{obra.centro_catalogador}-BLMP-{pais}-{ms_imp}-{obra.num_control}"
+    ObraGeneral.objects.filter(pk=obra_id).update(
+        pais_principal=pais, signatura=signatura
+    )
+    return pais, signatura
 
 
 def validar_obra_coleccion(obra):
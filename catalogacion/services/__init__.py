@@ -0,0 +1 @@
+# Servicios de catalogación
@@ -0,0 +1,355 @@
+"""
+Servicio de búsqueda de texto completo del catálogo.
+
+Motor según el backend de la base de datos:
+- "fts5": SQLite con tabla virtual FTS5 (ranking bm25)
+- "postgresql": columna tsvector + GIN (ranking ts_rank_cd)
+- "basico": icontains sobre IndiceBusquedaObra (sin ranking) si no hay motor
+
+Todos los textos (documento y consulta) se normalizan a minúsculas sin tildes,
+por lo que "canción" y "cancion" encuentran lo mismo. Cada término de la
+consulta se busca por prefijo y todos deben aparecer (AND).
+
+Uso:
+    qs = filtrar_por_busqueda(ObraGeneral.objects.all(), "pasillo quito")
+"""
+
+import logging
+import re
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, When
+
+from catalogacion.services.transacciones import programar_una_vez
+
+logger = logging.getLogger("catalogacion")
+
+TABLA_FTS = "catalogacion_indicebusquedaobra_fts"
+
+# Máximo de resultados rankeados que se devuelven a las vistas
+MAX_RESULTADOS = 1000
+# Máximo de términos considerados de una consulta
+MAX_TERMINOS = 10
+# Obras por lote al reconstruir el índice completo
+TAMANO_LOTE_INDICE = 500
+
+# Pesos bm25 por columna (titulos, autores, materias, contenido, signaturas)
+PESOS_FTS5 = (10.0, 8.0, 4.0, 1.0, 8.0)
+
+_motor = None
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin diacríticos (á→a, ñ→n, ü→u)."""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_tildes.lower()
+
+
+def terminos_busqueda(consulta):
+    """Términos alfanuméricos normalizados de una consulta."""
+    return re.findall(r"[0-9a-z]+", normalizar_texto(consulta))[:MAX_TERMINOS]
+
+
+def motor_busqueda():
+    """Motor disponible para la conexión actual (se calcula una vez)."""
+    global _motor
+    if _motor is None:
+        if connection.vendor == "postgresql":
+            _motor = "postgresql"
+        elif connection.vendor == "sqlite" and TABLA_FTS in connection.introspection.table_names():
+            _motor = "fts5"
+        else:
+            _motor = "basico"
+    return _motor
+
+
+# ===========================================
+# CONSTRUCCIÓN DEL ÍNDICE
+# ===========================================
+
+def _unir(*valores):
+    return normalizar_texto(" ".join(str(v) for v in valores if v))
+
+
+def construir_documento(obra):
+    """
+    Arma los campos de IndiceBusquedaObra para una obra.
+
+    Returns:
+        dict: titulos, autores, materias, contenido, signaturas
+    """
+    titulos = [obra.titulo_principal, obra.subtitulo]
+    for alternativo in obra.titulos_alternativos.all():
+        titulos += [alternativo.titulo, alternativo.subtitulo]
+    for autoridad in (obra.titulo_uniforme, obra.titulo_240):
+        if autoridad:
+            titulos.append(autoridad.titulo)
+    for forma in (obra.forma_130, obra.forma_240):
+        if forma:
+            titulos.append(forma.forma)
+
+    autores = [obra.compositor.apellidos_nombres if obra.compositor else ""]
+    for nombre in obra.nombres_relacionados_700.all():
+        if nombre.persona:
+            autores.append(nombre.persona.apellidos_nombres)
+    for entidad in obra.entidades_relacionadas_710.all():
+        if entidad.entidad:
+            autores.append(entidad.entidad.nombre)
+
+    materias = [m.materia.termino for m in obra.materias_650.all() if m.materia]
+    materias += [m.materia.forma for m in obra.materias_655.all() if m.materia]
+
+    contenido = [c.contenido for c in obra.contenidos_505.all()]
+    contenido += [s.sumario for s in obra.sumarios_520.all()]
+
+    num_control = obra.num_control or ""
+    signaturas = [
+        num_control,
+        re.sub(r"\D", "", num_control),  # "M000012" también por "000012"
+        obra.centro_catalogador,
+        obra.signatura,
+    ]
+    signaturas += [u.signatura_original for u in obra.ubicaciones_852.all()]
+
+    return {
+        "titulos": _unir(*titulos),
+        "autores": _unir(*autores),
+        "materias": _unir(*materias),
+        "contenido": _unir(*contenido),
+        "signaturas": _unir(*signaturas),
+    }
+
+
+def _obras_indexables():
+    from catalogacion.models import ObraGeneral
+
+    return (
+        ObraGeneral.objects.select_related(
+            "compositor", "titulo_uniforme", "titulo_240", "forma_130", "forma_240"
+        )
+        .prefetch_related(
+            "titulos_alternativos",
+            "nombres_relacionados_700__persona",
+            "entidades_relacionadas_710__entidad",
+            "materias_650__materia",
+            "materias_655__materia",
+            "contenidos_505",
+            "sumarios_520",
+            "ubicaciones_852",
+        )
+    )
+
+
+def _obtener_obra(obra_id):
+    return _obras_indexables().filter(pk=obra_id).first()
+
+
+def actualizar_indice_obra(obra_id):
+    """
+    Recalcula el documento de búsqueda de una obra (o lo elimina si ya no existe).
+    Los triggers FTS5 / la columna generada tsvector se actualizan solos.
+    """
+    from catalogacion.models import IndiceBusquedaObra
+
+    obra = _obtener_obra(obra_id)
+    if obra is None:
+        IndiceBusquedaObra.objects.filter(obra_id=obra_id).delete()
+        return None
+
+    indice, _ = IndiceBusquedaObra.objects.update_or_create(
+        obra=obra, defaults=construir_documento(obra)
+    )
+    return indice
+
+
+def indexar_obras(obra_ids):
+    """
+    Reindexa varias obras de una vez (importaciones masivas): una consulta por
+    relación precargada y un solo bulk_create, en lugar de una actualización
+    por obra.
+
+    Returns:
+        int: Número de obras indexadas
+    """
+    from catalogacion.models import IndiceBusquedaObra
+
+    obra_ids = list(obra_ids)
+    indices = [
+        IndiceBusquedaObra(obra=obra, **construir_documento(obra))
+        for obra in _obras_indexables().filter(pk__in=obra_ids)
+    ]
+    IndiceBusquedaObra.objects.filter(obra_id__in=obra_ids).delete()
+    IndiceBusquedaObra.objects.bulk_create(indices)
+    return len(indices)
+
+
+def programar_actualizacion_indice(obra_id):
+    """
+    Programa la reindexación de la obra al confirmar la transacción
+    (una sola vez por obra aunque se guarden muchos formsets).
+    """
+    if not obra_id:
+        return
+
+    def _ejecutar():
+        try:
+            actualizar_indice_obra(obra_id)
+        except Exception as e:
+            logger.error(f"Error actualizando índice de búsqueda de obra {obra_id}: {e}")
+
+    programar_una_vez(("indice", obra_id), _ejecutar)
+
+
+def programar_actualizacion_indices(obra_ids):
+    for obra_id in set(obra_ids):
+        programar_actualizacion_indice(obra_id)
+
+
+def reconstruir_indice():
+    """
+    Reindexa todas las obras por lotes de TAMANO_LOTE_INDICE con indexar_obras.
+
+    Returns:
+        int: Número de obras indexadas
+    """
+    from catalogacion.models import ObraGeneral
+
+    obra_ids = list(ObraGeneral.objects.order_by("id").values_list("id", flat=True))
+    total = 0
+    for inicio in range(0, len(obra_ids), TAMANO_LOTE_INDICE):
+        with transaction.atomic():
+            total += indexar_obras(obra_ids[inicio : inicio + TAMANO_LOTE_INDICE])
+    return total
+
+
+# ===========================================
+# CONSULTA
+# ===========================================
+
+def buscar_ids(consulta, limite=MAX_RESULTADOS):
+    """
+    IDs de obras que coinciden con la consulta, ordenados por relevancia.
+    Solo los `limite` primeros (ver busqueda_truncada).
+
+    Returns:
+        list[int] | None: None si el motor no rankea (búsqueda básica)
+    """
+    terminos = terminos_busqueda(consulta)
+    if not terminos:
+        return []
+
+    motor = motor_busqueda()
+    if motor == "fts5":
+        pesos = ", ".join(str(p) for p in PESOS_FTS5)
+        sql = (
+            f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s "
+            f"ORDER BY bm25({TABLA_FTS}, {pesos}) LIMIT %s"
+        )
+        params = [_expresion_fts5(terminos), limite]
+    elif motor == "postgresql":
+        tsquery, params_tsquery = _tsquery_postgresql(terminos)
+        sql = (
+            "SELECT obra_id FROM catalogacion_indicebusquedaobra "
+            f"WHERE vector @@ {tsquery} "
+            f"ORDER BY ts_rank_cd(vector, {tsquery}) DESC LIMIT %s"
+        )
+        params = [*params_tsquery, *params_tsquery, limite]
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def _expresion_fts5(terminos):
+    """Consulta FTS5: todos los términos, cada uno por prefijo."""
+    return " AND ".join(f'"{t}"*' for t in terminos)
+
+
+def _tsquery_postgresql(terminos):
+    """
+    tsquery de PostgreSQL (SQL y parámetros): todos los términos, cada uno por
+    prefijo. La columna signaturas se indexa con la configuración 'simple' y
+    el resto con 'spanish', así que cada término se busca en ambas (OR).
+
+    Returns:
+        tuple[str, list]: Expresión SQL y sus parámetros
+    """
+    por_termino = "(to_tsquery('simple', %s) || to_tsquery('spanish', %s))"
+    sql = " && ".join([por_termino] * len(terminos))
+    params = [f"{t}:*" for t in terminos for _ in range(2)]
+    return f"({sql})", params
+
+
+def busqueda_truncada(consulta, limite=MAX_RESULTADOS):
+    """
+    True si la consulta tiene más coincidencias que las `limite` más
+    relevantes que devuelve buscar_ids: el resto no llega a las vistas, que
+    deben avisarlo. Solo comprueba si existe la coincidencia `limite` + 1
+    (sin ordenar por relevancia ni contarlas todas).
+    """
+    terminos = terminos_busqueda(consulta)
+    motor = motor_busqueda()
+    if not terminos or motor == "basico":
+        return False
+
+    if motor == "fts5":
+        sql = f"SELECT 1 FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s LIMIT 1 OFFSET %s"
+        params = [_expresion_fts5(terminos), limite]
+    else:
+        tsquery, params_tsquery = _tsquery_postgresql(terminos)
+        sql = (
+            "SELECT 1 FROM catalogacion_indicebusquedaobra "
+            f"WHERE vector @@ {tsquery} LIMIT 1 OFFSET %s"
+        )
+        params = [*params_tsquery, limite]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone() is not None
+
+
+def _filtro_basico(consulta, campo):
+    """Q con icontains por término sobre el índice (motor "basico")."""
+    prefijo = "indice_busqueda" if campo == "pk" else f"{campo.removesuffix('_id')}__indice_busqueda"
+    filtro = Q()
+    for termino in terminos_busqueda(consulta):
+        por_termino = Q()
+        for columna in ("titulos", "autores", "materias", "contenido", "signaturas"):
+            por_termino |= Q(**{f"{prefijo}__{columna}__icontains": termino})
+        filtro &= por_termino
+    return filtro
+
+
+def filtrar_por_busqueda(queryset, consulta, campo="pk"):
+    """
+    Filtra un queryset por la consulta y lo ordena por relevancia.
+
+    Args:
+        queryset: QuerySet de ObraGeneral o de un modelo con FK a la obra
+        consulta: Texto ingresado por el usuario
+        campo: Campo que contiene el id de la obra ("pk", "obra_id"...)
+
+    Returns:
+        QuerySet filtrado (ordenado por relevancia cuando el motor lo permite)
+    """
+    if not (consulta or "").strip():
+        return queryset
+    if not terminos_busqueda(consulta):
+        return queryset.none()
+
+    ids = buscar_ids(consulta)
+    if ids is None:
+        return queryset.filter(_filtro_basico(consulta, campo))
+    if not ids:
+        return queryset.none()
+
+    relevancia = Case(
+        *[When(**{campo: obra_id}, then=posicion) for posicion, obra_id in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(**{f"{campo}__in": ids}).order_by(relevancia)
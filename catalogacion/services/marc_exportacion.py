@@ -0,0 +1,191 @@
+"""
+Exportación masiva del catálogo en MARC21, en streaming.
+
+Las obras se recorren por lotes (iterator(chunk_size) + queryset_marc, que
+precarga las relaciones de cada lote en un número fijo de consultas) y cada
+registro se serializa y se entrega apenas se construye, de modo que la
+memoria no crece con el tamaño del catálogo. La salida puede comprimirse en
+gzip sobre la marcha.
+
+    marcxml   <collection> MARCXML
+    mrc       MARC21 binario ISO 2709
+    jsonl     MARC-in-JSON, un registro por línea
+    mrk       Mnemónico (MarcEdit), registros separados por línea en blanco
+
+Uso:
+    qs = obras_exportables(desde=fecha, id_desde=1, id_hasta=5000)
+    for trozo in iter_exportacion(qs, "mrc", comprimir=True):
+        archivo.write(trozo)
+    python manage.py exportar_marc --formato=mrc --gzip --salida=catalogo.mrc.gz
+"""
+
+import json
+import os
+import zlib
+from datetime import datetime, time
+from pathlib import Path
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from catalogacion.services.marc_registro import construir_registro, queryset_marc
+from catalogacion.services.marc_serializacion import (
+    a_marc_json,
+    a_mnemonico,
+    coleccion_marcxml,
+    iter_iso2709,
+)
+
+# Obras por lote: cada lote son ~25 consultas (una por relación precargada)
+TAMANO_LOTE = 500
+
+
+def _marcxml(registros):
+    for texto in coleccion_marcxml(registros):
+        yield texto.encode("utf-8")
+
+
+def _jsonl(registros):
+    for registro in registros:
+        yield (json.dumps(a_marc_json(registro), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _mrk(registros):
+    for registro in registros:
+        yield (a_mnemonico(registro) + "\n\n").encode("utf-8")
+
+
+# formato: (extensión, content type, serializador de registros a bytes)
+FORMATOS = {
+    "marcxml": ("xml", "application/marcxml+xml", _marcxml),
+    "mrc": ("mrc", "application/marc", iter_iso2709),
+    "jsonl": ("jsonl", "application/x-ndjson", _jsonl),
+    "mrk": ("mrk", "text/plain; charset=utf-8", _mrk),
+}
+
+
+def interpretar_fecha(valor: str):
+    """
+    Fecha de --since / ?since= (AAAA-MM-DD o ISO 8601) como datetime con
+    zona horaria; None si no se puede interpretar.
+    """
+    fecha = parse_datetime(valor)
+    if fecha is None:
+        dia = parse_date(valor)
+        if dia is None:
+            return None
+        fecha = datetime.combine(dia, time.min)
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+def obras_exportables(
+    desde=None,
+    id_desde: int | None = None,
+    id_hasta: int | None = None,
+    solo_publicadas: bool = True,
+):
+    """
+    Obras a exportar, ordenadas por id.
+
+    Args:
+        desde: Solo las modificadas a partir de esta fecha/hora
+            (fecha_modificacion_sistema), para exportaciones incrementales
+        id_desde, id_hasta: Rango de ids, ambos inclusive (fragmentos)
+        solo_publicadas: Excluir las no publicadas
+    """
+    from catalogacion.models import ObraGeneral
+
+    qs = ObraGeneral.objects.activos()
+    if solo_publicadas:
+        qs = qs.filter(publicada=True)
+    if desde is not None:
+        qs = qs.filter(fecha_modificacion_sistema__gte=desde)
+    if id_desde is not None:
+        qs = qs.filter(pk__gte=id_desde)
+    if id_hasta is not None:
+        qs = qs.filter(pk__lte=id_hasta)
+    return qs.order_by("pk")
+
+
+def rango_fragmento(queryset, fragmento: int, total: int) -> tuple[int, int] | None:
+    """
+    Rango de ids (inclusive) del fragmento `fragmento` (1..total) al partir
+    el rango de ids del queryset en `total` tramos iguales, para repartir
+    una exportación entre procesos.
+
+    Returns:
+        tuple | None: (id_desde, id_hasta), o None si el queryset está vacío
+    """
+    from django.db.models import Max, Min
+
+    if not 1 <= fragmento <= total:
+        raise ValueError(f"Fragmento {fragmento} fuera de 1..{total}")
+    limites = queryset.aggregate(minimo=Min("pk"), maximo=Max("pk"))
+    if limites["minimo"] is None:
+        return None
+    minimo, maximo = limites["minimo"], limites["maximo"]
+    ancho = (maximo - minimo + total) // total
+    id_desde = minimo + (fragmento - 1) * ancho
+    return id_desde, min(id_desde + ancho - 1, maximo)
+
+
+def iter_registros(queryset, tamano_lote: int = TAMANO_LOTE):
+    """Registros MARC de las obras del queryset, cargadas por lotes."""
+    for obra in queryset_marc(queryset).iterator(chunk_size=tamano_lote):
+        yield construir_registro(obra)
+
+
+def _gzip(trozos, nivel: int = 6):
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # 31: cabecera gzip
+    for trozo in trozos:
+        comprimido = compresor.compress(trozo)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def iter_exportacion(
+    queryset,
+    formato: str,
+    comprimir: bool = False,
+    tamano_lote: int = TAMANO_LOTE,
+):
+    """
+    Exportación completa del queryset en bytes, por partes.
+
+    Yields:
+        bytes: Trozos de la salida (comprimidos si `comprimir`)
+    """
+    serializador = FORMATOS[formato][2]
+    trozos = serializador(iter_registros(queryset, tamano_lote))
+    return _gzip(trozos) if comprimir else trozos
+
+
+def exportar_a_archivo(
+    ruta,
+    queryset,
+    formato: str,
+    comprimir: bool = False,
+    tamano_lote: int = TAMANO_LOTE,
+) -> int:
+    """
+    Escribe la exportación en `ruta` (primero en un temporal al lado, para
+    que quien lea el archivo nunca vea uno a medio escribir).
+
+    Returns:
+        int: Bytes escritos
+    """
+    ruta = Path(ruta)
+    temporal = ruta.with_name(f".{ruta.name}.{os.getpid()}.tmp")
+    escritos = 0
+    try:
+        with open(temporal, "wb") as f:
+            for trozo in iter_exportacion(queryset, formato, comprimir, tamano_lote):
+                f.write(trozo)
+                escritos += len(trozo)
+        os.replace(temporal, ruta)
+    finally:
+        temporal.unlink(missing_ok=True)
+    return escritos
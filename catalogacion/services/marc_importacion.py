@@ -0,0 +1,974 @@
+"""
+Importación masiva de registros MARC21 (ISO 2709 o MARCXML).
+
+Cada registro se traduce a un árbol de filas (ObraGeneral y sus registros de
+los bloques 0XX-8XX) sin tocar la base de datos; luego, por lotes y dentro de
+una transacción por lote:
+
+- las autoridades se resuelven contra mapas en memoria (valor -> id) y las
+  que faltan se crean con un bulk_create por modelo;
+- los números de control se reservan con una sola actualización de
+  NumeroControlSecuencia por tipo de registro;
+- las filas se escriben con un bulk_create por modelo y nivel.
+
+bulk_create no llama a save() ni dispara señales: los campos que calcula
+ObraGeneral.save() se preparan aquí y las obras se importan sin publicar
+(el índice de búsqueda se actualiza por lote con indexar_obras).
+
+Los $w de 773/774/787 se resuelven primero contra el 001 de los registros
+del mismo archivo y, si no hay ninguno, contra los números de control
+existentes; los que no apuntan a un registro ya escrito se enlazan al terminar.
+
+Uso:
+    resultado = importar_marc(archivo, formato="mrc", simular=True)
+    python manage.py importar_marc catalogo_antiguo.mrc --dry-run
+"""
+
+import logging
+import re
+import unicodedata
+from collections import ChainMap, Counter, defaultdict
+
+from django.db import transaction
+
+from catalogacion.services.marc_serializacion import (
+    iter_bytes_iso2709,
+    iter_leer_marcxml,
+    leer_iso2709,
+)
+
+logger = logging.getLogger("catalogacion")
+
+TAMANO_LOTE = 200
+
+# Puntuación ISBD final que el sistema no guarda ("Quito :", "Título /")
+_PUNTUACION_FINAL = " /:;=,"
+
+# "Apellidos, Nombres (1900-1980)": nombre y fechas de una persona en 773/774/787 $a
+_NOMBRE_CON_FECHAS = re.compile(r"^(.*?)\s*\(([^()]*)\)$")
+
+# Campos que se derivan al guardar la obra o que el sistema no almacena
+ETIQUETAS_DERIVADAS = {"001", "003", "005", "008", "040", "092"}
+
+
+class ErrorMapeo(ValueError):
+    """El registro no puede importarse (falta un dato obligatorio o no cabe)."""
+
+
+class ResultadoImportacion:
+    """Resumen de una importación (o de una simulación con dry-run)."""
+
+    def __init__(self):
+        self.leidos = 0
+        self.importados = 0
+        self.errores = []  # (posición, 001, mensaje): registros omitidos
+        self.avisos = []  # (posición, 001, mensaje): registros importados con pérdidas
+        self.etiquetas_ignoradas = Counter()
+        self.autoridades_nuevas = Counter()
+        self.enlaces_sin_resolver = []  # (posición, 001, $w)
+
+    @property
+    def omitidos(self):
+        return len(self.errores)
+
+
+class RefAutoridad:
+    """Referencia a una autoridad por su valor; se resuelve a id por lote."""
+
+    __slots__ = ("modelo", "valor", "extras")
+
+    def __init__(self, modelo, valor, extras=None):
+        self.modelo = modelo
+        self.valor = valor
+        self.extras = extras or {}
+
+
+class RefObra:
+    """$w de un enlace: número de control (001) de la obra relacionada."""
+
+    __slots__ = ("control",)
+
+    def __init__(self, control):
+        self.control = control
+
+
+class Nodo:
+    """Fila a crear: modelo, valores y filas hijas (nombre de la FK, Nodo)."""
+
+    __slots__ = ("modelo", "campos", "hijos", "instancia")
+
+    def __init__(self, modelo, **campos):
+        self.modelo = modelo
+        self.campos = campos
+        self.hijos = []
+        self.instancia = None
+
+    def hijo(self, fk, modelo, **campos):
+        nodo = Nodo(modelo, **campos)
+        self.hijos.append((fk, nodo))
+        return nodo
+
+
+class ObraImportada:
+    """Resultado de mapear un registro: la obra como árbol de Nodos."""
+
+    __slots__ = ("posicion", "control", "nodo", "avisos")
+
+    def __init__(self, posicion, control, nodo, avisos):
+        self.posicion = posicion
+        self.control = control
+        self.nodo = nodo
+        self.avisos = avisos
+
+
+# ===========================================
+# LECTURA
+# ===========================================
+
+def detectar_formato(nombre: str, inicio: bytes) -> str:
+    """'marcxml' o 'mrc' según la extensión o el primer byte del archivo."""
+    if nombre.lower().endswith((".xml", ".marcxml")):
+        return "marcxml"
+    if nombre.lower().endswith((".mrc", ".iso", ".marc")):
+        return "mrc"
+    return "marcxml" if inicio.lstrip()[:1] == b"<" else "mrc"
+
+
+def iter_registros_archivo(origen, formato: str):
+    """
+    Registros de un archivo binario abierto.
+
+    Yields:
+        tuple: (Registro, None) o (None, mensaje) si el registro no se pudo leer
+    """
+    if formato == "marcxml":
+        for registro in iter_leer_marcxml(origen):
+            yield registro, None
+        return
+    for datos in iter_bytes_iso2709(origen):
+        try:
+            yield leer_iso2709(datos), None
+        except ValueError as e:
+            yield None, f"Registro ISO 2709 ilegible: {e}"
+
+
+# ===========================================
+# MAPEO REGISTRO -> FILAS
+# ===========================================
+
+def _normalizar(valor: str) -> str:
+    valor = unicodedata.normalize("NFKD", valor.casefold().strip().rstrip(_PUNTUACION_FINAL + "."))
+    return "".join(c for c in valor if not unicodedata.combining(c))
+
+
+class _Mapeador:
+    """Traduce un Registro a Nodos; acumula avisos del registro."""
+
+    _opciones = {}
+
+    def __init__(self, centro_por_defecto):
+        from django.apps import apps
+
+        self.modelos = apps.get_app_config("catalogacion")
+        self.centro_por_defecto = centro_por_defecto
+        self.avisos = []
+
+    def m(self, nombre):
+        return self.modelos.get_model(nombre)
+
+    # --- valores ---
+
+    @staticmethod
+    def sub(campo, codigo):
+        return next((v.strip() for c, v in campo.subcampos if c == codigo and v.strip()), "")
+
+    @staticmethod
+    def subs(campo, codigo):
+        return [v.strip() for c, v in campo.subcampos if c == codigo and v.strip()]
+
+    @staticmethod
+    def limpio(valor):
+        return valor.rstrip(_PUNTUACION_FINAL).strip()
+
+    def opcion(self, modelo, campo, valor, tag):
+        """Código de una opción a partir del código o de su etiqueta."""
+        if not valor:
+            return None
+        clave = (modelo, campo)
+        if clave not in self._opciones:
+            opciones = {}
+            for codigo, etiqueta in modelo._meta.get_field(campo).choices:
+                opciones[_normalizar(str(codigo))] = codigo
+                opciones.setdefault(_normalizar(str(etiqueta)), codigo)
+            self._opciones[clave] = opciones
+        codigo = self._opciones[clave].get(_normalizar(valor))
+        if codigo is None:
+            self.avisos.append(f"{tag}: valor no reconocido para {campo}: {valor!r}")
+        return codigo
+
+    def entero(self, valor, tag, campo):
+        if not valor:
+            return None
+        if valor.isdigit():
+            return int(valor)
+        self.avisos.append(f"{tag}: {campo} no es un número: {valor!r}")
+        return None
+
+    # --- registro ---
+
+    def mapear(self, registro):
+        ObraGeneral = self.m("ObraGeneral")
+        leader = registro.leader.ljust(24)
+        tipo = leader[6]
+        if tipo not in ("c", "d"):
+            raise ErrorMapeo(f"Líder/06 '{tipo}' no es música notada (c o d)")
+        nivel = leader[7]
+        if nivel not in ("a", "c", "m"):
+            self.avisos.append(f"Líder/07 '{nivel}' no admitido: se importa como 'm'")
+            nivel = "m"
+
+        por_tag = defaultdict(list)
+        for campo in registro.campos:
+            por_tag[campo.tag].append(campo)
+        primero = {tag: campos[0] for tag, campos in por_tag.items()}
+
+        control = next((c.dato for c in por_tag.get("001", [])), "") or ""
+        centro = (
+            next((c.dato for c in por_tag.get("003", []) if c.dato), "")
+            or (self.sub(primero["040"], "a") if "040" in primero else "")
+            or self.centro_por_defecto
+        )
+        codigo_008 = next((c.dato for c in por_tag.get("008", [])), "")
+
+        obra = Nodo(
+            ObraGeneral,
+            tipo_registro=tipo,
+            nivel_bibliografico=nivel,
+            centro_catalogador=centro.strip(),
+            codigo_informacion=codigo_008 if len(codigo_008) == 40 else "",
+            # Sin valor en el registro no se aplican los defaults del modelo
+            autoria=None,
+            medio_interpretacion_130=None,
+            arreglo_130=None,
+            medio_interpretacion_240=None,
+            arreglo_240=None,
+            tipo_numero_028=None,
+            control_nota_028=None,
+        )
+        c = obra.campos
+
+        for tag, campos in por_tag.items():
+            metodo = getattr(self, f"t{tag}", None)
+            if metodo is None:
+                continue
+            for campo in campos:
+                metodo(obra, campo)
+
+        if not c.get("titulo_principal"):
+            raise ErrorMapeo("Falta el título principal (245 $a)")
+
+        ignoradas = [
+            tag
+            for tag in por_tag
+            if tag not in ETIQUETAS_DERIVADAS and not hasattr(self, f"t{tag}")
+        ]
+        return obra, control.strip(), ignoradas
+
+    # --- 0XX ---
+
+    def t020(self, obra, campo):
+        obra.campos["isbn"] = self.sub(campo, "a")
+
+    def t024(self, obra, campo):
+        obra.campos["ismn"] = self.sub(campo, "a")
+
+    def t028(self, obra, campo):
+        ObraGeneral = obra.modelo
+        obra.campos["numero_editor"] = self.sub(campo, "a")
+        if campo.ind1.strip():
+            obra.campos["tipo_numero_028"] = self.opcion(ObraGeneral, "tipo_numero_028", campo.ind1, "028")
+        if campo.ind2.strip():
+            obra.campos["control_nota_028"] = self.opcion(ObraGeneral, "control_nota_028", campo.ind2, "028")
+
+    def t031(self, obra, campo):
+        incipit = obra.hijo(
+            "obra",
+            self.m("IncipitMusical"),
+            numero_obra=self.entero(self.sub(campo, "a"), "031", "$a"),
+            numero_movimiento=self.entero(self.sub(campo, "b"), "031", "$b"),
+            numero_pasaje=self.entero(self.sub(campo, "c"), "031", "$c"),
+            titulo_encabezamiento=self.sub(campo, "d"),
+            personaje=self.sub(campo, "e"),
+            clave=self.sub(campo, "g"),
+            voz_instrumento=self.sub(campo, "m"),
+            armadura=self.sub(campo, "n"),
+            tiempo=self.sub(campo, "o"),
+            notacion_musical=self.sub(campo, "p"),
+        )
+        for url in self.subs(campo, "u"):
+            incipit.hijo("incipit", self.m("IncipitURL"), url=url)
+
+    def t041(self, obra, campo):
+        CodigoLengua = self.m("CodigoLengua")
+        codigo = obra.hijo(
+            "obra",
+            CodigoLengua,
+            indicacion_traduccion=self.opcion(
+                CodigoLengua, "indicacion_traduccion", campo.ind1.strip() or "#", "041"
+            ),
+            fuente_codigo=self.opcion(CodigoLengua, "fuente_codigo", campo.ind2.strip() or "#", "041"),
+        )
+        IdiomaObra = self.m("IdiomaObra")
+        for idioma in self.subs(campo, "a"):
+            valor = self.opcion(IdiomaObra, "codigo_idioma", idioma, "041")
+            if valor:
+                codigo.hijo("codigo_lengua", IdiomaObra, codigo_idioma=valor)
+
+    def t044(self, obra, campo):
+        CodigoPaisEntidad = self.m("CodigoPaisEntidad")
+        for pais in self.subs(campo, "a"):
+            valor = self.opcion(CodigoPaisEntidad, "codigo_pais", pais, "044")
+            if valor:
+                obra.hijo("obra", CodigoPaisEntidad, codigo_pais=valor)
+
+    # --- 1XX / 2XX ---
+
+    def _persona(self, campo):
+        nombre = self.limpio(self.sub(campo, "a"))
+        if not nombre:
+            return None
+        return RefAutoridad(
+            self.m("AutoridadPersona"),
+            nombre,
+            {"coordenadas_biograficas": self.limpio(self.sub(campo, "d")) or None},
+        )
+
+    def _persona_encabezamiento(self, valor):
+        """$a de 773/774/787: "Apellidos, Nombres (fechas)" como se exporta."""
+        nombre, fechas = self.limpio(valor), None
+        coincidencia = _NOMBRE_CON_FECHAS.match(nombre)
+        if coincidencia:
+            nombre, fechas = coincidencia.groups()
+        if not nombre:
+            return None
+        return RefAutoridad(
+            self.m("AutoridadPersona"), nombre, {"coordenadas_biograficas": fechas}
+        )
+
+    def t100(self, obra, campo):
+        ObraGeneral = obra.modelo
+        obra.campos["compositor"] = self._persona(campo)
+        obra.campos["termino_asociado"] = self.limpio(self.sub(campo, "c"))
+        obra.campos["autoria"] = self.opcion(ObraGeneral, "autoria", self.sub(campo, "j"), "100")
+        FuncionCompositor = self.m("FuncionCompositor")
+        for funcion in self.subs(campo, "e"):
+            valor = self.opcion(FuncionCompositor, "funcion", funcion, "100")
+            if valor:
+                obra.hijo("obra", FuncionCompositor, funcion=valor)
+
+    def _titulo_uniforme(self, obra, campo, sufijo, campo_titulo):
+        ObraGeneral = obra.modelo
+        titulo = self.limpio(self.sub(campo, "a"))
+        if titulo:
+            obra.campos[campo_titulo] = RefAutoridad(self.m("AutoridadTituloUniforme"), titulo)
+        forma = self.limpio(self.sub(campo, "k"))
+        if forma:
+            obra.campos[f"forma_{sufijo}"] = RefAutoridad(self.m("AutoridadFormaMusical"), forma)
+        obra.campos[f"medio_interpretacion_{sufijo}"] = self.opcion(
+            ObraGeneral, f"medio_interpretacion_{sufijo}", self.sub(campo, "m"), sufijo
+        )
+        obra.campos[f"numero_parte_{sufijo}"] = self.sub(campo, "n")
+        obra.campos[f"arreglo_{sufijo}"] = self.opcion(
+            ObraGeneral, f"arreglo_{sufijo}", self.sub(campo, "o"), sufijo
+        )
+        obra.campos[f"nombre_parte_{sufijo}"] = self.sub(campo, "p")
+        obra.campos[f"tonalidad_{sufijo}"] = self.opcion(
+            ObraGeneral, f"tonalidad_{sufijo}", self.sub(campo, "r"), sufijo
+        )
+
+    def t130(self, obra, campo):
+        self._titulo_uniforme(obra, campo, "130", "titulo_uniforme")
+
+    def t240(self, obra, campo):
+        self._titulo_uniforme(obra, campo, "240", "titulo_240")
+
+    def t245(self, obra, campo):
+        obra.campos["titulo_principal"] = self.limpio(self.sub(campo, "a"))
+        obra.campos["subtitulo"] = self.limpio(self.sub(campo, "b"))
+        obra.campos["mencion_responsabilidad"] = self.limpio(self.sub(campo, "c"))
+
+    def t246(self, obra, campo):
+        titulo = self.limpio(self.sub(campo, "a"))
+        if titulo:
+            obra.hijo(
+                "obra",
+                self.m("TituloAlternativo"),
+                titulo=titulo,
+                subtitulo=self.limpio(self.sub(campo, "b")),
+                texto_visualizacion=self.limpio(self.sub(campo, "i")),
+            )
+
+    def t250(self, obra, campo):
+        edicion = self.limpio(self.sub(campo, "a"))
+        if edicion:
+            obra.hijo("obra", self.m("Edicion"), edicion=edicion)
+
+    def t264(self, obra, campo):
+        ProduccionPublicacion = self.m("ProduccionPublicacion")
+        prod = obra.hijo(
+            "obra",
+            ProduccionPublicacion,
+            funcion=self.opcion(ProduccionPublicacion, "funcion", campo.ind2.strip(), "264"),
+        )
+        for lugar in self.subs(campo, "a"):
+            prod.hijo("produccion_publicacion", self.m("Lugar264"), lugar=self.limpio(lugar))
+        for nombre in self.subs(campo, "b"):
+            prod.hijo("produccion_publicacion", self.m("NombreEntidad264"), nombre=self.limpio(nombre))
+        for fecha in self.subs(campo, "c"):
+            prod.hijo("produccion_publicacion", self.m("Fecha264"), fecha=self.limpio(fecha))
+
+    # --- 3XX / 4XX ---
+
+    def t300(self, obra, campo):
+        obra.campos["extension"] = self.limpio(self.sub(campo, "a"))
+        obra.campos["otras_caracteristicas"] = self.limpio(self.sub(campo, "b"))
+        obra.campos["dimension"] = self.limpio(self.sub(campo, "c"))
+        obra.campos["material_acompanante"] = self.limpio(self.sub(campo, "e"))
+
+    def t340(self, obra, campo):
+        obra.campos["ms_imp"] = self.opcion(obra.modelo, "ms_imp", self.sub(campo, "d"), "340")
+
+    def t348(self, obra, campo):
+        obra.campos["formato"] = self.opcion(obra.modelo, "formato", self.sub(campo, "a"), "348")
+
+    def t382(self, obra, campo):
+        medio382 = obra.hijo(
+            "obra", self.m("MedioInterpretacion382"), solista=self.sub(campo, "b")
+        )
+        Medio = self.m("MedioInterpretacion382_a")
+        for medio in self.subs(campo, "a"):
+            valor = self.opcion(Medio, "medio", medio, "382")
+            if valor:
+                medio382.hijo("medio_interpretacion", Medio, medio=valor)
+
+    def t383(self, obra, campo):
+        obra.campos["numero_obra"] = self.sub(campo, "a")
+        obra.campos["opus"] = self.sub(campo, "b")
+
+    def t384(self, obra, campo):
+        obra.campos["tonalidad_384"] = self.opcion(
+            obra.modelo, "tonalidad_384", self.sub(campo, "a"), "384"
+        )
+
+    def t490(self, obra, campo):
+        serie = obra.hijo("obra", self.m("MencionSerie490"))
+        for titulo in self.subs(campo, "a"):
+            serie.hijo("mencion_serie", self.m("TituloSerie490"), titulo_serie=self.limpio(titulo))
+        for volumen in self.subs(campo, "v"):
+            serie.hijo("mencion_serie", self.m("VolumenSerie490"), volumen=volumen)
+
+    # --- 5XX ---
+
+    def t500(self, obra, campo):
+        obra.hijo("obra", self.m("NotaGeneral500"), nota_general=self.sub(campo, "a"))
+
+    def t505(self, obra, campo):
+        obra.hijo("obra", self.m("Contenido505"), contenido=self.sub(campo, "a"))
+
+    def t520(self, obra, campo):
+        obra.hijo("obra", self.m("Sumario520"), sumario=self.sub(campo, "a"))
+
+    def t545(self, obra, campo):
+        DatosBiograficos545 = self.m("DatosBiograficos545")
+        if any(nodo.modelo is DatosBiograficos545 for _, nodo in obra.hijos):
+            self.avisos.append("545 repetido: solo se importa el primero")
+            return
+        obra.hijo(
+            "obra",
+            DatosBiograficos545,
+            texto_biografico=self.sub(campo, "a"),
+            uri=self.sub(campo, "u") or None,
+        )
+
+    # --- 6XX ---
+
+    def t650(self, obra, campo):
+        termino = self.limpio(self.sub(campo, "a"))
+        materia = obra.hijo(
+            "obra",
+            self.m("Materia650"),
+            materia=RefAutoridad(self.m("AutoridadMateria"), termino) if termino else None,
+        )
+        for valor in self.subs(campo, "y"):
+            materia.hijo("materia650", self.m("SubdivisionMateria650"), subdivision=self.limpio(valor))
+        for valor in self.subs(campo, "z"):
+            materia.hijo("materia650", self.m("SubdivisionCronologica650"), subdivision=self.limpio(valor))
+
+    def t655(self, obra, campo):
+        forma = self.limpio(self.sub(campo, "a"))
+        genero = obra.hijo(
+            "obra",
+            self.m("MateriaGenero655"),
+            materia=RefAutoridad(self.m("AutoridadFormaMusical"), forma) if forma else None,
+        )
+        for valor in self.subs(campo, "x"):
+            genero.hijo("materia655", self.m("SubdivisionGeneral655"), subdivision=self.limpio(valor))
+        for valor in self.subs(campo, "y"):
+            genero.hijo("materia655", self.m("SubdivisionCronologica655"), subdivision=self.limpio(valor))
+
+    # --- 7XX ---
+
+    def t700(self, obra, campo):
+        NombreRelacionado700 = self.m("NombreRelacionado700")
+        nombre = obra.hijo(
+            "obra",
+            NombreRelacionado700,
+            persona=self._persona(campo),
+            coordenadas_biograficas=self.limpio(self.sub(campo, "d")),
+            relacion=self.sub(campo, "i"),
+            autoria=self.opcion(NombreRelacionado700, "autoria", self.sub(campo, "j"), "700"),
+            titulo_obra=self.limpio(self.sub(campo, "t")),
+        )
+        for termino in self.subs(campo, "c"):
+            nombre.hijo("nombre_700", self.m("TerminoAsociado700"), termino=self.limpio(termino))
+        Funcion700 = self.m("Funcion700")
+        for funcion in self.subs(campo, "e"):
+            valor = self.opcion(Funcion700, "funcion", funcion, "700")
+            if valor:
+                nombre.hijo("nombre_700", Funcion700, funcion=valor)
+
+    def t710(self, obra, campo):
+        nombre = self.limpio(self.sub(campo, "a"))
+        if not nombre:
+            return
+        entidad = obra.hijo(
+            "obra",
+            self.m("EntidadRelacionada710"),
+            entidad=RefAutoridad(self.m("AutoridadEntidad"), nombre),
+        )
+        Funcion710 = self.m("FuncionInstitucional710")
+        for funcion in self.subs(campo, "e"):
+            valor = self.opcion(Funcion710, "funcion", funcion, "710")
+            if valor:
+                entidad.hijo("entidad_710", Funcion710, funcion=valor)
+
+    def _enlace(self, obra, campo, modelo, modelo_numero, fk, titulo_autoridad=True):
+        # El modelo exige encabezamiento ($a) y título ($t); sin ellos el
+        # enlace no se puede guardar aunque el MARC sea válido
+        encabezamiento = self._persona_encabezamiento(self.sub(campo, "a"))
+        titulo = self.limpio(self.sub(campo, "t"))
+        faltan = [codigo for codigo, valor in (("$a", encabezamiento), ("$t", titulo)) if not valor]
+        if faltan:
+            self.avisos.append(f"{campo.tag} sin {' ni '.join(faltan)}: se omite el enlace")
+            return
+        campos = {"encabezamiento_principal": encabezamiento}
+        if titulo_autoridad:
+            campos["titulo"] = RefAutoridad(self.m("AutoridadTituloUniforme"), titulo)
+        else:
+            campos["titulo"] = titulo
+        enlace = obra.hijo("obra", self.m(modelo), **campos)
+        for control in self.subs(campo, "w"):
+            enlace.hijo(fk, self.m(modelo_numero), obra_relacionada=RefObra(control))
+
+    def t773(self, obra, campo):
+        self._enlace(obra, campo, "EnlaceDocumentoFuente773", "NumeroControl773", "enlace_773")
+
+    def t774(self, obra, campo):
+        self._enlace(obra, campo, "EnlaceUnidadConstituyente774", "NumeroControl774", "enlace_774")
+
+    def t787(self, obra, campo):
+        self._enlace(
+            obra, campo, "OtrasRelaciones787", "NumeroControl787", "enlace_787",
+            titulo_autoridad=False,
+        )
+
+    # --- 8XX ---
+
+    def t852(self, obra, campo):
+        ubicacion = obra.hijo(
+            "obra",
+            self.m("Ubicacion852"),
+            codigo_o_nombre=self.sub(campo, "a"),
+            signatura_original=self.sub(campo, "h"),
+        )
+        for estanteria in self.subs(campo, "c"):
+            ubicacion.hijo("ubicacion", self.m("Estanteria852"), estanteria=estanteria)
+
+    def t856(self, obra, campo):
+        disponible = obra.hijo("obra", self.m("Disponible856"))
+        for url in self.subs(campo, "u"):
+            disponible.hijo("disponible", self.m("URL856"), url=url)
+        for texto in self.subs(campo, "y"):
+            disponible.hijo("disponible", self.m("TextoEnlace856"), texto_enlace=texto)
+
+
+def _recorrer(nodo):
+    yield nodo
+    for _, hijo in nodo.hijos:
+        yield from _recorrer(hijo)
+
+
+def _validar_nodo(nodo):
+    """
+    Los valores nulos en columnas NOT NULL o que no caben en su columna
+    invalidan el registro (así el dry-run reporta lo que haría fallar la
+    escritura).
+    """
+    for actual in _recorrer(nodo):
+        for nombre, valor in actual.campos.items():
+            campo = actual.modelo._meta.get_field(nombre)
+            if valor is None and not campo.null:
+                raise ErrorMapeo(f"{actual.modelo.__name__}.{nombre} es obligatorio")
+            if not isinstance(valor, str):
+                continue
+            largo = getattr(campo, "max_length", None)
+            if largo and len(valor) > largo:
+                raise ErrorMapeo(
+                    f"{actual.modelo.__name__}.{nombre} supera {largo} caracteres"
+                )
+        for valor in actual.campos.values():
+            if isinstance(valor, RefAutoridad):
+                campo_clave = _CLAVES_AUTORIDAD[valor.modelo.__name__]
+                largo = valor.modelo._meta.get_field(campo_clave).max_length
+                if len(valor.valor) > largo:
+                    raise ErrorMapeo(
+                        f"{valor.modelo.__name__} supera {largo} caracteres: {valor.valor[:40]}..."
+                    )
+
+
+def mapear_registro(registro, posicion, centro_por_defecto="UNL"):
+    """
+    Traduce un Registro a una ObraImportada (sin acceder a la base de datos
+    salvo para leer opciones de los modelos).
+
+    Returns:
+        tuple: (ObraImportada, etiquetas ignoradas)
+
+    Raises:
+        ErrorMapeo: Si el registro no puede importarse
+    """
+    mapeador = _Mapeador(centro_por_defecto)
+    nodo, control, ignoradas = mapeador.mapear(registro)
+    _validar_nodo(nodo)
+    return ObraImportada(posicion, control, nodo, mapeador.avisos), ignoradas
+
+
+# ===========================================
+# ESCRITURA POR LOTES
+# ===========================================
+
+# Campo único que identifica cada autoridad
+_CLAVES_AUTORIDAD = {
+    "AutoridadPersona": "apellidos_nombres",
+    "AutoridadTituloUniforme": "titulo",
+    "AutoridadFormaMusical": "forma",
+    "AutoridadMateria": "termino",
+    "AutoridadEntidad": "nombre",
+}
+
+
+class MapaAutoridades:
+    """
+    valor -> id de cada modelo de autoridad, cargado una vez por importación;
+    las que faltan se crean de una vez por lote.
+    """
+
+    def __init__(self):
+        self._mapas = {}
+
+    def _mapa(self, modelo):
+        if modelo not in self._mapas:
+            clave = _CLAVES_AUTORIDAD[modelo.__name__]
+            self._mapas[modelo] = dict(modelo.objects.values_list(clave, "id"))
+        return self._mapas[modelo]
+
+    def faltantes(self, refs):
+        """{modelo: {valor: extras}} de las referencias que no existen aún."""
+        nuevas = defaultdict(dict)
+        for ref in refs:
+            if ref.valor not in self._mapa(ref.modelo):
+                nuevas[ref.modelo].setdefault(ref.valor, ref.extras)
+        return nuevas
+
+    def resolver(self, refs):
+        """Crea las autoridades que faltan y devuelve {modelo: cantidad creada}."""
+        creadas = Counter()
+        for modelo, valores in self.faltantes(refs).items():
+            clave = _CLAVES_AUTORIDAD[modelo.__name__]
+            modelo.objects.bulk_create(
+                [modelo(**{clave: valor}, **extras) for valor, extras in valores.items()],
+                ignore_conflicts=True,
+            )
+            mapa = self._mapa(modelo)
+            mapa.update(
+                modelo.objects.filter(**{f"{clave}__in": list(valores)}).values_list(clave, "id")
+            )
+            creadas[modelo.__name__] += len(valores)
+        return creadas
+
+    def id_de(self, ref):
+        return self._mapa(ref.modelo)[ref.valor]
+
+
+def _preparar_obra(obra, num_control):
+    """Campos que ObraGeneral.save() calcula en la creación."""
+    from catalogacion.models.utils import (
+        actualizar_fecha_hora_transaccion,
+        generar_codigo_informacion,
+        signatura_para_archivo,
+    )
+
+    obra.num_control = num_control
+    obra.estado_registro = "n"
+    if not obra.codigo_informacion:
+        obra.codigo_informacion = generar_codigo_informacion()
+    obra.fecha_hora_ultima_transaccion = actualizar_fecha_hora_transaccion()
+    obra.signatura = signatura_para_archivo(obra) or ""
+
+
+def _instanciar(nodo, autoridades, padre_fk=None, padre=None):
+    valores = {}
+    for nombre, valor in nodo.campos.items():
+        if isinstance(valor, RefAutoridad):
+            valores[f"{nombre}_id"] = autoridades.id_de(valor)
+        elif isinstance(valor, RefObra):
+            continue  # lo asigna el escritor cuando el $w está resuelto
+        else:
+            valores[nombre] = valor
+    if padre_fk:
+        valores[f"{padre_fk}_id"] = padre.pk
+    nodo.instancia = nodo.modelo(**valores)
+    return nodo.instancia
+
+
+class _Escritor:
+    """Escribe lotes de ObraImportada y recuerda los 001 importados."""
+
+    def __init__(self, usuario=None):
+        self.autoridades = MapaAutoridades()
+        self.usuario = usuario
+        self.controles = {}  # 001 del archivo -> id de la obra creada
+        self.pendientes = []  # (modelo, fk, id del enlace, $w, posición, 001)
+
+    def _resolver_obras(self, controles):
+        from catalogacion.models import ObraGeneral
+
+        resueltos = {c: self.controles[c] for c in controles if c in self.controles}
+        faltan = sorted(set(controles) - set(resueltos))
+        for i in range(0, len(faltan), TAMANO_LOTE):
+            resueltos.update(
+                ObraGeneral.objects.filter(
+                    num_control__in=faltan[i:i + TAMANO_LOTE]
+                ).values_list("num_control", "id")
+            )
+        return resueltos
+
+    def escribir(self, lote):
+        """
+        Escribe el lote en una transacción. Si falla, la base de datos y el
+        estado del escritor quedan como antes del lote y la excepción se propaga.
+
+        Returns:
+            tuple: (ids de las obras creadas, {modelo de autoridad: creadas})
+        """
+        from catalogacion.services.busqueda import indexar_obras
+
+        nuevos, pendientes = {}, []
+        try:
+            with transaction.atomic():
+                ids, creadas = self._escribir(lote, nuevos, pendientes)
+                indexar_obras(ids)
+        except Exception:
+            # Los ids de autoridades creadas en la transacción ya no existen
+            self.autoridades = MapaAutoridades()
+            raise
+        self.controles.update(nuevos)
+        self.pendientes.extend(pendientes)
+        return ids, creadas
+
+    def _escribir(self, lote, nuevos, pendientes):
+        from catalogacion.models import ObraGeneral
+        from catalogacion.models.utils import reservar_numeros_control
+
+        refs = [
+            valor
+            for importada in lote
+            for nodo in _recorrer(importada.nodo)
+            for valor in nodo.campos.values()
+            if isinstance(valor, RefAutoridad)
+        ]
+        creadas = self.autoridades.resolver(refs)
+
+        # Números de control: una reserva por tipo de registro
+        por_tipo = defaultdict(list)
+        for importada in lote:
+            por_tipo[importada.nodo.campos["tipo_registro"]].append(importada)
+        obras = []
+        for tipo, importadas in por_tipo.items():
+            for importada, numero in zip(
+                importadas, reservar_numeros_control(tipo, len(importadas))
+            ):
+                obra = _instanciar(importada.nodo, self.autoridades)
+                obra.catalogador = obra.modificado_por = self.usuario
+                paises = [
+                    n.campos["codigo_pais"]
+                    for _, n in importada.nodo.hijos
+                    if "codigo_pais" in n.campos
+                ]
+                obra.pais_principal = (paises[0] if paises else "EC").upper()
+                _preparar_obra(obra, numero)
+                obras.append(obra)
+        ObraGeneral.objects.bulk_create(obras)
+        for importada in lote:
+            if importada.control:
+                nuevos[importada.control] = importada.nodo.instancia.pk
+
+        # $w hacia registros del archivo ya escritos; el resto se enlaza al
+        # final, cuando un 001 del archivo ya no puede confundirse con el
+        # número de control de una obra existente
+        obras_w = ChainMap(nuevos, self.controles)
+
+        # Un bulk_create por modelo y nivel del árbol
+        nivel = [(importada, importada.nodo) for importada in lote]
+        while nivel:
+            por_modelo = defaultdict(list)
+            siguiente = []
+            for importada, padre in nivel:
+                for fk, hijo in padre.hijos:
+                    ref_obra = hijo.campos.get("obra_relacionada")
+                    if isinstance(ref_obra, RefObra):
+                        if ref_obra.control not in obras_w:
+                            pendientes.append(
+                                (
+                                    hijo.modelo, fk, padre.instancia.pk, ref_obra.control,
+                                    importada.posicion, importada.control,
+                                )
+                            )
+                            continue
+                        instancia = _instanciar(hijo, self.autoridades, fk, padre.instancia)
+                        instancia.obra_relacionada_id = obras_w[ref_obra.control]
+                    else:
+                        instancia = _instanciar(hijo, self.autoridades, fk, padre.instancia)
+                    por_modelo[hijo.modelo].append(instancia)
+                    siguiente.append((importada, hijo))
+            for modelo, instancias in por_modelo.items():
+                modelo.objects.bulk_create(instancias)
+            nivel = siguiente
+
+        return [obra.pk for obra in obras], creadas
+
+    def enlazar_pendientes(self):
+        """$w hacia registros posteriores del archivo o hacia obras existentes."""
+        obras_w = self._resolver_obras({pendiente[3] for pendiente in self.pendientes})
+        por_modelo = defaultdict(list)
+        sin_resolver = []
+        for modelo, fk, enlace_id, control, posicion, control_registro in self.pendientes:
+            if control in obras_w:
+                por_modelo[modelo].append(
+                    modelo(**{f"{fk}_id": enlace_id, "obra_relacionada_id": obras_w[control]})
+                )
+            else:
+                sin_resolver.append((posicion, control_registro, control))
+        with transaction.atomic():
+            for modelo, instancias in por_modelo.items():
+                modelo.objects.bulk_create(instancias)
+        return sin_resolver
+
+
+def _escribir_aislando_errores(escritor, lote, resultado):
+    """
+    Escribe el lote; si la escritura falla, reintenta registro por registro
+    para que solo los que fallan se reporten como errores y el resto se importe.
+
+    Yields:
+        tuple: (obras escritas, {modelo de autoridad: creadas}) por escritura exitosa
+    """
+    try:
+        ids, creadas = escritor.escribir(lote)
+    except Exception as e:
+        if len(lote) > 1:
+            for importada in lote:
+                yield from _escribir_aislando_errores(escritor, [importada], resultado)
+            return
+        importada = lote[0]
+        logger.warning(f"Importación MARC: registro {importada.posicion} no escrito: {e}")
+        resultado.errores.append(
+            (importada.posicion, importada.control, f"Error al guardar: {e}")
+        )
+        return
+    yield len(ids), creadas
+
+
+def importar_marc(
+    origen,
+    formato: str = "mrc",
+    simular: bool = False,
+    tamano_lote: int = TAMANO_LOTE,
+    centro_por_defecto: str = "UNL",
+    usuario=None,
+) -> ResultadoImportacion:
+    """
+    Importa los registros de un archivo binario abierto.
+
+    Args:
+        formato: 'mrc' (ISO 2709) o 'marcxml'
+        simular: Solo mapear y reportar errores, sin escribir (dry-run)
+        tamano_lote: Registros por transacción
+        centro_por_defecto: 040 $a cuando el registro no trae 003 ni 040
+        usuario: Catalogador al que se atribuyen las obras
+
+    Returns:
+        ResultadoImportacion
+    """
+    resultado = ResultadoImportacion()
+    escritor = None if simular else _Escritor(usuario)
+    autoridades = MapaAutoridades() if simular else None
+    lote = []
+
+    def _vaciar():
+        if not lote:
+            return
+        if simular:
+            refs = [
+                valor
+                for importada in lote
+                for nodo in _recorrer(importada.nodo)
+                for valor in nodo.campos.values()
+                if isinstance(valor, RefAutoridad)
+            ]
+            for modelo, valores in autoridades.faltantes(refs).items():
+                resultado.autoridades_nuevas[modelo.__name__] += len(valores)
+                # Contarlas una sola vez en toda la simulación
+                autoridades._mapa(modelo).update(dict.fromkeys(valores, 0))
+            resultado.importados += len(lote)
+        else:
+            for escrito, creadas in _escribir_aislando_errores(escritor, lote, resultado):
+                resultado.importados += escrito
+                resultado.autoridades_nuevas.update(creadas)
+        lote.clear()
+
+    for posicion, (registro, error) in enumerate(iter_registros_archivo(origen, formato), start=1):
+        resultado.leidos += 1
+        if registro is None:
+            resultado.errores.append((posicion, "", error))
+            continue
+        control = next((c.dato for c in registro.campos_de("001")), "") or ""
+        try:
+            importada, ignoradas = mapear_registro(registro, posicion, centro_por_defecto)
+        except ErrorMapeo as e:
+            resultado.errores.append((posicion, control, str(e)))
+            continue
+        resultado.etiquetas_ignoradas.update(ignoradas)
+        resultado.avisos.extend((posicion, control, aviso) for aviso in importada.avisos)
+        lote.append(importada)
+        if len(lote) >= tamano_lote:
+            _vaciar()
+    _vaciar()
+
+    if not simular:
+        resultado.enlaces_sin_resolver = escritor.enlazar_pendientes()
+        logger.info(
+            f"Importación MARC: {resultado.importados} obras, "
+            f"{resultado.omitidos} registros omitidos"
+        )
+    return resultado
@@ -0,0 +1,418 @@
+"""
+Construcción de registros MARC21 de una obra en una sola pasada.
+
+El grafo de relaciones de la obra se carga con un número fijo de consultas
+(SELECT_MARC + PREFETCH_MARC, sin importar cuántas obras ni cuántos campos
+repetibles tengan) y se vuelca a una estructura intermedia de campos y
+subcampos (Registro). Todas las salidas MARC se generan desde esa
+estructura (ver marc_serializacion.py): vista pública, vista cruda,
+administración y exportaciones.
+
+Uso:
+    obra = queryset_marc(ObraGeneral.objects.filter(pk=pk)).get()
+    registro = construir_registro(obra)
+    texto = a_mnemonico(registro)
+"""
+
+# Relaciones 1:1 que se traen en la misma consulta de la obra
+SELECT_MARC = (
+    "compositor",
+    "titulo_uniforme",
+    "titulo_240",
+    "forma_130",
+    "forma_240",
+    "datos_biograficos_545",
+)
+
+# Relaciones repetibles: una consulta por cada entrada
+PREFETCH_MARC = (
+    # Bloque 0XX
+    "incipits_musicales__urls",
+    "codigos_lengua__idiomas",
+    "codigos_pais_entidad",
+    # Bloque 1XX
+    "funciones_compositor",
+    # Bloque 2XX
+    "titulos_alternativos",
+    "ediciones",
+    "producciones_publicaciones__lugares",
+    "producciones_publicaciones__entidades",
+    "producciones_publicaciones__fechas",
+    # Bloque 3XX
+    "medios_interpretacion_382__medios",
+    # Bloque 4XX
+    "menciones_serie__titulos",
+    "menciones_serie__volumenes",
+    # Bloque 5XX
+    "notas_generales_500",
+    "contenidos_505",
+    "sumarios_520",
+    # Bloque 6XX
+    "materias_650__materia",
+    "materias_650__subdivisiones",
+    "materias_650__subdivisiones_geograficas",
+    "materias_655__materia",
+    "materias_655__subdivisiones",
+    "materias_655__subdivisiones_cronologicas",
+    # Bloque 7XX
+    "nombres_relacionados_700__persona",
+    "nombres_relacionados_700__funciones",
+    "nombres_relacionados_700__terminos_asociados",
+    "entidades_relacionadas_710__entidad",
+    "entidades_relacionadas_710__funciones_institucionales",
+    "enlaces_documento_fuente_773__titulo",
+    "enlaces_documento_fuente_773__encabezamiento_principal",
+    "enlaces_documento_fuente_773__numeros_control__obra_relacionada",
+    "enlaces_unidades_774__encabezamiento_principal",
+    "enlaces_unidades_774__titulo",
+    "enlaces_unidades_774__numeros_control__obra_relacionada",
+    "otras_relaciones_787__encabezamiento_principal",
+    "otras_relaciones_787__numeros_control__obra_relacionada",
+    # Bloque 8XX
+    "ubicaciones_852__autoridad",
+    "ubicaciones_852__estanterias",
+    "disponibles_856__urls_856",
+    "disponibles_856__textos_enlace_856",
+)
+
+
+def queryset_marc(queryset):
+    """Agrega al queryset de obras todo lo que construir_registro necesita."""
+    return queryset.select_related(*SELECT_MARC).prefetch_related(*PREFETCH_MARC)
+
+
+class Campo:
+    """
+    Campo MARC: de control (001-009, solo `dato`) o de datos (indicadores y
+    lista ordenada de subcampos (código, valor)). Los indicadores en blanco
+    se guardan como espacio.
+    """
+
+    __slots__ = ("tag", "ind1", "ind2", "subcampos", "dato")
+
+    def __init__(self, tag, ind1=" ", ind2=" ", subcampos=None, dato=None):
+        self.tag = tag
+        self.ind1 = ind1
+        self.ind2 = ind2
+        self.subcampos = subcampos or []
+        self.dato = dato
+
+    @property
+    def es_control(self):
+        return self.tag < "010"
+
+    @property
+    def indicadores(self):
+        return f"{self.ind1}{self.ind2}"
+
+    @property
+    def indicadores_lc(self):
+        """Indicadores con "#" por blanco, como en la documentación de LC."""
+        return self.indicadores.replace(" ", "#")
+
+    def __repr__(self):
+        if self.es_control:
+            return f"<Campo {self.tag} {self.dato!r}>"
+        return f"<Campo {self.tag} {self.indicadores!r} {self.subcampos!r}>"
+
+
+class Registro:
+    """Líder y campos de un registro MARC21, en orden de salida."""
+
+    __slots__ = ("leader", "campos")
+
+    def __init__(self, leader):
+        self.leader = leader
+        self.campos = []
+
+    def control(self, tag, valor):
+        if valor:
+            self.campos.append(Campo(tag, dato=str(valor)))
+
+    def datos(self, tag, indicadores, subcampos):
+        """
+        Agrega un campo de datos con los subcampos que tengan valor; si no
+        queda ninguno el campo se omite.
+        """
+        subcampos = [(codigo, str(valor)) for codigo, valor in subcampos if valor]
+        if subcampos:
+            ind = indicadores.replace("#", " ")
+            self.campos.append(Campo(tag, ind[0], ind[1], subcampos))
+
+    def campos_de(self, tag):
+        return [campo for campo in self.campos if campo.tag == tag]
+
+
+def _titulo_uniforme(obra, sufijo):
+    """Subcampos $k $m $n $o $p $r de 130/240."""
+    forma = getattr(obra, f"forma_{sufijo}")
+    return [
+        ("k", forma),
+        ("m", getattr(obra, f"get_medio_interpretacion_{sufijo}_display")()),
+        ("n", getattr(obra, f"numero_parte_{sufijo}")),
+        ("o", getattr(obra, f"get_arreglo_{sufijo}_display")()),
+        ("p", getattr(obra, f"nombre_parte_{sufijo}")),
+        ("r", getattr(obra, f"get_tonalidad_{sufijo}_display")()),
+    ]
+
+
+def _enlace(registro, tag, enlace):
+    """773/774/787: $a encabezamiento, $t título, $w números de control."""
+    subcampos = [("a", enlace.encabezamiento_principal), ("t", enlace.titulo)]
+    subcampos += [
+        ("w", numero.obra_relacionada.num_control)
+        for numero in enlace.numeros_control.all()
+        if numero.obra_relacionada_id
+    ]
+    registro.datos(tag, "1#", subcampos)
+
+
+def construir_registro(obra) -> Registro:
+    """
+    Registro MARC21 completo de una obra. Sin consultas adicionales si la
+    obra viene de queryset_marc.
+    """
+    from catalogacion.models.utils import obtener_pais_principal
+
+    r = Registro(obra.generar_leader())
+
+    # === 00X: control ===
+    r.control("001", obra.num_control)
+    r.control("003", obra.centro_catalogador)
+    r.control("005", obra.fecha_hora_ultima_transaccion)
+    r.control("008", obra.codigo_informacion)
+
+    # === 0XX: identificación y códigos ===
+    r.datos("020", "##", [("a", obra.isbn)])
+    r.datos("024", "2#", [("a", obra.ismn)])
+    if obra.numero_editor:
+        r.datos(
+            "028",
+            f"{obra.tipo_numero_028 or '2'}{obra.control_nota_028 or '0'}",
+            [("a", obra.numero_editor)],
+        )
+    for incipit in obra.incipits_musicales.all():
+        r.datos(
+            "031",
+            "##",
+            [
+                ("a", incipit.numero_obra),
+                ("b", incipit.numero_movimiento),
+                ("c", incipit.numero_pasaje),
+                ("d", incipit.titulo_encabezamiento),
+                ("e", incipit.personaje),
+                ("g", incipit.clave),
+                ("m", incipit.voz_instrumento),
+                ("n", incipit.armadura),
+                ("o", incipit.tiempo),
+                ("p", incipit.notacion_musical),
+                *[("u", url.url) for url in incipit.urls.all()],
+                ("2", "pe"),
+            ],
+        )
+    r.datos(
+        "040",
+        "##",
+        [("a", obra.centro_catalogador), ("b", "spa"), ("c", obra.centro_catalogador)],
+    )
+    for codigo in obra.codigos_lengua.all():
+        r.datos(
+            "041",
+            f"{codigo.indicacion_traduccion or '#'}{codigo.fuente_codigo or '#'}",
+            [("a", idioma.codigo_idioma) for idioma in codigo.idiomas.all()],
+        )
+    r.datos("044", "##", [("a", pais.codigo_pais) for pais in obra.codigos_pais_entidad.all()])
+    if obra.centro_catalogador and obra.num_control:
+        r.datos(
+            "092",
+            "##",
+            [
+                ("a", obra.centro_catalogador),
+                ("b", "BLMP"),
+                ("c", obtener_pais_principal(obra)),
+                ("d", "Ms" if obra.tipo_registro == "d" else "Imp"),
+                ("0", obra.num_control),
+            ],
+        )
+
+    # === 1XX: punto de acceso principal ===
+    compositor = obra.compositor
+    if compositor:
+        r.datos(
+            "100",
+            "1#",
+            [
+                ("a", compositor.apellidos_nombres),
+                ("d", compositor.coordenadas_biograficas),
+                ("c", obra.termino_asociado),
+                *[("e", f.get_funcion_display()) for f in obra.funciones_compositor.all()],
+                ("j", obra.get_autoria_display() if obra.autoria else ""),
+            ],
+        )
+    elif obra.titulo_uniforme:
+        r.datos("130", "0#", [("a", obra.titulo_uniforme), *_titulo_uniforme(obra, "130")])
+
+    # === 2XX: títulos, edición, publicación ===
+    if obra.titulo_240 and compositor:
+        r.datos("240", "10", [("a", obra.titulo_240), *_titulo_uniforme(obra, "240")])
+    r.datos(
+        "245",
+        "10" if compositor else "00",
+        [
+            ("a", obra.titulo_principal),
+            ("b", obra.subtitulo),
+            ("c", obra.mencion_responsabilidad),
+            (
+                "h",
+                {"d": "[música manuscrita]", "c": "[música impresa]"}.get(obra.tipo_registro),
+            ),
+        ],
+    )
+    for alternativo in obra.titulos_alternativos.all():
+        r.datos(
+            "246",
+            "1#",
+            [
+                ("i", alternativo.texto_visualizacion),
+                ("a", alternativo.titulo),
+                ("b", alternativo.subtitulo),
+            ],
+        )
+    for edicion in obra.ediciones.all():
+        r.datos("250", "##", [("a", edicion.edicion)])
+    for prod in obra.producciones_publicaciones.all():
+        r.datos(
+            "264",
+            f"#{prod.funcion or '#'}",
+            [
+                *[("a", lugar.lugar) for lugar in prod.lugares.all()],
+                *[("b", entidad.nombre) for entidad in prod.entidades.all()],
+                *[("c", fecha.fecha) for fecha in prod.fechas.all()],
+            ],
+        )
+
+    # === 3XX: descripción física y música ===
+    r.datos(
+        "300",
+        "##",
+        [
+            ("a", obra.extension),
+            ("b", obra.otras_caracteristicas),
+            ("c", obra.dimension),
+            ("e", obra.material_acompanante),
+        ],
+    )
+    r.datos("340", "##", [("d", obra.get_ms_imp_display() if obra.ms_imp else "")])
+    r.datos("348", "##", [("a", obra.get_formato_display() if obra.formato else "")])
+    for medio382 in obra.medios_interpretacion_382.all():
+        r.datos(
+            "382",
+            "##",
+            [
+                *[("a", medio.get_medio_display()) for medio in medio382.medios.all()],
+                ("b", medio382.solista),
+            ],
+        )
+    r.datos("383", "##", [("a", obra.numero_obra), ("b", obra.opus)])
+    r.datos(
+        "384", "0#", [("a", obra.get_tonalidad_384_display() if obra.tonalidad_384 else "")]
+    )
+
+    # === 4XX: series ===
+    for serie in obra.menciones_serie.all():
+        r.datos(
+            "490",
+            "0#",
+            [
+                *[("a", titulo.titulo_serie) for titulo in serie.titulos.all()],
+                *[("v", volumen.volumen) for volumen in serie.volumenes.all()],
+            ],
+        )
+
+    # === 5XX: notas ===
+    for nota in obra.notas_generales_500.all():
+        r.datos("500", "##", [("a", nota.nota_general)])
+    for contenido in obra.contenidos_505.all():
+        r.datos("505", "00", [("a", contenido.contenido)])
+    for sumario in obra.sumarios_520.all():
+        r.datos("520", "##", [("a", sumario.sumario)])
+    datos_bio = getattr(obra, "datos_biograficos_545", None)
+    if datos_bio:
+        r.datos("545", "0#", [("a", datos_bio.texto_biografico), ("u", datos_bio.uri)])
+
+    # === 6XX: materias ===
+    for materia in obra.materias_650.all():
+        r.datos(
+            "650",
+            "04",
+            [
+                ("a", materia.materia),
+                *[("y", s.subdivision) for s in materia.subdivisiones.all()],
+                *[("z", s.subdivision) for s in materia.subdivisiones_geograficas.all()],
+            ],
+        )
+    for genero in obra.materias_655.all():
+        r.datos(
+            "655",
+            "#4",
+            [
+                ("a", genero.materia),
+                *[("x", s.subdivision) for s in genero.subdivisiones.all()],
+                *[("y", s.subdivision) for s in genero.subdivisiones_cronologicas.all()],
+            ],
+        )
+
+    # === 7XX: asientos secundarios y enlaces ===
+    for nombre in obra.nombres_relacionados_700.all():
+        persona = nombre.persona
+        r.datos(
+            "700",
+            "1#",
+            [
+                ("a", persona.apellidos_nombres if persona else ""),
+                ("d", persona.coordenadas_biograficas if persona else ""),
+                *[("c", t.termino) for t in nombre.terminos_asociados.all()],
+                *[("e", f.get_funcion_display()) for f in nombre.funciones.all()],
+                ("i", nombre.relacion),
+                ("j", nombre.get_autoria_display() if nombre.autoria else ""),
+                ("t", nombre.titulo_obra),
+            ],
+        )
+    for entidad in obra.entidades_relacionadas_710.all():
+        r.datos(
+            "710",
+            "2#",
+            [
+                ("a", entidad.entidad),
+                *[("e", f.get_funcion_display()) for f in entidad.funciones_institucionales.all()],
+            ],
+        )
+    for enlace in obra.enlaces_documento_fuente_773.all():
+        _enlace(r, "773", enlace)
+    for enlace in obra.enlaces_unidades_774.all():
+        _enlace(r, "774", enlace)
+    for enlace in obra.otras_relaciones_787.all():
+        _enlace(r, "787", enlace)
+
+    # === 8XX: ubicación y acceso ===
+    for ubicacion in obra.ubicaciones_852.all():
+        r.datos(
+            "852",
+            "##",
+            [
+                ("a", ubicacion.autoridad or ubicacion.codigo_o_nombre),
+                ("h", ubicacion.signatura_original),
+                *[("c", e.estanteria) for e in ubicacion.estanterias.all()],
+            ],
+        )
+    for disponible in obra.disponibles_856.all():
+        r.datos(
+            "856",
+            "4#",
+            [
+                *[("u", url.url) for url in disponible.urls_856.all()],
+                *[("y", texto.texto_enlace) for texto in disponible.textos_enlace_856.all()],
+            ],
+        )
+
+    return r
@@ -0,0 +1,364 @@
+"""
+Salidas de un Registro MARC21 (ver marc_registro.py).
+
+    a_mnemonico      MARC mnemónico (.mrk, MarcEdit): =245  10$aTítulo
+    a_hexadecimal    Líder posición por posición y campos (vista cruda)
+    a_marcxml        MARCXML (<record> del esquema MARC21 slim)
+    a_marc_json      MARC-in-JSON (dict listo para json.dumps)
+    a_iso2709        MARC21 binario ISO 2709 (.mrc), UTF-8
+
+y lectura de ISO 2709 y MARCXML (leer_iso2709, iter_leer_iso2709,
+iter_leer_marcxml) para verificación e importación.
+
+Uso:
+    registro = construir_registro(obra)
+    texto = a_mnemonico(registro)
+    with open("catalogo.mrc", "wb") as f:
+        escribir_iso2709(registros, f)
+"""
+
+import logging
+import re
+from xml.sax.saxutils import escape, quoteattr
+
+from catalogacion.services.marc_registro import Campo, Registro
+
+logger = logging.getLogger("catalogacion")
+
+NS_MARCXML = "http://www.loc.gov/MARC21/slim"
+
+# Caracteres de control que XML 1.0 no admite
+_RE_NO_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+# ===========================================
+# MNEMÓNICO
+# ===========================================
+
+def _mrk(valor: str) -> str:
+    # En .mrk "$" separa subcampos; el literal se escribe {dollar}
+    return valor.replace("$", "{dollar}")
+
+
+def a_mnemonico(registro, blanco: str = "\\") -> str:
+    """
+    Registro en formato mnemónico, una línea por campo.
+
+    Args:
+        blanco: Carácter para indicadores en blanco ("\\" en MarcEdit, "#"
+            en la documentación de LC)
+    """
+    lineas = [f"=LDR  {leader_calculado(registro).replace(' ', blanco)}"]
+    for campo in registro.campos:
+        if campo.es_control:
+            lineas.append(f"={campo.tag}  {_mrk(campo.dato).replace(' ', blanco)}")
+            continue
+        subcampos = "".join(f"${codigo}{_mrk(valor)}" for codigo, valor in campo.subcampos)
+        lineas.append(f"={campo.tag}  {campo.indicadores.replace(' ', blanco)}{subcampos}")
+    return "\n".join(lineas)
+
+
+def a_hexadecimal(registro) -> str:
+    """
+    Vista por posiciones: cada carácter del líder en su línea (=h-000 ...
+    =h-023) y luego cada campo con sus indicadores y subcampos.
+    """
+    lineas = [
+        f"=h-{pos:03d} {valor}" for pos, valor in enumerate(leader_calculado(registro))
+    ]
+    for campo in registro.campos:
+        if campo.es_control:
+            lineas.append(f"=h-{campo.tag} {campo.dato}")
+            continue
+        subcampos = "".join(f"${codigo}{valor}" for codigo, valor in campo.subcampos)
+        lineas.append(f"=h-{campo.tag} {campo.indicadores.replace(' ', '#')}{subcampos}")
+    return "\n".join(lineas)
+
+
+# ===========================================
+# MARCXML
+# ===========================================
+
+def limpiar_xml(valor: str) -> str:
+    """Quita los caracteres de control que XML 1.0 no admite."""
+    return _RE_NO_XML.sub("", valor)
+
+
+def _xml(valor: str) -> str:
+    return escape(limpiar_xml(valor))
+
+
+def a_marcxml(registro, namespace: bool = True) -> str:
+    """
+    Elemento <record> del registro.
+
+    Args:
+        namespace: Declarar xmlns en el <record>; False cuando va dentro de
+            un <collection> que ya lo declara
+    """
+    partes = [f'<record xmlns="{NS_MARCXML}">' if namespace else "<record>"]
+    partes.append(f"<leader>{_xml(registro.leader)}</leader>")
+    for campo in registro.campos:
+        if campo.es_control:
+            partes.append(f'<controlfield tag="{campo.tag}">{_xml(campo.dato)}</controlfield>')
+            continue
+        partes.append(
+            f'<datafield tag="{campo.tag}" ind1="{campo.ind1}" ind2="{campo.ind2}">'
+        )
+        for codigo, valor in campo.subcampos:
+            partes.append(f"<subfield code={quoteattr(codigo)}>{_xml(valor)}</subfield>")
+        partes.append("</datafield>")
+    partes.append("</record>")
+    return "".join(partes)
+
+
+def coleccion_marcxml(registros):
+    """
+    Documento <collection> por partes (para escribir o transmitir en
+    streaming sin armar el documento completo en memoria).
+
+    Yields:
+        str: Cabecera, un <record> por registro y cierre
+    """
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<collection xmlns="{NS_MARCXML}">\n'
+    for registro in registros:
+        yield a_marcxml(registro, namespace=False) + "\n"
+    yield "</collection>\n"
+
+
+# ===========================================
+# MARC-IN-JSON
+# ===========================================
+
+def a_marc_json(registro) -> dict:
+    """Registro en MARC-in-JSON: {"leader": ..., "fields": [{tag: ...}, ...]}."""
+    campos = []
+    for campo in registro.campos:
+        if campo.es_control:
+            campos.append({campo.tag: campo.dato})
+            continue
+        campos.append(
+            {
+                campo.tag: {
+                    "ind1": campo.ind1,
+                    "ind2": campo.ind2,
+                    "subfields": [{codigo: valor} for codigo, valor in campo.subcampos],
+                }
+            }
+        )
+    return {"leader": registro.leader, "fields": campos}
+
+
+# ===========================================
+# ISO 2709 (.mrc)
+# ===========================================
+
+DELIMITADOR = b"\x1f"
+FIN_CAMPO = b"\x1e"
+FIN_REGISTRO = b"\x1d"
+
+# Topes de los campos de longitud: 5 dígitos en el líder, 4 en el directorio
+LARGO_MAX_REGISTRO = 99999
+LARGO_MAX_CAMPO = 9999
+
+# Los separadores estructurales no pueden aparecer dentro de los datos
+_SIN_SEPARADORES = str.maketrans("", "", "\x1d\x1e\x1f")
+
+
+class RegistroDemasiadoLargo(ValueError):
+    """El registro o uno de sus campos no cabe en las longitudes de ISO 2709."""
+
+
+def _bytes_campo(campo) -> bytes:
+    if campo.es_control:
+        return campo.dato.translate(_SIN_SEPARADORES).encode("utf-8") + FIN_CAMPO
+    partes = [campo.indicadores.encode("ascii")]
+    for codigo, valor in campo.subcampos:
+        partes += (
+            DELIMITADOR,
+            codigo.encode("ascii"),
+            valor.translate(_SIN_SEPARADORES).encode("utf-8"),
+        )
+    partes.append(FIN_CAMPO)
+    return b"".join(partes)
+
+
+def a_iso2709(registro) -> bytes:
+    """
+    Registro en MARC21 binario: líder con longitud (00-04) y dirección base
+    (12-16) calculadas, directorio de entradas de 12 bytes (etiqueta,
+    longitud, posición) y campos en UTF-8 (líder 09 = "a").
+
+    Raises:
+        RegistroDemasiadoLargo: Si un campo supera 9999 bytes o el registro
+            99999
+    """
+    directorio = []
+    datos = []
+    posicion = 0
+    for campo in registro.campos:
+        bloque = _bytes_campo(campo)
+        if len(bloque) > LARGO_MAX_CAMPO:
+            raise RegistroDemasiadoLargo(
+                f"Campo {campo.tag} de {len(bloque)} bytes (máximo {LARGO_MAX_CAMPO})"
+            )
+        directorio.append(b"%s%04d%05d" % (campo.tag.encode("ascii"), len(bloque), posicion))
+        datos.append(bloque)
+        posicion += len(bloque)
+
+    base = 24 + 12 * len(directorio) + 1
+    largo = base + posicion + 1
+    if largo > LARGO_MAX_REGISTRO:
+        raise RegistroDemasiadoLargo(
+            f"Registro de {largo} bytes (máximo {LARGO_MAX_REGISTRO})"
+        )
+
+    leader = registro.leader
+    leader = f"{largo:05d}{leader[5:9]}a22{base:05d}{leader[17:20]}4500"
+    return b"".join([leader.encode("ascii"), *directorio, FIN_CAMPO, *datos, FIN_REGISTRO])
+
+
+def leader_calculado(registro) -> str:
+    """Líder con la longitud y la dirección base que tendría en ISO 2709."""
+    try:
+        return a_iso2709(registro)[:24].decode("ascii")
+    except RegistroDemasiadoLargo:
+        return registro.leader
+
+
+def iter_iso2709(registros):
+    """
+    Registros en ISO 2709 uno por uno (para escribir o transmitir en
+    streaming). Los que no caben en el formato se omiten con un aviso en el
+    log, para que un registro no corte un volcado completo.
+
+    Yields:
+        bytes: Un registro completo, terminado en 0x1D
+    """
+    for registro in registros:
+        try:
+            yield a_iso2709(registro)
+        except RegistroDemasiadoLargo as e:
+            control = next((c.dato for c in registro.campos_de("001")), "?")
+            logger.warning(f"Registro {control} omitido en ISO 2709: {e}")
+
+
+def escribir_iso2709(registros, destino) -> int:
+    """
+    Escribe los registros en un archivo binario abierto.
+
+    Returns:
+        int: Registros escritos
+    """
+    escritos = 0
+    for datos in iter_iso2709(registros):
+        destino.write(datos)
+        escritos += 1
+    return escritos
+
+
+def leer_iso2709(datos: bytes) -> Registro:
+    """
+    Registro desde su forma ISO 2709 (inverso de a_iso2709).
+
+    Raises:
+        ValueError: Si la longitud, el directorio o los separadores no
+            son consistentes
+    """
+    if len(datos) < 25 or len(datos) != int(datos[:5]) or datos[-1:] != FIN_REGISTRO:
+        raise ValueError("Longitud de registro ISO 2709 inconsistente")
+    leader = datos[:24].decode("ascii")
+    base = int(datos[12:17])
+    directorio = datos[24 : base - 1]
+    if len(directorio) % 12 or datos[base - 1 : base] != FIN_CAMPO:
+        raise ValueError("Directorio ISO 2709 mal formado")
+
+    registro = Registro(leader)
+    for i in range(0, len(directorio), 12):
+        tag = directorio[i : i + 3].decode("ascii")
+        largo = int(directorio[i + 3 : i + 7])
+        posicion = base + int(directorio[i + 7 : i + 12])
+        bloque = datos[posicion : posicion + largo]
+        if bloque[-1:] != FIN_CAMPO:
+            raise ValueError(f"Campo {tag} sin terminador")
+        bloque = bloque[:-1]
+        campo = Campo(tag)
+        if campo.es_control:
+            campo.dato = bloque.decode("utf-8")
+        else:
+            indicadores = bloque[:2].decode("ascii")
+            campo.ind1, campo.ind2 = indicadores[0], indicadores[1]
+            campo.subcampos = [
+                (sub[:1].decode("ascii"), sub[1:].decode("utf-8"))
+                for sub in bloque[2:].split(DELIMITADOR)[1:]
+            ]
+        registro.campos.append(campo)
+    return registro
+
+
+def iter_bytes_iso2709(origen):
+    """
+    Separa los registros de un archivo ISO 2709 abierto sin interpretarlos
+    (un registro dañado no impide leer los siguientes).
+
+    Yields:
+        bytes: Un registro completo
+    """
+    while True:
+        cabeza = origen.read(5)
+        if not cabeza.strip():
+            return
+        if not cabeza.isdigit():
+            raise ValueError(f"Longitud de registro ilegible: {cabeza!r}")
+        yield cabeza + origen.read(int(cabeza) - 5)
+
+
+def iter_leer_iso2709(origen):
+    """
+    Lee registros de un archivo binario abierto sin cargarlo entero.
+
+    Yields:
+        Registro: Uno por cada registro del archivo
+    """
+    for datos in iter_bytes_iso2709(origen):
+        yield leer_iso2709(datos)
+
+
+def iter_leer_marcxml(origen):
+    """
+    Lee los <record> de un documento MARCXML (con o sin espacio de nombres)
+    por partes, liberando cada registro después de entregarlo.
+
+    Yields:
+        Registro: Uno por cada <record>
+    """
+    from xml.etree.ElementTree import iterparse
+
+    def _local(tag):
+        return tag.rsplit("}", 1)[-1]
+
+    for _, elemento in iterparse(origen, events=("end",)):
+        if _local(elemento.tag) != "record":
+            continue
+        registro = Registro("")
+        for hijo in elemento:
+            nombre = _local(hijo.tag)
+            if nombre == "leader":
+                registro.leader = (hijo.text or "").ljust(24)[:24]
+            elif nombre == "controlfield":
+                registro.campos.append(Campo(hijo.get("tag", ""), dato=hijo.text or ""))
+            elif nombre == "datafield":
+                registro.campos.append(
+                    Campo(
+                        hijo.get("tag", ""),
+                        (hijo.get("ind1") or " ")[:1],
+                        (hijo.get("ind2") or " ")[:1],
+                        [
+                            (sub.get("code", ""), sub.text or "")
+                            for sub in hijo
+                            if _local(sub.tag) == "subfield"
+                        ],
+                    )
+                )
+        elemento.clear()
+        yield registro
@@ -0,0 +1,217 @@
+"""
+Paginación por cursor (keyset) para listados grandes.
+
+En lugar de OFFSET + COUNT(*), cada página se pide "después de" (o "antes de")
+los valores de orden de la última fila vista, con una clave de orden única
+(ej: -fecha_creacion_sistema, id). Así el costo no crece con la profundidad de
+la página y el listado no repite ni salta filas aunque se inserten obras nuevas
+mientras se recorre.
+
+El cursor es opaco para el cliente: base64 (url-safe) de un JSON con la
+dirección y los valores de la fila frontera.
+
+Uso:
+    pagina = paginar_por_cursor(
+        ObraGeneral.objects.activos(),
+        ("-fecha_creacion_sistema", "id"),
+        cursor=request.GET.get("cursor"),
+        tamano=20,
+    )
+    pagina.object_list, pagina.cursor_siguiente, pagina.a_dict()
+"""
+
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+# Conteo máximo al pedir el total: por encima se informa "más de LIMITE_CONTEO"
+LIMITE_CONTEO = 1000
+
+SIGUIENTE = "s"
+ANTERIOR = "a"
+
+
+# ===========================================
+# CURSOR
+# ===========================================
+
+def _serializar_valor(valor):
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+
+def codificar_cursor(valores, direccion=SIGUIENTE):
+    """Cursor opaco a partir de los valores de orden de una fila."""
+    datos = {"d": direccion, "v": [_serializar_valor(v) for v in valores]}
+    texto = json.dumps(datos, separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    """
+    Returns:
+        tuple: (direccion, valores) tal como se codificaron
+
+    Raises:
+        ValueError: Si el cursor está mal formado
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        direccion, valores = datos["d"], datos["v"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as e:
+        raise ValueError("Cursor de paginación inválido") from e
+
+    if direccion not in (SIGUIENTE, ANTERIOR) or not isinstance(valores, list):
+        raise ValueError("Cursor de paginación inválido")
+    return direccion, valores
+
+
+# ===========================================
+# PÁGINA
+# ===========================================
+
+class PaginaCursor:
+    """
+    Página de un listado por cursor. Expone la misma interfaz básica que
+    django.core.paginator.Page (object_list, has_next, has_previous,
+    has_other_pages) más los cursores de las páginas vecinas.
+    """
+
+    def __init__(self, object_list, cursor_siguiente, cursor_anterior, total=None,
+                 total_aproximado=False):
+        self.object_list = object_list
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+        self.total = total
+        self.total_aproximado = total_aproximado
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def a_dict(self):
+        """Metadatos de paginación para respuestas JSON."""
+        return {
+            "siguiente": self.cursor_siguiente,
+            "anterior": self.cursor_anterior,
+            "total": self.total,
+            "total_aproximado": self.total_aproximado,
+        }
+
+
+# ===========================================
+# CONSULTA
+# ===========================================
+
+def _campo(queryset, nombre):
+    """Campo de modelo (o anotación) usado para convertir los valores del cursor."""
+    if nombre in queryset.query.annotations:
+        return queryset.query.annotations[nombre].output_field
+    if nombre == "pk":
+        return queryset.model._meta.pk
+    try:
+        return queryset.model._meta.get_field(nombre)
+    except FieldDoesNotExist:
+        raise ValueError(f"Campo de orden desconocido: {nombre}")
+
+
+def _filtro_keyset(orden, valores, direccion):
+    """
+    Q que selecciona las filas posteriores (o anteriores) a la frontera.
+    Para (-fecha, id): fecha < f OR (fecha = f AND id > i).
+    """
+    alternativas = []
+    for i, (nombre, descendente) in enumerate(orden):
+        hacia_menores = descendente == (direccion == SIGUIENTE)
+        comparacion = "lt" if hacia_menores else "gt"
+        iguales = [Q(**{orden[j][0]: valores[j]}) for j in range(i)]
+        alternativas.append(
+            reduce(and_, iguales + [Q(**{f"{nombre}__{comparacion}": valores[i]})])
+        )
+    return reduce(or_, alternativas)
+
+
+def paginar_por_cursor(queryset, orden, cursor=None, tamano=20, contar=False):
+    """
+    Obtiene una página del queryset ordenado por una clave única.
+
+    Args:
+        queryset: QuerySet a paginar (su orden previo se reemplaza)
+        orden: Campos de orden, el último debe ser único (ej: ("-fecha", "id"))
+        cursor: Cursor recibido del cliente, o None para la primera página
+        tamano: Filas por página
+        contar: Si True, calcula el total acotado a LIMITE_CONTEO
+
+    Returns:
+        PaginaCursor
+
+    Raises:
+        ValueError: Si el cursor es inválido o no corresponde al orden
+    """
+    orden = [(campo.lstrip("-"), campo.startswith("-")) for campo in orden]
+    direccion = SIGUIENTE
+    filas = queryset
+
+    if cursor:
+        direccion, valores = decodificar_cursor(cursor)
+        if len(valores) != len(orden):
+            raise ValueError("Cursor de paginación inválido")
+        try:
+            valores = [
+                _campo(queryset, nombre).to_python(valor)
+                for (nombre, _), valor in zip(orden, valores)
+            ]
+        except ValidationError as e:
+            raise ValueError("Cursor de paginación inválido") from e
+        filas = filas.filter(_filtro_keyset(orden, valores, direccion))
+
+    # Hacia atrás se recorre con el orden invertido y luego se da vuelta
+    invertir = direccion == ANTERIOR
+    filas = filas.order_by(
+        *[
+            f"-{nombre}" if descendente != invertir else nombre
+            for nombre, descendente in orden
+        ]
+    )
+
+    object_list = list(filas[: tamano + 1])
+    hay_mas = len(object_list) > tamano
+    object_list = object_list[:tamano]
+    if invertir:
+        object_list.reverse()
+
+    def _cursor(fila, sentido):
+        return codificar_cursor([getattr(fila, nombre) for nombre, _ in orden], sentido)
+
+    if invertir:
+        tiene_siguiente, tiene_anterior = bool(cursor), hay_mas
+    else:
+        tiene_siguiente, tiene_anterior = hay_mas, bool(cursor)
+
+    pagina = PaginaCursor(
+        object_list,
+        _cursor(object_list[-1], SIGUIENTE) if tiene_siguiente and object_list else None,
+        _cursor(object_list[0], ANTERIOR) if tiene_anterior and object_list else None,
+    )
+
+    if contar:
+        total = queryset.order_by()[: LIMITE_CONTEO + 1].count()
+        pagina.total = min(total, LIMITE_CONTEO)
+        pagina.total_aproximado = total > LIMITE_CONTEO
+    return pagina
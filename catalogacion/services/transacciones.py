@@ -0,0 +1,63 @@
+"""
+Trabajo diferido hasta el commit, agrupado por clave.
+
+Los handlers de señales de una misma transacción piden muchas veces el mismo
+recálculo (un formset guarda veinte hijos de la misma obra).
+programar_una_vez(clave, funcion) lo registra con transaction.on_commit y, al
+confirmar, ejecuta la función una sola vez por clave.
+
+Cada llamada registra su propio callback, así que si un savepoint o la
+transacción hacen rollback Django descarta los suyos y los que sobreviven
+siguen cubriendo la clave. Los callbacks de una transacción comparten un
+lote que recuerda qué claves ya se ejecutaron; el lote se renueva en cuanto
+empieza a ejecutarse, de modo que la transacción siguiente no hereda sus
+claves (y uno descartado por rollback no ejecutó ninguna).
+
+Uso:
+    programar_una_vez(("ficha", obra_id), lambda: actualizar_ficha_publica(obra_id))
+"""
+
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+_estado = threading.local()
+
+
+class _Lote:
+    """Claves ya ejecutadas por los callbacks de una transacción."""
+
+    def __init__(self):
+        self.ejecutadas = set()
+        self.iniciado = False
+
+    def ejecutar(self, clave, funcion):
+        self.iniciado = True
+        if clave in self.ejecutadas:
+            return
+        self.ejecutadas.add(clave)
+        funcion()
+
+
+def _lote_actual(using):
+    lotes = getattr(_estado, "lotes", None)
+    if lotes is None:
+        lotes = _estado.lotes = {}
+    lote = lotes.get(using)
+    if lote is None or lote.iniciado:
+        lote = lotes[using] = _Lote()
+    return lote
+
+
+def programar_una_vez(clave, funcion, using=None):
+    """
+    Ejecuta funcion() al confirmar la transacción actual, una sola vez por
+    clave aunque se programe muchas veces. Fuera de un bloque atómico se
+    ejecuta inmediatamente.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    if not transaction.get_connection(using).in_atomic_block:
+        funcion()
+        return
+    lote = _lote_actual(using)
+    transaction.on_commit(lambda: lote.ejecutar(clave, funcion), using=using)
@@ -0,0 +1,95 @@
+"""
+Tests de la búsqueda de texto completo (motor FTS5 de SQLite).
+"""
+
+import importlib
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+
+from catalogacion.models import ObraGeneral, Sumario520
+from catalogacion.services import busqueda
+
+migracion = importlib.import_module("catalogacion.migrations.0014_indice_busqueda_obra")
+
+
+def _fts5_disponible():
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+@unittest.skipUnless(_fts5_disponible(), "SQLite sin FTS5")
+class BusquedaFts5Test(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Sin migraciones (settings de tests) la tabla FTS5 no existe
+        if busqueda.TABLA_FTS not in connection.introspection.table_names():
+            with connection.cursor() as cursor:
+                for sql in migracion.SQL_SQLITE:
+                    cursor.execute(sql)
+
+        def crear(titulo):
+            return ObraGeneral.objects.create(
+                tipo_registro="d",
+                nivel_bibliografico="m",
+                titulo_principal=titulo,
+                centro_catalogador="UNL",
+            )
+
+        cls.en_sumario = crear("Vals")
+        Sumario520.objects.create(obra=cls.en_sumario, sumario="Un pasillo lento")
+        cls.en_titulo = crear("Pasillo quiteño")
+        cls.cancion = crear("Canción de cuna")
+        busqueda.reconstruir_indice()
+
+    def setUp(self):
+        busqueda._motor = None
+        self.addCleanup(setattr, busqueda, "_motor", None)
+
+    def test_usa_fts5(self):
+        self.assertEqual(busqueda.motor_busqueda(), "fts5")
+
+    def test_el_titulo_pesa_mas_que_el_sumario(self):
+        self.assertEqual(
+            busqueda.buscar_ids("pasillo"), [self.en_titulo.pk, self.en_sumario.pk]
+        )
+
+    def test_prefijos_sin_tildes_y_todos_los_terminos(self):
+        self.assertEqual(busqueda.buscar_ids("CANCION cun"), [self.cancion.pk])
+        self.assertEqual(busqueda.buscar_ids("pasil quit"), [self.en_titulo.pk])
+        self.assertEqual(busqueda.buscar_ids("pasillo cuna"), [])
+
+    def test_por_numero_de_control(self):
+        numero = self.cancion.num_control
+        self.assertEqual(busqueda.buscar_ids(numero), [self.cancion.pk])
+        self.assertEqual(busqueda.buscar_ids(numero.lstrip("M")), [self.cancion.pk])
+
+    def test_truncado(self):
+        self.assertEqual(len(busqueda.buscar_ids("pasillo", limite=1)), 1)
+        self.assertTrue(busqueda.busqueda_truncada("pasillo", limite=1))
+        self.assertFalse(busqueda.busqueda_truncada("pasillo", limite=2))
+        self.assertFalse(busqueda.busqueda_truncada(""))
+
+    def test_filtrar_ordena_por_relevancia(self):
+        qs = busqueda.filtrar_por_busqueda(ObraGeneral.objects.all(), "pasillo")
+        self.assertEqual(list(qs), [self.en_titulo, self.en_sumario])
+
+    def test_el_indice_sigue_los_cambios(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cancion.titulo_principal = "Tonada"
+            self.cancion.save()
+        self.assertEqual(busqueda.buscar_ids("cancion"), [])
+        self.assertEqual(busqueda.buscar_ids("tonada"), [self.cancion.pk])
+
+
+class ConsultaPostgresqlTest(unittest.TestCase):
+    def test_cada_termino_en_ambas_configuraciones(self):
+        sql, params = busqueda._tsquery_postgresql(["m0001", "quito"])
+        self.assertEqual(sql.count("to_tsquery('simple', %s)"), 2)
+        self.assertEqual(sql.count("to_tsquery('spanish', %s)"), 2)
+        self.assertEqual(sql.count("&&"), 1)
+        self.assertEqual(params, ["m0001:*", "m0001:*", "quito:*", "quito:*"])
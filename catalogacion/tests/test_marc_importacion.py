@@ -0,0 +1,136 @@
+"""
+Tests de la importación masiva MARC21 (ISO 2709 y MARCXML).
+"""
+
+import io
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from catalogacion.models import AutoridadPersona, NotaGeneral500, ObraGeneral
+from catalogacion.services.marc_exportacion import iter_exportacion
+from catalogacion.services.marc_importacion import ETIQUETAS_DERIVADAS, importar_marc
+from catalogacion.services.marc_registro import Registro, construir_registro, queryset_marc
+from catalogacion.services.marc_serializacion import a_iso2709
+
+LEADER = "00000ncm a2200000 i 4500"
+
+
+def _registro(control, titulo, *campos):
+    registro = Registro(LEADER)
+    registro.control("001", control)
+    registro.datos("245", "10", [("a", titulo)])
+    for tag, indicadores, subcampos in campos:
+        registro.datos(tag, indicadores, subcampos)
+    return registro
+
+
+def _contenido(obra):
+    """Campos MARC de la obra sin los que se recalculan al importar."""
+    registro = construir_registro(queryset_marc(ObraGeneral.objects.filter(pk=obra.pk)).get())
+    return [
+        (c.tag, c.indicadores, c.subcampos)
+        for c in registro.campos
+        if not c.es_control and c.tag not in ETIQUETAS_DERIVADAS
+    ]
+
+
+class ImportacionMarcTest(TestCase):
+    def _archivo(self):
+        registros = [
+            _registro(
+                "L1",
+                "Colección de pasillos",
+                ("100", "1#", [("a", "Pérez, Juan")]),
+                ("774", "0#", [("a", "Pérez, Juan"), ("t", "Pasillo"), ("w", "L2")]),
+            ),
+            _registro(
+                "L2",
+                "Pasillo",
+                ("100", "1#", [("a", "Pérez, Juan")]),
+                # Sin $a: el enlace se omite con un aviso
+                ("773", "0#", [("t", "Colección de pasillos"), ("w", "L1")]),
+            ),
+            # Sin 245: error de mapeo
+            Registro(LEADER),
+        ]
+        registros[2].control("001", "L3")
+        return b"".join(a_iso2709(r) for r in registros)
+
+    def test_simulacion_y_carga_reportan_lo_mismo(self):
+        datos = self._archivo()
+        simulado = importar_marc(io.BytesIO(datos), "mrc", simular=True)
+        self.assertEqual(ObraGeneral.objects.count(), 0)
+
+        real = importar_marc(io.BytesIO(datos), "mrc", tamano_lote=1)
+        self.assertEqual(real.leidos, simulado.leidos)
+        self.assertEqual(real.importados, simulado.importados)
+        self.assertEqual(real.errores, simulado.errores)
+        self.assertEqual(real.avisos, simulado.avisos)
+        self.assertEqual(real.etiquetas_ignoradas, simulado.etiquetas_ignoradas)
+        self.assertEqual(real.autoridades_nuevas, simulado.autoridades_nuevas)
+
+        self.assertEqual(real.importados, 2)
+        self.assertEqual([(p, c) for p, c, _ in real.errores], [(3, "L3")])
+        self.assertTrue(any("773" in aviso for _, _, aviso in real.avisos))
+        self.assertEqual(ObraGeneral.objects.count(), real.importados)
+        self.assertFalse(ObraGeneral.objects.filter(publicada=True).exists())
+
+    def test_autoridades_y_enlaces(self):
+        existente = AutoridadPersona.objects.create(apellidos_nombres="Pérez, Juan")
+        resultado = importar_marc(io.BytesIO(self._archivo()), "mrc", tamano_lote=1)
+
+        self.assertEqual(resultado.autoridades_nuevas["AutoridadPersona"], 0)
+        self.assertEqual(AutoridadPersona.objects.count(), 1)
+        coleccion = ObraGeneral.objects.get(titulo_principal="Colección de pasillos")
+        pasillo = ObraGeneral.objects.get(titulo_principal="Pasillo")
+        self.assertEqual(coleccion.compositor, existente)
+        self.assertNotIn(coleccion.num_control, ("L1", "L2"))
+        # El $w apunta a un registro de un lote posterior: se enlaza al terminar
+        enlace = coleccion.enlaces_unidades_774.get()
+        self.assertEqual(
+            list(enlace.numeros_control.values_list("obra_relacionada", flat=True)), [pasillo.pk]
+        )
+        self.assertEqual(resultado.enlaces_sin_resolver, [])
+
+    def test_ida_y_vuelta_igual_en_mrc_y_marcxml(self):
+        compositor = AutoridadPersona.objects.create(apellidos_nombres="Durán, Sixto María")
+        originales = []
+        for numero in range(3):
+            obra = ObraGeneral.objects.create(
+                tipo_registro="d",
+                nivel_bibliografico="m",
+                centro_catalogador="UNL",
+                titulo_principal=f"Yaraví ñ {numero}",
+                compositor=compositor,
+            )
+            NotaGeneral500.objects.create(obra=obra, nota_general=f"Nota «{numero}»")
+            originales.append(obra)
+        esperado = [_contenido(obra) for obra in originales]
+        qs = ObraGeneral.objects.filter(pk__in=[o.pk for o in originales]).order_by("pk")
+
+        for formato in ("mrc", "marcxml"):
+            with self.subTest(formato=formato):
+                datos = b"".join(iter_exportacion(qs, formato))
+                ultimo = ObraGeneral.objects.order_by("-pk").first().pk
+                resultado = importar_marc(io.BytesIO(datos), formato, tamano_lote=2)
+
+                self.assertEqual((resultado.importados, resultado.errores), (3, []))
+                importadas = ObraGeneral.objects.filter(pk__gt=ultimo).order_by("pk")
+                self.assertEqual([_contenido(obra) for obra in importadas], esperado)
+        self.assertEqual(AutoridadPersona.objects.count(), 1)
+
+    def test_comando_dry_run(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            archivo = Path(directorio) / "catalogo.mrc"
+            archivo.write_bytes(self._archivo())
+            salida, errores = io.StringIO(), io.StringIO()
+            call_command(
+                "importar_marc", str(archivo), dry_run=True, stdout=salida, stderr=errores
+            )
+
+        self.assertEqual(ObraGeneral.objects.count(), 0)
+        self.assertIn("3 registros leídos, 2 válidos, 1 con errores", salida.getvalue())
+        self.assertIn("Registro 3 (L3)", errores.getvalue())
@@ -0,0 +1,138 @@
+"""
+Tests de la serialización MARC21 binaria (ISO 2709).
+"""
+
+import io
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from catalogacion.models import ObraGeneral
+from catalogacion.services.marc_registro import Registro, construir_registro, queryset_marc
+from catalogacion.services.marc_serializacion import (
+    LARGO_MAX_CAMPO,
+    RegistroDemasiadoLargo,
+    a_iso2709,
+    iter_iso2709,
+    iter_leer_iso2709,
+    leer_iso2709,
+)
+
+LEADER = "00000ncm a2200000 i 4500"
+
+
+def _registro(control, titulo, *campos):
+    registro = Registro(LEADER)
+    registro.control("001", control)
+    registro.datos("245", "10", [("a", titulo)])
+    for tag, indicadores, subcampos in campos:
+        registro.datos(tag, indicadores, subcampos)
+    return registro
+
+
+def _contenido(registro):
+    return [
+        (c.tag, c.dato) if c.es_control else (c.tag, c.indicadores, c.subcampos)
+        for c in registro.campos
+    ]
+
+
+class Iso2709Test(SimpleTestCase):
+    def test_ida_y_vuelta_con_caracteres_multibyte(self):
+        registro = _registro(
+            "M000001",
+            "Canción de cuna ♪ – Ñandú",
+            ("100", "1#", [("a", "Muñoz, José"), ("d", "1900-1980")]),
+            ("500", "##", [("a", "Dedicatoria: 日本語のテキスト")]),
+        )
+        datos = a_iso2709(registro)
+
+        # Longitudes y posiciones se cuentan en bytes, no en caracteres
+        self.assertEqual(int(datos[:5]), len(datos))
+        self.assertEqual(datos[9:10], b"a")
+        leido = leer_iso2709(datos)
+        self.assertEqual(_contenido(leido), _contenido(registro))
+        self.assertEqual(leido.leader, datos[:24].decode("ascii"))
+
+    def test_directorio(self):
+        datos = a_iso2709(_registro("M1", "Ñ"))
+        base = int(datos[12:17])
+        # Líder + 2 entradas de 12 bytes + fin de campo
+        self.assertEqual(base, 24 + 2 * 12 + 1)
+        self.assertEqual(datos[24:36], b"001000300000")
+        # "10" + $a + "Ñ" (2 bytes) + fin de campo
+        self.assertEqual(datos[36:48], b"245000700003")
+        self.assertEqual(datos[base + 3 : base + 10], "10\x1faÑ\x1e".encode())
+        self.assertEqual(datos[-1:], b"\x1d")
+
+    def test_separadores_en_los_datos_se_eliminan(self):
+        registro = _registro("M000002", "Título\x1fcon\x1eseparadores\x1d")
+        leido = leer_iso2709(a_iso2709(registro))
+        self.assertEqual(leido.campos_de("245")[0].subcampos, [("a", "Títuloconseparadores")])
+
+    def test_lectura_de_varios_registros_seguidos(self):
+        registros = [_registro(f"M{n:06d}", f"Obra ñ {n}") for n in range(1, 4)]
+        origen = io.BytesIO(b"".join(a_iso2709(r) for r in registros))
+        leidos = list(iter_leer_iso2709(origen))
+        self.assertEqual([_contenido(r) for r in leidos], [_contenido(r) for r in registros])
+
+    def test_longitud_inconsistente(self):
+        datos = a_iso2709(_registro("M000003", "Obra"))
+        with self.assertRaises(ValueError):
+            leer_iso2709(datos[:-2] + datos[-1:])
+
+    def test_registros_demasiado_largos_se_omiten(self):
+        largo = _registro("M000004", "ñ" * LARGO_MAX_CAMPO)
+        with self.assertRaises(RegistroDemasiadoLargo):
+            a_iso2709(largo)
+
+        registros = [_registro("M000005", "Antes"), largo, _registro("M000006", "Después")]
+        with self.assertLogs("catalogacion", "WARNING"):
+            escritos = list(iter_iso2709(registros))
+        self.assertEqual(
+            [leer_iso2709(d).campos_de("001")[0].dato for d in escritos],
+            ["M000005", "M000006"],
+        )
+
+
+class ExportacionIso2709Test(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.obras = [
+            ObraGeneral.objects.create(
+                tipo_registro="d",
+                nivel_bibliografico="m",
+                centro_catalogador="UNL",
+                titulo_principal=titulo,
+            )
+            for titulo in ("Pasillo en sol menor", "Yaraví ñ")
+        ]
+
+    def test_leader_de_la_obra(self):
+        leader = self.obras[0].generar_leader()
+        self.assertEqual(len(leader), 24)
+        self.assertEqual((leader[6], leader[7], leader[9], leader[10:12]), ("d", "m", "a", "22"))
+        self.assertEqual(leader[20:], "4500")
+
+    def test_ida_y_vuelta_de_una_obra(self):
+        obra = queryset_marc(ObraGeneral.objects.filter(pk=self.obras[1].pk)).get()
+        registro = construir_registro(obra)
+        leido = leer_iso2709(a_iso2709(registro))
+        self.assertEqual(_contenido(leido), _contenido(registro))
+        self.assertEqual(leido.campos_de("245")[0].subcampos[0][1][:9], "Yaraví ñ")
+
+    def test_accion_del_admin(self):
+        admin = get_user_model().objects.create_superuser("admin@example.com", "clave")
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse("admin:catalogacion_obrageneral_changelist"),
+            {"action": "exportar_iso2709", "_selected_action": [o.pk for o in self.obras]},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/marc")
+        leidos = list(iter_leer_iso2709(io.BytesIO(b"".join(response.streaming_content))))
+        self.assertEqual(
+            sorted(r.campos_de("001")[0].dato for r in leidos),
+            sorted(o.num_control for o in self.obras),
+        )
@@ -0,0 +1,85 @@
+"""
+Tests de la paginación por cursor (keyset).
+"""
+
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from catalogacion.models import ObraGeneral
+from catalogacion.services.paginacion import (
+    codificar_cursor,
+    decodificar_cursor,
+    paginar_por_cursor,
+)
+
+ORDEN = ("-fecha_creacion_sistema", "id")
+
+
+class CursorTest(SimpleTestCase):
+    def test_ida_y_vuelta(self):
+        fecha = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        cursor = codificar_cursor([fecha, 42, "ñ"], "a")
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decodificar_cursor(cursor), ("a", [fecha.isoformat(), 42, "ñ"]))
+
+    def test_cursores_invalidos(self):
+        for cursor in ("", "%%%", "bm8gZXMganNvbg", codificar_cursor([1], "x"), "e30"):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decodificar_cursor(cursor)
+
+
+class PaginarPorCursorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for numero in range(5):
+            ObraGeneral.objects.create(
+                tipo_registro="d",
+                nivel_bibliografico="m",
+                titulo_principal=f"Obra {numero}",
+                centro_catalogador="UNL",
+                publicada=True,
+            )
+        # Misma fecha para todas: el id desempata
+        ObraGeneral.objects.update(
+            fecha_creacion_sistema=datetime(2024, 1, 1, tzinfo=timezone.utc)
+        )
+        cls.ids = list(ObraGeneral.objects.order_by(*ORDEN).values_list("id", flat=True))
+
+    def _ids(self, pagina):
+        return [obra.id for obra in pagina.object_list]
+
+    def test_recorre_hacia_adelante_y_atras(self):
+        qs = ObraGeneral.objects.all()
+        primera = paginar_por_cursor(qs, ORDEN, tamano=2, contar=True)
+        self.assertEqual(self._ids(primera), self.ids[:2])
+        self.assertEqual(primera.total, 5)
+        self.assertFalse(primera.has_previous())
+
+        segunda = paginar_por_cursor(qs, ORDEN, primera.cursor_siguiente, tamano=2)
+        tercera = paginar_por_cursor(qs, ORDEN, segunda.cursor_siguiente, tamano=2)
+        self.assertEqual(self._ids(segunda), self.ids[2:4])
+        self.assertEqual(self._ids(tercera), self.ids[4:])
+        self.assertFalse(tercera.has_next())
+
+        anterior = paginar_por_cursor(qs, ORDEN, tercera.cursor_anterior, tamano=2)
+        self.assertEqual(self._ids(anterior), self.ids[2:4])
+
+    def test_no_repite_filas_si_se_insertan_obras(self):
+        qs = ObraGeneral.objects.all()
+        primera = paginar_por_cursor(qs, ORDEN, tamano=2)
+        ObraGeneral.objects.create(
+            tipo_registro="d",
+            nivel_bibliografico="m",
+            titulo_principal="Nueva",
+            centro_catalogador="UNL",
+        )
+        segunda = paginar_por_cursor(qs, ORDEN, primera.cursor_siguiente, tamano=2)
+        self.assertEqual(self._ids(segunda), self.ids[2:4])
+
+    def test_cursor_invalido_en_la_vista_publica(self):
+        response = self.client.get(
+            reverse("catalogo_publico:lista_obras"), {"cursor": "no-es-un-cursor"}
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,54 @@
+"""
+Tests de las columnas almacenadas pais_principal y signatura de ObraGeneral.
+"""
+
+from django.test import TestCase
+
+from catalogacion.models import CodigoPaisEntidad, ObraGeneral
+
+
+class PaisPrincipalTest(TestCase):
+    def setUp(self):
+        self.obra = ObraGeneral.objects.create(
+            tipo_registro="d",
+            nivel_bibliografico="m",
+            titulo_principal="Pasillo",
+            centro_catalogador="UNL",
+        )
+
+    def _almacenado(self):
+        return ObraGeneral.objects.values_list("pais_principal", "signatura").get(
+            pk=self.obra.pk
+        )
+
+    def test_cambiar_el_044_actualiza_pais_y_signatura(self):
+        self.assertEqual(self._almacenado(), ("EC", "UNL-BLMP-EC-Ms-M000001"))
+
+        codigo = CodigoPaisEntidad.objects.create(obra=self.obra, codigo_pais="pe")
+        self.assertEqual(self._almacenado(), ("PE", "UNL-BLMP-PE-Ms-M000001"))
+
+        codigo.delete()
+        self.assertEqual(self._almacenado(), ("EC", "UNL-BLMP-EC-Ms-M000001"))
+
+    def test_guardar_una_instancia_desactualizada_no_restaura_el_pais(self):
+        desactualizada = ObraGeneral.objects.get(pk=self.obra.pk)
+        CodigoPaisEntidad.objects.create(obra=self.obra, codigo_pais="pe")
+
+        desactualizada.titulo_principal = "Vals"
+        desactualizada.save()
+        self.assertEqual(self._almacenado(), ("PE", "UNL-BLMP-PE-Ms-M000001"))
+
+    def test_update_fields_incluye_pais_y_signatura(self):
+        ObraGeneral.objects.filter(pk=self.obra.pk).update(pais_principal="", signatura="")
+        CodigoPaisEntidad.objects.bulk_create(
+            [CodigoPaisEntidad(obra=self.obra, codigo_pais="ar")]  # sin señales
+        )
+
+        self.obra.titulo_principal = "Vals"
+        self.obra.save(update_fields=["titulo_principal"])
+        self.assertEqual(self._almacenado(), ("AR", "UNL-BLMP-AR-Ms-M000001"))
+
+    def test_resolver_el_pais_no_consulta_la_bd(self):
+        obra = ObraGeneral.objects.get(pk=self.obra.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(obra.signatura_publica_display, obra.signatura_publica_display)
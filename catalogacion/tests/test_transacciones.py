@@ -0,0 +1,41 @@
+"""
+Tests de programar_una_vez (trabajo diferido hasta el commit).
+"""
+
+from django.db import transaction
+from django.test import TestCase
+
+from catalogacion.services.transacciones import programar_una_vez
+
+
+class ProgramarUnaVezTest(TestCase):
+    def setUp(self):
+        self.ejecutadas = []
+
+    def _funcion(self, nombre):
+        return lambda: self.ejecutadas.append(nombre)
+
+    def test_una_ejecucion_por_clave(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                programar_una_vez("a", self._funcion("a"))
+            programar_una_vez("b", self._funcion("b"))
+            self.assertEqual(self.ejecutadas, [])
+        self.assertEqual(self.ejecutadas, ["a", "b"])
+
+    def test_sobrevive_al_rollback_de_un_savepoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    programar_una_vez("a", self._funcion("descartada"))
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            programar_una_vez("a", self._funcion("a"))
+        self.assertEqual(self.ejecutadas, ["a"])
+
+    def test_la_transaccion_siguiente_no_hereda_claves(self):
+        for nombre in ("primera", "segunda"):
+            with self.captureOnCommitCallbacks(execute=True):
+                programar_una_vez("a", self._funcion(nombre))
+        self.assertEqual(self.ejecutadas, ["primera", "segunda"])
@@ -3,8 +3,8 @@ from django.views.decorators.http import require_GET
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
-from django.db.models import Q
 from catalogacion.models import ObraGeneral
+from catalogacion.services.busqueda import filtrar_por_busqueda
 import json
 
 @require_GET
@@ -41,20 +41,14 @@ def buscar_obras(request):
     if len(q) < 2:
         return JsonResponse({"results": []})
 
-    # Búsqueda ampliada: num_control, título, compositor, signatura
-    qs = (
+    # Búsqueda ampliada (índice de texto completo): num_control, título,
+    # compositor, signatura 852, materias...
+    qs = filtrar_por_busqueda(
         ObraGeneral.objects
         .select_related("compositor", "titulo_uniforme")
-        .prefetch_related("ubicaciones_852")
-        .filter(
-            Q(num_control__icontains=q) |
-            Q(titulo_principal__icontains=q) |
-            Q(compositor__apellidos_nombres__icontains=q) |
-            Q(ubicaciones_852__signatura_original__icontains=q)
-        )
-        .distinct()
-        .order_by("num_control")[:20]
-    )
+        .prefetch_related("ubicaciones_852"),
+        q,
+    )[:20]
 
     results = []
     for o in qs:
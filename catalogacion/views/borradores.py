@@ -391,16 +391,22 @@ from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views.generic import DeleteView, DetailView, ListView
 
+from catalogacion.views.paginacion import PaginacionCursorMixin
 from usuarios.mixins import CatalogadorRequiredMixin
 
 
-class ListaBorradoresView(CatalogadorRequiredMixin, ListView):
+class ListaBorradoresView(CatalogadorRequiredMixin, PaginacionCursorMixin, ListView):
     """Vista para listar borradores activos del usuario actual"""
 
     model = BorradorObra
     template_name = "catalogacion/lista_borradores.html"
     context_object_name = "borradores"
     paginate_by = 20
+    orden_cursor = ("-fecha_modificacion", "id")
+
+    def usar_cursor(self):
+        # La búsqueda de borradores no cambia el orden
+        return True
 
     def get_queryset(self):
         """Obtener solo borradores activos del usuario, ordenados por fecha de modificación"""
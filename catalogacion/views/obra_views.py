@@ -10,7 +10,7 @@ from pathlib import Path
 from django.conf import settings
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import Q
+from django.db.models.functions import Coalesce
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse, reverse_lazy
@@ -25,6 +25,7 @@ from django.views.generic import (
 
 from catalogacion.forms import ObraGeneralForm
 from catalogacion.forms.formsets import Funcion700FormSet
+from catalogacion.services.busqueda import filtrar_por_busqueda
 from catalogacion.models import (
     NombreRelacionado700,
     NumeroControl773,
@@ -37,6 +38,7 @@ from catalogacion.views.obra_config import (
     get_campos_visibles,
 )
 from catalogacion.views.obra_mixins import ObraFormsetMixin
+from catalogacion.views.paginacion import PaginacionCursorMixin
 from usuarios.mixins import CatalogadorRequiredMixin
 
 # Configurar logger
@@ -805,9 +807,9 @@ class DetalleObraView(CatalogadorRequiredMixin, DetailView):
         return obj
 
 
-class ListaObrasView(CatalogadorRequiredMixin, ListView):
+class ListaObrasView(CatalogadorRequiredMixin, PaginacionCursorMixin, ListView):
     """
-    Vista de listado de obras con paginación y búsqueda.
+    Vista de listado de obras con paginación por cursor y búsqueda.
     Permite filtrar obras por título, número de control o compositor.
     """
 
@@ -815,6 +817,7 @@ class ListaObrasView(CatalogadorRequiredMixin, ListView):
     template_name = "catalogacion/lista_obras.html"
     context_object_name = "obras"
     paginate_by = 20
+    contar_total = True
 
     def get_queryset(self):
         """Obtener queryset con búsqueda y optimizaciones, filtrado por usuario"""
@@ -830,17 +833,23 @@ class ListaObrasView(CatalogadorRequiredMixin, ListView):
             if not self.request.user.es_admin:
                 queryset = queryset.filter(catalogador=self.request.user)
 
-        # Filtro de búsqueda
+        # Filtro de búsqueda (texto completo, ordenado por relevancia)
         q = self.request.GET.get("q")
         if q:
-            queryset = queryset.filter(
-                Q(titulo_principal__icontains=q)
-                | Q(num_control__icontains=q)
-                | Q(compositor__apellidos_nombres__icontains=q)
-            )
+            queryset = filtrar_por_busqueda(queryset, q)
 
         return queryset
 
+    def serializar_objeto(self, obra):
+        return {
+            "id": obra.id,
+            "num_control": obra.num_control,
+            "titulo": obra.titulo_principal or "",
+            "compositor": obra.compositor.apellidos_nombres if obra.compositor else "",
+            "publicada": obra.publicada,
+            "url": reverse("catalogacion:detalle_obra", args=[obra.pk]),
+        }
+
 
 class EliminarObraView(CatalogadorRequiredMixin, DeleteView):
     """
@@ -926,7 +935,7 @@ class EliminarObraView(CatalogadorRequiredMixin, DeleteView):
         return redirect(self.success_url)
 
 
-class PapeleraObrasView(CatalogadorRequiredMixin, ListView):
+class PapeleraObrasView(CatalogadorRequiredMixin, PaginacionCursorMixin, ListView):
     """
     Vista para mostrar obras eliminadas (papelera).
     Permite restaurar o purgar permanentemente.
@@ -936,13 +945,20 @@ class PapeleraObrasView(CatalogadorRequiredMixin, ListView):
     template_name = "catalogacion/papelera_obras.html"
     context_object_name = "obras"
     paginate_by = 20
+    # fecha_eliminacion admite NULL; el cursor usa la fecha de modificación de respaldo
+    orden_cursor = ("-orden_eliminacion", "id")
 
     def get_queryset(self):
         """Obtener solo obras eliminadas (activo=False)"""
         return (
             ObraGeneral.objects.filter(activo=False)
             .select_related("compositor", "catalogador")
-            .order_by("-fecha_eliminacion")
+            .annotate(
+                orden_eliminacion=Coalesce(
+                    "fecha_eliminacion", "fecha_modificacion_sistema"
+                )
+            )
+            .order_by("-orden_eliminacion")
         )
 
     def get_context_data(self, **kwargs):
@@ -0,0 +1,115 @@
+"""
+Mixin de paginación por cursor para ListView.
+"""
+
+from django.http import Http404, JsonResponse
+
+from catalogacion.services.busqueda import MAX_RESULTADOS, busqueda_truncada
+from catalogacion.services.paginacion import paginar_por_cursor
+
+
+class PaginacionCursorMixin:
+    """
+    Reemplaza la paginación por OFFSET de ListView por paginación por cursor
+    (?cursor=...) cuando el listado está en su orden natural.
+
+    Con búsqueda de texto el orden es por relevancia, así que se mantiene el
+    paginador clásico (?page=N); el resultado rankeado ya está acotado a
+    MAX_RESULTADOS y, si la consulta tenía más coincidencias, el contexto
+    lo indica con `busqueda_truncada` (y el total como aproximado).
+
+    En ambos modos deja en el contexto `url_pagina_anterior`,
+    `url_pagina_siguiente`, `total_resultados` y `total_aproximado`, para que
+    las plantillas no dependan del modo. Con ?formato=json responde JSON si la
+    vista define `serializar_objeto`.
+    """
+
+    orden_cursor = ("-fecha_creacion_sistema", "id")
+    parametro_cursor = "cursor"
+    # Calcular el total (acotado a LIMITE_CONTEO) en modo cursor
+    contar_total = False
+
+    def usar_cursor(self):
+        return not self.request.GET.get("q")
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.usar_cursor():
+            return super().paginate_queryset(queryset, page_size)
+
+        try:
+            pagina = paginar_por_cursor(
+                queryset,
+                self.orden_cursor,
+                cursor=self.request.GET.get(self.parametro_cursor),
+                tamano=page_size,
+                contar=self.contar_total,
+            )
+        except ValueError:
+            raise Http404("Cursor de paginación inválido")
+        return (None, pagina, pagina.object_list, pagina.has_other_pages())
+
+    def _url_con(self, **valores):
+        params = self.request.GET.copy()
+        for clave in ("page", self.parametro_cursor):
+            params.pop(clave, None)
+        params.update(valores)
+        return "?" + params.urlencode()
+
+    def get_paginacion_context(self, paginator, page):
+        if page is None:
+            return {}
+
+        if paginator is None:
+            return {
+                "url_pagina_anterior": (
+                    self._url_con(**{self.parametro_cursor: page.cursor_anterior})
+                    if page.has_previous() else ""
+                ),
+                "url_pagina_siguiente": (
+                    self._url_con(**{self.parametro_cursor: page.cursor_siguiente})
+                    if page.has_next() else ""
+                ),
+                "total_resultados": page.total,
+                "total_aproximado": page.total_aproximado,
+            }
+
+        truncada = busqueda_truncada(self.request.GET.get("q", ""))
+        return {
+            "url_pagina_anterior": (
+                self._url_con(page=page.previous_page_number())
+                if page.has_previous() else ""
+            ),
+            "url_pagina_siguiente": (
+                self._url_con(page=page.next_page_number())
+                if page.has_next() else ""
+            ),
+            "total_resultados": paginator.count,
+            "total_aproximado": truncada,
+            "busqueda_truncada": truncada,
+            "max_resultados_busqueda": MAX_RESULTADOS,
+        }
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(
+            self.get_paginacion_context(context.get("paginator"), context.get("page_obj"))
+        )
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get("formato") == "json" and hasattr(self, "serializar_objeto"):
+            return JsonResponse(
+                {
+                    "resultados": [
+                        self.serializar_objeto(obj) for obj in context["object_list"]
+                    ],
+                    "paginacion": {
+                        "siguiente": context.get("url_pagina_siguiente", ""),
+                        "anterior": context.get("url_pagina_anterior", ""),
+                        "total": context.get("total_resultados"),
+                        "total_aproximado": context.get("total_aproximado", False),
+                        "busqueda_truncada": context.get("busqueda_truncada", False),
+                    },
+                }
+            )
+        return super().render_to_response(context, **response_kwargs)
@@ -5,3 +5,6 @@ class CatalogoPublicoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'catalogo_publico'
     verbose_name = 'Catálogo Público'
+
+    def ready(self):
+        import catalogo_publico.signals  # noqa
@@ -0,0 +1 @@
+# Management package for catalogo_publico app
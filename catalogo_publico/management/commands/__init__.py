@@ -0,0 +1 @@
+# Commands package for catalogo_publico app
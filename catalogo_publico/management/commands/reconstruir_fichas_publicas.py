@@ -0,0 +1,27 @@
+"""
+Comando para reconstruir la tabla FichaPublica.
+Crea las fichas de todas las obras publicadas y elimina las huérfanas.
+Útil tras la migración inicial o después de cargas masivas.
+
+Uso:
+    python manage.py reconstruir_fichas_publicas
+"""
+
+from django.core.management.base import BaseCommand
+
+from catalogo_publico.services.ficha_service import reconstruir_fichas_publicas
+
+
+class Command(BaseCommand):
+    help = "Reconstruye las fichas públicas precalculadas de las obras publicadas"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Reconstruyendo fichas públicas...")
+
+        actualizadas, eliminadas = reconstruir_fichas_publicas()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fichas actualizadas: {actualizadas} | eliminadas: {eliminadas}"
+            )
+        )
@@ -0,0 +1,30 @@
+"""
+Comando para reconstruir la tabla RegistroOAI del proveedor OAI-PMH.
+Serializa las obras publicadas cuyo registro falta o cambió y marca como
+eliminadas las que dejaron de estar publicadas.
+Útil tras la migración inicial o después de cargas masivas. Solo con la
+tabla vacía se conservan las fechas de las obras como datestamp; en las
+demás ejecuciones los registros escritos llevan la fecha actual.
+
+Uso:
+    python manage.py reconstruir_registros_oai
+"""
+
+from django.core.management.base import BaseCommand
+
+from catalogo_publico.services.oai_service import reconstruir_registros_oai
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los registros OAI-PMH precalculados de las obras publicadas"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Reconstruyendo registros OAI-PMH...")
+
+        escritos, eliminados = reconstruir_registros_oai()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Registros actualizados: {escritos} | marcados como eliminados: {eliminados}"
+            )
+        )
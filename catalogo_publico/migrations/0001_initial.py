@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('catalogacion', '0012_default_solista_piano'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FichaPublica',
+            fields=[
+                ('obra', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ficha_publica', serialize=False, to='catalogacion.obrageneral')),
+                ('tipo_registro', models.CharField(db_index=True, max_length=1)),
+                ('nivel_bibliografico', models.CharField(max_length=1)),
+                ('num_control', models.CharField(blank=True, default='', max_length=7)),
+                ('centro_catalogador', models.CharField(blank=True, default='', max_length=10)),
+                ('titulo_principal', models.CharField(blank=True, default='', max_length=500)),
+                ('compositor_nombre', models.CharField(blank=True, default='', max_length=200)),
+                ('titulo_destacado', models.TextField(blank=True, default='')),
+                ('titulo_fuente', models.TextField(blank=True, default='')),
+                ('autor_principal', models.CharField(blank=True, default='', max_length=300)),
+                ('autor_nota', models.CharField(blank=True, default='', max_length=50)),
+                ('tipo_soporte', models.CharField(blank=True, default='', max_length=20)),
+                ('signatura', models.CharField(blank=True, default='', max_length=100)),
+                ('signatura_coleccion', models.CharField(blank=True, default='', max_length=100)),
+                ('incipit_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('incipit_paec', models.TextField(blank=True, default='')),
+                ('incipit_titulo', models.CharField(blank=True, default='', max_length=200)),
+                ('cover_url', models.CharField(blank=True, default='', max_length=700)),
+                ('cover_kind', models.CharField(blank=True, default='', max_length=10)),
+                ('visor_url', models.CharField(blank=True, default='', max_length=300)),
+                ('fecha_creacion_obra', models.DateTimeField(help_text='Copia de ObraGeneral.fecha_creacion_sistema (orden de la lista)')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Ficha pública',
+                'verbose_name_plural': 'Fichas públicas',
+                'ordering': ['-fecha_creacion_obra'],
+                'indexes': [models.Index(fields=['-fecha_creacion_obra'], name='catalogo_pu_fecha_c_20c26f_idx'), models.Index(fields=['tipo_registro', '-fecha_creacion_obra'], name='catalogo_pu_tipo_re_a52cfe_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo_publico', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConteoFaceta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('faceta', models.CharField(max_length=20)),
+                ('valor', models.CharField(max_length=50)),
+                ('etiqueta', models.CharField(blank=True, default='', max_length=300)),
+                ('total', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Conteo de faceta',
+                'verbose_name_plural': 'Conteos de facetas',
+                'indexes': [models.Index(fields=['faceta', '-total'], name='catalogo_pu_faceta_b4f623_idx')],
+                'unique_together': {('faceta', 'valor')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FacetaObra',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('faceta', models.CharField(max_length=20)),
+                ('valor', models.CharField(max_length=50)),
+                ('etiqueta', models.CharField(blank=True, default='', max_length=300)),
+                ('ficha', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facetas', to='catalogo_publico.fichapublica')),
+            ],
+            options={
+                'verbose_name': 'Faceta de obra',
+                'verbose_name_plural': 'Facetas de obras',
+                'indexes': [models.Index(fields=['faceta', 'valor'], name='catalogo_pu_faceta_e09ddc_idx')],
+                'unique_together': {('ficha', 'faceta', 'valor')},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogacion', '0015_indices_paginacion_cursor'),
+        ('catalogo_publico', '0002_facetas'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='fichapublica',
+            name='catalogo_pu_fecha_c_20c26f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='fichapublica',
+            index=models.Index(fields=['-fecha_creacion_obra', 'obra'], name='catalogo_pu_fecha_c_e48013_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo_publico', '0003_indice_paginacion_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroOAI',
+            fields=[
+                ('obra_id', models.PositiveBigIntegerField(help_text='Id de la ObraGeneral (se conserva aunque la obra se elimine)', primary_key=True, serialize=False)),
+                ('datestamp', models.DateTimeField(help_text='Última modificación del registro según OAI-PMH')),
+                ('eliminado', models.BooleanField(default=False)),
+                ('marc21', models.TextField(blank=True, default='')),
+                ('oai_dc', models.TextField(blank=True, default='')),
+                ('huella', models.CharField(blank=True, default='', help_text='SHA-256 de las dos serializaciones (detecta cambios reales)', max_length=64)),
+            ],
+            options={
+                'verbose_name': 'Registro OAI-PMH',
+                'verbose_name_plural': 'Registros OAI-PMH',
+                'indexes': [models.Index(fields=['datestamp', 'obra_id'], name='catalogo_pu_datesta_37098c_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,163 @@
+"""
+Modelos del catálogo público.
+
+FichaPublica es una tabla materializada con los datos de presentación de cada
+obra publicada, para que la lista pública se resuelva con una sola consulta
+indexada en lugar de prefetch de ~20 relaciones por página.
+
+RegistroOAI guarda cada registro ya serializado para el proveedor OAI-PMH
+(ver services/oai_service.py), incluidas las marcas de registros retirados.
+"""
+
 from django.db import models
 
-# Create your models here.
+from catalogacion.models import ObraGeneral
+
+
+class FichaPublica(models.Model):
+    """
+    Resumen precalculado de una obra publicada (una fila por ObraGeneral publicada).
+    Se mantiene desde catalogo_publico/signals.py al publicar, despublicar o
+    editar la obra y sus registros relacionados.
+    """
+
+    obra = models.OneToOneField(
+        ObraGeneral,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="ficha_publica",
+    )
+
+    # Datos de filtrado / búsqueda
+    tipo_registro = models.CharField(max_length=1, db_index=True)
+    nivel_bibliografico = models.CharField(max_length=1)
+    num_control = models.CharField(max_length=7, blank=True, default="")
+    centro_catalogador = models.CharField(max_length=10, blank=True, default="")
+    titulo_principal = models.CharField(max_length=500, blank=True, default="")
+    compositor_nombre = models.CharField(max_length=200, blank=True, default="")
+
+    # Textos de presentación (propiedades *_display de ObraGeneral)
+    titulo_destacado = models.TextField(blank=True, default="")
+    titulo_fuente = models.TextField(blank=True, default="")
+    autor_principal = models.CharField(max_length=300, blank=True, default="")
+    autor_nota = models.CharField(max_length=50, blank=True, default="")
+    tipo_soporte = models.CharField(max_length=20, blank=True, default="")
+    signatura = models.CharField(max_length=100, blank=True, default="")
+    signatura_coleccion = models.CharField(max_length=100, blank=True, default="")
+
+    # Primer íncipit (031)
+    incipit_id = models.PositiveIntegerField(null=True, blank=True)
+    incipit_paec = models.TextField(blank=True, default="")
+    incipit_titulo = models.CharField(max_length=200, blank=True, default="")
+
+    # Portada y visor
+    cover_url = models.CharField(max_length=700, blank=True, default="")
+    cover_kind = models.CharField(max_length=10, blank=True, default="")  # "jpg" | "pdf"
+    visor_url = models.CharField(max_length=300, blank=True, default="")
+
+    fecha_creacion_obra = models.DateTimeField(
+        help_text="Copia de ObraGeneral.fecha_creacion_sistema (orden de la lista)"
+    )
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Ficha pública"
+        verbose_name_plural = "Fichas públicas"
+        ordering = ["-fecha_creacion_obra"]
+        indexes = [
+            models.Index(fields=["-fecha_creacion_obra", "obra"]),
+            models.Index(fields=["tipo_registro", "-fecha_creacion_obra"]),
+        ]
+
+    def __str__(self):
+        return f"Ficha {self.num_control}: {self.titulo_destacado[:60]}"
+
+
+class FacetaObra(models.Model):
+    """
+    Valor de faceta de una obra publicada (compositor, forma, medio, etc.).
+    Una fila por (obra, faceta, valor); se recalcula junto con la FichaPublica.
+    """
+
+    ficha = models.ForeignKey(
+        FichaPublica,
+        on_delete=models.CASCADE,
+        related_name="facetas",
+    )
+    faceta = models.CharField(max_length=20)
+    valor = models.CharField(max_length=50)
+    etiqueta = models.CharField(max_length=300, blank=True, default="")
+
+    class Meta:
+        verbose_name = "Faceta de obra"
+        verbose_name_plural = "Facetas de obras"
+        unique_together = [["ficha", "faceta", "valor"]]
+        indexes = [
+            models.Index(fields=["faceta", "valor"]),
+        ]
+
+    def __str__(self):
+        return f"{self.faceta}={self.valor} (obra {self.ficha_id})"
+
+
+class ConteoFaceta(models.Model):
+    """
+    Número de obras publicadas por valor de faceta.
+    Se actualiza de forma incremental (F() ± 1) al cambiar las facetas de una
+    obra, para que la lista pública no agregue en cada petición.
+    """
+
+    faceta = models.CharField(max_length=20)
+    valor = models.CharField(max_length=50)
+    etiqueta = models.CharField(max_length=300, blank=True, default="")
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Conteo de faceta"
+        verbose_name_plural = "Conteos de facetas"
+        unique_together = [["faceta", "valor"]]
+        indexes = [
+            models.Index(fields=["faceta", "-total"]),
+        ]
+
+    def __str__(self):
+        return f"{self.faceta}={self.etiqueta or self.valor}: {self.total}"
+
+
+class RegistroOAI(models.Model):
+    """
+    Registro servido por OAI-PMH, serializado de antemano (marc21 y oai_dc).
+
+    Se recalcula desde catalogo_publico/signals.py igual que la ficha; el
+    datestamp solo avanza cuando cambia el contenido. Al despublicar, enviar
+    a la papelera o eliminar la obra la fila queda como registro eliminado
+    (deletedRecord persistent), por eso no tiene FK a ObraGeneral.
+    """
+
+    obra_id = models.PositiveBigIntegerField(
+        primary_key=True,
+        help_text="Id de la ObraGeneral (se conserva aunque la obra se elimine)",
+    )
+    datestamp = models.DateTimeField(
+        help_text="Última modificación del registro según OAI-PMH"
+    )
+    eliminado = models.BooleanField(default=False)
+    marc21 = models.TextField(blank=True, default="")
+    oai_dc = models.TextField(blank=True, default="")
+    huella = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="SHA-256 de las dos serializaciones (detecta cambios reales)",
+    )
+
+    class Meta:
+        verbose_name = "Registro OAI-PMH"
+        verbose_name_plural = "Registros OAI-PMH"
+        indexes = [
+            models.Index(fields=["datestamp", "obra_id"]),
+        ]
+
+    def __str__(self):
+        estado = " (eliminado)" if self.eliminado else ""
+        return f"OAI obra {self.obra_id} {self.datestamp:%Y-%m-%d}{estado}"
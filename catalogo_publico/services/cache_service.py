@@ -0,0 +1,195 @@
+"""
+Caché HTTP de las páginas públicas de detalle de una obra.
+
+Cada respuesta se guarda bajo un ETag calculado con el id de la obra, su
+fecha_modificacion_sistema y dos versiones guardadas en la caché:
+- versión de la obra: cambia al guardar la obra o cualquiera de sus registros
+  hijos (señales en catalogo_publico/signals.py)
+- versión del catálogo: cambia al editar una autoridad (afecta a muchas obras)
+
+La misma caché guarda los conteos de facetas de la lista pública con filtros
+(faceta_service.obtener_conteos), bajo una versión que cambia cada vez que se
+recalcula o elimina una FichaPublica.
+
+Invalidar es solo escribir una versión nueva: las respuestas anteriores quedan
+inalcanzables y expiran solas. Si una versión se pierde (reinicio, desalojo) se
+crea otra con la hora actual, nunca se reutiliza una anterior.
+
+El backend se elige en settings (CACHES["catalogo_publico"]): archivos (por
+defecto) o un servidor compatible con Redis, compartidos por todos los procesos
+para que una invalidación hecha desde un comando o una cola llegue a todos los
+workers web. La memoria local solo sirve con un único proceso.
+"""
+
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from catalogacion.services.transacciones import programar_una_vez
+
+logger = logging.getLogger("catalogacion")
+
+ALIAS_CACHE = "catalogo_publico"
+
+CLAVE_VERSION_CATALOGO = "version:catalogo"
+CLAVE_VERSION_FACETAS = "version:facetas"
+
+# Segundos que se guardan los conteos de una combinación de filtros
+TIEMPO_CONTEOS = 60 * 10
+
+
+def _cache():
+    return caches[ALIAS_CACHE]
+
+
+def _clave_version_obra(obra_id):
+    return f"version:obra:{obra_id}"
+
+
+def _version(clave):
+    """Versión actual (timestamp); si no existe se crea con la hora actual."""
+    ahora = time.time()
+    cache = _cache()
+    cache.add(clave, ahora, timeout=None)
+    return cache.get(clave, ahora)
+
+
+# ===========================================
+# VALIDADORES Y RESPUESTAS
+# ===========================================
+
+def validadores_obra(obra_id):
+    """
+    ETag y Last-Modified de las páginas de una obra publicada, con una sola
+    consulta indexada (sin cargar la obra ni sus relaciones).
+
+    Returns:
+        tuple: (etag, ultima_modificacion) o None si la obra no está publicada
+    """
+    from catalogacion.models import ObraGeneral
+
+    fecha = (
+        ObraGeneral.objects.filter(pk=obra_id, publicada=True)
+        .values_list("fecha_modificacion_sistema", flat=True)
+        .first()
+    )
+    if fecha is None:
+        return None
+
+    version_obra = _version(_clave_version_obra(obra_id))
+    version_catalogo = _version(CLAVE_VERSION_CATALOGO)
+    etag = hashlib.md5(
+        f"{obra_id}:{fecha.timestamp()}:{version_obra}:{version_catalogo}".encode()
+    ).hexdigest()
+    ultima = max(fecha.timestamp(), version_obra, version_catalogo)
+    return etag, datetime.fromtimestamp(ultima, tz=timezone.utc)
+
+
+def respuesta_cacheable(request):
+    """
+    Solo se cachean visitas anónimas sin sesión ni mensajes pendientes: la
+    plantilla base muestra el menú del usuario autenticado.
+    """
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.GET
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and "messages" not in request.COOKIES
+    )
+
+
+def _clave_respuesta(ruta, etag):
+    return "respuesta:" + hashlib.md5(f"{ruta}:{etag}".encode()).hexdigest()
+
+
+def obtener_respuesta(ruta, etag):
+    """HttpResponse cacheada para la ruta y ETag, o None."""
+    datos = _cache().get(_clave_respuesta(ruta, etag))
+    if datos is None:
+        return None
+    contenido, content_type = datos
+    return HttpResponse(contenido, content_type=content_type)
+
+
+def guardar_respuesta(ruta, etag, response):
+    _cache().set(
+        _clave_respuesta(ruta, etag), (response.content, response["Content-Type"])
+    )
+
+
+# ===========================================
+# CONTEOS DE FACETAS
+# ===========================================
+
+def _clave_conteos(parametros):
+    version = f"{_version(CLAVE_VERSION_FACETAS)}:{_version(CLAVE_VERSION_CATALOGO)}"
+    filtros = "&".join(f"{k}={v}" for k, v in sorted(parametros.items()))
+    return "conteos:" + hashlib.md5(f"{version}:{filtros}".encode()).hexdigest()
+
+
+def obtener_conteos_cacheados(parametros):
+    """Conteos de facetas guardados para los filtros dados, o None."""
+    return _cache().get(_clave_conteos(parametros))
+
+
+def guardar_conteos(parametros, conteos):
+    _cache().set(_clave_conteos(parametros), conteos, timeout=TIEMPO_CONTEOS)
+
+
+# ===========================================
+# INVALIDACIÓN
+# ===========================================
+
+def invalidar_obra(obra_id):
+    _cache().set(_clave_version_obra(obra_id), time.time(), timeout=None)
+
+
+def invalidar_catalogo():
+    _cache().set(CLAVE_VERSION_CATALOGO, time.time(), timeout=None)
+
+
+def programar_invalidacion_obra(obra_id):
+    """
+    Invalida la caché de la obra al confirmar la transacción (antes, un
+    visitante podría volver a cachear el contenido viejo con la versión nueva).
+    """
+    if not obra_id:
+        return
+
+    def _ejecutar():
+        try:
+            invalidar_obra(obra_id)
+        except Exception as e:
+            logger.error(f"Error invalidando caché pública de obra {obra_id}: {e}")
+
+    programar_una_vez(("cache_obra", obra_id), _ejecutar)
+
+
+def programar_invalidacion_obras(obra_ids):
+    for obra_id in set(obra_ids):
+        programar_invalidacion_obra(obra_id)
+
+
+def programar_invalidacion_catalogo():
+    programar_una_vez("cache_catalogo", invalidar_catalogo)
+
+
+def invalidar_facetas():
+    _cache().set(CLAVE_VERSION_FACETAS, time.time(), timeout=None)
+
+
+def programar_invalidacion_facetas():
+    """Descarta los conteos de facetas cacheados al confirmar la transacción."""
+
+    def _ejecutar():
+        try:
+            invalidar_facetas()
+        except Exception as e:
+            logger.error(f"Error invalidando conteos de facetas: {e}")
+
+    programar_una_vez("cache_facetas", _ejecutar)
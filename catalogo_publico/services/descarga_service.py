@@ -0,0 +1,157 @@
+"""
+Entrega de archivos grandes (PDF de obras y colecciones).
+
+- ETag (mtime + tamaño) y Last-Modified: las visitas repetidas reciben 304.
+- Range: responde 206 con el tramo pedido, así el visor PDF del navegador
+  pide solo las páginas que muestra en lugar del archivo completo.
+- Delegación al servidor web (settings.ARCHIVOS_OFFLOAD):
+    "x-sendfile"        Apache (mod_xsendfile), lighttpd
+    "x-accel-redirect"  nginx; requiere una location internal que apunte a
+                        MEDIA_ROOT en settings.ARCHIVOS_ACCEL_PREFIJO
+  En ese modo Django solo valida el acceso y el servidor web transmite el
+  archivo (con soporte de Range propio), sin ocupar un worker.
+
+Uso:
+    return respuesta_archivo(request, "digitalizacion/pdf/x.pdf", nombre_descarga="x.pdf")
+"""
+
+import os
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+# Tamaño de cada bloque leído al transmitir un rango
+TAMANO_BLOQUE = 64 * 1024
+
+_RE_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _rango_solicitado(request, tamano, etag, modificado):
+    """
+    Rango único pedido en la cabecera Range.
+
+    Returns:
+        tuple (inicio, fin) inclusivo, None si se debe enviar el archivo
+        completo, o "invalido" si el rango no se puede satisfacer
+    """
+    cabecera = request.META.get("HTTP_RANGE", "").strip()
+    if not cabecera or request.method not in ("GET", "HEAD"):
+        return None
+
+    # If-Range: solo se respeta el rango si el archivo no cambió
+    if_range = request.META.get("HTTP_IF_RANGE", "").strip()
+    if if_range:
+        if if_range.startswith(('"', 'W/"')):
+            if if_range != etag:
+                return None
+        elif parse_http_date_safe(if_range) != modificado:
+            return None
+
+    match = _RE_RANGO.match(cabecera.replace(" ", ""))
+    if not match:
+        # Varios rangos o unidad desconocida: se envía completo (RFC 9110)
+        return None
+
+    inicio, fin = match.groups()
+    if inicio == "":
+        if fin == "":
+            return None
+        # Sufijo: los últimos N bytes
+        largo = int(fin)
+        if largo == 0:
+            return "invalido"
+        return max(0, tamano - largo), tamano - 1
+
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        return "invalido"
+    return inicio, fin
+
+
+def _leer_tramo(ruta, inicio, largo):
+    with open(ruta, "rb") as archivo:
+        archivo.seek(inicio)
+        restante = largo
+        while restante > 0:
+            bloque = archivo.read(min(TAMANO_BLOQUE, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+
+
+def _content_disposition(nombre_descarga, inline):
+    tipo = "inline" if inline else "attachment"
+    if not nombre_descarga:
+        return tipo
+    try:
+        nombre_descarga.encode("ascii")
+        return f'{tipo}; filename="{nombre_descarga}"'
+    except UnicodeEncodeError:
+        return f"{tipo}; filename*=utf-8''{quote(nombre_descarga)}"
+
+
+def respuesta_archivo(
+    request,
+    rel_path,
+    content_type="application/pdf",
+    nombre_descarga=None,
+    inline=False,
+):
+    """
+    Respuesta HTTP para un archivo bajo MEDIA_ROOT con GET condicional,
+    Range y delegación opcional al servidor web.
+
+    Raises:
+        Http404: Si el archivo no existe
+    """
+    ruta = Path(settings.MEDIA_ROOT) / rel_path
+    try:
+        stat = ruta.stat()
+    except OSError:
+        raise Http404("Archivo no encontrado")
+
+    modificado = int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if response is None:
+        modo = getattr(settings, "ARCHIVOS_OFFLOAD", "")
+        rango = None if modo else _rango_solicitado(request, stat.st_size, etag, modificado)
+
+        if modo == "x-sendfile":
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = os.fspath(ruta.resolve())
+        elif modo == "x-accel-redirect":
+            response = HttpResponse(content_type=content_type)
+            prefijo = getattr(settings, "ARCHIVOS_ACCEL_PREFIJO", "/media-protegida/")
+            response["X-Accel-Redirect"] = prefijo.rstrip("/") + "/" + quote(
+                Path(rel_path).as_posix()
+            )
+        elif rango == "invalido":
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+        elif rango:
+            inicio, fin = rango
+            largo = fin - inicio + 1
+            response = StreamingHttpResponse(
+                _leer_tramo(ruta, inicio, largo), status=206, content_type=content_type
+            )
+            response["Content-Range"] = f"bytes {inicio}-{fin}/{stat.st_size}"
+            response["Content-Length"] = str(largo)
+        else:
+            response = FileResponse(open(ruta, "rb"), content_type=content_type)
+
+        response["Content-Disposition"] = _content_disposition(nombre_descarga, inline)
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(modificado)
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
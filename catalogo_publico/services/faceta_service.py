@@ -0,0 +1,291 @@
+"""
+Servicio de facetas del catálogo público.
+
+Las facetas de cada obra publicada se guardan en FacetaObra y sus totales en
+ConteoFaceta. Ambos se actualizan de forma incremental cuando se recalcula la
+FichaPublica (publicar, despublicar, editar), de modo que la lista pública lee
+los conteos sin agregar sobre las tablas MARC.
+
+Con filtros activos los conteos se agregan sobre FacetaObra solo para las
+fichas resultantes y se guardan en la caché pública por combinación de
+filtros; cualquier cambio de fichas cambia la versión y los descarta.
+
+Facetas:
+- compositor (100), forma (130 $k y 655), medio (382), tonalidad (384),
+  siglo (264 $c), país (044) y copia digital.
+"""
+
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max
+
+from .cache_service import (
+    guardar_conteos,
+    obtener_conteos_cacheados,
+    programar_invalidacion_facetas,
+)
+
+FACETAS = [
+    ("compositor", "Compositor"),
+    ("forma", "Forma musical"),
+    ("medio", "Medio de interpretación"),
+    ("tonalidad", "Tonalidad"),
+    ("siglo", "Siglo"),
+    ("pais", "País"),
+    ("digital", "Copia digital"),
+]
+CLAVES_FACETAS = [clave for clave, _ in FACETAS]
+
+# Valores mostrados por faceta (los de mayor conteo)
+VALORES_POR_FACETA = 10
+
+ROMANOS = [
+    (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I"),
+]
+
+
+def siglo_romano(siglo):
+    """21 -> 'XXI'"""
+    resultado = ""
+    for valor, letras in ROMANOS:
+        while siglo >= valor:
+            resultado += letras
+            siglo -= valor
+    return resultado
+
+
+def siglos_de_fecha(texto):
+    """
+    Siglos mencionados en una fecha 264 $c.
+    Acepta años completos (1890, [1890?]) y décadas/siglos inciertos (189-, 18--).
+    """
+    siglos = set()
+    for match in re.finditer(r"(?<!\d)(\d{2})[\d\-u?]{2}(?!\d)", texto or ""):
+        siglo = int(match.group(1)) + 1
+        if 10 <= siglo <= 21:
+            siglos.add(siglo)
+    return siglos
+
+
+def calcular_facetas(obra):
+    """
+    Facetas de una obra (requiere las relaciones precargadas por ficha_service).
+
+    Returns:
+        dict: {(faceta, valor): etiqueta}
+    """
+    facetas = {}
+
+    if obra.compositor:
+        facetas[("compositor", str(obra.compositor_id))] = obra.compositor.apellidos_nombres
+
+    formas = [obra.forma_130] + [m.materia for m in obra.materias_655.all()]
+    for forma in formas:
+        if forma:
+            facetas[("forma", str(forma.id))] = forma.forma
+
+    for medio_382 in obra.medios_interpretacion_382.all():
+        for medio in medio_382.medios.all():
+            if medio.medio:
+                facetas[("medio", medio.medio)] = medio.get_medio_display()
+
+    if obra.tonalidad_384:
+        facetas[("tonalidad", obra.tonalidad_384)] = obra.get_tonalidad_384_display()
+
+    for produccion in obra.producciones_publicaciones.all():
+        for fecha in produccion.fechas.all():
+            for siglo in siglos_de_fecha(fecha.fecha):
+                facetas[("siglo", str(siglo))] = f"Siglo {siglo_romano(siglo)}"
+
+    for pais in obra.codigos_pais_entidad.all():
+        facetas[("pais", pais.codigo_pais)] = pais.get_codigo_pais_display()
+
+    tiene_digital = getattr(obra, "digital_set", None) is not None or any(
+        True for _ in obra.segments.all()
+    )
+    facetas[("digital", "si" if tiene_digital else "no")] = (
+        "Con copia digital" if tiene_digital else "Sin copia digital"
+    )
+    return facetas
+
+
+def _ajustar_conteos(claves, delta, etiquetas=None):
+    """
+    Suma `delta` a los conteos de las claves (faceta, valor).
+
+    Cada ajuste es un único UPDATE condicional sobre la fila, así que dos
+    procesos que cambian la misma faceta no se pisan: si al sumar la fila
+    no existe se crea (y si otro proceso la creó primero se vuelve a sumar),
+    y al restar solo se borran las que quedaron en cero en ese momento.
+    """
+    from catalogo_publico.models import ConteoFaceta
+
+    for faceta, valor in claves:
+        fila = ConteoFaceta.objects.filter(faceta=faceta, valor=valor)
+        if delta > 0:
+            if fila.update(total=F("total") + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    ConteoFaceta.objects.create(
+                        faceta=faceta,
+                        valor=valor,
+                        etiqueta=etiquetas[(faceta, valor)],
+                        total=delta,
+                    )
+            except IntegrityError:
+                fila.update(total=F("total") + delta)  # la creó otro proceso
+        else:
+            fila.filter(total__gte=-delta).update(total=F("total") + delta)
+            fila.filter(total__lte=0).delete()
+
+
+def actualizar_facetas(ficha, obra):
+    """
+    Sincroniza FacetaObra de una ficha y aplica la diferencia a ConteoFaceta.
+
+    Los recálculos simultáneos de una misma ficha se serializan bloqueando la
+    ficha (select_for_update, donde el motor lo admite). Aun así cada fila se
+    inserta en su propio savepoint y se borra por separado, y los conteos solo
+    se ajustan por las filas que este recálculo insertó o borró de verdad: si
+    otro se adelantó, la fila ya contada no se vuelve a contar.
+    """
+    from catalogo_publico.models import ConteoFaceta, FacetaObra, FichaPublica
+
+    # También cambian los resultados con filtros (ej: búsqueda por título)
+    programar_invalidacion_facetas()
+
+    nuevas = calcular_facetas(obra)
+
+    with transaction.atomic():
+        bloqueada = FichaPublica.objects.select_for_update().filter(pk=ficha.pk)
+        if not list(bloqueada.values_list("pk", flat=True)):
+            return  # la ficha se eliminó mientras tanto
+
+        anteriores = {
+            (f.faceta, f.valor): f for f in FacetaObra.objects.filter(ficha=ficha)
+        }
+
+        quitadas = set()
+        for clave in anteriores.keys() - nuevas.keys():
+            borradas, _ = FacetaObra.objects.filter(pk=anteriores[clave].pk).delete()
+            if borradas:
+                quitadas.add(clave)
+
+        agregadas = set()
+        for faceta, valor in nuevas.keys() - anteriores.keys():
+            try:
+                with transaction.atomic():
+                    FacetaObra.objects.create(
+                        ficha=ficha,
+                        faceta=faceta,
+                        valor=valor,
+                        etiqueta=nuevas[(faceta, valor)],
+                    )
+            except IntegrityError:
+                continue  # la insertó otro recálculo de la misma ficha
+            agregadas.add((faceta, valor))
+
+        _ajustar_conteos(quitadas, -1)
+        _ajustar_conteos(agregadas, +1, nuevas)
+
+        # Etiquetas renombradas (ej: se corrigió el nombre del compositor)
+        for clave in anteriores.keys() & nuevas.keys():
+            if anteriores[clave].etiqueta != nuevas[clave]:
+                FacetaObra.objects.filter(pk=anteriores[clave].pk).update(
+                    etiqueta=nuevas[clave]
+                )
+                ConteoFaceta.objects.filter(faceta=clave[0], valor=clave[1]).update(
+                    etiqueta=nuevas[clave]
+                )
+
+
+def descontar_facetas(ficha):
+    """Resta de ConteoFaceta las facetas de una ficha que se va a eliminar."""
+    from catalogo_publico.models import FacetaObra
+
+    claves = set(FacetaObra.objects.filter(ficha=ficha).values_list("faceta", "valor"))
+    _ajustar_conteos(claves, -1)
+    programar_invalidacion_facetas()
+
+
+def recalcular_conteos():
+    """Reconstruye ConteoFaceta desde FacetaObra (corrige cualquier desvío)."""
+    from catalogo_publico.models import ConteoFaceta, FacetaObra
+
+    filas = (
+        FacetaObra.objects.values("faceta", "valor")
+        .annotate(total=Count("ficha"), etiqueta=Max("etiqueta"))
+        .order_by()
+    )
+    ConteoFaceta.objects.all().delete()
+    ConteoFaceta.objects.bulk_create([ConteoFaceta(**fila) for fila in filas])
+    programar_invalidacion_facetas()
+
+
+def filtrar_por_facetas(queryset, filtros):
+    """
+    Restringe un queryset de FichaPublica a las obras con todos los valores
+    de faceta indicados.
+
+    Args:
+        filtros: dict {faceta: valor}
+    """
+    from catalogo_publico.models import FacetaObra
+
+    for faceta, valor in filtros.items():
+        queryset = queryset.filter(
+            pk__in=FacetaObra.objects.filter(faceta=faceta, valor=valor).values("ficha_id")
+        )
+    return queryset
+
+
+def obtener_conteos(fichas=None, parametros=None):
+    """
+    Valores más frecuentes por faceta.
+
+    Args:
+        fichas: QuerySet de FichaPublica ya filtrado, o None para el catálogo
+            completo (se lee ConteoFaceta, sin agregar)
+        parametros: dict con los filtros que produjeron `fichas`; si se indica,
+            la agregación se guarda en caché bajo esos filtros
+
+    Returns:
+        dict: {faceta: [{"valor", "etiqueta", "total"}, ...]}
+    """
+    from catalogo_publico.models import ConteoFaceta, FacetaObra
+
+    conteos = {clave: [] for clave in CLAVES_FACETAS}
+
+    if fichas is None:
+        for clave in CLAVES_FACETAS:
+            conteos[clave] = list(
+                ConteoFaceta.objects.filter(faceta=clave)
+                .order_by("-total", "etiqueta")
+                .values("valor", "etiqueta", "total")[:VALORES_POR_FACETA]
+            )
+        return conteos
+
+    if parametros is not None:
+        cacheados = obtener_conteos_cacheados(parametros)
+        if cacheados is not None:
+            return cacheados
+
+    # Con filtros activos: agregación sobre una sola tabla estrecha e indexada
+    filas = (
+        FacetaObra.objects.filter(ficha_id__in=fichas.order_by().values("pk"))
+        .values("faceta", "valor")
+        .annotate(total=Count("ficha"), etiqueta=Max("etiqueta"))
+        .order_by("faceta", "-total", "etiqueta")
+    )
+    for fila in filas:
+        valores = conteos.get(fila["faceta"])
+        if valores is not None and len(valores) < VALORES_POR_FACETA:
+            valores.append(
+                {"valor": fila["valor"], "etiqueta": fila["etiqueta"], "total": fila["total"]}
+            )
+
+    if parametros is not None:
+        guardar_conteos(parametros, conteos)
+    return conteos
@@ -0,0 +1,217 @@
+"""
+Servicio para mantener la tabla FichaPublica.
+
+Cada ficha guarda los textos de presentación, la portada y el enlace al visor
+de una obra publicada, junto con sus facetas (ver faceta_service). Se recalcula al escribir (publicar, despublicar, editar
+la obra o sus registros hijos) para que la lista pública solo lea.
+
+Las actualizaciones se difieren hasta el commit y se agrupan por obra
+(catalogacion.services.transacciones.programar_una_vez), de modo que guardar un formulario con muchos formsets recalcula la ficha
+una sola vez.
+"""
+
+import logging
+
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from catalogacion.services.transacciones import programar_una_vez
+
+from .faceta_service import actualizar_facetas, recalcular_conteos
+
+logger = logging.getLogger("catalogacion")
+
+
+def _obtener_obra(obra_id):
+    from catalogacion.models import ObraGeneral
+
+    return (
+        ObraGeneral.objects.select_related(
+            "compositor",
+            "titulo_uniforme",
+            "titulo_240",
+            "forma_130",
+            "forma_240",
+            "digital_set",
+        )
+        .prefetch_related(
+            "codigos_pais_entidad",
+            "incipits_musicales",
+            "enlaces_documento_fuente_773__numeros_control__obra_relacionada",
+            "materias_655__materia",
+            "medios_interpretacion_382__medios",
+            "producciones_publicaciones__fechas",
+            "segments",
+        )
+        .filter(pk=obra_id)
+        .first()
+    )
+
+
+def resolver_portada(obra):
+    """
+    Determina portada y visor de una obra.
+
+    PRIORIDAD: DigitalSet propio > primer segmento en colección.
+    Portada: miniatura de 600 px o JPG derivado de la página inicial >
+    thumbnail del PDF > marcador PDF.
+    Nunca renderiza el PDF: los thumbnails faltantes se encolan (ThumbnailJob).
+
+    Returns:
+        tuple: (cover_url, cover_kind, visor_url) con "" cuando no hay portada
+    """
+    from digitalizacion.models import DigitalPage, WorkSegment
+    from digitalizacion.services.thumbnail_queue import (
+        encolar_thumbnail_digital_set,
+        encolar_thumbnail_segmento,
+    )
+
+    ds_propio = getattr(obra, "digital_set", None)
+    seg = None
+    if ds_propio:
+        ds = ds_propio
+        page_n = 1
+        visor_url = reverse("digitalizacion:visor_obra", kwargs={"obra_id": obra.id})
+    else:
+        seg = (
+            WorkSegment.objects.filter(obra_id=obra.id)
+            .select_related("digital_set")
+            .order_by("start_page")
+            .first()
+        )
+        if seg:
+            ds = seg.digital_set
+            page_n = seg.start_page
+            visor_url = reverse(
+                "digitalizacion:visor_obra", kwargs={"obra_id": obra.id}
+            )
+        else:
+            # Dejamos link aunque no haya cover; el template decide
+            return "", "", reverse("digitalizacion:visor_digital", kwargs={"pk": obra.id})
+
+    pagina = (
+        DigitalPage.objects.filter(digital_set=ds, page_number=page_n)
+        .exclude(derivative_path="")
+        .values_list("preview_path", "derivative_path")
+        .first()
+    )
+    if pagina:
+        return default_storage.url(pagina[0] or pagina[1]), "jpg", visor_url
+
+    if not ds.pdf_path:
+        return "", "", visor_url
+
+    # Solo se leen thumbnails ya generados; si falta, se encola para el worker
+    thumb_path = ds.pdf_thumb_path if seg is None else seg.cached_thumb_path
+    if thumb_path:
+        return default_storage.url(thumb_path), "jpg", visor_url
+
+    if seg is None:
+        encolar_thumbnail_digital_set(ds)
+    else:
+        encolar_thumbnail_segmento(seg)
+
+    # Fallback: mostrar placeholder PDF
+    return default_storage.url(ds.pdf_path), "pdf", visor_url
+
+
+def actualizar_ficha_publica(obra_id):
+    """
+    Crea, recalcula o elimina la ficha pública de una obra.
+
+    La ficha existe solo mientras la obra está publicada y activa.
+
+    Returns:
+        FichaPublica | None
+    """
+    from catalogo_publico.models import FichaPublica
+
+    obra = _obtener_obra(obra_id)
+    if obra is None or not obra.publicada or not obra.activo:
+        FichaPublica.objects.filter(obra_id=obra_id).delete()
+        return None
+
+    incipit = next(iter(obra.incipits_musicales.all()), None)
+    cover_url, cover_kind, visor_url = resolver_portada(obra)
+
+    titulo_fuente = (
+        obra.titulo_uniforme_130_display
+        or obra.titulo_uniforme_240_display
+        or obra.titulo_245_display
+    )
+
+    ficha, _ = FichaPublica.objects.update_or_create(
+        obra=obra,
+        defaults={
+            "tipo_registro": obra.tipo_registro,
+            "nivel_bibliografico": obra.nivel_bibliografico,
+            "num_control": obra.num_control or "",
+            "centro_catalogador": obra.centro_catalogador or "",
+            "titulo_principal": obra.titulo_principal or "",
+            "compositor_nombre": (
+                obra.compositor.apellidos_nombres if obra.compositor else ""
+            ),
+            "titulo_destacado": obra.titulo_destacado_display,
+            "titulo_fuente": titulo_fuente,
+            "autor_principal": obra.autor_publico_principal,
+            "autor_nota": obra.autor_publico_nota,
+            "tipo_soporte": obra.tipo_soporte_publico_display,
+            "signatura": obra.signatura_publica_display,
+            "signatura_coleccion": obra.signatura_coleccion_padre or "",
+            "incipit_id": incipit.pk if incipit else None,
+            "incipit_paec": (incipit.paec_full or "") if incipit else "",
+            "incipit_titulo": incipit.titulo_encabezamiento if incipit else "",
+            "cover_url": cover_url,
+            "cover_kind": cover_kind,
+            "visor_url": visor_url,
+            "fecha_creacion_obra": obra.fecha_creacion_sistema,
+        },
+    )
+    actualizar_facetas(ficha, obra)
+    return ficha
+
+
+def programar_actualizacion_ficha(obra_id):
+    """
+    Programa el recálculo de la ficha al confirmar la transacción actual.
+    Fuera de un bloque atómico se ejecuta inmediatamente.
+    """
+    if not obra_id:
+        return
+
+    def _ejecutar():
+        try:
+            actualizar_ficha_publica(obra_id)
+        except Exception as e:
+            logger.error(f"Error actualizando ficha pública de obra {obra_id}: {e}")
+
+    programar_una_vez(("ficha", obra_id), _ejecutar)
+
+
+def programar_actualizacion_fichas(obra_ids):
+    for obra_id in set(obra_ids):
+        programar_actualizacion_ficha(obra_id)
+
+
+def reconstruir_fichas_publicas():
+    """
+    Reconstruye todas las fichas: crea las que faltan y elimina las huérfanas.
+
+    Returns:
+        tuple: (fichas actualizadas, fichas eliminadas)
+    """
+    from catalogacion.models import ObraGeneral
+    from catalogo_publico.models import FichaPublica
+
+    publicadas = list(
+        ObraGeneral.objects.filter(publicada=True, activo=True).values_list(
+            "id", flat=True
+        )
+    )
+    eliminadas, _ = FichaPublica.objects.exclude(
+        obra__publicada=True, obra__activo=True
+    ).delete()
+    for obra_id in publicadas:
+        actualizar_ficha_publica(obra_id)
+    recalcular_conteos()
+    return len(publicadas), eliminadas
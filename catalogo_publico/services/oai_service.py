@@ -0,0 +1,550 @@
+"""
+Proveedor OAI-PMH 2.0 del catálogo publicado.
+
+Los registros se sirven desde la tabla RegistroOAI (marc21 = MARCXML y
+oai_dc ya serializados), que se mantiene al escribir igual que FichaPublica:
+las señales programan actualizar_registro_oai(obra_id) con on_commit y el
+datestamp solo avanza cuando el contenido serializado cambia. Despublicar,
+enviar a la papelera o eliminar la obra deja la fila marcada como eliminada.
+
+Las listas se paginan por conjunto de claves (datestamp, obra_id): el token
+de reanudación lleva la última clave entregada, así que cada página es una
+consulta indexada sin OFFSET, por grande que sea la cosecha.
+
+Uso:
+    actualizar_registro_oai(obra_id)        # desde signals.py
+    reconstruir_registros_oai()              # comando reconstruir_registros_oai
+    respuesta_oai(request.GET, url_base)     # vista OAIPMHView
+"""
+
+import base64
+import hashlib
+import logging
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from catalogacion.services.marc_registro import construir_registro, queryset_marc
+from catalogacion.services.marc_serializacion import NS_MARCXML, a_marcxml, limpiar_xml
+from catalogacion.services.transacciones import programar_una_vez
+
+logger = logging.getLogger("catalogacion")
+
+NS_OAI = "http://www.openarchives.org/OAI/2.0/"
+NS_OAI_DC = "http://www.openarchives.org/OAI/2.0/oai_dc/"
+NS_DC = "http://purl.org/dc/elements/1.1/"
+NS_XSI = "http://www.w3.org/2001/XMLSchema-instance"
+
+FORMATOS_METADATOS = {
+    "marc21": (NS_MARCXML, "http://www.loc.gov/standards/marcxml/schema/MARC21slim.xsd"),
+    "oai_dc": (NS_OAI_DC, "http://www.openarchives.org/OAI/2.0/oai_dc.xsd"),
+}
+
+# Argumentos admitidos por verbo: (obligatorios, opcionales)
+VERBOS = {
+    "Identify": (set(), set()),
+    "ListMetadataFormats": (set(), {"identifier"}),
+    "ListSets": (set(), {"resumptionToken"}),
+    "GetRecord": ({"identifier", "metadataPrefix"}, set()),
+    "ListIdentifiers": ({"metadataPrefix"}, {"from", "until", "set"}),
+    "ListRecords": ({"metadataPrefix"}, {"from", "until", "set"}),
+}
+
+# Elemento Dublin Core: (etiqueta MARC, subcampos que se unen)
+MAPA_DC = (
+    ("title", "245", "ab"),
+    ("title", "246", "ab"),
+    ("creator", "100", "ad"),
+    ("contributor", "700", "ad"),
+    ("contributor", "710", "a"),
+    ("subject", "650", "ayz"),
+    ("subject", "655", "axy"),
+    ("description", "500", "a"),
+    ("description", "505", "a"),
+    ("description", "520", "a"),
+    ("publisher", "264", "b"),
+    ("date", "264", "c"),
+    ("format", "300", "abc"),
+    ("identifier", "020", "a"),
+    ("identifier", "024", "a"),
+    ("language", "041", "a"),
+    ("relation", "773", "t"),
+)
+
+TIPO_DC = {"c": "Partitura impresa", "d": "Partitura manuscrita"}
+
+
+def tamano_pagina() -> int:
+    return getattr(settings, "OAI_TAMANO_PAGINA", 100)
+
+
+def dominio() -> str:
+    return getattr(settings, "OAI_DOMINIO", "catalogo-musical")
+
+
+def identificador(obra_id) -> str:
+    return f"oai:{dominio()}:{obra_id}"
+
+
+def _obra_de_identificador(valor: str):
+    prefijo = f"oai:{dominio()}:"
+    if not valor.startswith(prefijo) or not valor[len(prefijo):].isdigit():
+        return None
+    return int(valor[len(prefijo):])
+
+
+def _fecha_oai(fecha) -> str:
+    return fecha.astimezone(dt_timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ===========================================
+# SERIALIZACIÓN Y MANTENIMIENTO DE LA TABLA
+# ===========================================
+
+def a_oai_dc(registro, url_obra: str = "") -> str:
+    """Elemento <oai_dc:dc> a partir de un Registro MARC."""
+    partes = [
+        f'<oai_dc:dc xmlns:oai_dc="{NS_OAI_DC}" xmlns:dc="{NS_DC}" '
+        f'xmlns:xsi="{NS_XSI}" xsi:schemaLocation="{NS_OAI_DC} '
+        f'{FORMATOS_METADATOS["oai_dc"][1]}">'
+    ]
+
+    def _elemento(nombre, valor):
+        partes.append(f"<dc:{nombre}>{escape(limpiar_xml(valor))}</dc:{nombre}>")
+
+    for nombre, tag, codigos in MAPA_DC:
+        for campo in registro.campos_de(tag):
+            valor = " ".join(v for c, v in campo.subcampos if c in codigos)
+            if valor:
+                _elemento(nombre, valor)
+    tipo = TIPO_DC.get(registro.leader[6])
+    if tipo:
+        _elemento("type", tipo)
+    if url_obra:
+        _elemento("identifier", url_obra)
+    partes.append("</oai_dc:dc>")
+    return "".join(partes)
+
+
+def serializar_obra(obra) -> tuple[str, str]:
+    """
+    (marc21, oai_dc) de una obra cargada con queryset_marc.
+    """
+    registro = construir_registro(obra)
+    url_base = getattr(settings, "OAI_URL_CATALOGO", "")
+    url_obra = ""
+    if url_base:
+        url_obra = url_base.rstrip("/") + reverse(
+            "catalogo_publico:detalle", kwargs={"pk": obra.pk}
+        )
+    return a_marcxml(registro), a_oai_dc(registro, url_obra)
+
+
+def _huella(marc21: str, oai_dc: str) -> str:
+    return hashlib.sha256(f"{marc21}\x00{oai_dc}".encode("utf-8")).hexdigest()
+
+
+def _obras_publicadas():
+    from catalogacion.models import ObraGeneral
+
+    return ObraGeneral.objects.filter(publicada=True, activo=True)
+
+
+def actualizar_registro_oai(obra_id):
+    """
+    Recalcula el registro OAI de una obra. Si dejó de estar publicada (o ya
+    no existe) y había sido servida, queda como eliminada.
+
+    Returns:
+        RegistroOAI | None
+    """
+    from catalogo_publico.models import RegistroOAI
+
+    ahora = timezone.now()
+    obra = queryset_marc(_obras_publicadas().filter(pk=obra_id)).first()
+    actual = RegistroOAI.objects.filter(pk=obra_id).first()
+
+    if obra is None:
+        if actual and not actual.eliminado:
+            actual.eliminado = True
+            actual.marc21 = actual.oai_dc = actual.huella = ""
+            actual.datestamp = ahora
+            actual.save()
+        return actual
+
+    marc21, oai_dc = serializar_obra(obra)
+    huella = _huella(marc21, oai_dc)
+    if actual and not actual.eliminado and actual.huella == huella:
+        return actual
+
+    registro, _ = RegistroOAI.objects.update_or_create(
+        obra_id=obra_id,
+        defaults={
+            "datestamp": ahora,
+            "eliminado": False,
+            "marc21": marc21,
+            "oai_dc": oai_dc,
+            "huella": huella,
+        },
+    )
+    return registro
+
+
+def programar_actualizacion_oai(obra_id):
+    """
+    Programa el recálculo del registro OAI al confirmar la transacción.
+    Fuera de un bloque atómico se ejecuta inmediatamente.
+    """
+    if not obra_id:
+        return
+
+    def _ejecutar():
+        try:
+            actualizar_registro_oai(obra_id)
+        except Exception as e:
+            logger.error(f"Error actualizando registro OAI de obra {obra_id}: {e}")
+
+    programar_una_vez(("oai", obra_id), _ejecutar)
+
+
+def programar_actualizacion_oai_obras(obra_ids):
+    for obra_id in set(obra_ids):
+        programar_actualizacion_oai(obra_id)
+
+
+def reconstruir_registros_oai(tamano_lote: int = 500):
+    """
+    Serializa todas las obras publicadas por lotes y marca como eliminadas
+    las filas de obras que ya no lo están. En la carga inicial (tabla vacía)
+    cada registro toma como datestamp la última modificación o publicación
+    de la obra; después, todo registro nuevo o cambiado toma la fecha actual,
+    porque un datestamp anterior a la última cosecha incremental haría que
+    los recolectores no lo vieran nunca.
+
+    Returns:
+        tuple: (registros creados o actualizados, marcados como eliminados)
+    """
+    from catalogo_publico.models import RegistroOAI
+
+    ahora = timezone.now()
+    existentes = dict(
+        RegistroOAI.objects.filter(eliminado=False).values_list("obra_id", "huella")
+    )
+    vistos = set()
+    nuevos, cambiados = [], []
+
+    def _guardar():
+        RegistroOAI.objects.bulk_create(nuevos, batch_size=tamano_lote)
+        RegistroOAI.objects.bulk_update(
+            cambiados,
+            ["datestamp", "eliminado", "marc21", "oai_dc", "huella"],
+            batch_size=tamano_lote,
+        )
+        total = len(nuevos) + len(cambiados)
+        nuevos.clear()
+        cambiados.clear()
+        return total
+
+    ya_en_tabla = set(RegistroOAI.objects.values_list("obra_id", flat=True))
+    carga_inicial = not ya_en_tabla
+    escritos = 0
+    obras = queryset_marc(_obras_publicadas().order_by("pk"))
+    for obra in obras.iterator(chunk_size=tamano_lote):
+        vistos.add(obra.pk)
+        marc21, oai_dc = serializar_obra(obra)
+        huella = _huella(marc21, oai_dc)
+        if existentes.get(obra.pk) == huella:
+            continue
+        fila = RegistroOAI(
+            obra_id=obra.pk,
+            eliminado=False,
+            marc21=marc21,
+            oai_dc=oai_dc,
+            huella=huella,
+        )
+        if carga_inicial:
+            fila.datestamp = max(
+                f for f in (obra.fecha_modificacion_sistema, obra.fecha_publicacion) if f
+            )
+        else:
+            fila.datestamp = ahora
+        if obra.pk in ya_en_tabla:
+            cambiados.append(fila)
+        else:
+            nuevos.append(fila)
+        if len(nuevos) + len(cambiados) >= tamano_lote:
+            escritos += _guardar()
+    escritos += _guardar()
+
+    retiradas = set(existentes) - vistos
+    eliminados = RegistroOAI.objects.filter(obra_id__in=retiradas).update(
+        eliminado=True, marc21="", oai_dc="", huella="", datestamp=ahora
+    )
+    return escritos, eliminados
+
+
+# ===========================================
+# PROTOCOLO
+# ===========================================
+
+class ErrorOAI(Exception):
+    """Error del protocolo: se responde como <error code="...">."""
+
+    def __init__(self, codigo, mensaje):
+        super().__init__(mensaje)
+        self.codigo = codigo
+        self.mensaje = mensaje
+
+
+def _interpretar_fecha(valor: str, hasta: bool = False):
+    """
+    Fecha de from/until con granularidad de día o de segundo (UTC).
+
+    Returns:
+        tuple: (datetime, granularidad "dia" | "segundo")
+    """
+    if len(valor) == 10:
+        try:
+            dia = parse_date(valor)
+        except ValueError:
+            # Bien formada pero inexistente (2024-13-01)
+            dia = None
+        if dia is None:
+            raise ErrorOAI("badArgument", f"Fecha inválida: {valor}")
+        fecha = datetime.combine(dia, time.min, tzinfo=dt_timezone.utc)
+        if hasta:
+            fecha += timedelta(days=1) - timedelta(microseconds=1)
+        return fecha, "dia"
+    try:
+        fecha = parse_datetime(valor) if valor.endswith("Z") and len(valor) == 20 else None
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ErrorOAI("badArgument", f"Fecha inválida: {valor}")
+    if hasta:
+        fecha += timedelta(seconds=1) - timedelta(microseconds=1)
+    return fecha, "segundo"
+
+
+def _codificar_token(datos: dict) -> str:
+    texto = "|".join(
+        str(datos.get(clave, ""))
+        for clave in ("metadataPrefix", "from", "until", "datestamp", "obra_id", "cursor")
+    )
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def _decodificar_token(token: str) -> dict:
+    try:
+        texto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        prefijo, desde, hasta, datestamp, obra_id, cursor = texto.split("|")
+        return {
+            "metadataPrefix": prefijo,
+            "from": desde,
+            "until": hasta,
+            "datestamp": datetime.fromisoformat(datestamp),
+            "obra_id": int(obra_id),
+            "cursor": int(cursor),
+        }
+    except (ValueError, UnicodeDecodeError):
+        raise ErrorOAI("badResumptionToken", "Token de reanudación inválido")
+
+
+def _validar_argumentos(verbo, argumentos):
+    obligatorios, opcionales = VERBOS[verbo]
+    claves = set(argumentos) - {"verb"}
+    if verbo in ("ListIdentifiers", "ListRecords") and "resumptionToken" in claves:
+        if claves != {"resumptionToken"}:
+            raise ErrorOAI("badArgument", "resumptionToken es exclusivo")
+        return
+    if not obligatorios <= claves or claves - obligatorios - opcionales:
+        raise ErrorOAI("badArgument", f"Argumentos inválidos para {verbo}")
+
+
+def _cabecera(registro) -> str:
+    estado = ' status="deleted"' if registro.eliminado else ""
+    return (
+        f"<header{estado}><identifier>{identificador(registro.obra_id)}</identifier>"
+        f"<datestamp>{_fecha_oai(registro.datestamp)}</datestamp></header>"
+    )
+
+
+def _registro(registro, prefijo) -> str:
+    if registro.eliminado:
+        return f"<record>{_cabecera(registro)}</record>"
+    metadatos = registro.marc21 if prefijo == "marc21" else registro.oai_dc
+    return f"<record>{_cabecera(registro)}<metadata>{metadatos}</metadata></record>"
+
+
+def _identify(url_base):
+    from catalogo_publico.models import RegistroOAI
+
+    primera = RegistroOAI.objects.order_by("datestamp").values_list(
+        "datestamp", flat=True
+    ).first()
+    email = getattr(settings, "OAI_EMAIL_ADMIN", "") or "admin@localhost"
+    return (
+        "<Identify>"
+        f"<repositoryName>{escape(getattr(settings, 'OAI_NOMBRE_REPOSITORIO', 'Catálogo musical MARC21'))}</repositoryName>"
+        f"<baseURL>{escape(url_base)}</baseURL>"
+        "<protocolVersion>2.0</protocolVersion>"
+        f"<adminEmail>{escape(email)}</adminEmail>"
+        f"<earliestDatestamp>{_fecha_oai(primera or timezone.now())}</earliestDatestamp>"
+        "<deletedRecord>persistent</deletedRecord>"
+        "<granularity>YYYY-MM-DDThh:mm:ssZ</granularity>"
+        "</Identify>"
+    )
+
+
+def _list_metadata_formats(argumentos):
+    from catalogo_publico.models import RegistroOAI
+
+    if "identifier" in argumentos:
+        obra_id = _obra_de_identificador(argumentos["identifier"])
+        if obra_id is None or not RegistroOAI.objects.filter(pk=obra_id).exists():
+            raise ErrorOAI("idDoesNotExist", "Identificador desconocido")
+    formatos = "".join(
+        f"<metadataFormat><metadataPrefix>{prefijo}</metadataPrefix>"
+        f"<schema>{esquema}</schema><metadataNamespace>{ns}</metadataNamespace>"
+        "</metadataFormat>"
+        for prefijo, (ns, esquema) in FORMATOS_METADATOS.items()
+    )
+    return f"<ListMetadataFormats>{formatos}</ListMetadataFormats>"
+
+
+def _get_record(argumentos):
+    from catalogo_publico.models import RegistroOAI
+
+    prefijo = argumentos["metadataPrefix"]
+    if prefijo not in FORMATOS_METADATOS:
+        raise ErrorOAI("cannotDisseminateFormat", f"Formato no disponible: {prefijo}")
+    obra_id = _obra_de_identificador(argumentos["identifier"])
+    registro = RegistroOAI.objects.filter(pk=obra_id).first() if obra_id else None
+    if registro is None:
+        raise ErrorOAI("idDoesNotExist", "Identificador desconocido")
+    return f"<GetRecord>{_registro(registro, prefijo)}</GetRecord>"
+
+
+def _listar(verbo, argumentos):
+    from catalogo_publico.models import RegistroOAI
+
+    if "resumptionToken" in argumentos:
+        token = _decodificar_token(argumentos["resumptionToken"])
+        argumentos = {k: v for k, v in token.items() if v != ""}
+    if "set" in argumentos:
+        raise ErrorOAI("noSetHierarchy", "El repositorio no define conjuntos")
+
+    prefijo = argumentos["metadataPrefix"]
+    if prefijo not in FORMATOS_METADATOS:
+        raise ErrorOAI("cannotDisseminateFormat", f"Formato no disponible: {prefijo}")
+
+    qs = RegistroOAI.objects.all()
+    granularidades = set()
+    if argumentos.get("from"):
+        desde, granularidad = _interpretar_fecha(argumentos["from"])
+        granularidades.add(granularidad)
+        qs = qs.filter(datestamp__gte=desde)
+    if argumentos.get("until"):
+        hasta, granularidad = _interpretar_fecha(argumentos["until"], hasta=True)
+        granularidades.add(granularidad)
+        qs = qs.filter(datestamp__lte=hasta)
+    if len(granularidades) > 1:
+        raise ErrorOAI("badArgument", "from y until con distinta granularidad")
+    if argumentos.get("from") and argumentos.get("until") and desde > hasta:
+        raise ErrorOAI("badArgument", "from es posterior a until")
+
+    cursor = argumentos.get("cursor", 0)
+    if "datestamp" in argumentos:
+        qs = qs.filter(
+            Q(datestamp__gt=argumentos["datestamp"])
+            | Q(datestamp=argumentos["datestamp"], obra_id__gt=argumentos["obra_id"])
+        )
+
+    campos = ["obra_id", "datestamp", "eliminado"]
+    if verbo == "ListRecords":
+        campos.append(prefijo)
+    tamano = tamano_pagina()
+    pagina = list(qs.order_by("datestamp", "obra_id").only(*campos)[: tamano + 1])
+    if not pagina:
+        if "datestamp" in argumentos:
+            # El token apuntaba al final exacto de la lista
+            return f"<{verbo}><resumptionToken cursor=\"{cursor}\"/></{verbo}>"
+        raise ErrorOAI("noRecordsMatch", "Ningún registro coincide con la consulta")
+
+    hay_mas = len(pagina) > tamano
+    pagina = pagina[:tamano]
+    if verbo == "ListRecords":
+        cuerpo = "".join(_registro(r, prefijo) for r in pagina)
+    else:
+        cuerpo = "".join(_cabecera(r) for r in pagina)
+
+    if hay_mas:
+        ultimo = pagina[-1]
+        token = _codificar_token(
+            {
+                "metadataPrefix": prefijo,
+                "from": argumentos.get("from", ""),
+                "until": argumentos.get("until", ""),
+                "datestamp": ultimo.datestamp.isoformat(),
+                "obra_id": ultimo.obra_id,
+                "cursor": cursor + len(pagina),
+            }
+        )
+        cuerpo += f'<resumptionToken cursor="{cursor}">{token}</resumptionToken>'
+    elif "datestamp" in argumentos:
+        # Última página de una lista reanudada: token vacío
+        cuerpo += f'<resumptionToken cursor="{cursor}"/>'
+    return f"<{verbo}>{cuerpo}</{verbo}>"
+
+
+def respuesta_oai(argumentos, url_base: str) -> str:
+    """
+    Documento OAI-PMH completo para los argumentos de la petición.
+
+    Args:
+        argumentos: QueryDict o dict de GET/POST
+        url_base: URL absoluta del endpoint (baseURL y <request>)
+    """
+    repetidos = hasattr(argumentos, "lists") and any(
+        len(valores) > 1 for _, valores in argumentos.lists()
+    )
+    argumentos = {clave: argumentos.get(clave) for clave in argumentos}
+    verbo = argumentos.get("verb")
+    atributos = ""
+    try:
+        if verbo not in VERBOS or (repetidos and argumentos.get("verb") is None):
+            raise ErrorOAI("badVerb", "Verbo ilegal o ausente")
+        if repetidos:
+            raise ErrorOAI("badArgument", "Argumento repetido")
+        _validar_argumentos(verbo, argumentos)
+        atributos = "".join(
+            f" {clave}={quoteattr(limpiar_xml(valor))}"
+            for clave, valor in argumentos.items()
+        )
+        if verbo == "Identify":
+            cuerpo = _identify(url_base)
+        elif verbo == "ListMetadataFormats":
+            cuerpo = _list_metadata_formats(argumentos)
+        elif verbo == "ListSets":
+            raise ErrorOAI("noSetHierarchy", "El repositorio no define conjuntos")
+        elif verbo == "GetRecord":
+            cuerpo = _get_record(argumentos)
+        else:
+            cuerpo = _listar(verbo, argumentos)
+    except ErrorOAI as e:
+        cuerpo = f"<error code={quoteattr(e.codigo)}>{escape(limpiar_xml(e.mensaje))}</error>"
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<OAI-PMH xmlns="{NS_OAI}" xmlns:xsi="{NS_XSI}" '
+        f'xsi:schemaLocation="{NS_OAI} http://www.openarchives.org/OAI/2.0/OAI-PMH.xsd">'
+        f"<responseDate>{_fecha_oai(timezone.now())}</responseDate>"
+        f"<request{atributos}>{escape(url_base)}</request>"
+        f"{cuerpo}</OAI-PMH>\n"
+    )
@@ -0,0 +1,349 @@
+"""
+Signals que mantienen sincronizadas las tablas FichaPublica y RegistroOAI y
+la caché HTTP de las páginas públicas de obra.
+
+Cada handler solo programa el recálculo o la invalidación (on_commit,
+agrupado por obra); el trabajo real ocurre en catalogo_publico.services.
+"""
+
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from catalogacion.models import (
+    AutoridadFormaMusical,
+    AutoridadPersona,
+    AutoridadTituloUniforme,
+    CodigoPaisEntidad,
+    EnlaceDocumentoFuente773,
+    Fecha264,
+    IncipitMusical,
+    MateriaGenero655,
+    MedioInterpretacion382,
+    MedioInterpretacion382_a,
+    NumeroControl773,
+    NumeroControl774,
+    NumeroControl787,
+    ObraGeneral,
+    ProduccionPublicacion,
+)
+from digitalizacion.models import DigitalSet, WorkSegment
+
+from .models import FichaPublica
+from .services.cache_service import (
+    programar_invalidacion_catalogo,
+    programar_invalidacion_obra,
+    programar_invalidacion_obras,
+)
+from .services.faceta_service import descontar_facetas
+from .services.ficha_service import (
+    programar_actualizacion_ficha,
+    programar_actualizacion_fichas,
+)
+from .services.oai_service import (
+    programar_actualizacion_oai,
+    programar_actualizacion_oai_obras,
+)
+
+# Campos de cache de PDF que no afectan a la ficha
+CAMPOS_CACHE_PDF = {"cached_pdf_path", "cached_pdf_generated_at", "cached_pdf_huella"}
+
+
+# === ObraGeneral ===
+
+@receiver(post_save, sender=ObraGeneral)
+def actualizar_ficha_por_obra(sender, instance, **kwargs):
+    """
+    Recalcula la ficha de la obra y la de sus obras hijas (773), cuya
+    signatura de colección depende del número de control de esta.
+    """
+    programar_actualizacion_ficha(instance.pk)
+
+    hijas = NumeroControl773.objects.filter(
+        obra_relacionada_id=instance.pk,
+        enlace_773__obra__publicada=True,
+    ).values_list("enlace_773__obra_id", flat=True)
+    programar_actualizacion_fichas(hijas)
+
+
+# === Registros hijos que aparecen en la ficha ===
+
+@receiver(post_save, sender=CodigoPaisEntidad)
+@receiver(post_delete, sender=CodigoPaisEntidad)
+@receiver(post_save, sender=IncipitMusical)
+@receiver(post_delete, sender=IncipitMusical)
+@receiver(post_save, sender=EnlaceDocumentoFuente773)
+@receiver(post_delete, sender=EnlaceDocumentoFuente773)
+@receiver(post_save, sender=MateriaGenero655)
+@receiver(post_delete, sender=MateriaGenero655)
+@receiver(post_save, sender=MedioInterpretacion382)
+@receiver(post_delete, sender=MedioInterpretacion382)
+@receiver(post_save, sender=ProduccionPublicacion)
+@receiver(post_delete, sender=ProduccionPublicacion)
+def actualizar_ficha_por_hijo(sender, instance, **kwargs):
+    programar_actualizacion_ficha(instance.obra_id)
+
+
+@receiver(post_save, sender=MedioInterpretacion382_a)
+@receiver(post_delete, sender=MedioInterpretacion382_a)
+def actualizar_ficha_por_medio_382(sender, instance, **kwargs):
+    try:
+        obra_id = instance.medio_interpretacion.obra_id
+    except MedioInterpretacion382.DoesNotExist:
+        return
+    programar_actualizacion_ficha(obra_id)
+
+
+@receiver(post_save, sender=Fecha264)
+@receiver(post_delete, sender=Fecha264)
+def actualizar_ficha_por_fecha_264(sender, instance, **kwargs):
+    try:
+        obra_id = instance.produccion_publicacion.obra_id
+    except ProduccionPublicacion.DoesNotExist:
+        return
+    programar_actualizacion_ficha(obra_id)
+
+
+@receiver(post_save, sender=NumeroControl773)
+@receiver(post_delete, sender=NumeroControl773)
+def actualizar_ficha_por_numero_control_773(sender, instance, **kwargs):
+    try:
+        obra_id = instance.enlace_773.obra_id
+    except EnlaceDocumentoFuente773.DoesNotExist:
+        return
+    programar_actualizacion_ficha(obra_id)
+
+
+# === Autoridades ===
+
+@receiver(post_save, sender=AutoridadPersona)
+def actualizar_fichas_por_persona(sender, instance, created, **kwargs):
+    if created:
+        return
+    obras = ObraGeneral.objects.filter(
+        compositor=instance, publicada=True
+    ).values_list("id", flat=True)
+    programar_actualizacion_fichas(obras)
+
+
+@receiver(post_save, sender=AutoridadTituloUniforme)
+def actualizar_fichas_por_titulo_uniforme(sender, instance, created, **kwargs):
+    if created:
+        return
+    obras = ObraGeneral.objects.filter(
+        Q(titulo_uniforme=instance) | Q(titulo_240=instance), publicada=True
+    ).values_list("id", flat=True)
+    programar_actualizacion_fichas(obras)
+
+
+@receiver(post_save, sender=AutoridadFormaMusical)
+def actualizar_fichas_por_forma(sender, instance, created, **kwargs):
+    if created:
+        return
+    obras = ObraGeneral.objects.filter(
+        Q(forma_130=instance) | Q(forma_240=instance) | Q(materias_655__materia=instance),
+        publicada=True,
+    ).values_list("id", flat=True)
+    programar_actualizacion_fichas(obras)
+
+
+# === Digitalización (portada y visor) ===
+
+@receiver(post_save, sender=DigitalSet)
+def actualizar_fichas_por_digital_set(sender, instance, **kwargs):
+    obra_ids = list(instance.segments.values_list("obra_id", flat=True))
+    if instance.obra_id:
+        obra_ids.append(instance.obra_id)
+    programar_actualizacion_fichas(obra_ids)
+
+
+@receiver(post_save, sender=WorkSegment)
+def actualizar_ficha_por_segmento(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= CAMPOS_CACHE_PDF:
+        return
+    programar_actualizacion_ficha(instance.obra_id)
+
+
+@receiver(post_delete, sender=WorkSegment)
+def actualizar_ficha_por_segmento_eliminado(sender, instance, **kwargs):
+    programar_actualizacion_ficha(instance.obra_id)
+
+
+# === Facetas ===
+
+@receiver(pre_delete, sender=FichaPublica)
+def descontar_facetas_ficha(sender, instance, **kwargs):
+    """Mantiene ConteoFaceta al despublicar o eliminar la obra (también en CASCADE)."""
+    descontar_facetas(instance)
+
+
+# === Caché HTTP de páginas de obra ===
+
+# Modelos de catalogación que no se muestran en las páginas públicas
+MODELOS_SIN_CACHE = {"IndiceBusquedaObra"}
+# Registros compartidos entre obras fuera del módulo de autoridades
+AUTORIDADES_COMPARTIDAS = {"EncabezamientoEnlace"}
+
+
+def _ruta_hacia_obra(modelo, profundidad=3):
+    """
+    Atributos a recorrer desde un registro hasta el id de su obra, siguiendo
+    FKs llamadas "obra" (ej: Fecha264 -> ["produccion_publicacion", "obra_id"]).
+    Las FKs a ObraGeneral con otro nombre (773 $w, borradores) no son de la obra.
+    """
+    campos = [f for f in modelo._meta.concrete_fields if f.many_to_one or f.one_to_one]
+    for campo in campos:
+        if campo.name == "obra" and campo.related_model is ObraGeneral:
+            return [campo.attname]
+    if profundidad > 1:
+        for campo in campos:
+            padre = campo.related_model
+            if padre is ObraGeneral or padre._meta.app_label != "catalogacion":
+                continue
+            ruta = _ruta_hacia_obra(padre, profundidad - 1)
+            if ruta:
+                return [campo.name] + ruta
+    return None
+
+
+def _obra_de(instance, ruta):
+    valor = instance
+    try:
+        for atributo in ruta:
+            valor = getattr(valor, atributo)
+            if valor is None:
+                return None
+    except ObjectDoesNotExist:
+        # El padre ya se eliminó (CASCADE); su propia señal invalida la obra
+        return None
+    return valor
+
+
+def invalidar_cache_por_hijo(sender, instance, **kwargs):
+    programar_invalidacion_obra(_obra_de(instance, RUTAS_HACIA_OBRA[sender]))
+
+
+def invalidar_cache_por_autoridad(sender, instance, created=False, **kwargs):
+    if not created:
+        programar_invalidacion_catalogo()
+
+
+RUTAS_HACIA_OBRA = {}
+for _modelo in apps.get_app_config("catalogacion").get_models():
+    if _modelo is ObraGeneral or _modelo.__name__ in MODELOS_SIN_CACHE:
+        continue
+    if (
+        _modelo.__module__ == "catalogacion.models.autoridades"
+        or _modelo.__name__ in AUTORIDADES_COMPARTIDAS
+    ):
+        post_save.connect(invalidar_cache_por_autoridad, sender=_modelo)
+        post_delete.connect(invalidar_cache_por_autoridad, sender=_modelo)
+        continue
+    _ruta = _ruta_hacia_obra(_modelo)
+    if _ruta:
+        RUTAS_HACIA_OBRA[_modelo] = _ruta
+        post_save.connect(invalidar_cache_por_hijo, sender=_modelo)
+        post_delete.connect(invalidar_cache_por_hijo, sender=_modelo)
+
+
+@receiver(post_save, sender=ObraGeneral)
+@receiver(post_delete, sender=ObraGeneral)
+def invalidar_cache_por_obra(sender, instance, **kwargs):
+    """
+    Invalida la obra (publicar, despublicar, editar) y las que la enlazan
+    en 773/774/787, que muestran su título o número de control.
+    """
+    programar_invalidacion_obra(instance.pk)
+
+    enlazadas = []
+    for modelo, enlace in (
+        (NumeroControl773, "enlace_773__obra_id"),
+        (NumeroControl774, "enlace_774__obra_id"),
+        (NumeroControl787, "enlace_787__obra_id"),
+    ):
+        enlazadas += modelo.objects.filter(obra_relacionada_id=instance.pk).values_list(
+            enlace, flat=True
+        )
+    programar_invalidacion_obras(enlazadas)
+
+
+@receiver(post_save, sender=DigitalSet)
+def invalidar_cache_por_digital_set(sender, instance, **kwargs):
+    obra_ids = list(instance.segments.values_list("obra_id", flat=True))
+    if instance.obra_id:
+        obra_ids.append(instance.obra_id)
+    programar_invalidacion_obras(obra_ids)
+
+
+@receiver(post_save, sender=WorkSegment)
+@receiver(post_delete, sender=WorkSegment)
+def invalidar_cache_por_segmento(sender, instance, **kwargs):
+    programar_invalidacion_obra(instance.obra_id)
+
+
+# === Registros OAI-PMH ===
+# El registro MARC usa todos los campos de la obra: se reutilizan las rutas
+# hacia la obra calculadas para la caché HTTP.
+
+def actualizar_oai_por_hijo(sender, instance, **kwargs):
+    programar_actualizacion_oai(_obra_de(instance, RUTAS_HACIA_OBRA[sender]))
+
+
+def _obras_de_autoridad(instance):
+    """Obras publicadas que muestran la autoridad en algún campo."""
+    obra_ids = set()
+    for relacion in instance._meta.related_objects:
+        modelo = relacion.related_model
+        filtro = {relacion.field.name: instance}
+        if modelo is ObraGeneral:
+            obra_ids.update(
+                modelo.objects.filter(publicada=True, **filtro).values_list("id", flat=True)
+            )
+        elif modelo in RUTAS_HACIA_OBRA:
+            ruta = RUTAS_HACIA_OBRA[modelo]
+            publicada = "__".join(ruta[:-1] + ["obra", "publicada"])
+            obra_ids.update(
+                modelo.objects.filter(**filtro, **{publicada: True}).values_list(
+                    "__".join(ruta), flat=True
+                )
+            )
+    return obra_ids
+
+
+def actualizar_oai_por_autoridad(sender, instance, created=False, **kwargs):
+    if not created:
+        programar_actualizacion_oai_obras(_obras_de_autoridad(instance))
+
+
+for _modelo in RUTAS_HACIA_OBRA:
+    post_save.connect(actualizar_oai_por_hijo, sender=_modelo)
+    post_delete.connect(actualizar_oai_por_hijo, sender=_modelo)
+for _modelo in apps.get_app_config("catalogacion").get_models():
+    if (
+        _modelo.__module__ == "catalogacion.models.autoridades"
+        or _modelo.__name__ in AUTORIDADES_COMPARTIDAS
+    ):
+        post_save.connect(actualizar_oai_por_autoridad, sender=_modelo)
+
+
+@receiver(post_save, sender=ObraGeneral)
+@receiver(post_delete, sender=ObraGeneral)
+def actualizar_oai_por_obra(sender, instance, **kwargs):
+    """
+    Publicar, editar, despublicar, enviar a la papelera o eliminar la obra;
+    también las que la enlazan en 773/774/787 ($w lleva su número de control).
+    """
+    programar_actualizacion_oai(instance.pk)
+
+    enlazadas = []
+    for modelo, enlace in (
+        (NumeroControl773, "enlace_773__obra_id"),
+        (NumeroControl774, "enlace_774__obra_id"),
+        (NumeroControl787, "enlace_787__obra_id"),
+    ):
+        enlazadas += modelo.objects.filter(
+            obra_relacionada_id=instance.pk
+        ).values_list(enlace, flat=True)
+    programar_actualizacion_oai_obras(enlazadas)
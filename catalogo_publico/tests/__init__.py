@@ -0,0 +1,9 @@
+"""
+Tests del catálogo público.
+
+- test_fichas: tabla materializada FichaPublica
+- test_facetas: facetas y sus conteos
+- test_cache: ETag, 304 e invalidación de la página de detalle
+- test_descarga: entrega de PDFs con Range y GET condicional
+- test_oai: proveedor OAI-PMH (reanudación, fechas, errores)
+"""
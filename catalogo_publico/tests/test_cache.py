@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from catalogacion.models import AutoridadPersona, CodigoPaisEntidad, ObraGeneral
+from catalogo_publico.services.cache_service import ALIAS_CACHE
+
+
+class CacheObraPublicaTest(TestCase):
+    def setUp(self):
+        caches[ALIAS_CACHE].clear()
+        self.persona = AutoridadPersona.objects.create(apellidos_nombres="Pérez, Juan")
+        self.obra = self._en_commit(
+            ObraGeneral.objects.create,
+            tipo_registro="d",
+            nivel_bibliografico="m",
+            titulo_principal="Pasillo",
+            centro_catalogador="UNL",
+            publicada=True,
+            compositor=self.persona,
+        )
+        self.url = reverse("catalogo_publico:detalle_obra", args=[self.obra.pk])
+
+    def _en_commit(self, funcion, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return funcion(*args, **kwargs)
+
+    def _etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_revalidacion_responde_304(self):
+        response = self.client.get(self.url)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_la_visita_repetida_sale_de_la_cache(self):
+        primera = self.client.get(self.url)
+        with self.assertNumQueries(1):  # solo los validadores
+            segunda = self.client.get(self.url)
+        self.assertEqual(segunda.content, primera.content)
+
+    def test_editar_la_obra_cambia_el_etag(self):
+        etag = self._etag()
+        self.obra.titulo_principal = "Vals"
+        self._en_commit(self.obra.save)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Vals")
+
+    def test_editar_un_registro_hijo_cambia_el_etag(self):
+        etag = self._etag()
+        self._en_commit(CodigoPaisEntidad.objects.create, obra=self.obra, codigo_pais="pe")
+        self.assertNotEqual(self._etag(), etag)
+
+    def test_editar_una_autoridad_cambia_el_etag(self):
+        etag = self._etag()
+        self.persona.apellidos_nombres = "Pérez Ruiz, Juan"
+        self._en_commit(self.persona.save)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Pérez Ruiz, Juan")
+
+    def test_despublicar(self):
+        self._etag()
+        self.obra.publicada = False
+        self._en_commit(self.obra.save)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_con_sesion_no_se_cachea(self):
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "x"
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
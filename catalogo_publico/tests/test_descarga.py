@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase
+
+from catalogo_publico.services.descarga_service import respuesta_archivo
+
+
+class RangoDescargaTest(SimpleTestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.datos = bytes(range(256)) * 4
+        (Path(self.media) / "a.pdf").write_bytes(self.datos)
+        self.factory = RequestFactory()
+
+    def _pedir(self, rango=None, offload="", **cabeceras):
+        if rango:
+            cabeceras["HTTP_RANGE"] = rango
+        request = self.factory.get("/", **cabeceras)
+        with self.settings(MEDIA_ROOT=self.media, ARCHIVOS_OFFLOAD=offload):
+            return respuesta_archivo(request, "a.pdf")
+
+    def _contenido(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_rangos_satisfacibles(self):
+        casos = [
+            ("bytes=0-9", 0, 9),
+            ("bytes=1000-", 1000, 1023),
+            ("bytes=-24", 1000, 1023),
+            ("bytes=-5000", 0, 1023),
+            ("bytes=10-99999", 10, 1023),
+        ]
+        for rango, inicio, fin in casos:
+            with self.subTest(rango=rango):
+                response = self._pedir(rango)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], f"bytes {inicio}-{fin}/1024")
+                self.assertEqual(response["Content-Length"], str(fin - inicio + 1))
+                self.assertEqual(self._contenido(response), self.datos[inicio : fin + 1])
+
+    def test_rangos_no_satisfacibles(self):
+        for rango in ("bytes=1024-", "bytes=20-10", "bytes=-0"):
+            with self.subTest(rango=rango):
+                response = self._pedir(rango)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_rangos_ignorados_envian_el_archivo_completo(self):
+        for rango in ("bytes=0-1,5-9", "items=0-9", "bytes=-"):
+            with self.subTest(rango=rango):
+                response = self._pedir(rango)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self._contenido(response), self.datos)
+
+    def test_if_range(self):
+        etag = self._pedir()["ETag"]
+        self.assertEqual(self._pedir("bytes=0-9", HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self._pedir("bytes=0-9", HTTP_IF_RANGE='"otro"').status_code, 200)
+
+    def test_get_condicional(self):
+        response = self._pedir()
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        repetida = self._pedir(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_delegacion_al_servidor_web(self):
+        response = self._pedir("bytes=0-9", offload="x-accel-redirect")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], "/media-protegida/a.pdf")
+        self.assertEqual(response.content, b"")
+
+    def test_archivo_inexistente(self):
+        request = self.factory.get("/")
+        with self.settings(MEDIA_ROOT=self.media), self.assertRaises(Http404):
+            respuesta_archivo(request, "no-existe.pdf")
@@ -0,0 +1,114 @@
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from catalogacion.models import AutoridadPersona, CodigoPaisEntidad, ObraGeneral
+from catalogo_publico.models import ConteoFaceta, FacetaObra, FichaPublica
+from catalogo_publico.services import faceta_service
+from catalogo_publico.services.cache_service import ALIAS_CACHE
+from catalogo_publico.services.ficha_service import _obtener_obra
+
+
+class FacetasTest(TestCase):
+    def setUp(self):
+        caches[ALIAS_CACHE].clear()
+        self.persona = AutoridadPersona.objects.create(apellidos_nombres="Pérez, Juan")
+
+    def _en_commit(self, funcion, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return funcion(*args, **kwargs)
+
+    def _crear_obra(self, titulo, **campos):
+        return self._en_commit(
+            ObraGeneral.objects.create,
+            tipo_registro="d",
+            nivel_bibliografico="m",
+            titulo_principal=titulo,
+            centro_catalogador="UNL",
+            **campos,
+        )
+
+    def _conteos(self, faceta):
+        return dict(
+            ConteoFaceta.objects.filter(faceta=faceta).values_list("valor", "total")
+        )
+
+    def test_publicar_editar_y_despublicar(self):
+        obra = self._crear_obra("Pasillo", publicada=True, compositor=self.persona)
+        otra = self._crear_obra("Vals", publicada=True, compositor=self.persona)
+        self.assertEqual(self._conteos("compositor"), {str(self.persona.pk): 2})
+        self.assertEqual(self._conteos("pais"), {})
+
+        self._en_commit(CodigoPaisEntidad.objects.create, obra=obra, codigo_pais="ec")
+        self.assertEqual(self._conteos("pais"), {"ec": 1})
+
+        obra.compositor = None
+        self._en_commit(obra.save)
+        self.assertEqual(self._conteos("compositor"), {str(self.persona.pk): 1})
+
+        otra.publicada = False
+        self._en_commit(otra.save)
+        self.assertEqual(self._conteos("compositor"), {})
+        self.assertEqual(self._conteos("digital"), {"no": 1})
+
+    def test_renombrar_la_autoridad_cambia_la_etiqueta(self):
+        self._crear_obra("Pasillo", publicada=True, compositor=self.persona)
+        self.persona.apellidos_nombres = "Pérez Ruiz, Juan"
+        self._en_commit(self.persona.save)
+        self.assertEqual(
+            ConteoFaceta.objects.get(faceta="compositor").etiqueta, "Pérez Ruiz, Juan"
+        )
+
+    def test_no_cuenta_dos_veces_una_fila_que_otro_recalculo_inserto(self):
+        obra = self._crear_obra("Pasillo", publicada=True, compositor=self.persona)
+        ficha = FichaPublica.objects.get(obra=obra)
+        FacetaObra.objects.filter(ficha=ficha).delete()
+
+        calcular = faceta_service.calcular_facetas
+
+        def adelantarse(obra):
+            # Otro proceso inserta las mismas filas entre la lectura y la escritura
+            nuevas = calcular(obra)
+            for (faceta, valor), etiqueta in nuevas.items():
+                FacetaObra.objects.create(
+                    ficha=ficha, faceta=faceta, valor=valor, etiqueta=etiqueta
+                )
+            return nuevas
+
+        faceta_service.calcular_facetas = adelantarse
+        self.addCleanup(setattr, faceta_service, "calcular_facetas", calcular)
+        faceta_service.actualizar_facetas(ficha, _obtener_obra(obra.pk))
+
+        self.assertEqual(self._conteos("compositor"), {str(self.persona.pk): 1})
+
+    def test_recalcular_conteos(self):
+        self._crear_obra("Pasillo", publicada=True, compositor=self.persona)
+        ConteoFaceta.objects.update(total=99)
+        faceta_service.recalcular_conteos()
+        self.assertEqual(self._conteos("compositor"), {str(self.persona.pk): 1})
+
+    def test_conteos_con_filtros_se_cachean_hasta_el_siguiente_cambio(self):
+        self._crear_obra("Pasillo", publicada=True, compositor=self.persona)
+        fichas = FichaPublica.objects.filter(tipo_registro="d")
+        parametros = {"tipo": "d"}
+
+        def total_compositor():
+            (valor,) = faceta_service.obtener_conteos(fichas, parametros)["compositor"]
+            return valor["total"]
+
+        self.assertEqual(total_compositor(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(total_compositor(), 1)
+
+        self._crear_obra("Vals", publicada=True, compositor=self.persona)
+        self.assertEqual(total_compositor(), 2)
+
+    def test_lista_publica_filtrada(self):
+        self._crear_obra("Pasillo", publicada=True, compositor=self.persona)
+        self._crear_obra("Vals", publicada=True)
+
+        response = self.client.get(
+            reverse("catalogo_publico:lista_obras"), {"compositor": self.persona.pk}
+        )
+        self.assertContains(response, "Pasillo")
+        self.assertNotContains(response, "Vals")
@@ -0,0 +1,51 @@
+from django.test import TestCase
+
+from catalogacion.models import AutoridadPersona, ObraGeneral
+from catalogo_publico.models import FichaPublica
+
+
+class FichaPublicaTest(TestCase):
+    def _crear_obra(self, **campos):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ObraGeneral.objects.create(
+                tipo_registro="d",
+                nivel_bibliografico="m",
+                titulo_principal="Pasillo",
+                centro_catalogador="UNL",
+                **campos,
+            )
+
+    def _guardar(self, instancia):
+        with self.captureOnCommitCallbacks(execute=True):
+            instancia.save()
+
+    def test_solo_las_obras_publicadas_tienen_ficha(self):
+        obra = self._crear_obra(publicada=False)
+        self.assertFalse(FichaPublica.objects.filter(obra=obra).exists())
+
+        obra.publicada = True
+        self._guardar(obra)
+        ficha = FichaPublica.objects.get(obra=obra)
+        self.assertEqual(ficha.titulo_principal, "Pasillo")
+        self.assertEqual(ficha.num_control, obra.num_control)
+
+        obra.publicada = False
+        self._guardar(obra)
+        self.assertFalse(FichaPublica.objects.filter(obra=obra).exists())
+
+    def test_editar_la_obra_recalcula_la_ficha(self):
+        obra = self._crear_obra(publicada=True)
+        obra.titulo_principal = "Vals"
+        self._guardar(obra)
+        self.assertEqual(FichaPublica.objects.get(obra=obra).titulo_principal, "Vals")
+
+    def test_editar_una_autoridad_recalcula_sus_fichas(self):
+        persona = AutoridadPersona.objects.create(apellidos_nombres="Pérez, Juan")
+        obra = self._crear_obra(publicada=True, compositor=persona)
+        self.assertEqual(FichaPublica.objects.get(obra=obra).compositor_nombre, "Pérez, Juan")
+
+        persona.apellidos_nombres = "Pérez Ruiz, Juan"
+        self._guardar(persona)
+        self.assertEqual(
+            FichaPublica.objects.get(obra=obra).compositor_nombre, "Pérez Ruiz, Juan"
+        )
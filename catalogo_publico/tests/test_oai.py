@@ -0,0 +1,151 @@
+import re
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from xml.dom.minidom import parseString
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalogacion.models import ObraGeneral
+from catalogo_publico.models import RegistroOAI
+from catalogo_publico.services.oai_service import (
+    actualizar_registro_oai,
+    identificador,
+    reconstruir_registros_oai,
+)
+
+
+def _errores(contenido):
+    return re.findall(r'<error code="([^"]+)"', contenido.decode())
+
+
+def _identificadores(contenido):
+    return [int(n) for n in re.findall(r"<identifier>[^<]*:(\d+)</identifier>", contenido.decode())]
+
+
+@override_settings(OAI_TAMANO_PAGINA=2)
+class OAIPMHTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.obras = [
+            ObraGeneral.objects.create(
+                tipo_registro="d",
+                nivel_bibliografico="m",
+                titulo_principal=f"Obra {n}",
+                centro_catalogador="UNL",
+                publicada=True,
+            )
+            for n in range(5)
+        ]
+        reconstruir_registros_oai()
+
+    def _oai(self, **argumentos):
+        response = self.client.get(reverse("catalogo_publico:oai"), argumentos)
+        self.assertEqual(response.status_code, 200)
+        parseString(response.content)
+        return response.content
+
+    def _fechar(self, obra, *fecha):
+        RegistroOAI.objects.filter(pk=obra.pk).update(
+            datestamp=datetime(*fecha, tzinfo=dt_timezone.utc)
+        )
+
+    def test_reanudacion_recorre_todos_los_registros(self):
+        identificadores = []
+        contenido = self._oai(verb="ListIdentifiers", metadataPrefix="oai_dc")
+        paginas = 1
+        while True:
+            identificadores += _identificadores(contenido)
+            token = re.search(r"<resumptionToken[^>]*>([^<]+)</resumptionToken>", contenido.decode())
+            if not token:
+                break
+            contenido = self._oai(verb="ListIdentifiers", resumptionToken=token.group(1))
+            paginas += 1
+
+        self.assertEqual(paginas, 3)
+        self.assertEqual(sorted(identificadores), sorted(o.pk for o in self.obras))
+        # La última página cierra la lista con un token vacío
+        self.assertIn(b'<resumptionToken cursor="4"/>', contenido)
+
+    def test_rango_de_fechas(self):
+        for obra, dia in zip(self.obras, (1, 2, 2, 3, 4)):
+            self._fechar(obra, 2024, 1, dia, 12, 0, 0)
+
+        # Con granularidad de día, until incluye todo el día
+        contenido = self._oai(
+            verb="ListIdentifiers",
+            metadataPrefix="oai_dc",
+            **{"from": "2024-01-02", "until": "2024-01-03"},
+        )
+        self.assertEqual(_identificadores(contenido), [o.pk for o in self.obras[1:3]])
+        self.assertIn(b"resumptionToken", contenido)
+
+        contenido = self._oai(
+            verb="ListIdentifiers",
+            metadataPrefix="oai_dc",
+            **{"from": "2024-01-03T12:00:00Z", "until": "2024-01-04T11:59:59Z"},
+        )
+        self.assertEqual(_identificadores(contenido), [self.obras[3].pk])
+        self.assertIn(b"<datestamp>2024-01-03T12:00:00Z</datestamp>", contenido)
+
+        contenido = self._oai(verb="ListRecords", metadataPrefix="marc21", **{"from": "2024-02-01"})
+        self.assertEqual(_errores(contenido), ["noRecordsMatch"])
+
+    def test_registro_eliminado(self):
+        obra = self.obras[0]
+        self._fechar(obra, 2024, 1, 1, 0, 0, 0)
+        # Sin cambios en el contenido el datestamp no avanza
+        actualizar_registro_oai(obra.pk)
+        self.assertEqual(RegistroOAI.objects.get(pk=obra.pk).datestamp.year, 2024)
+
+        ObraGeneral.objects.filter(pk=obra.pk).update(publicada=False)
+        actualizar_registro_oai(obra.pk)
+
+        contenido = self._oai(
+            verb="GetRecord", identifier=identificador(obra.pk), metadataPrefix="marc21"
+        )
+        self.assertIn(b'status="deleted"', contenido)
+        self.assertNotIn(b"<metadata>", contenido)
+        self.assertGreater(RegistroOAI.objects.get(pk=obra.pk).datestamp.year, 2024)
+
+    def test_get_record(self):
+        obra = self.obras[1]
+        contenido = self._oai(
+            verb="GetRecord", identifier=identificador(obra.pk), metadataPrefix="marc21"
+        )
+        self.assertIn(b"Obra 1", contenido)
+        self.assertIn(b"http://www.loc.gov/MARC21/slim", contenido)
+
+        errores = [
+            ({"identifier": "oai:otro:1", "metadataPrefix": "oai_dc"}, "idDoesNotExist"),
+            ({"identifier": identificador(obra.pk), "metadataPrefix": "mods"}, "cannotDisseminateFormat"),
+        ]
+        for argumentos, codigo in errores:
+            with self.subTest(codigo=codigo):
+                self.assertEqual(_errores(self._oai(verb="GetRecord", **argumentos)), [codigo])
+
+    def test_argumentos_invalidos(self):
+        casos = [
+            {"verb": "ListRecords"},
+            {"verb": "ListRecords", "metadataPrefix": "oai_dc", "desconocido": "1"},
+            {"verb": "GetRecord", "metadataPrefix": "oai_dc"},
+            {"verb": "ListRecords", "metadataPrefix": "oai_dc", "from": "2024-13-01"},
+            {"verb": "ListRecords", "metadataPrefix": "oai_dc", "from": "2024-01-01",
+             "until": "2024-01-02T00:00:00Z"},
+            {"verb": "ListRecords", "metadataPrefix": "oai_dc", "from": "2024-02-01",
+             "until": "2024-01-01"},
+            {"verb": "ListIdentifiers", "metadataPrefix": "oai_dc", "resumptionToken": "x"},
+        ]
+        for argumentos in casos:
+            with self.subTest(argumentos=argumentos):
+                self.assertEqual(_errores(self._oai(**argumentos)), ["badArgument"])
+
+    def test_argumento_repetido(self):
+        response = self.client.get(
+            reverse("catalogo_publico:oai") + "?verb=Identify&verb=Identify"
+        )
+        self.assertEqual(_errores(response.content), ["badArgument"])
+
+    def test_token_invalido(self):
+        contenido = self._oai(verb="ListRecords", resumptionToken="no-es-un-token")
+        self.assertEqual(_errores(contenido), ["badResumptionToken"])
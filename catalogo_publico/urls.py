@@ -3,9 +3,11 @@ from django.urls import path
 from .views import (
     DescargarPDFObraView,
     DetalleObraPublicaView,
+    ExportarMARCView,
     FormatoMARC21View,
     HomePublicoView,
     ListaObrasPublicaView,
+    OAIPMHView,
     VistaDetalladaObraView,
     VistaMARCCrudoView,
 )
@@ -22,4 +24,6 @@ urlpatterns = [
     path("obras/<int:pk>/marc21/", FormatoMARC21View.as_view(), name="formato_marc21"),
     path("obras/<int:pk>/descargar-pdf/", DescargarPDFObraView.as_view(), name="descargar_pdf"),
     path("obras/<int:pk>/marc-crudo/", VistaMARCCrudoView.as_view(), name="vista_marc_crudo"),
+    path("exportar/marc/", ExportarMARCView.as_view(), name="exportar_marc"),
+    path("oai/", OAIPMHView.as_view(), name="oai"),
 ]
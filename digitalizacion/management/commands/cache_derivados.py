@@ -0,0 +1,77 @@
+"""
+Informe y poda de las cachés de derivados regenerables: PDFs de segmento
+(con presupuesto DERIVADOS_CACHE_MB), thumbnails, imágenes IIIF compuestas y
+páginas de PDF renderizadas.
+
+Uso:
+    python manage.py cache_derivados
+    python manage.py cache_derivados --podar
+    python manage.py cache_derivados --podar --limite-mb=2048
+"""
+
+from django.core.management.base import BaseCommand
+
+from digitalizacion.services.cache_derivados import (
+    podar_derivados,
+    presupuesto_bytes,
+    resumen_por_coleccion,
+)
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1024 / 1024:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = "Tamaño y tasa de aciertos de la caché de derivados por colección"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--podar",
+            action="store_true",
+            help="Expulsar los PDFs de segmento usados hace más tiempo si se supera el presupuesto",
+        )
+        parser.add_argument(
+            "--limite-mb",
+            type=int,
+            default=None,
+            help="Presupuesto a aplicar al podar (default: DERIVADOS_CACHE_MB)",
+        )
+
+    def handle(self, *args, **options):
+        from digitalizacion.services.iiif_imagen import cache_iiif
+        from digitalizacion.services.render_pdf import cache_render
+
+        limite = presupuesto_bytes()
+        if options["limite_mb"] is not None:
+            limite = options["limite_mb"] * 1024 * 1024
+
+        if options["podar"]:
+            expulsados, liberados = podar_derivados(limite)
+            self.stdout.write(
+                self.style.SUCCESS(f"PDFs expulsados: {expulsados} ({_mb(liberados)})")
+            )
+
+        total_pdfs = total_thumbs = 0
+        for fila in resumen_por_coleccion():
+            ds = fila["digital_set"]
+            uso = fila["uso"]
+            tasa = uso.tasa_aciertos if uso else None
+            total_pdfs += fila["bytes_pdfs"]
+            total_thumbs += fila["bytes_thumbs"]
+            self.stdout.write(
+                f"  DigitalSet {ds.id} ({ds.obra.titulo_principal[:40]}): "
+                f"{fila['pdfs']} PDFs {_mb(fila['bytes_pdfs'])}, "
+                f"thumbs {_mb(fila['bytes_thumbs'])}, "
+                f"aciertos {uso.aciertos if uso else 0}/"
+                f"{uso.aciertos + uso.fallos if uso else 0}"
+                f" ({f'{tasa:.0%}' if tasa is not None else '-'}), "
+                f"expulsados {uso.expulsados if uso else 0}"
+            )
+
+        self.stdout.write(f"PDFs de segmento: {_mb(total_pdfs)} de {_mb(limite)}")
+        self.stdout.write(f"Thumbnails: {_mb(total_thumbs)}")
+        for nombre, cache in (("Imágenes IIIF", cache_iiif()), ("Páginas de PDF", cache_render())):
+            self.stdout.write(
+                f"{nombre}: {_mb(cache.tamano())} de {_mb(cache.limite_bytes)}"
+            )
@@ -0,0 +1,61 @@
+"""
+Worker de la cola de construcción de segmentos (ConstruccionSegmentosJob).
+Genera en una sola pasada por colección los PDFs y thumbnails de sus
+segmentos; con --procesos varias colecciones se procesan en paralelo.
+
+Uso:
+    python manage.py construir_segmentos
+    python manage.py construir_segmentos --todos --procesos=4
+    python manage.py construir_segmentos --obra=12 --force
+    python manage.py construir_segmentos --continuo --espera=10
+"""
+
+from digitalizacion.management.worker_cola import ComandoWorkerCola
+from digitalizacion.models import ConstruccionSegmentosJob, DigitalSet
+from digitalizacion.services.segmentos_lote import (
+    encolar_construccion_segmentos,
+    procesar_trabajo,
+)
+
+
+class Command(ComandoWorkerCola):
+    help = "Genera en lote los PDFs y thumbnails de los segmentos de colecciones"
+
+    modelo = ConstruccionSegmentosJob
+    procesar_trabajo = staticmethod(procesar_trabajo)
+    select_related = ("digital_set",)
+    minutos_colgado = 60
+    mensaje_procesados = "Colecciones procesadas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Encolar antes todas las colecciones con segmentos",
+        )
+        parser.add_argument(
+            "--obra",
+            type=int,
+            action="append",
+            default=[],
+            help="Encolar antes la colección con este id (se puede repetir)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerar aunque ya existan PDFs y thumbnails",
+        )
+        super().add_arguments(parser)
+
+    def encolar(self, **options):
+        colecciones = DigitalSet.objects.none()
+        if options["todos"]:
+            colecciones = DigitalSet.objects.filter(segments__isnull=False).distinct()
+        elif options["obra"]:
+            colecciones = DigitalSet.objects.filter(obra_id__in=options["obra"])
+        encolados = 0
+        for ds in colecciones.iterator():
+            if encolar_construccion_segmentos(ds, force=options["force"]):
+                encolados += 1
+        if encolados:
+            self.stdout.write(f"Colecciones encoladas: {encolados}")
@@ -0,0 +1,134 @@
+"""
+Genera las miniaturas de 200 y 600 px de páginas ya importadas.
+Las importaciones nuevas las generan solas; este comando completa las
+páginas importadas antes de existir las miniaturas.
+
+Uso:
+    python manage.py generar_miniaturas
+    python manage.py generar_miniaturas --obra=12 --procesos=4
+    python manage.py generar_miniaturas --force
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from digitalizacion.models import DigitalPage, DigitalSet
+from digitalizacion.services.almacen import blob_de, rutas_blob
+from digitalizacion.services.thumbnail_service import (
+    generar_miniaturas_pagina,
+    rutas_miniaturas,
+)
+
+
+class Command(BaseCommand):
+    help = "Genera las miniaturas de 200 y 600 px de las páginas importadas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--obra",
+            type=int,
+            action="append",
+            default=[],
+            help="Solo las páginas de esta obra (se puede repetir)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerar aunque la página ya tenga miniaturas",
+        )
+        parser.add_argument(
+            "--procesos",
+            type=int,
+            default=getattr(settings, "DIGITALIZACION_IMPORTACION_PROCESOS", 4),
+            help="Número de procesos en paralelo",
+        )
+
+    def handle(self, *args, **options):
+        media = Path(settings.MEDIA_ROOT)
+        pages = DigitalPage.objects.exclude(derivative_path="", master_path="")
+        if options["obra"]:
+            pages = pages.filter(digital_set__obra_id__in=options["obra"])
+        if not options["force"]:
+            pages = pages.filter(thumb_path="")
+
+        tareas = {}
+        ds_por_pagina = {}
+        for page in pages.only("id", "digital_set_id", "derivative_path", "master_path"):
+            # El derivado (2000 px) se reduce mucho más rápido que el TIFF
+            origen = media / (page.derivative_path or page.master_path)
+            if not origen.exists():
+                continue
+            blob = blob_de(origen)
+            if blob is not None:
+                rutas = rutas_blob(blob.name)
+                chica, mediana = rutas["miniatura"], rutas["vista_previa"]
+            else:
+                # repo/iiif/jpg/x.jpg o repo/master/x.tif -> repo/iiif/thumbs/x_200.jpg
+                repo = origen.parents[2] if page.derivative_path else origen.parents[1]
+                chica, mediana = rutas_miniaturas(repo / "iiif" / "thumbs", origen.stem)
+            tareas[page.id] = (str(origen), str(chica), str(mediana))
+            ds_por_pagina[page.id] = page.digital_set_id
+
+        if not tareas:
+            self.stdout.write("No hay páginas pendientes.")
+            return
+
+        procesos = max(1, options["procesos"])
+        generadas = []
+        errores = 0
+
+        def _registrar(page_id):
+            _, chica, mediana = tareas[page_id]
+            generadas.append(
+                DigitalPage(
+                    id=page_id,
+                    thumb_path=str(Path(chica).relative_to(media)).replace("\\", "/"),
+                    preview_path=str(Path(mediana).relative_to(media)).replace("\\", "/"),
+                )
+            )
+
+        if procesos == 1:
+            for page_id, args in tareas.items():
+                try:
+                    generar_miniaturas_pagina(*args)
+                    _registrar(page_id)
+                except Exception as e:
+                    errores += 1
+                    self.stdout.write(self.style.WARNING(f"  [ERROR] página {page_id}: {e}"))
+        else:
+            connections.close_all()
+            contexto = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+                futuros = {
+                    pool.submit(generar_miniaturas_pagina, *args): page_id
+                    for page_id, args in tareas.items()
+                }
+                for futuro in as_completed(futuros):
+                    page_id = futuros[futuro]
+                    try:
+                        futuro.result()
+                        _registrar(page_id)
+                    except Exception as e:
+                        errores += 1
+                        self.stdout.write(
+                            self.style.WARNING(f"  [ERROR] página {page_id}: {e}")
+                        )
+
+        DigitalPage.objects.bulk_update(
+            generadas, ["thumb_path", "preview_path"], batch_size=200
+        )
+        # bulk_update no emite señales: guardar el DigitalSet actualiza las
+        # portadas del catálogo público y los manifiestos IIIF
+        for ds in DigitalSet.objects.filter(
+            id__in={ds_por_pagina[p.id] for p in generadas}
+        ):
+            ds.save(update_fields=["updated_at"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Miniaturas generadas: {len(generadas)} (errores: {errores})")
+        )
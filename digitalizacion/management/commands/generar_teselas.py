@@ -0,0 +1,118 @@
+"""
+Genera las pirámides de teselas (IIIF Image) de páginas ya importadas.
+Las importaciones nuevas las generan solas; este comando completa las
+páginas importadas antes de existir las teselas.
+
+Uso:
+    python manage.py generar_teselas
+    python manage.py generar_teselas --obra=12 --procesos=4
+    python manage.py generar_teselas --force
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from digitalizacion.models import DigitalPage
+from digitalizacion.services.almacen import blob_de, rutas_blob
+from digitalizacion.services.iiif_imagen import generar_piramide
+
+
+class Command(BaseCommand):
+    help = "Genera las pirámides de teselas IIIF de las páginas importadas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--obra",
+            type=int,
+            action="append",
+            default=[],
+            help="Solo las páginas de esta obra (se puede repetir)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerar aunque la página ya tenga teselas",
+        )
+        parser.add_argument(
+            "--procesos",
+            type=int,
+            default=getattr(settings, "DIGITALIZACION_IMPORTACION_PROCESOS", 4),
+            help="Número de procesos en paralelo",
+        )
+
+    def handle(self, *args, **options):
+        media = Path(settings.MEDIA_ROOT)
+        pages = DigitalPage.objects.exclude(master_path="")
+        if options["obra"]:
+            pages = pages.filter(digital_set__obra_id__in=options["obra"])
+        if not options["force"]:
+            pages = pages.filter(tiles_path="")
+
+        tareas = {}
+        for page in pages.only("id", "master_path"):
+            master = media / page.master_path
+            if not master.exists():
+                continue
+            blob = blob_de(master)
+            if blob is not None:
+                destino = rutas_blob(blob.name)["teselas"]
+            else:
+                # repo/master/x.tif -> repo/iiif/tiles/x/
+                destino = master.parent.parent / "iiif" / "tiles" / master.stem
+            tareas[page.id] = (str(master), destino)
+
+        if not tareas:
+            self.stdout.write("No hay páginas pendientes.")
+            return
+
+        procesos = max(1, options["procesos"])
+        generadas = []
+        errores = 0
+
+        def _registrar(page_id, destino, tamano):
+            ancho, alto = tamano
+            generadas.append(
+                DigitalPage(
+                    id=page_id,
+                    width=ancho,
+                    height=alto,
+                    tiles_path=str(destino.relative_to(media)).replace("\\", "/"),
+                )
+            )
+
+        if procesos == 1:
+            for page_id, (master, destino) in tareas.items():
+                try:
+                    _registrar(page_id, destino, generar_piramide(Path(master), destino))
+                except Exception as e:
+                    errores += 1
+                    self.stdout.write(self.style.WARNING(f"  [ERROR] página {page_id}: {e}"))
+        else:
+            connections.close_all()
+            contexto = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+                futuros = {
+                    pool.submit(generar_piramide, Path(master), destino): (page_id, destino)
+                    for page_id, (master, destino) in tareas.items()
+                }
+                for futuro in as_completed(futuros):
+                    page_id, destino = futuros[futuro]
+                    try:
+                        _registrar(page_id, destino, futuro.result())
+                    except Exception as e:
+                        errores += 1
+                        self.stdout.write(
+                            self.style.WARNING(f"  [ERROR] página {page_id}: {e}")
+                        )
+
+        DigitalPage.objects.bulk_update(
+            generadas, ["width", "height", "tiles_path"], batch_size=200
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Pirámides generadas: {len(generadas)} (errores: {errores})")
+        )
@@ -4,11 +4,9 @@ Uso: python manage.py generate_pdf_thumbs
 """
 
 from django.core.management.base import BaseCommand
-from digitalizacion.models import DigitalSet, WorkSegment
-from digitalizacion.services.thumbnail_service import (
-    get_pdf_thumbnail_for_digital_set,
-    get_pdf_thumbnail_for_segment
-)
+from digitalizacion.models import DigitalSet
+from digitalizacion.services.segmentos_lote import construir_segmentos
+from digitalizacion.services.thumbnail_service import get_pdf_thumbnail_for_digital_set
 
 
 class Command(BaseCommand):
@@ -42,14 +40,17 @@ class Command(BaseCommand):
 
         self.stdout.write("\nProcesando WorkSegments de colecciones con PDF...")
 
-        # 2. WorkSegments de colecciones con PDF
-        for seg in WorkSegment.objects.select_related('digital_set').all():
-            if seg.digital_set and seg.digital_set.pdf_path:
-                if force or not seg.cached_thumb_path:
-                    result = get_pdf_thumbnail_for_segment(seg)
-                    if result:
-                        seg_count += 1
-                        self.stdout.write(f"  [OK] Segment {seg.id}: {result}")
+        # 2. WorkSegments: una sola apertura del PDF por colección
+        colecciones = DigitalSet.objects.exclude(pdf_path="").filter(
+            segments__isnull=False
+        ).distinct()
+        for ds in colecciones:
+            result = construir_segmentos(ds, force=force, pdfs=False)
+            if result["thumbs"]:
+                seg_count += result["thumbs"]
+                self.stdout.write(
+                    f"  [OK] DigitalSet {ds.id}: {result['thumbs']} segmentos"
+                )
 
         self.stdout.write(self.style.SUCCESS(
             f"\nGenerados: {ds_count} DigitalSets, {seg_count} Segments"
@@ -0,0 +1,41 @@
+"""
+Worker de la cola de importación de TIFF (ImportacionJob).
+Copia los TIFF del INBOX a master/ y genera los JPG derivados, repartiendo
+las páginas de cada importación entre varios procesos.
+
+Uso:
+    python manage.py importar_tiffs
+    python manage.py importar_tiffs --procesos=8
+    python manage.py importar_tiffs --continuo --espera=10
+"""
+
+from functools import partial
+
+from django.conf import settings
+
+from digitalizacion.management.worker_cola import ComandoWorkerCola
+from digitalizacion.models import ImportacionJob
+from digitalizacion.services.cola import procesar_cola
+from digitalizacion.services.importacion import procesar_trabajo
+
+
+class Command(ComandoWorkerCola):
+    help = "Procesa la cola de importaciones de TIFF desde el INBOX"
+
+    modelo = ImportacionJob
+    procesar_trabajo = staticmethod(procesar_trabajo)
+    select_related = ("digital_set",)
+    # Las páginas ya importadas se omiten al retomar (mismo SHA-256)
+    minutos_colgado = 120
+    procesos_por_defecto = getattr(settings, "DIGITALIZACION_IMPORTACION_PROCESOS", 4)
+    ayuda_procesos = "Procesos para convertir las páginas de cada importación"
+    mensaje_liberados = "Importaciones colgadas liberadas"
+    mensaje_procesados = "Importaciones terminadas"
+
+    def ejecutar_ronda(self, procesos):
+        # Las importaciones van una a una; los procesos se reparten sus páginas
+        return procesar_cola(
+            self.modelo,
+            partial(self.procesar_trabajo, procesos=procesos),
+            self.select_related,
+        )
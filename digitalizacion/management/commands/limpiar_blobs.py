@@ -0,0 +1,52 @@
+"""
+Elimina del almacén por contenido (blobs/) las imágenes que ya no usa
+ninguna DigitalPage (DigitalSet eliminados, páginas reimportadas con otro
+escaneo). No borra nada mientras haya una importación en proceso.
+
+Uso:
+    python manage.py limpiar_blobs --dry-run
+    python manage.py limpiar_blobs
+    python manage.py limpiar_blobs --minutos=10
+"""
+
+from django.core.management.base import BaseCommand
+
+from digitalizacion.services.almacen import blobs_huerfanos, eliminar_blob
+
+
+class Command(BaseCommand):
+    help = "Elimina los blobs de imágenes que no usa ninguna página"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo listar los blobs huérfanos, sin borrarlos",
+        )
+        parser.add_argument(
+            "--minutos",
+            type=int,
+            default=60,
+            help="No tocar blobs modificados hace menos de estos minutos (default: 60)",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        eliminados = 0
+        liberados = 0
+
+        for blob in blobs_huerfanos(antiguedad_minima=options["minutos"] * 60):
+            eliminados += 1
+            if dry_run:
+                self.stdout.write(f"  {blob}")
+                continue
+            liberados += eliminar_blob(blob)
+
+        if dry_run:
+            self.stdout.write(f"Blobs huérfanos: {eliminados}")
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Blobs eliminados: {eliminados} ({liberados / 1024 / 1024:.1f} MB)"
+            )
+        )
@@ -0,0 +1,61 @@
+"""
+Worker de la cola de optimización de PDFs (OptimizacionPdfJob).
+Reescribe en segundo plano las copias de acceso de los PDFs subidos y de los
+PDFs de segmentos (compactadas y, con qpdf o pikepdf instalado, linealizadas).
+
+Uso:
+    python manage.py optimizar_pdfs
+    python manage.py optimizar_pdfs --todos        # encola los PDFs sin optimizar
+    python manage.py optimizar_pdfs --procesos=2
+    python manage.py optimizar_pdfs --continuo --espera=30
+"""
+
+from digitalizacion.management.worker_cola import ComandoWorkerCola
+from digitalizacion.models import DigitalSet, OptimizacionPdfJob
+from digitalizacion.services.pdf_acceso import (
+    encolar_optimizacion_digital_set,
+    linealizador_disponible,
+    procesar_trabajo,
+)
+
+
+class Command(ComandoWorkerCola):
+    help = "Procesa la cola persistente de optimización de PDFs de acceso"
+
+    modelo = OptimizacionPdfJob
+    procesar_trabajo = staticmethod(procesar_trabajo)
+    select_related = ("digital_set", "segment")
+    # Un PDF grande tarda más que un thumbnail
+    minutos_colgado = 120
+    mensaje_procesados = "PDFs optimizados"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Encolar antes todos los PDFs de DigitalSet aún no optimizados",
+        )
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        if linealizador_disponible() is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Sin qpdf ni pikepdf: los PDFs se compactarán pero no se "
+                    "linealizarán (instale qpdf o pikepdf)"
+                )
+            )
+        super().handle(*args, **options)
+
+    def encolar(self, **options):
+        if not options["todos"]:
+            return
+
+        encolados = 0
+        pendientes = DigitalSet.objects.exclude(pdf_path="").filter(
+            pdf_optimizado_at__isnull=True
+        )
+        for ds in pendientes.iterator():
+            if encolar_optimizacion_digital_set(ds):
+                encolados += 1
+        self.stdout.write(f"PDFs encolados: {encolados}")
@@ -0,0 +1,22 @@
+"""
+Worker de la cola de thumbnails (ThumbnailJob).
+Genera en segundo plano los thumbnails encolados al subir PDFs o crear segmentos.
+
+Uso:
+    python manage.py procesar_thumbnails
+    python manage.py procesar_thumbnails --procesos=4
+    python manage.py procesar_thumbnails --continuo --espera=10
+"""
+
+from digitalizacion.management.worker_cola import ComandoWorkerCola
+from digitalizacion.models import ThumbnailJob
+from digitalizacion.services.thumbnail_queue import procesar_trabajo
+
+
+class Command(ComandoWorkerCola):
+    help = "Procesa la cola persistente de thumbnails de PDF"
+
+    modelo = ThumbnailJob
+    procesar_trabajo = staticmethod(procesar_trabajo)
+    select_related = ("digital_set", "segment__digital_set")
+    mensaje_procesados = "Thumbnails generados"
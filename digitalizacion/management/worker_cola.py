@@ -0,0 +1,99 @@
+"""
+Comando base de los workers de las colas persistentes de digitalización.
+
+Cada comando solo declara su modelo y su procesar_trabajo(job); este se
+encarga de liberar trabajos colgados, vaciar la cola con uno o varios
+procesos y, con --continuo, esperar trabajos nuevos.
+
+Uso:
+    class Command(ComandoWorkerCola):
+        help = "..."
+        modelo = ThumbnailJob
+        procesar_trabajo = staticmethod(procesar_trabajo)
+        select_related = ("digital_set",)
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from digitalizacion.services.cola import liberar_colgados, procesar_cola, worker_proceso
+
+
+class ComandoWorkerCola(BaseCommand):
+    modelo = None
+    procesar_trabajo = None
+    select_related = ()
+
+    # Minutos EN_PROCESO tras los que un trabajo se da por abandonado
+    minutos_colgado = 30
+    procesos_por_defecto = 1
+    ayuda_procesos = "Número de procesos en paralelo (default: 1)"
+    mensaje_liberados = "Trabajos colgados liberados"
+    mensaje_procesados = "Trabajos procesados"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--procesos",
+            type=int,
+            default=self.procesos_por_defecto,
+            help=self.ayuda_procesos,
+        )
+        parser.add_argument(
+            "--continuo",
+            action="store_true",
+            help="No terminar al vaciar la cola; esperar nuevos trabajos",
+        )
+        parser.add_argument(
+            "--espera",
+            type=int,
+            default=5,
+            help="Segundos entre revisiones de la cola en modo continuo (default: 5)",
+        )
+
+    def encolar(self, **options):
+        """Encola trabajos antes de procesar la cola (opciones propias del comando)."""
+
+    def handle(self, *args, **options):
+        procesos = max(1, options["procesos"])
+        continuo = options["continuo"]
+        espera = options["espera"]
+
+        self.encolar(**options)
+
+        liberados = liberar_colgados(self.modelo, self.minutos_colgado)
+        if liberados:
+            self.stdout.write(self.style.WARNING(f"{self.mensaje_liberados}: {liberados}"))
+
+        while True:
+            procesados = self.ejecutar_ronda(procesos)
+            if procesados:
+                self.stdout.write(
+                    self.style.SUCCESS(f"{self.mensaje_procesados}: {procesados}")
+                )
+
+            if not continuo:
+                break
+            time.sleep(espera)
+
+    def ejecutar_ronda(self, procesos):
+        """Vacía la cola; con varios procesos cada uno reclama sus propios trabajos."""
+        if procesos == 1:
+            return procesar_cola(self.modelo, self.procesar_trabajo, self.select_related)
+
+        funcion = self.procesar_trabajo
+        argumentos = (
+            self.modelo._meta.label,
+            f"{funcion.__module__}.{funcion.__qualname__}",
+            self.select_related,
+        )
+
+        # Cada proceso abre su propia conexión a la BD
+        connections.close_all()
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            resultados = [pool.submit(worker_proceso, *argumentos) for _ in range(procesos)]
+            return sum(r.result() for r in resultados)
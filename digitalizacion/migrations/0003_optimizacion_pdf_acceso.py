@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digitalizacion', '0002_thumbnail_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digitalset',
+            name='pdf_master_path',
+            field=models.CharField(blank=True, default='', max_length=700),
+        ),
+        migrations.AddField(
+            model_name='digitalset',
+            name='pdf_optimizado_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='OptimizacionPdfJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('HECHO', 'Hecho'), ('ERROR', 'Error')], db_index=True, default='PENDIENTE', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('digital_set', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='optimizacion_jobs', to='digitalizacion.digitalset')),
+                ('segment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='optimizacion_jobs', to='digitalizacion.worksegment')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['estado', 'created_at'], name='digitalizac_estado_a4b5c7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digitalizacion', '0003_optimizacion_pdf_acceso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConstruccionSegmentosJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('force', models.BooleanField(default=False, help_text='Regenerar aunque ya existan PDFs y thumbnails')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('HECHO', 'Hecho'), ('ERROR', 'Error')], db_index=True, default='PENDIENTE', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('digital_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='construccion_segmentos_jobs', to='digitalizacion.digitalset')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['estado', 'created_at'], name='digitalizac_estado_aff6b9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digitalizacion', '0004_construccion_segmentos_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digitalpage',
+            name='master_sha256',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='ImportacionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('HECHO', 'Hecho'), ('ERROR', 'Error')], db_index=True, default='PENDIENTE', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('total_paginas', models.PositiveIntegerField(default=0)),
+                ('paginas_procesadas', models.PositiveIntegerField(default=0)),
+                ('paginas_omitidas', models.PositiveIntegerField(default=0, help_text='Páginas sin cambios respecto a una importación anterior')),
+                ('paginas_nuevas', models.PositiveIntegerField(default=0)),
+                ('avisos', models.TextField(blank=True, default='', help_text='Páginas sin derivado JPG (una por línea)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('digital_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importacion_jobs', to='digitalizacion.digitalset')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['estado', 'created_at'], name='digitalizac_estado_0a1910_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digitalizacion', '0005_importacion_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digitalpage',
+            name='height',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='digitalpage',
+            name='tiles_path',
+            field=models.CharField(blank=True, default='', max_length=700),
+        ),
+        migrations.AddField(
+            model_name='digitalpage',
+            name='width',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
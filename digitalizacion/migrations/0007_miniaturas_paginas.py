@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digitalizacion', '0006_piramide_teselas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digitalpage',
+            name='preview_path',
+            field=models.CharField(blank=True, default='', max_length=700),
+        ),
+        migrations.AddField(
+            model_name='digitalpage',
+            name='thumb_path',
+            field=models.CharField(blank=True, default='', max_length=700),
+        ),
+    ]
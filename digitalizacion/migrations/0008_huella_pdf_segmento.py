@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digitalizacion', '0007_miniaturas_paginas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksegment',
+            name='cached_pdf_huella',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
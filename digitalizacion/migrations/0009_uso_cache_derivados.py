@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digitalizacion', '0008_huella_pdf_segmento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsoCacheDerivados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aciertos', models.PositiveBigIntegerField(default=0)),
+                ('fallos', models.PositiveBigIntegerField(default=0)),
+                ('expulsados', models.PositiveBigIntegerField(default=0)),
+                ('ultimo_acceso', models.DateTimeField(blank=True, null=True)),
+                ('digital_set', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='uso_cache', to='digitalizacion.digitalset')),
+            ],
+        ),
+    ]
@@ -32,6 +32,9 @@ class DigitalSet(models.Model):
     pdf_path = models.CharField(max_length=700, blank=True, default="")
     pdf_total_pages = models.PositiveIntegerField(default=0)
     pdf_thumb_path = models.CharField(max_length=700, blank=True, default="")
+    # Original subido (preservación); pdf_path es la copia de acceso optimizada
+    pdf_master_path = models.CharField(max_length=700, blank=True, default="")
+    pdf_optimizado_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         tipo_str = "Colección" if self.tipo == "COLECCION" else "Obra"
@@ -62,6 +65,18 @@ class DigitalPage(models.Model):
     derivative_path = models.CharField(
         max_length=700, blank=True, default=""
     )  # JPG para visor (iiif/jpg/)
+    # SHA-256 del TIFF del que salieron master y derivado; permite retomar una
+    # importación sin reprocesar las páginas que no cambiaron
+    master_sha256 = models.CharField(max_length=64, blank=True, default="")
+
+    # Pirámide de teselas para el servicio IIIF Image (iiif/tiles/<página>/)
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    tiles_path = models.CharField(max_length=700, blank=True, default="")
+
+    # Miniaturas para grillas y portadas (iiif/thumbs/): 200 y 600 px
+    thumb_path = models.CharField(max_length=700, blank=True, default="")
+    preview_path = models.CharField(max_length=700, blank=True, default="")
 
     class Meta:
         unique_together = ("digital_set", "page_number")
@@ -96,6 +111,9 @@ class WorkSegment(models.Model):
     # Cache de PDF generado para este segmento
     cached_pdf_path = models.CharField(max_length=700, blank=True, default="")
     cached_pdf_generated_at = models.DateTimeField(null=True, blank=True)
+    # Huella de las fuentes con que se generó (ver pdf_service.huella_segmento);
+    # si no coincide con la actual el PDF cacheado está desactualizado
+    cached_pdf_huella = models.CharField(max_length=64, blank=True, default="")
     cached_thumb_path = models.CharField(max_length=700, blank=True, default="")
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -105,3 +123,214 @@ class WorkSegment(models.Model):
 
     def __str__(self):
         return f"{self.obra_id} {self.start_page}-{self.end_page} ({self.tipo})"
+
+
+class ThumbnailJob(models.Model):
+    """
+    Trabajo de la cola persistente de thumbnails.
+
+    Se encola al subir un PDF o crear un segmento y lo procesa el comando
+    `procesar_thumbnails`, de modo que las vistas públicas solo leen rutas ya
+    generadas.
+    """
+
+    ESTADOS = (
+        ("PENDIENTE", "Pendiente"),
+        ("EN_PROCESO", "En proceso"),
+        ("HECHO", "Hecho"),
+        ("ERROR", "Error"),
+    )
+
+    digital_set = models.ForeignKey(
+        DigitalSet,
+        on_delete=models.CASCADE,
+        related_name="thumbnail_jobs",
+        null=True,
+        blank=True,
+    )
+    segment = models.ForeignKey(
+        WorkSegment,
+        on_delete=models.CASCADE,
+        related_name="thumbnail_jobs",
+        null=True,
+        blank=True,
+    )
+    force = models.BooleanField(
+        default=False, help_text="Regenerar aunque ya exista el thumbnail"
+    )
+    estado = models.CharField(
+        max_length=20, choices=ESTADOS, default="PENDIENTE", db_index=True
+    )
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["estado", "created_at"])]
+
+    def __str__(self):
+        if self.segment_id:
+            return f"Thumbnail segmento {self.segment_id} ({self.estado})"
+        return f"Thumbnail DigitalSet {self.digital_set_id} ({self.estado})"
+
+
+class OptimizacionPdfJob(models.Model):
+    """
+    Trabajo de la cola de optimización de PDFs de acceso.
+
+    Linealiza ("fast web view") y opcionalmente recomprime las imágenes del PDF
+    de acceso de un DigitalSet (el original queda en pdf_master_path) o del
+    PDF cacheado de un segmento. Lo procesa el comando `optimizar_pdfs`.
+    """
+
+    ESTADOS = ThumbnailJob.ESTADOS
+
+    digital_set = models.ForeignKey(
+        DigitalSet,
+        on_delete=models.CASCADE,
+        related_name="optimizacion_jobs",
+        null=True,
+        blank=True,
+    )
+    segment = models.ForeignKey(
+        WorkSegment,
+        on_delete=models.CASCADE,
+        related_name="optimizacion_jobs",
+        null=True,
+        blank=True,
+    )
+    estado = models.CharField(
+        max_length=20, choices=ESTADOS, default="PENDIENTE", db_index=True
+    )
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["estado", "created_at"])]
+
+    def __str__(self):
+        if self.segment_id:
+            return f"Optimización PDF segmento {self.segment_id} ({self.estado})"
+        return f"Optimización PDF DigitalSet {self.digital_set_id} ({self.estado})"
+
+
+class ConstruccionSegmentosJob(models.Model):
+    """
+    Trabajo de la cola de construcción en lote de los segmentos de una colección.
+
+    Se encola al segmentar una colección: el comando `construir_segmentos` abre
+    el PDF una sola vez y genera los PDFs y thumbnails de todos sus segmentos.
+    Varios segmentos creados seguidos comparten el mismo trabajo pendiente.
+    """
+
+    ESTADOS = ThumbnailJob.ESTADOS
+
+    digital_set = models.ForeignKey(
+        DigitalSet,
+        on_delete=models.CASCADE,
+        related_name="construccion_segmentos_jobs",
+    )
+    force = models.BooleanField(
+        default=False, help_text="Regenerar aunque ya existan PDFs y thumbnails"
+    )
+    estado = models.CharField(
+        max_length=20, choices=ESTADOS, default="PENDIENTE", db_index=True
+    )
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["estado", "created_at"])]
+
+    def __str__(self):
+        return f"Segmentos DigitalSet {self.digital_set_id} ({self.estado})"
+
+
+class ImportacionJob(models.Model):
+    """
+    Trabajo de importación de los TIFF del INBOX de una obra.
+
+    Lo encola ImportarObraView y lo procesa el comando `importar_tiffs`, que
+    reparte las páginas entre varios procesos y va guardando el avance para
+    que la pantalla de importación lo consulte.
+    """
+
+    ESTADOS = ThumbnailJob.ESTADOS
+
+    digital_set = models.ForeignKey(
+        DigitalSet,
+        on_delete=models.CASCADE,
+        related_name="importacion_jobs",
+    )
+    estado = models.CharField(
+        max_length=20, choices=ESTADOS, default="PENDIENTE", db_index=True
+    )
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    # Avance
+    total_paginas = models.PositiveIntegerField(default=0)
+    paginas_procesadas = models.PositiveIntegerField(default=0)
+    paginas_omitidas = models.PositiveIntegerField(
+        default=0, help_text="Páginas sin cambios respecto a una importación anterior"
+    )
+    paginas_nuevas = models.PositiveIntegerField(default=0)
+    avisos = models.TextField(
+        blank=True, default="", help_text="Páginas sin derivado JPG (una por línea)"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["estado", "created_at"])]
+
+    def __str__(self):
+        return f"Importación DigitalSet {self.digital_set_id} ({self.estado})"
+
+    @property
+    def porcentaje(self):
+        if not self.total_paginas:
+            return 0
+        return int(self.paginas_procesadas * 100 / self.total_paginas)
+
+
+class UsoCacheDerivados(models.Model):
+    """
+    Contadores de uso de los PDFs de segmento cacheados de una colección
+    (ver services/cache_derivados.py y el comando `cache_derivados`).
+    """
+
+    digital_set = models.OneToOneField(
+        DigitalSet,
+        on_delete=models.CASCADE,
+        related_name="uso_cache",
+    )
+    aciertos = models.PositiveBigIntegerField(default=0)
+    fallos = models.PositiveBigIntegerField(default=0)
+    expulsados = models.PositiveBigIntegerField(default=0)
+    ultimo_acceso = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Uso de caché DigitalSet {self.digital_set_id}"
+
+    @property
+    def tasa_aciertos(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else None
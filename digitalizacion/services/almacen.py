@@ -0,0 +1,205 @@
+"""
+Almacén direccionado por contenido de masters y derivados de páginas.
+
+Cada TIFF importado vive en blobs/<sha[:2]>/<sha>/ (SHA-256 del TIFF) junto
+con todo lo que se deriva de él:
+
+    master.tif, derivado.jpg, miniatura_200.jpg, miniatura_600.jpg, tiles/
+
+Las rutas de DigitalPage apuntan ahí, así que un mismo escaneo compartido
+por varias obras (o reimportado) se guarda una sola vez. El master se trae
+del INBOX con reflink (copy-on-write) o hardlink cuando están en el mismo
+sistema de archivos, y solo si no se puede se copia.
+
+Los blobs no se borran al eliminar un DigitalSet (pueden estar compartidos):
+los huérfanos los elimina el comando `limpiar_blobs`.
+
+Uso:
+    rutas = rutas_blob(sha)
+    guardar_master(inbox / "p001.tif", rutas["master"])
+"""
+
+import os
+import shutil
+import stat
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+# Carpeta del almacén dentro de MEDIA_ROOT
+CARPETA_BLOBS = "blobs"
+
+# ioctl FICLONE de Linux (reflink en btrfs, XFS, ZFS...)
+FICLONE = 0x40049409
+
+SOLO_LECTURA = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+def raiz_blobs() -> Path:
+    return Path(settings.MEDIA_ROOT) / CARPETA_BLOBS
+
+
+def dir_blob(sha: str) -> Path:
+    return raiz_blobs() / sha[:2] / sha
+
+
+def rutas_blob(sha: str) -> dict:
+    """Rutas absolutas del master y sus derivados dentro del blob."""
+    from digitalizacion.services.thumbnail_service import (
+        MINIATURA_CHICA,
+        MINIATURA_MEDIANA,
+    )
+
+    base = dir_blob(sha)
+    return {
+        "master": base / "master.tif",
+        "derivado": base / "derivado.jpg",
+        "miniatura": base / f"miniatura_{MINIATURA_CHICA}.jpg",
+        "vista_previa": base / f"miniatura_{MINIATURA_MEDIANA}.jpg",
+        "teselas": base / "tiles",
+    }
+
+
+def blob_de(path: Path) -> Path | None:
+    """Directorio del blob que contiene `path`, o None si está fuera del almacén."""
+    try:
+        relativa = Path(path).resolve().relative_to(raiz_blobs().resolve())
+    except ValueError:
+        return None
+    if len(relativa.parts) < 2:
+        return None
+    return raiz_blobs() / relativa.parts[0] / relativa.parts[1]
+
+
+def _reflink(origen: Path, destino: Path) -> None:
+    import fcntl
+
+    with open(origen, "rb") as src, open(destino, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _clonar(origen: Path, destino: Path) -> str:
+    """
+    Lleva `origen` a `destino` sin duplicar datos si el sistema lo permite.
+
+    Returns:
+        str: "reflink", "hardlink" o "copia"
+    """
+    try:
+        _reflink(origen, destino)
+        return "reflink"
+    except (ImportError, OSError):
+        destino.unlink(missing_ok=True)
+    try:
+        os.link(origen, destino)
+        return "hardlink"
+    except OSError:
+        shutil.copy2(origen, destino)
+        return "copia"
+
+
+def guardar_master(origen: Path, destino: Path) -> bool:
+    """
+    Guarda el TIFF en su blob si todavía no está.
+
+    El archivo queda de solo lectura: con hardlink el permiso lo comparte el
+    archivo del INBOX, lo que impide modificar en el sitio un master ya
+    archivado.
+
+    Returns:
+        True si el blob ya existía (contenido compartido o reimportado)
+    """
+    if destino.exists():
+        # Renueva el mtime del blob: puede ser un huérfano antiguo que la
+        # página vuelve a usar, y hasta guardar la tanda ninguna DigitalPage
+        # lo referencia (ver blobs_huerfanos)
+        os.utime(destino.parent)
+        return True
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    # Nombre temporal + os.replace: otro proceso puede estar guardando el
+    # mismo contenido a la vez y nunca debe ver un master a medio escribir
+    temporal = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    temporal.unlink(missing_ok=True)
+    try:
+        _clonar(origen, temporal)
+        os.chmod(temporal, SOLO_LECTURA)
+        os.replace(temporal, destino)
+    finally:
+        temporal.unlink(missing_ok=True)
+    return False
+
+
+def guardar_atomico(destino: Path, escribir) -> None:
+    """Llama a escribir(ruta_temporal) y mueve el resultado a `destino`."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix=f".{destino.stem}-", suffix=destino.suffix, dir=destino.parent)
+    os.close(fd)
+    try:
+        escribir(Path(temporal))
+        os.replace(temporal, destino)
+    finally:
+        Path(temporal).unlink(missing_ok=True)
+
+
+def blobs_referenciados() -> set[Path]:
+    """Directorios de blobs a los que apunta alguna DigitalPage."""
+    from digitalizacion.models import DigitalPage
+
+    media = Path(settings.MEDIA_ROOT)
+    referenciados = set()
+    rutas = DigitalPage.objects.filter(
+        master_path__startswith=f"{CARPETA_BLOBS}/"
+    ).values_list("master_path", flat=True)
+    for ruta in rutas.iterator():
+        blob = blob_de(media / ruta)
+        if blob:
+            referenciados.add(blob)
+    return referenciados
+
+
+def blobs_huerfanos(antiguedad_minima: float = 3600):
+    """
+    Blobs sin DigitalPage que los use. Se ignoran los recientes: una
+    importación en curso crea (o reutiliza) el blob antes de guardar la
+    página. Mientras haya importaciones en proceso no se devuelve ninguno.
+
+    Yields:
+        Path de cada directorio de blob huérfano
+    """
+    import time
+
+    from digitalizacion.models import ImportacionJob
+
+    raiz = raiz_blobs()
+    if not raiz.exists():
+        return
+    if ImportacionJob.objects.filter(estado="EN_PROCESO").exists():
+        return
+    referenciados = {p.resolve() for p in blobs_referenciados()}
+    limite = time.time() - antiguedad_minima
+    for prefijo in raiz.iterdir():
+        if not prefijo.is_dir():
+            continue
+        for blob in prefijo.iterdir():
+            if blob.resolve() in referenciados:
+                continue
+            if blob.stat().st_mtime > limite:
+                continue
+            yield blob
+
+
+def eliminar_blob(blob: Path) -> int:
+    """
+    Borra un blob (el master es de solo lectura).
+
+    Returns:
+        Bytes liberados (aproximados: un hardlink con el INBOX no libera nada)
+    """
+    liberados = 0
+    for archivo in blob.rglob("*"):
+        if archivo.is_file():
+            liberados += archivo.stat().st_size
+            os.chmod(archivo, stat.S_IWUSR | SOLO_LECTURA)
+    shutil.rmtree(blob, ignore_errors=True)
+    return liberados
@@ -0,0 +1,241 @@
+"""
+Presupuesto de disco y expulsión LRU de los derivados regenerables.
+
+Los PDFs de segmento (access/segment_pdfs/) se regeneran cuando hacen falta
+(get_segment_pdf, worker `construir_segmentos`), así que no deben ocupar el
+NAS sin límite junto a los masters. Como en cache_disco.py, el "último uso"
+es el mtime del archivo: los aciertos lo renuevan (como mucho una vez por
+minuto) y al superar DERIVADOS_CACHE_MB se borran los de uso más antiguo y
+se limpia su ruta en el segmento, que vuelve a construirse en segundo plano
+la próxima vez que se pida. La caché pública de las obras afectadas se
+invalida, para que la vista detallada vuelva a resolver el PDF del visor.
+
+Los aciertos se acumulan en memoria de cada proceso y se escriben en
+UsoCacheDerivados como mucho una vez por RENOVAR_USO y colección, junto con
+la renovación del mtime de los PDFs usados; un fallo se escribe en el acto
+y arrastra los aciertos pendientes de su colección. Al terminar un proceso
+se pierden como mucho los aciertos del último minuto.
+
+Los thumbnails (access/segment_thumbs/, access/thumbs/) se cuentan en el
+informe pero no se expulsan: pesan poco, los referencian las fichas
+públicas y los sirve directamente el servidor web.
+
+Uso:
+    registrar_uso(segment, acierto=True)   # al resolver el PDF de un segmento
+    podar_derivados()                      # tras cada pasada del worker
+    python manage.py cache_derivados --podar
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from digitalizacion.services.cache_disco import RENOVAR_USO
+
+logger = logging.getLogger("catalogacion")
+
+# Fracción del presupuesto que queda tras podar
+OBJETIVO = 0.9
+
+# Aciertos aún sin escribir por DigitalSet: {ds_id: (aciertos, rutas de PDF)}
+_aciertos_pendientes = {}
+# Última escritura de UsoCacheDerivados por DigitalSet (time.monotonic())
+_ultima_escritura = {}
+_bloqueo = threading.Lock()
+
+
+def presupuesto_bytes() -> int:
+    return getattr(settings, "DERIVADOS_CACHE_MB", 10240) * 1024 * 1024
+
+
+def _ruta_media(rel_path: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / rel_path
+
+
+def registrar_uso(segment, acierto: bool) -> None:
+    """
+    Cuenta un acierto o fallo de la caché de la colección del segmento.
+
+    Los aciertos se acumulan y se escriben (renovando el "último uso" de los
+    PDFs acertados) como mucho una vez por RENOVAR_USO; un fallo se escribe
+    siempre, con los aciertos pendientes de la colección.
+    """
+    ds_id = segment.digital_set_id
+    ahora = time.monotonic()
+
+    with _bloqueo:
+        aciertos, rutas = _aciertos_pendientes.pop(ds_id, (0, set()))
+        if acierto:
+            aciertos += 1
+            if segment.cached_pdf_path:
+                rutas.add(segment.cached_pdf_path)
+            ultima = _ultima_escritura.get(ds_id)
+            if ultima is not None and ahora - ultima < RENOVAR_USO:
+                _aciertos_pendientes[ds_id] = (aciertos, rutas)
+                return
+        _ultima_escritura[ds_id] = ahora
+
+    for rel_path in rutas:
+        _renovar_uso(_ruta_media(rel_path))
+    _escribir_uso(ds_id, aciertos, 0 if acierto else 1)
+
+
+def _renovar_uso(ruta: Path) -> None:
+    try:
+        if time.time() - ruta.stat().st_mtime > RENOVAR_USO:
+            os.utime(ruta)
+    except OSError:
+        pass
+
+
+def _escribir_uso(ds_id: int, aciertos: int, fallos: int) -> None:
+    from digitalizacion.models import UsoCacheDerivados
+
+    cambios = {
+        "aciertos": F("aciertos") + aciertos,
+        "fallos": F("fallos") + fallos,
+        "ultimo_acceso": timezone.now(),
+    }
+    uso = UsoCacheDerivados.objects.filter(digital_set_id=ds_id)
+    if uso.update(**cambios):
+        return
+    try:
+        UsoCacheDerivados.objects.create(digital_set_id=ds_id)
+    except IntegrityError:
+        pass  # lo creó otra petición al mismo tiempo
+    uso.update(**cambios)
+
+
+def pdfs_segmentos(digital_set_id: int | None = None):
+    """
+    PDFs de segmento cacheados que existen en disco.
+
+    Yields:
+        tuple: (mtime, tamaño, segment_id, digital_set_id, cached_pdf_path)
+    """
+    from digitalizacion.models import WorkSegment
+
+    qs = WorkSegment.objects.exclude(cached_pdf_path="")
+    if digital_set_id is not None:
+        qs = qs.filter(digital_set_id=digital_set_id)
+    for seg_id, ds_id, rel_path in qs.values_list(
+        "id", "digital_set_id", "cached_pdf_path"
+    ).iterator():
+        try:
+            st = _ruta_media(rel_path).stat()
+        except FileNotFoundError:
+            continue
+        yield st.st_mtime, st.st_size, seg_id, ds_id, rel_path
+
+
+def podar_derivados(limite_bytes: int | None = None) -> tuple[int, int]:
+    """
+    Si los PDFs de segmento superan el presupuesto, borra los usados hace
+    más tiempo hasta dejarlos en OBJETIVO × presupuesto.
+
+    Returns:
+        tuple: (PDFs expulsados, bytes liberados)
+    """
+    from catalogo_publico.services.cache_service import programar_invalidacion_obras
+    from digitalizacion.models import UsoCacheDerivados, WorkSegment
+
+    limite = presupuesto_bytes() if limite_bytes is None else limite_bytes
+    pdfs = list(pdfs_segmentos())
+    total = sum(tamano for _, tamano, _, _, _ in pdfs)
+    if total <= limite:
+        return 0, 0
+
+    meta = limite * OBJETIVO
+    expulsados = liberados = 0
+    por_coleccion = {}
+    segmentos = []
+    for _, tamano, seg_id, ds_id, rel_path in sorted(pdfs):
+        if total - liberados <= meta:
+            break
+        # Sin señales: el segmento no cambió, solo deja de tener PDF cacheado
+        # (y post_save re-encolaría trabajos)
+        limpiado = WorkSegment.objects.filter(pk=seg_id, cached_pdf_path=rel_path).update(
+            cached_pdf_path="", cached_pdf_huella="", cached_pdf_generated_at=None
+        )
+        if not limpiado:
+            continue  # se regeneró con otro nombre mientras tanto
+        _ruta_media(rel_path).unlink(missing_ok=True)
+        expulsados += 1
+        liberados += tamano
+        por_coleccion[ds_id] = por_coleccion.get(ds_id, 0) + 1
+        segmentos.append(seg_id)
+
+    for ds_id, cantidad in por_coleccion.items():
+        UsoCacheDerivados.objects.filter(digital_set_id=ds_id).update(
+            expulsados=F("expulsados") + cantidad
+        )
+    # El .update() no dispara señales: la página cacheada de la obra seguiría
+    # apuntando al PDF del segmento expulsado
+    programar_invalidacion_obras(
+        WorkSegment.objects.filter(pk__in=segmentos).values_list("obra_id", flat=True)
+    )
+
+    logger.info(
+        f"Caché de derivados: {expulsados} PDFs de segmento expulsados "
+        f"({liberados / 1024 / 1024:.1f} MB)"
+    )
+    return expulsados, liberados
+
+
+def resumen_por_coleccion() -> list[dict]:
+    """
+    Tamaño en disco de los derivados y contadores de uso de cada colección.
+
+    Returns:
+        list[dict]: digital_set, pdfs, bytes_pdfs, bytes_thumbs, uso
+            (UsoCacheDerivados o None), ordenado por bytes_pdfs descendente
+    """
+    from digitalizacion.models import DigitalSet, UsoCacheDerivados, WorkSegment
+
+    filas = {}
+
+    def _fila(ds_id):
+        return filas.setdefault(
+            ds_id, {"pdfs": 0, "bytes_pdfs": 0, "bytes_thumbs": 0}
+        )
+
+    def _tamano(rel_path):
+        try:
+            return _ruta_media(rel_path).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    for _, tamano, _, ds_id, _ in pdfs_segmentos():
+        fila = _fila(ds_id)
+        fila["pdfs"] += 1
+        fila["bytes_pdfs"] += tamano
+
+    thumbs = WorkSegment.objects.exclude(cached_thumb_path="").values_list(
+        "digital_set_id", "cached_thumb_path"
+    )
+    for ds_id, rel_path in thumbs.iterator():
+        _fila(ds_id)["bytes_thumbs"] += _tamano(rel_path)
+    for ds_id, rel_path in DigitalSet.objects.exclude(pdf_thumb_path="").values_list(
+        "id", "pdf_thumb_path"
+    ):
+        _fila(ds_id)["bytes_thumbs"] += _tamano(rel_path)
+
+    usos = {u.digital_set_id: u for u in UsoCacheDerivados.objects.all()}
+    for ds_id in usos:
+        _fila(ds_id)
+
+    sets = DigitalSet.objects.select_related("obra").in_bulk(list(filas))
+    resumen = [
+        {"digital_set": sets[ds_id], "uso": usos.get(ds_id), **fila}
+        for ds_id, fila in filas.items()
+        if ds_id in sets
+    ]
+    resumen.sort(key=lambda fila: fila["bytes_pdfs"], reverse=True)
+    return resumen
@@ -0,0 +1,180 @@
+"""
+Caché de archivos en disco con tope de tamaño y expulsión LRU.
+
+El "último uso" es el mtime del archivo: cada acierto lo renueva (como mucho
+una vez por minuto, para no escribir en disco en cada lectura) y al podar se
+borran primero los de mtime más antiguo. No depende de atime, que suele estar
+desactivado (noatime) en los servidores.
+
+La poda recorre el directorio, así que no se hace en cada escritura: solo
+cuando lo escrito desde la última poda supera una fracción del tope o ha
+pasado un intervalo.
+
+Uso:
+    cache = CacheDisco(Path("/media/cache/pdf"), limite_bytes=1024**3)
+    ruta = cache.obtener("12/p3.jpg") or cache.guardar("12/p3.jpg", escribir)
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("catalogacion")
+
+# Segundos mínimos entre dos renovaciones del mtime de un mismo archivo
+RENOVAR_USO = 60
+
+
+class CacheDisco:
+    def __init__(
+        self,
+        raiz: Path,
+        limite_bytes: int,
+        objetivo: float = 0.9,
+        intervalo_poda: float = 300,
+        fraccion_poda: float = 0.05,
+    ):
+        """
+        Args:
+            raiz: Directorio de la caché
+            limite_bytes: Tamaño máximo; al superarlo se poda hasta `objetivo`
+            objetivo: Fracción del límite que queda tras podar
+            intervalo_poda: Segundos máximos entre podas mientras se escribe
+            fraccion_poda: Fracción del límite escrita que fuerza una poda
+        """
+        self.raiz = Path(raiz)
+        self.limite_bytes = limite_bytes
+        self.objetivo = objetivo
+        self.intervalo_poda = intervalo_poda
+        self.fraccion_poda = fraccion_poda
+        self._escritos = 0
+        self._ultima_poda = time.monotonic()
+        self._lock = threading.Lock()
+
+    def ruta(self, relativa: str) -> Path:
+        return self.raiz / relativa
+
+    def obtener(self, relativa: str) -> Path | None:
+        """Ruta del archivo cacheado (renovando su uso), o None si no está."""
+        ruta = self.ruta(relativa)
+        try:
+            mtime = ruta.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if time.time() - mtime > RENOVAR_USO:
+            try:
+                os.utime(ruta)
+            except OSError:
+                pass
+        return ruta
+
+    def guardar(self, relativa: str, escribir) -> Path:
+        """
+        Llama a escribir(ruta_temporal) y publica el archivo de forma atómica
+        (un lector concurrente nunca ve un archivo a medio escribir).
+        """
+        ruta = self.ruta(relativa)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_name(f".{ruta.stem}.{os.getpid()}.{threading.get_ident()}{ruta.suffix}")
+        try:
+            escribir(temporal)
+            tamano = temporal.stat().st_size
+            os.replace(temporal, ruta)
+        finally:
+            temporal.unlink(missing_ok=True)
+        self._registrar_escritura(tamano)
+        return ruta
+
+    def registrar_archivo(self, ruta: Path) -> None:
+        """Cuenta un archivo escrito por fuera de guardar() para la próxima poda."""
+        try:
+            self._registrar_escritura(ruta.stat().st_size)
+        except FileNotFoundError:
+            pass
+
+    def _registrar_escritura(self, tamano: int) -> None:
+        with self._lock:
+            self._escritos += tamano
+            toca = (
+                self._escritos >= self.limite_bytes * self.fraccion_poda
+                or time.monotonic() - self._ultima_poda >= self.intervalo_poda
+            )
+            if toca:
+                self._escritos = 0
+                self._ultima_poda = time.monotonic()
+        if toca:
+            try:
+                self.podar()
+            except OSError as e:
+                logger.warning(f"No se pudo podar la caché {self.raiz}: {e}")
+
+    def archivos(self):
+        """
+        Yields:
+            tuple: (mtime, tamaño, ruta) de cada archivo de la caché
+        """
+        pendientes = [self.raiz]
+        while pendientes:
+            carpeta = pendientes.pop()
+            try:
+                entradas = list(os.scandir(carpeta))
+            except FileNotFoundError:
+                continue
+            for entrada in entradas:
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        pendientes.append(entrada.path)
+                    elif entrada.is_file(follow_symlinks=False):
+                        st = entrada.stat(follow_symlinks=False)
+                        yield st.st_mtime, st.st_size, entrada.path
+                except FileNotFoundError:
+                    continue
+
+    def tamano(self) -> int:
+        return sum(tamano for _, tamano, _ in self.archivos())
+
+    def podar(self, limite_bytes: int | None = None) -> tuple[int, int]:
+        """
+        Borra los archivos usados hace más tiempo hasta dejar la caché en
+        `objetivo` × límite (solo si lo supera).
+
+        Returns:
+            tuple: (archivos borrados, bytes liberados)
+        """
+        limite = self.limite_bytes if limite_bytes is None else limite_bytes
+        archivos = list(self.archivos())
+        total = sum(tamano for _, tamano, _ in archivos)
+        if total <= limite:
+            return 0, 0
+
+        meta = limite * self.objetivo
+        borrados = liberados = 0
+        carpetas = set()
+        for _, tamano, ruta in sorted(archivos):
+            if total - liberados <= meta:
+                break
+            try:
+                os.unlink(ruta)
+            except FileNotFoundError:
+                continue
+            borrados += 1
+            liberados += tamano
+            carpetas.add(os.path.dirname(ruta))
+
+        # Carpetas vacías (versiones viejas de un PDF, páginas sin uso)
+        for carpeta in sorted(carpetas, key=len, reverse=True):
+            carpeta = Path(carpeta)
+            while carpeta != self.raiz and self.raiz in carpeta.parents:
+                try:
+                    carpeta.rmdir()
+                except OSError:
+                    break
+                carpeta = carpeta.parent
+
+        logger.info(
+            f"Caché {self.raiz}: {borrados} archivos expulsados "
+            f"({liberados / 1024 / 1024:.1f} MB)"
+        )
+        return borrados, liberados
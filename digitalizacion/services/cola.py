@@ -0,0 +1,145 @@
+"""
+Piezas comunes de las colas persistentes (en BD) de digitalización:
+ThumbnailJob, OptimizacionPdfJob, ConstruccionSegmentosJob e ImportacionJob.
+
+Cada trabajo se reclama con un UPDATE condicionado al estado PENDIENTE, así
+dos procesos nunca toman el mismo trabajo. Cada cola solo aporta su modelo y
+su procesar_trabajo(job); el bucle (procesar_cola) y el comando worker
+(digitalizacion.management.worker_cola) son comunes.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger("catalogacion")
+
+# Reintentos antes de dejar un trabajo en ERROR
+MAX_INTENTOS = 3
+
+
+def reclamar(modelo, *select_related):
+    """
+    Toma el siguiente trabajo pendiente del modelo marcándolo EN_PROCESO.
+
+    Returns:
+        Trabajo reclamado o None si la cola está vacía
+    """
+    while True:
+        job_id = (
+            modelo.objects.filter(estado="PENDIENTE")
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        reclamado = modelo.objects.filter(pk=job_id, estado="PENDIENTE").update(
+            estado="EN_PROCESO",
+            started_at=timezone.now(),
+            intentos=F("intentos") + 1,
+        )
+        if reclamado:
+            return modelo.objects.select_related(*select_related).get(pk=job_id)
+        # Otro proceso lo tomó primero: probar con el siguiente
+
+
+def procesar_cola(
+    modelo, procesar_trabajo, select_related=(), max_trabajos: int | None = None
+) -> int:
+    """
+    Reclama y procesa trabajos hasta vaciar la cola (o llegar a max_trabajos).
+
+    Args:
+        modelo: Modelo de la cola
+        procesar_trabajo: Función que procesa un trabajo ya reclamado,
+            registra su resultado y devuelve True si terminó bien
+        select_related: Relaciones a cargar con cada trabajo reclamado
+
+    Returns:
+        Número de trabajos terminados con éxito
+    """
+    exitosos = 0
+    procesados = 0
+    while max_trabajos is None or procesados < max_trabajos:
+        job = reclamar(modelo, *select_related)
+        if job is None:
+            break
+        procesados += 1
+        if procesar_trabajo(job):
+            exitosos += 1
+    return exitosos
+
+
+def registrar_resultado(job, ok: bool, error: str = ""):
+    """Marca el trabajo HECHO, lo devuelve a PENDIENTE o lo deja en ERROR."""
+    if ok:
+        job.estado = "HECHO"
+    elif job.intentos < MAX_INTENTOS:
+        job.estado = "PENDIENTE"
+    else:
+        job.estado = "ERROR"
+        logger.error(f"Trabajo fallido ({job}): {error}")
+
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=["estado", "error", "finished_at"])
+
+
+def liberar_colgados(modelo, minutos: int = 30) -> int:
+    """
+    Devuelve a PENDIENTE los trabajos EN_PROCESO abandonados por un worker caído.
+
+    Returns:
+        Número de trabajos liberados
+    """
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return modelo.objects.filter(estado="EN_PROCESO", started_at__lt=limite).update(
+        estado="PENDIENTE"
+    )
+
+
+def ejecutar_en_proceso_hijo(funcion, *args):
+    """
+    Ejecuta `funcion` en un proceso hijo de un comando worker.
+    Inicializa Django si el proceso arrancó con 'spawn'.
+    """
+    import django
+    from django.apps import apps
+    from django.db import connections
+
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+    try:
+        return funcion(*args)
+    finally:
+        connections.close_all()
+
+
+def worker_proceso(
+    modelo: str, procesar_trabajo: str, select_related=(), max_trabajos: int | None = None
+) -> int:
+    """
+    Punto de entrada de cada proceso hijo de un comando worker.
+
+    El modelo ('app.Modelo') y procesar_trabajo (ruta con puntos) llegan como
+    texto: el proceso hijo solo puede resolverlos tras inicializar Django.
+    """
+
+    def _procesar():
+        from django.apps import apps
+        from django.utils.module_loading import import_string
+
+        return procesar_cola(
+            apps.get_model(modelo),
+            import_string(procesar_trabajo),
+            select_related,
+            max_trabajos,
+        )
+
+    return ejecutar_en_proceso_hijo(_procesar)
@@ -0,0 +1,382 @@
+"""
+Servicio IIIF Image API 3.0 (nivel 1) a partir de pirámides de teselas.
+
+Al importar, cada TIFF master genera una pirámide en iiif/tiles/<página>/:
+
+    <factor>/<columna>_<fila>.jpg     teselas de TAMANO_TESELA px
+
+con factores de escala 1, 2, 4, ... hasta que la imagen cabe en una tesela.
+Un pedido alineado a la rejilla (lo que piden los visores con deep zoom) se
+responde con el archivo de la tesela tal cual; cualquier otra región/tamaño
+se compone con las teselas del nivel más chico que alcanza la resolución
+pedida y se guarda en la caché de disco (IIIF_CACHE_DIR, con tope de
+IIIF_CACHE_MB y expulsión LRU).
+
+Páginas importadas antes de existir las teselas usan el JPG derivado como
+única fuente (sin deep zoom).
+
+Sintaxis soportada (https://iiif.io/api/image/3.0/):
+    región:   full | square | x,y,w,h | pct:x,y,w,h
+    tamaño:   max | w, | ,h | w,h | !w,h | pct:n
+    rotación: 0
+    calidad:  default | color | gray
+    formato:  jpg | png
+"""
+
+import hashlib
+import math
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from digitalizacion.services.cache_disco import CacheDisco
+
+TAMANO_TESELA = 512
+
+# Lado mayor máximo de una imagen compuesta ("max" se ajusta a este límite)
+TAMANO_MAXIMO = 4000
+
+FORMATOS = {"jpg": ("JPEG", "image/jpeg"), "png": ("PNG", "image/png")}
+
+CONTEXTO_IMAGE_API = "http://iiif.io/api/image/3/context.json"
+
+_RE_ENTEROS = re.compile(r"^\d+,\d+,\d+,\d+$")
+_NUM = r"(\d+(?:\.\d+)?)"
+_RE_PCT = re.compile(rf"^pct:{_NUM},{_NUM},{_NUM},{_NUM}$")
+
+
+class SolicitudInvalida(ValueError):
+    """Parámetros IIIF mal formados o fuera de la imagen (HTTP 400)."""
+
+
+_cache = None
+
+
+# ===========================================
+# PIRÁMIDE
+# ===========================================
+
+def generar_piramide(origen: Path, destino: Path, tesela: int = TAMANO_TESELA) -> tuple[int, int]:
+    """
+    Genera la pirámide de teselas de una imagen. Se escribe en un directorio
+    temporal y reemplaza a la anterior al terminar.
+
+    Returns:
+        tuple: (ancho, alto) de la imagen a resolución completa
+    """
+    from PIL import Image
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = Path(tempfile.mkdtemp(prefix=f".{destino.name}-", dir=destino.parent))
+    try:
+        with Image.open(origen) as im:
+            nivel = im.convert("RGB") if im.mode not in ("RGB", "L") else im.copy()
+        ancho, alto = nivel.size
+
+        factor = 1
+        while True:
+            dir_nivel = temporal / str(factor)
+            dir_nivel.mkdir()
+            w, h = nivel.size
+            for fila in range(math.ceil(h / tesela)):
+                for col in range(math.ceil(w / tesela)):
+                    caja = (
+                        col * tesela,
+                        fila * tesela,
+                        min((col + 1) * tesela, w),
+                        min((fila + 1) * tesela, h),
+                    )
+                    nivel.crop(caja).save(
+                        dir_nivel / f"{col}_{fila}.jpg", "JPEG", quality=85
+                    )
+            if max(w, h) <= tesela:
+                break
+            # Cada nivel es la mitad del anterior (tamaño redondeado hacia arriba)
+            nivel = nivel.reduce(2)
+            factor *= 2
+
+        if destino.exists():
+            shutil.rmtree(destino)
+        os.replace(temporal, destino)
+    finally:
+        if temporal.exists():
+            shutil.rmtree(temporal, ignore_errors=True)
+    return ancho, alto
+
+
+def factores_escala(ancho: int, alto: int, tesela: int = TAMANO_TESELA) -> list[int]:
+    """Factores de escala de la pirámide: 1, 2, 4, ... (el último cabe en una tesela)."""
+    factores = [1]
+    while max(math.ceil(ancho / factores[-1]), math.ceil(alto / factores[-1])) > tesela:
+        factores.append(factores[-1] * 2)
+    return factores
+
+
+# ===========================================
+# FUENTE DE UNA PÁGINA
+# ===========================================
+
+class FuenteImagen:
+    """Acceso a la imagen de una DigitalPage: pirámide de teselas o JPG derivado."""
+
+    def __init__(self, page):
+        media = Path(settings.MEDIA_ROOT)
+        self.page = page
+        self.teselas = None
+        self.derivado = None
+
+        if page.tiles_path and page.width and page.height:
+            teselas = media / page.tiles_path
+            if (teselas / "1").is_dir():
+                self.teselas = teselas
+                self.ancho, self.alto = page.width, page.height
+                self.factores = factores_escala(self.ancho, self.alto)
+
+        if self.teselas is None:
+            if not page.derivative_path:
+                raise FileNotFoundError("La página no tiene imagen")
+            self.derivado = media / page.derivative_path
+            if not self.derivado.exists():
+                raise FileNotFoundError("La página no tiene imagen")
+            from PIL import Image
+
+            with Image.open(self.derivado) as im:
+                self.ancho, self.alto = im.size
+            self.factores = [1]
+
+    @property
+    def version(self) -> str:
+        """Cambia si se regenera la imagen (para ETag y caché de disco)."""
+        ruta = self.teselas / "1" if self.teselas else self.derivado
+        stat = ruta.stat()
+        return f"{stat.st_mtime_ns:x}-{self.ancho}x{self.alto}"
+
+    def ruta_tesela(self, factor, col, fila) -> Path | None:
+        if self.teselas is None:
+            return None
+        return self.teselas / str(factor) / f"{col}_{fila}.jpg"
+
+
+# ===========================================
+# INFO.JSON
+# ===========================================
+
+def info_json(fuente: FuenteImagen, id_servicio: str) -> dict:
+    """Documento info.json (Image API 3.0) de una página."""
+    info = {
+        "@context": CONTEXTO_IMAGE_API,
+        "id": id_servicio,
+        "type": "ImageService3",
+        "protocol": "http://iiif.io/api/image",
+        "profile": "level1",
+        "width": fuente.ancho,
+        "height": fuente.alto,
+        "maxWidth": TAMANO_MAXIMO,
+        "maxHeight": TAMANO_MAXIMO,
+        "sizes": [
+            {"width": math.ceil(fuente.ancho / f), "height": math.ceil(fuente.alto / f)}
+            for f in reversed(fuente.factores)
+        ],
+        "extraQualities": ["gray"],
+        "extraFormats": ["png"],
+        "extraFeatures": ["sizeByConfinedWh", "regionByPct", "sizeByPct"],
+    }
+    if fuente.teselas is not None:
+        info["tiles"] = [{"width": TAMANO_TESELA, "scaleFactors": fuente.factores}]
+    return info
+
+
+# ===========================================
+# SOLICITUDES
+# ===========================================
+
+def parsear_region(region: str, ancho: int, alto: int) -> tuple[int, int, int, int]:
+    """Región pedida recortada a la imagen: (x, y, w, h)."""
+    if region == "full":
+        return 0, 0, ancho, alto
+    if region == "square":
+        lado = min(ancho, alto)
+        return (ancho - lado) // 2, (alto - lado) // 2, lado, lado
+
+    match = _RE_PCT.match(region)
+    if match:
+        px, py, pw, ph = (float(v) for v in match.groups())
+        x, y = round(ancho * px / 100), round(alto * py / 100)
+        w, h = round(ancho * pw / 100), round(alto * ph / 100)
+    elif _RE_ENTEROS.match(region):
+        x, y, w, h = (int(v) for v in region.split(","))
+    else:
+        raise SolicitudInvalida(f"Región inválida: {region}")
+
+    if w <= 0 or h <= 0 or x >= ancho or y >= alto:
+        raise SolicitudInvalida(f"Región fuera de la imagen: {region}")
+    return x, y, min(w, ancho - x), min(h, alto - y)
+
+
+def parsear_tamano(tamano: str, rw: int, rh: int) -> tuple[int, int]:
+    """Tamaño final (w, h) para una región de rw x rh. No se amplía ("^" no soportado)."""
+    if tamano.startswith("^"):
+        raise SolicitudInvalida("Ampliación (^) no soportada")
+
+    if tamano == "max":
+        escala = min(1.0, TAMANO_MAXIMO / max(rw, rh))
+        return max(1, round(rw * escala)), max(1, round(rh * escala))
+
+    try:
+        if tamano.startswith("pct:"):
+            pct = float(tamano[4:])
+            if not 0 < pct <= 100:
+                raise SolicitudInvalida(f"Porcentaje inválido: {tamano}")
+            w, h = round(rw * pct / 100), round(rh * pct / 100)
+        elif tamano.startswith("!"):
+            bw, bh = (int(v) for v in tamano[1:].split(","))
+            if bw <= 0 or bh <= 0:
+                raise SolicitudInvalida(f"Tamaño inválido: {tamano}")
+            escala = min(bw / rw, bh / rh)
+            w, h = round(rw * escala), round(rh * escala)
+        else:
+            sw, sh = tamano.split(",")
+            if (sw and int(sw) <= 0) or (sh and int(sh) <= 0):
+                raise SolicitudInvalida(f"Tamaño inválido: {tamano}")
+            if sw and sh:
+                w, h = int(sw), int(sh)
+            elif sw:
+                w = int(sw)
+                h = round(rh * w / rw)
+            elif sh:
+                h = int(sh)
+                w = round(rw * h / rh)
+            else:
+                raise SolicitudInvalida(f"Tamaño inválido: {tamano}")
+    except SolicitudInvalida:
+        raise
+    except ValueError as e:
+        raise SolicitudInvalida(f"Tamaño inválido: {tamano}") from e
+
+    w, h = max(1, w), max(1, h)
+    if w > rw or h > rh:
+        raise SolicitudInvalida("Ampliación (^) no soportada")
+    if max(w, h) > TAMANO_MAXIMO:
+        raise SolicitudInvalida(f"El tamaño supera el máximo ({TAMANO_MAXIMO}px)")
+    return w, h
+
+
+def parsear_calidad_formato(rotacion: str, calidad: str, formato: str):
+    if rotacion not in ("0", "360"):
+        raise SolicitudInvalida("Solo se soporta rotación 0")
+    if calidad not in ("default", "color", "gray"):
+        raise SolicitudInvalida(f"Calidad no soportada: {calidad}")
+    if formato not in FORMATOS:
+        raise SolicitudInvalida(f"Formato no soportado: {formato}")
+
+
+def cache_iiif() -> CacheDisco:
+    global _cache
+    if _cache is None:
+        _cache = CacheDisco(
+            Path(
+                getattr(settings, "IIIF_CACHE_DIR", Path(settings.MEDIA_ROOT) / "cache" / "iiif")
+            ),
+            limite_bytes=getattr(settings, "IIIF_CACHE_MB", 2048) * 1024 * 1024,
+        )
+    return _cache
+
+
+def _relativa_cache(fuente, clave: str, formato: str) -> str:
+    digest = hashlib.sha1(f"{fuente.version}:{clave}".encode()).hexdigest()
+    return f"{fuente.page.pk}/{digest}.{formato}"
+
+
+def _componer(fuente, x, y, w, h, tw, th):
+    """Imagen de la región (x, y, w, h) escalada a (tw, th)."""
+    from PIL import Image
+
+    if fuente.teselas is None:
+        with Image.open(fuente.derivado) as im:
+            recorte = im.crop((x, y, x + w, y + h))
+        if (w, h) != (tw, th):
+            recorte = recorte.resize((tw, th), Image.Resampling.LANCZOS)
+        return recorte
+
+    # Nivel más chico que todavía tiene al menos la resolución pedida
+    candidatos = [f for f in fuente.factores if w / f >= tw and h / f >= th]
+    factor = max(candidatos) if candidatos else 1
+    lx0, ly0 = x // factor, y // factor
+    lx1 = min(math.ceil((x + w) / factor), math.ceil(fuente.ancho / factor))
+    ly1 = min(math.ceil((y + h) / factor), math.ceil(fuente.alto / factor))
+
+    c0, c1 = lx0 // TAMANO_TESELA, (lx1 - 1) // TAMANO_TESELA
+    f0, f1 = ly0 // TAMANO_TESELA, (ly1 - 1) // TAMANO_TESELA
+    lienzo = None
+    for fila in range(f0, f1 + 1):
+        for col in range(c0, c1 + 1):
+            with Image.open(fuente.ruta_tesela(factor, col, fila)) as tesela:
+                if lienzo is None:
+                    lienzo = Image.new(
+                        tesela.mode,
+                        ((c1 - c0 + 1) * TAMANO_TESELA, (f1 - f0 + 1) * TAMANO_TESELA),
+                    )
+                lienzo.paste(
+                    tesela, ((col - c0) * TAMANO_TESELA, (fila - f0) * TAMANO_TESELA)
+                )
+
+    ox, oy = c0 * TAMANO_TESELA, f0 * TAMANO_TESELA
+    recorte = lienzo.crop((lx0 - ox, ly0 - oy, lx1 - ox, ly1 - oy))
+    if recorte.size != (tw, th):
+        recorte = recorte.resize((tw, th), Image.Resampling.LANCZOS)
+    return recorte
+
+
+def _tesela_directa(fuente, x, y, w, h, tw, th) -> Path | None:
+    """Ruta de la tesela si el pedido coincide exactamente con una de la pirámide."""
+    if fuente.teselas is None:
+        return None
+    for factor in fuente.factores:
+        paso = TAMANO_TESELA * factor
+        if x % paso or y % paso:
+            continue
+        esperado_w = min(paso, fuente.ancho - x)
+        esperado_h = min(paso, fuente.alto - y)
+        if (w, h) != (esperado_w, esperado_h):
+            continue
+        if (tw, th) == (math.ceil(w / factor), math.ceil(h / factor)):
+            return fuente.ruta_tesela(factor, x // paso, y // paso)
+    return None
+
+
+def obtener_imagen(fuente, region, tamano, rotacion, calidad, formato) -> Path:
+    """
+    Archivo con la imagen pedida: una tesela existente o una composición
+    guardada en la caché de disco.
+
+    Raises:
+        SolicitudInvalida: Parámetros IIIF inválidos o no soportados
+    """
+    parsear_calidad_formato(rotacion, calidad, formato)
+    x, y, w, h = parsear_region(region, fuente.ancho, fuente.alto)
+    tw, th = parsear_tamano(tamano, w, h)
+
+    if calidad != "gray" and formato == "jpg":
+        directa = _tesela_directa(fuente, x, y, w, h, tw, th)
+        if directa is not None and directa.exists():
+            return directa
+
+    cache = cache_iiif()
+    relativa = _relativa_cache(fuente, f"{x},{y},{w},{h}/{tw},{th}/{calidad}", formato)
+    ruta = cache.obtener(relativa)
+    if ruta:
+        return ruta
+
+    imagen = _componer(fuente, x, y, w, h, tw, th)
+    if calidad == "gray":
+        imagen = imagen.convert("L")
+    elif imagen.mode not in ("RGB", "L"):
+        imagen = imagen.convert("RGB")
+
+    formato_pil, _ = FORMATOS[formato]
+    opciones = {"quality": 85} if formato_pil == "JPEG" else {}
+    return cache.guardar(relativa, lambda destino: imagen.save(destino, formato_pil, **opciones))
@@ -0,0 +1,294 @@
+"""
+Manifiestos IIIF Presentation 3.0 de DigitalSet y WorkSegment.
+
+Cada DigitalPage es un Canvas cuya imagen apunta al servicio IIIF Image de
+la página (iiif_imagen.py), así cualquier visor estándar (Mirador, Universal
+Viewer, OpenSeadragon) carga las páginas a demanda. El manifiesto de una
+colección incluye un Range por segmento (start_page..end_page); el de un
+segmento solo sus páginas.
+
+Los manifiestos se guardan en la caché bajo una versión calculada del estado
+en la BD (version_digital_set): cambia con el conjunto, sus páginas, sus
+segmentos o las obras que los rotulan, y sirve también de ETag.
+
+Uso:
+    manifiesto, version = obtener_manifiesto_digital_set(ds, base_url)
+    manifiesto, version = obtener_manifiesto_segmento(segment, base_url)
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+CONTEXTO_PRESENTATION = "http://iiif.io/api/presentation/3/context.json"
+
+# Las ediciones de subcampos MARC no cambian la versión: el TTL acota cuánto
+# puede quedar desactualizado un rótulo
+TTL_MANIFIESTO = 60 * 60
+
+IDIOMA = "es"
+
+
+def _valor(texto):
+    return {IDIOMA: [str(texto)]}
+
+
+def version_digital_set(ds_id) -> str:
+    """
+    Huella del estado en la BD del que sale el manifiesto: el conjunto, sus
+    páginas (cantidad, dimensiones, teselas, miniaturas), sus segmentos y las
+    obras que los rotulan. Se calcula en cada petición, así los cambios hechos
+    por comandos o colas (sin señales o en otro proceso) se ven en todos los
+    procesos web sin depender de una caché compartida.
+    """
+    from django.db.models import Count, Max, Q, Sum
+
+    from digitalizacion.models import DigitalPage, DigitalSet, WorkSegment
+
+    conjunto = (
+        DigitalSet.objects.filter(pk=ds_id)
+        .values_list("updated_at", "pdf_path", "obra__fecha_modificacion_sistema")
+        .first()
+    )
+    paginas = DigitalPage.objects.filter(digital_set_id=ds_id).aggregate(
+        total=Count("id"),
+        ultima=Max("id"),
+        ancho=Sum("width"),
+        alto=Sum("height"),
+        teselas=Count("id", filter=~Q(tiles_path="")),
+        derivados=Count("id", filter=~Q(derivative_path="")),
+        miniaturas=Count("id", filter=~Q(thumb_path="")),
+    )
+    segmentos = list(
+        WorkSegment.objects.filter(digital_set_id=ds_id)
+        .order_by("id")
+        .values_list(
+            "id", "start_page", "end_page", "cached_pdf_path",
+            "obra_id", "obra__fecha_modificacion_sistema",
+        )
+    )
+    firma = repr((conjunto, sorted(paginas.items()), segmentos))
+    return hashlib.sha1(firma.encode()).hexdigest()[:16]
+
+
+# ===========================================
+# CONSTRUCCIÓN
+# ===========================================
+
+def _metadatos_obra(obra) -> list:
+    campos = [
+        ("Título", obra.titulo_245_display),
+        ("Autor", obra.autor_publico_principal),
+        ("Signatura", obra.signatura_publica_display),
+        ("Publicación", obra.publicacion_publica_display),
+        ("Soporte", obra.tipo_soporte_publico_display),
+    ]
+    return [{"label": _valor(k), "value": _valor(v)} for k, v in campos if v]
+
+
+def _rotulo_obra(obra) -> str:
+    autor = obra.autor_publico_principal
+    titulo = obra.titulo_destacado_display
+    return f"{autor} — {titulo}" if autor and autor != "[s.n.]" else titulo
+
+
+def _prefijo_set(base_url, ds_id):
+    """
+    Prefijo de los id de Canvas y Range: los comparten el manifiesto del
+    conjunto y los de sus segmentos (no son URLs dereferenciables).
+    """
+    manifiesto = reverse("digitalizacion:iiif_manifiesto", kwargs={"ds_id": ds_id})
+    return base_url + manifiesto.rsplit("/", 1)[0]
+
+
+def _canvas(page, base_url, ds_id, dimensiones):
+    url = lambda nombre, **kw: base_url + reverse(f"digitalizacion:{nombre}", kwargs=kw)
+    ancho, alto = dimensiones
+    canvas_id = f"{_prefijo_set(base_url, ds_id)}/canvas/p{page.page_number}"
+    servicio = url("iiif_base", page_id=page.id)
+    imagen = url(
+        "iiif_imagen", page_id=page.id, region="full", size="max",
+        rotation="0", quality="default", fmt="jpg",
+    )
+    if page.thumb_path:
+        miniatura = base_url + settings.MEDIA_URL + page.thumb_path
+    else:
+        miniatura = url(
+            "iiif_imagen", page_id=page.id, region="full", size="!200,200",
+            rotation="0", quality="default", fmt="jpg",
+        )
+    return {
+        "id": canvas_id,
+        "type": "Canvas",
+        "label": {"none": [f"p{page.page_number:03d}"]},
+        "width": ancho,
+        "height": alto,
+        "thumbnail": [{"id": miniatura, "type": "Image", "format": "image/jpeg"}],
+        "items": [
+            {
+                "id": f"{canvas_id}/pagina",
+                "type": "AnnotationPage",
+                "items": [
+                    {
+                        "id": f"{canvas_id}/imagen",
+                        "type": "Annotation",
+                        "motivation": "painting",
+                        "target": canvas_id,
+                        "body": {
+                            "id": imagen,
+                            "type": "Image",
+                            "format": "image/jpeg",
+                            "width": ancho,
+                            "height": alto,
+                            "service": [
+                                {"id": servicio, "type": "ImageService3", "profile": "level1"}
+                            ],
+                        },
+                    }
+                ],
+            }
+        ],
+    }
+
+
+def _dimensiones(page):
+    """Ancho y alto de la imagen de la página (teselas o JPG derivado)."""
+    from digitalizacion.services.iiif_imagen import FuenteImagen
+
+    if page.width and page.height:
+        return page.width, page.height
+    try:
+        fuente = FuenteImagen(page)
+    except FileNotFoundError:
+        return None
+    return fuente.ancho, fuente.alto
+
+
+def _construir(
+    ds, obra, paginas, base_url, manifiesto_id, segmentos=(), segmentos_con_pdf=False
+):
+    canvases = []
+    por_numero = {}
+    for page in paginas:
+        dimensiones = _dimensiones(page)
+        if dimensiones is None:
+            continue
+        canvas = _canvas(page, base_url, ds.id, dimensiones)
+        canvases.append(canvas)
+        por_numero[page.page_number] = canvas["id"]
+
+    if not canvases:
+        return None
+
+    manifiesto = {
+        "@context": CONTEXTO_PRESENTATION,
+        "id": manifiesto_id,
+        "type": "Manifest",
+        "label": _valor(_rotulo_obra(obra)),
+        "metadata": _metadatos_obra(obra),
+        "viewingDirection": "left-to-right",
+        "behavior": ["paged"],
+        "thumbnail": canvases[0]["thumbnail"],
+        "items": canvases,
+    }
+    if obra.publicada:
+        manifiesto["homepage"] = [
+            {
+                "id": base_url + reverse("catalogo_publico:detalle", kwargs={"pk": obra.pk}),
+                "type": "Text",
+                "label": _valor("Ficha en el catálogo"),
+                "format": "text/html",
+            }
+        ]
+    if obra.publicada and (ds.pdf_path or segmentos_con_pdf):
+        manifiesto["rendering"] = [
+            {
+                "id": base_url
+                + reverse("catalogo_publico:descargar_pdf", kwargs={"pk": obra.pk}),
+                "type": "Text",
+                "label": _valor("Descargar PDF"),
+                "format": "application/pdf",
+            }
+        ]
+
+    rangos = []
+    for seg in segmentos:
+        items = [
+            {"id": por_numero[n], "type": "Canvas"}
+            for n in range(seg.start_page, seg.end_page + 1)
+            if n in por_numero
+        ]
+        if items:
+            rangos.append(
+                {
+                    "id": f"{_prefijo_set(base_url, ds.id)}/range/s{seg.id}",
+                    "type": "Range",
+                    "label": _valor(_rotulo_obra(seg.obra)),
+                    "items": items,
+                }
+            )
+    if rangos:
+        manifiesto["structures"] = rangos
+    return manifiesto
+
+
+def manifiesto_digital_set(ds, base_url) -> dict | None:
+    """Manifiesto de todas las páginas de un DigitalSet (con Ranges por segmento)."""
+    paginas = ds.pages.order_by("page_number")
+    segmentos = ds.segments.select_related("obra", "obra__compositor").order_by(
+        "start_page", "end_page"
+    )
+    manifiesto_id = base_url + reverse(
+        "digitalizacion:iiif_manifiesto", kwargs={"ds_id": ds.id}
+    )
+    return _construir(ds, ds.obra, paginas, base_url, manifiesto_id, segmentos)
+
+
+def manifiesto_segmento(segment, base_url) -> dict | None:
+    """Manifiesto con solo las páginas start_page..end_page de un segmento."""
+    ds = segment.digital_set
+    paginas = ds.pages.filter(
+        page_number__gte=segment.start_page, page_number__lte=segment.end_page
+    ).order_by("page_number")
+    manifiesto_id = base_url + reverse(
+        "digitalizacion:iiif_manifiesto_segmento", kwargs={"segment_id": segment.id}
+    )
+    return _construir(
+        ds, segment.obra, paginas, base_url, manifiesto_id,
+        segmentos_con_pdf=bool(segment.cached_pdf_path or ds.pdf_path),
+    )
+
+
+# ===========================================
+# CACHÉ
+# ===========================================
+
+def _obtener(clave, construir):
+    manifiesto = cache.get(clave)
+    if manifiesto is None:
+        manifiesto = construir()
+        # None también se cachea (conjunto sin imágenes) como {}
+        cache.set(clave, manifiesto or {}, TTL_MANIFIESTO)
+    return manifiesto or None
+
+
+def obtener_manifiesto_digital_set(ds, base_url):
+    """
+    Returns:
+        tuple: (manifiesto o None si no hay imágenes, versión para ETag)
+    """
+    version = version_digital_set(ds.id)
+    clave = f"iiif:manifiesto:ds:{ds.id}:{version}:{base_url}"
+    return _obtener(clave, lambda: manifiesto_digital_set(ds, base_url)), version
+
+
+def obtener_manifiesto_segmento(segment, base_url):
+    """
+    Returns:
+        tuple: (manifiesto o None si no hay imágenes, versión para ETag)
+    """
+    version = version_digital_set(segment.digital_set_id)
+    clave = f"iiif:manifiesto:seg:{segment.id}:{version}:{base_url}"
+    return _obtener(clave, lambda: manifiesto_segmento(segment, base_url)), version
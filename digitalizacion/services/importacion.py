@@ -0,0 +1,321 @@
+"""
+Importación en segundo plano de los TIFF del INBOX (ImportacionJob).
+
+Cada TIFF se guarda en el almacén direccionado por contenido (almacen.py),
+en blobs/<sha>/ junto con su JPG derivado (máx. 2000 px), sus miniaturas de
+200 y 600 px y su pirámide de teselas (servicio IIIF Image). Las páginas se
+reparten entre un pool de procesos y las filas DigitalPage se guardan por
+tandas con bulk_create(update_conflicts=True).
+
+Se puede retomar tras una caída y reimportar sin reescribir nada: cada
+página guarda el SHA-256 de su TIFF, y un blob que ya existe (misma página,
+otra importación u otra obra con el mismo escaneo) no se vuelve a generar.
+
+Uso:
+    encolar_importacion(ds)        # ImportarObraView
+    python manage.py importar_tiffs
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+
+from digitalizacion.services.cola import registrar_resultado
+
+logger = logging.getLogger("catalogacion")
+
+# Lado mayor del JPG derivado para el visor
+TAMANO_DERIVADO = 2000
+
+# Filas DigitalPage por bulk_create
+TANDA_PAGINAS = 50
+
+# Segundos mínimos entre escrituras del avance en la BD
+INTERVALO_AVANCE = 1.0
+
+# Campos de DigitalPage con rutas a archivos de la página
+CAMPOS_RUTAS = ("master_path", "derivative_path", "tiles_path", "thumb_path", "preview_path")
+
+
+def listar_tiffs(inbox: Path) -> list[Path]:
+    """TIFF del INBOX en orden de nombre (el orden define el número de página)."""
+    if not inbox.exists():
+        return []
+    return sorted(
+        p for p in inbox.iterdir() if p.is_file() and p.suffix.lower() in (".tif", ".tiff")
+    )
+
+
+def _sha256(ruta: Path) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _rel_media(path: Path) -> str:
+    return str(path.relative_to(Path(settings.MEDIA_ROOT))).replace("\\", "/")
+
+
+def procesar_pagina(src: str, sha_previo: str) -> dict:
+    """
+    Guarda un TIFF en su blob y genera lo que le falte (derivado, miniaturas,
+    teselas). Se ejecuta en los procesos del pool: solo toca archivos, nunca
+    la BD.
+
+    Returns:
+        dict: sha256, rutas (relativas a MEDIA_ROOT), derivado_ok, ancho, alto,
+        omitida, reutilizada, error
+    """
+    from PIL import Image
+
+    from digitalizacion.services.almacen import guardar_atomico, guardar_master, rutas_blob
+    from digitalizacion.services.iiif_imagen import generar_piramide
+    from digitalizacion.services.thumbnail_service import guardar_miniaturas
+
+    src = Path(src)
+    sha = _sha256(src)
+    rutas = rutas_blob(sha)
+    resultado = {
+        "sha256": sha,
+        "rutas": {
+            "master_path": _rel_media(rutas["master"]),
+            "derivative_path": _rel_media(rutas["derivado"]),
+            "tiles_path": _rel_media(rutas["teselas"]),
+            "thumb_path": _rel_media(rutas["miniatura"]),
+            "preview_path": _rel_media(rutas["vista_previa"]),
+        },
+        "derivado_ok": False, "ancho": 0, "alto": 0,
+        "omitida": False, "reutilizada": False, "error": "",
+    }
+    completo = all(ruta.exists() for ruta in rutas.values())
+    if sha == sha_previo and completo:
+        resultado.update(derivado_ok=True, omitida=True)
+        return resultado
+
+    resultado["reutilizada"] = guardar_master(src, rutas["master"]) and completo
+    master = rutas["master"]
+    try:
+        if not (rutas["derivado"].exists() and rutas["miniatura"].exists()
+                and rutas["vista_previa"].exists()):
+            with Image.open(master) as im:
+                if im.mode not in ("RGB", "L"):
+                    im = im.convert("RGB")
+                if max(im.size) > TAMANO_DERIVADO:
+                    im.thumbnail((TAMANO_DERIVADO, TAMANO_DERIVADO), Image.Resampling.LANCZOS)
+                guardar_atomico(
+                    rutas["derivado"],
+                    lambda ruta: im.save(ruta, "JPEG", quality=85, optimize=True),
+                )
+                guardar_miniaturas(im, rutas["miniatura"], rutas["vista_previa"])
+        if rutas["teselas"].exists():
+            # Solo lee la cabecera del TIFF
+            with Image.open(master) as im:
+                resultado["ancho"], resultado["alto"] = im.size
+        else:
+            resultado["ancho"], resultado["alto"] = generar_piramide(master, rutas["teselas"])
+        resultado["derivado_ok"] = True
+    except Exception as e:
+        resultado["error"] = str(e)
+    return resultado
+
+
+def _eliminar_archivos_anteriores(rutas_previas) -> None:
+    """
+    Borra los archivos que una página dejó de usar. Solo los de la
+    estructura por obra (master/, iiif/): los blobs pueden estar compartidos
+    y los limpia `limpiar_blobs`.
+    """
+    import shutil
+
+    from digitalizacion.services.almacen import blob_de
+
+    media = Path(settings.MEDIA_ROOT)
+    for ruta in rutas_previas:
+        if not ruta:
+            continue
+        archivo = media / ruta
+        if blob_de(archivo) is not None:
+            continue
+        if archivo.is_dir():
+            shutil.rmtree(archivo, ignore_errors=True)
+        else:
+            archivo.unlink(missing_ok=True)
+
+
+def importar_digital_set(job, procesos: int = 1) -> dict:
+    """
+    Importa los TIFF del INBOX de un DigitalSet actualizando el avance del job.
+
+    Returns:
+        dict: procesadas, omitidas, nuevas, reutilizadas
+    """
+    from digitalizacion.models import DigitalPage, ImportacionJob
+
+    ds = job.digital_set
+    inbox = Path(ds.inbox_path)
+    tiffs = listar_tiffs(inbox)
+    if not tiffs:
+        raise ValueError(f"No se encontraron imágenes TIFF en {inbox}")
+
+    previos = {
+        fila[0]: fila[1:]
+        for fila in ds.pages.values_list("page_number", "master_sha256", *CAMPOS_RUTAS)
+    }
+    tareas = {
+        idx: (str(src), previos[idx][0] if idx in previos else "")
+        for idx, src in enumerate(tiffs, start=1)
+    }
+
+    avance = {"procesadas": 0, "omitidas": 0, "nuevas": 0, "reutilizadas": 0}
+    avisos = []
+    pendientes = []
+    reemplazados = []
+    ultima_escritura = 0.0
+
+    job.total_paginas = len(tareas)
+    job.paginas_procesadas = job.paginas_omitidas = job.paginas_nuevas = 0
+    job.avisos = ""
+    job.save(
+        update_fields=[
+            "total_paginas", "paginas_procesadas", "paginas_omitidas",
+            "paginas_nuevas", "avisos",
+        ]
+    )
+
+    def _guardar_tanda():
+        if not pendientes:
+            return
+        DigitalPage.objects.bulk_create(
+            pendientes,
+            update_conflicts=True,
+            unique_fields=["digital_set", "page_number"],
+            update_fields=[*CAMPOS_RUTAS, "master_sha256", "width", "height"],
+        )
+        pendientes.clear()
+        # Una vez guardadas las rutas nuevas, lo anterior ya no se usa
+        _eliminar_archivos_anteriores(reemplazados)
+        reemplazados.clear()
+
+    def _escribir_avance():
+        ImportacionJob.objects.filter(pk=job.pk).update(
+            paginas_procesadas=avance["procesadas"],
+            paginas_omitidas=avance["omitidas"],
+            paginas_nuevas=avance["nuevas"],
+            avisos="\n".join(avisos),
+        )
+
+    def _registrar(idx, resultado):
+        nonlocal ultima_escritura
+        avance["procesadas"] += 1
+        if resultado["omitida"]:
+            avance["omitidas"] += 1
+        else:
+            if idx not in previos:
+                avance["nuevas"] += 1
+            if resultado["reutilizada"]:
+                avance["reutilizadas"] += 1
+            ok = resultado["derivado_ok"]
+            if resultado["error"]:
+                avisos.append(f"p{idx:03d}: {resultado['error']}")
+            rutas = {
+                campo: ruta if ok or campo == "master_path" else ""
+                for campo, ruta in resultado["rutas"].items()
+            }
+            if idx in previos:
+                reemplazados.extend(
+                    previa
+                    for previa, campo in zip(previos[idx][1:], CAMPOS_RUTAS)
+                    if previa != rutas[campo]
+                )
+            pendientes.append(
+                DigitalPage(
+                    digital_set=ds,
+                    page_number=idx,
+                    width=resultado["ancho"],
+                    height=resultado["alto"],
+                    # Sin derivado no se marca: la próxima importación lo reintenta
+                    master_sha256=resultado["sha256"] if ok else "",
+                    **rutas,
+                )
+            )
+        if len(pendientes) >= TANDA_PAGINAS:
+            _guardar_tanda()
+
+        ahora = time.monotonic()
+        if ahora - ultima_escritura >= INTERVALO_AVANCE:
+            ultima_escritura = ahora
+            _escribir_avance()
+
+    if procesos <= 1:
+        for idx, args in tareas.items():
+            _registrar(idx, procesar_pagina(*args))
+    else:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            futuros = {pool.submit(procesar_pagina, *args): idx for idx, args in tareas.items()}
+            for futuro in as_completed(futuros):
+                _registrar(futuros[futuro], futuro.result())
+
+    _guardar_tanda()
+    _escribir_avance()
+
+    ds.total_pages = ds.pages.count()
+    ds.estado = "IMPORTADO"
+    ds.save(update_fields=["total_pages", "estado", "updated_at"])
+    return avance
+
+
+# ===========================================
+# COLA
+# ===========================================
+
+def encolar_importacion(ds):
+    """
+    Encola la importación del INBOX de un DigitalSet (reutiliza la pendiente
+    o la que está en curso).
+
+    Returns:
+        ImportacionJob
+    """
+    from digitalizacion.models import ImportacionJob
+
+    activo = ImportacionJob.objects.filter(
+        digital_set=ds, estado__in=("PENDIENTE", "EN_PROCESO")
+    ).first()
+    return activo or ImportacionJob.objects.create(digital_set=ds)
+
+
+def ultima_importacion(ds):
+    """ImportacionJob más reciente del DigitalSet, o None."""
+    if not ds:
+        return None
+    return ds.importacion_jobs.order_by("-created_at", "-id").first()
+
+
+def procesar_trabajo(job, procesos: int = 1) -> bool:
+    """
+    Importa un trabajo ya reclamado y registra el resultado.
+
+    Returns:
+        True si la importación terminó
+    """
+    try:
+        avance = importar_digital_set(job, procesos=procesos)
+        logger.info(
+            f"Importación DigitalSet {job.digital_set_id}: {avance['procesadas']} páginas "
+            f"({avance['omitidas']} sin cambios, {avance['nuevas']} nuevas, "
+            f"{avance['reutilizadas']} ya archivadas)"
+        )
+        ok, error = True, ""
+    except Exception as e:
+        ok, error = False, str(e)
+
+    registrar_resultado(job, ok, error)
+    return ok
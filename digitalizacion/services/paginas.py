@@ -0,0 +1,154 @@
+"""
+Listado paginado de las DigitalPage de un DigitalSet para los visores.
+
+Los visores ya no reciben todas las páginas en el HTML: piden por rangos de
+page_number (consulta sobre el índice único digital_set + page_number) solo
+las que van a mostrar. Si el rango no tiene DigitalPage pero el conjunto
+tiene PDF, las páginas salen del render a demanda del PDF (render_pdf.py).
+
+Uso:
+    datos = listar_paginas(ds, desde=1, hasta=50)
+    # GET /digitalizacion/api/set/<ds_id>/paginas/?desde=1&hasta=50
+"""
+
+from django.conf import settings
+from django.db.models import Max, Min
+from django.urls import reverse
+
+# Páginas por respuesta (por defecto y máximo)
+LIMITE_PAGINAS = 50
+LIMITE_MAXIMO = 200
+
+
+def rango_paginas(ds, desde=None, hasta=None) -> tuple[int, int]:
+    """
+    Primer y último page_number del DigitalSet, acotados a desde..hasta.
+
+    Returns:
+        tuple: (primera, ultima); (0, 0) si no hay páginas
+    """
+    paginas = ds.pages.all()
+    if desde:
+        paginas = paginas.filter(page_number__gte=desde)
+    if hasta:
+        paginas = paginas.filter(page_number__lte=hasta)
+    limites = paginas.aggregate(primera=Min("page_number"), ultima=Max("page_number"))
+    return limites["primera"] or 0, limites["ultima"] or 0
+
+
+def rango_paginas_pdf(ds, desde=None, hasta=None) -> tuple[int, int]:
+    """Como rango_paginas, con las páginas del PDF del DigitalSet."""
+    total = ds.pdf_total_pages if ds.pdf_path else 0
+    if not total:
+        return 0, 0
+    primera, ultima = max(1, desde or 1), min(hasta or total, total)
+    return (primera, ultima) if primera <= ultima else (0, 0)
+
+
+def _url_iiif(page_id, size):
+    return reverse(
+        "digitalizacion:iiif_imagen",
+        kwargs={
+            "page_id": page_id, "region": "full", "size": size,
+            "rotation": "0", "quality": "default", "fmt": "jpg",
+        },
+    )
+
+
+def _url_media(path):
+    return f"{settings.MEDIA_URL}{path}" if path else None
+
+
+def serializar_pagina(page) -> dict:
+    con_imagen = bool(page.derivative_path or page.tiles_path)
+    # Las miniaturas pregeneradas se sirven como archivos estáticos; sin
+    # ellas, las produce el servicio IIIF
+    return {
+        "id": page.id,
+        "page_number": page.page_number,
+        "ancho": page.width or None,
+        "alto": page.height or None,
+        "derivado": _url_media(page.derivative_path),
+        "imagen": _url_iiif(page.id, "!1200,1200") if con_imagen else None,
+        "miniatura": _url_media(page.thumb_path)
+        or (_url_iiif(page.id, "!200,200") if con_imagen else None),
+        "vista_previa": _url_media(page.preview_path)
+        or (_url_iiif(page.id, "!600,600") if con_imagen else None),
+        "info": (
+            reverse("digitalizacion:iiif_info", kwargs={"page_id": page.id})
+            if con_imagen
+            else None
+        ),
+    }
+
+
+def _url_pdf(ds_id, numero, ancho):
+    url = reverse("digitalizacion:pdf_pagina", kwargs={"ds_id": ds_id, "numero": numero})
+    return f"{url}?ancho={ancho}"
+
+
+def serializar_pagina_pdf(ds_id, numero, dimensiones) -> dict:
+    ancho, alto = dimensiones
+    return {
+        "id": None,
+        "page_number": numero,
+        "ancho": ancho,
+        "alto": alto,
+        "derivado": None,
+        "imagen": _url_pdf(ds_id, numero, 1200),
+        "miniatura": _url_pdf(ds_id, numero, 200),
+        "vista_previa": _url_pdf(ds_id, numero, 600),
+        # Sin pirámide de teselas: no hay zoom IIIF
+        "info": None,
+    }
+
+
+def _listar_paginas_pdf(ds, desde, hasta, limite) -> dict:
+    from digitalizacion.services.render_pdf import dimensiones_paginas
+
+    fin = desde + limite - 1 if hasta is None else min(hasta, desde + limite - 1)
+    # dimensiones_paginas se corta al final del PDF
+    dimensiones = dimensiones_paginas(ds, desde, fin)
+    quedan = (
+        max(dimensiones, default=0) == fin
+        and (hasta is None or fin < hasta)
+        and (not ds.pdf_total_pages or fin < ds.pdf_total_pages)
+    )
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "siguiente": fin + 1 if quedan else None,
+        "paginas": [
+            serializar_pagina_pdf(ds.id, n, dimensiones[n]) for n in sorted(dimensiones)
+        ],
+    }
+
+
+def listar_paginas(ds, desde: int = 1, hasta: int | None = None, limite: int = LIMITE_PAGINAS) -> dict:
+    """
+    Páginas con page_number en desde..hasta (como máximo `limite`).
+
+    Returns:
+        dict: paginas, desde, hasta y siguiente (page_number con el que pedir
+        el resto del rango, o None)
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    paginas = ds.pages.filter(page_number__gte=desde)
+    if hasta is not None:
+        paginas = paginas.filter(page_number__lte=hasta)
+    # Una fila de más indica si queda rango por pedir
+    filas = list(
+        paginas.order_by("page_number").only(
+            "id", "digital_set", "page_number", "width", "height",
+            "derivative_path", "tiles_path", "thumb_path", "preview_path",
+        )[: limite + 1]
+    )
+    if not filas and ds.pdf_path:
+        return _listar_paginas_pdf(ds, desde, hasta, limite)
+    siguiente = filas.pop().page_number if len(filas) > limite else None
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "siguiente": siguiente,
+        "paginas": [serializar_pagina(p) for p in filas],
+    }
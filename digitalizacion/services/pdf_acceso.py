@@ -0,0 +1,282 @@
+"""
+Copias de acceso optimizadas de los PDFs ("fast web view").
+
+Al subir un PDF el original se guarda en master/pdf/ (preservación) y la
+copia de acceso en access/pdf/ (la que sirven el visor y la descarga). El
+comando `optimizar_pdfs` reescribe la copia de acceso en segundo plano:
+
+1. Recompresión opcional de imágenes a PDF_ACCESO_DPI (calidad JPEG
+   PDF_ACCESO_CALIDAD), con PyMuPDF.
+2. Limpieza: objetos huérfanos fuera, flujos comprimidos, object streams.
+3. Linealización con el binario qpdf o, si no está, con pikepdf (MuPDF ya no
+   linealiza), para que el navegador muestre la primera página sin leer el
+   final del archivo. Sin ninguno de los dos la copia solo se compacta; el
+   comando lo advierte al arrancar.
+
+La copia optimizada reemplaza a la anterior de forma atómica y solo si abre
+bien y conserva el número de páginas. Los PDFs de segmentos (derivados
+cacheados, sin master) se optimizan en el lugar.
+
+Uso:
+    encolar_optimizacion_digital_set(ds)   # tras subir un PDF
+    encolar_optimizacion_segmento(segment) # tras generar el PDF del segmento
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from digitalizacion.services.cola import registrar_resultado
+
+logger = logging.getLogger("catalogacion")
+
+
+def optimizacion_activa() -> bool:
+    return getattr(settings, "PDF_ACCESO_OPTIMIZAR", True)
+
+
+# ===========================================
+# OPTIMIZACIÓN
+# ===========================================
+
+def esta_linealizado(ruta: Path) -> bool:
+    """True si el PDF declara el diccionario /Linearized al inicio."""
+    with open(ruta, "rb") as f:
+        return b"/Linearized" in f.read(1024)
+
+
+def linealizador_disponible() -> str | None:
+    """"qpdf", "pikepdf" o None si no hay con qué linealizar."""
+    if shutil.which("qpdf"):
+        return "qpdf"
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return None
+    return "pikepdf"
+
+
+def _linealizar_qpdf(origen: Path, destino: Path) -> bool:
+    qpdf = shutil.which("qpdf")
+    if not qpdf:
+        return False
+    resultado = subprocess.run(
+        [qpdf, "--linearize", "--object-streams=generate", str(origen), str(destino)],
+        capture_output=True,
+    )
+    # 3 = terminó con advertencias (el archivo es válido)
+    if resultado.returncode not in (0, 3):
+        logger.warning(f"qpdf no pudo linealizar {origen}: {resultado.stderr[:200]!r}")
+        return False
+    return True
+
+
+def _linealizar_pikepdf(origen: Path, destino: Path) -> bool:
+    try:
+        import pikepdf
+    except ImportError:
+        return False
+    try:
+        with pikepdf.open(origen) as pdf:
+            pdf.save(
+                destino,
+                linearize=True,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate,
+            )
+    except pikepdf.PdfError as e:
+        logger.warning(f"pikepdf no pudo linealizar {origen}: {e}")
+        return False
+    return True
+
+
+def _linealizar(origen: Path, destino: Path) -> bool:
+    if linealizador_disponible() == "qpdf":
+        return _linealizar_qpdf(origen, destino)
+    return _linealizar_pikepdf(origen, destino)
+
+
+def optimizar_pdf(origen: Path, destino: Path, dpi: int | None = None, calidad: int = 75) -> dict:
+    """
+    Escribe en `destino` una versión optimizada de `origen`.
+
+    Args:
+        dpi: Resolución máxima de las imágenes (None = no recomprimir)
+        calidad: Calidad JPEG de las imágenes recomprimidas
+
+    Returns:
+        dict: paginas, bytes_origen, bytes_destino, linealizado
+
+    Raises:
+        ValueError: Si el resultado no conserva las páginas del original
+    """
+    import pymupdf
+
+    with tempfile.TemporaryDirectory(dir=destino.parent) as tmp:
+        limpio = Path(tmp) / "limpio.pdf"
+
+        with pymupdf.open(origen) as doc:
+            paginas = doc.page_count
+            if dpi and hasattr(doc, "rewrite_images"):
+                # Solo se tocan las imágenes que superan en 10% la resolución pedida
+                doc.rewrite_images(
+                    dpi_threshold=int(dpi * 1.1), dpi_target=dpi, quality=calidad
+                )
+            elif dpi:
+                logger.warning("PyMuPDF sin rewrite_images: se omite la recompresión")
+            doc.save(limpio, garbage=3, clean=True, deflate=True, use_objstms=1)
+
+        linealizado = Path(tmp) / "linealizado.pdf"
+        final = linealizado if _linealizar(limpio, linealizado) else limpio
+
+        with pymupdf.open(final) as doc:
+            if doc.page_count != paginas:
+                raise ValueError(
+                    f"El PDF optimizado tiene {doc.page_count} páginas (original: {paginas})"
+                )
+
+        os.replace(final, destino)
+
+    return {
+        "paginas": paginas,
+        "bytes_origen": origen.stat().st_size,
+        "bytes_destino": destino.stat().st_size,
+        "linealizado": esta_linealizado(destino),
+    }
+
+
+def preparar_copia_acceso(master: Path, acceso: Path):
+    """
+    Copia inicial de acceso (idéntica al master) mientras llega la optimizada.
+    Se usa un enlace duro cuando el sistema de archivos lo permite.
+    """
+    acceso.parent.mkdir(parents=True, exist_ok=True)
+    if acceso.exists():
+        acceso.unlink()
+    try:
+        os.link(master, acceso)
+    except OSError:
+        shutil.copy2(master, acceso)
+
+
+def _ruta_media(rel_path: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / rel_path
+
+
+def _rel_media(path: Path) -> str:
+    return str(path.relative_to(Path(settings.MEDIA_ROOT))).replace("\\", "/")
+
+
+def _optimizar_en_lugar(origen: Path, acceso: Path) -> dict:
+    """Optimiza `origen` hacia un temporal junto a `acceso` y lo reemplaza."""
+    temporal = acceso.with_name(acceso.name + ".optimizando")
+    try:
+        datos = optimizar_pdf(
+            origen,
+            temporal,
+            dpi=getattr(settings, "PDF_ACCESO_DPI", None),
+            calidad=getattr(settings, "PDF_ACCESO_CALIDAD", 75),
+        )
+        # Sin ganancia (ni linealización ni menos bytes) se conserva el actual
+        if not datos["linealizado"] and datos["bytes_destino"] >= acceso.stat().st_size:
+            temporal.unlink()
+            return datos
+        os.replace(temporal, acceso)
+        return datos
+    finally:
+        if temporal.exists():
+            temporal.unlink()
+
+
+def optimizar_digital_set(ds) -> dict | None:
+    """
+    Regenera la copia de acceso del PDF de un DigitalSet desde su master.
+    Los PDFs subidos antes de existir master/ pasan primero a master/pdf/.
+    """
+    if not ds.pdf_path:
+        return None
+    acceso = _ruta_media(ds.pdf_path)
+    if not acceso.exists():
+        return None
+
+    if not ds.pdf_master_path or not _ruta_media(ds.pdf_master_path).exists():
+        # repo/access/pdf/x.pdf -> repo/master/pdf/x.pdf
+        master = acceso.parent.parent.parent / "master" / "pdf" / acceso.name
+        master.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(acceso, master)
+        ds.pdf_master_path = _rel_media(master)
+
+    datos = _optimizar_en_lugar(_ruta_media(ds.pdf_master_path), acceso)
+    ds.pdf_optimizado_at = timezone.now()
+    ds.save(update_fields=["pdf_master_path", "pdf_optimizado_at"])
+    return datos
+
+
+def optimizar_segmento(segment) -> dict | None:
+    """Optimiza en el lugar el PDF cacheado de un segmento."""
+    if not segment.cached_pdf_path:
+        return None
+    ruta = _ruta_media(segment.cached_pdf_path)
+    if not ruta.exists():
+        return None
+    return _optimizar_en_lugar(ruta, ruta)
+
+
+# ===========================================
+# COLA
+# ===========================================
+
+def _encolar(**objetivo):
+    from digitalizacion.models import OptimizacionPdfJob
+
+    if not optimizacion_activa():
+        return None
+    pendiente = OptimizacionPdfJob.objects.filter(estado="PENDIENTE", **objetivo).first()
+    return pendiente or OptimizacionPdfJob.objects.create(**objetivo)
+
+
+def encolar_optimizacion_digital_set(ds):
+    """
+    Returns:
+        OptimizacionPdfJob o None si no hay PDF o la optimización está desactivada
+    """
+    if not ds or not ds.pdf_path:
+        return None
+    return _encolar(digital_set=ds)
+
+
+def encolar_optimizacion_segmento(segment):
+    if not segment.cached_pdf_path:
+        return None
+    return _encolar(segment=segment)
+
+
+def procesar_trabajo(job) -> bool:
+    """
+    Optimiza el PDF de un trabajo ya reclamado y registra el resultado.
+
+    Returns:
+        True si el PDF quedó optimizado (o no requería cambios)
+    """
+    try:
+        if job.segment_id:
+            datos = optimizar_segmento(job.segment)
+        else:
+            datos = optimizar_digital_set(job.digital_set)
+        error = "" if datos else "No hay PDF que optimizar"
+    except Exception as e:
+        datos = None
+        error = str(e)
+
+    if datos:
+        logger.info(
+            f"PDF optimizado ({job}): {datos['bytes_origen']} -> "
+            f"{datos['bytes_destino']} bytes, linealizado={datos['linealizado']}"
+        )
+    registrar_resultado(job, bool(datos), error)
+    return bool(datos)
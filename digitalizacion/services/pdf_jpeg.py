@@ -0,0 +1,136 @@
+"""
+Escritor de PDF a partir de JPG sin decodificar las imágenes.
+
+Cada JPG se incrusta tal cual como XObject /DCTDecode (el mismo flujo que
+guarda Pillow, sin decodificar ni recomprimir) y el PDF se escribe página
+a página: la memoria no depende del número de páginas. De cada imagen solo
+se lee la cabecera (tamaño y modo).
+
+La página mide lo mismo que con Image.save(..., "PDF"): un punto por píxel
+(72 ppp), así que el resultado es visualmente idéntico al de Pillow.
+
+Uso:
+    paginas = escribir_pdf_jpgs([ruta_p001, ruta_p002], destino)
+"""
+
+import io
+import os
+import shutil
+from pathlib import Path
+
+# Espacio de color PDF según el modo de Pillow
+ESPACIOS_COLOR = {
+    "RGB": "/DeviceRGB",
+    "L": "/DeviceGray",
+    "CMYK": "/DeviceCMYK",
+}
+
+# Bloque de copia de los datos del JPG al PDF
+BLOQUE = 1024 * 1024
+
+
+def _imagen(ruta: Path):
+    """
+    Datos para incrustar una imagen.
+
+    Returns:
+        tuple: (ancho, alto, modo, origen) con origen = ruta del JPG o bytes
+        de un JPG recodificado (solo si el archivo no era un JPEG usable)
+    """
+    from PIL import Image
+
+    with Image.open(ruta) as im:
+        if im.format == "JPEG" and im.mode in ESPACIOS_COLOR:
+            return im.width, im.height, im.mode, ruta
+        # Caso raro (PNG, JPEG con modo no soportado): una sola imagen en memoria
+        im = im.convert("RGB")
+        buffer = io.BytesIO()
+        im.save(buffer, "JPEG", quality=90)
+        return im.width, im.height, "RGB", buffer.getvalue()
+
+
+class _EscritorPdf:
+    """Escribe objetos PDF numerados registrando su posición para el xref."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.posiciones = {}
+        self.archivo.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def objeto(self, numero: int, diccionario: str, flujo=None, largo: int = 0):
+        self.posiciones[numero] = self.archivo.tell()
+        self.archivo.write(f"{numero} 0 obj\n".encode())
+        if flujo is None:
+            self.archivo.write(f"{diccionario}\nendobj\n".encode())
+            return
+        self.archivo.write(f"{diccionario[:-2]} /Length {largo} >>\nstream\n".encode())
+        if isinstance(flujo, bytes):
+            self.archivo.write(flujo)
+        else:
+            with open(flujo, "rb") as f:
+                shutil.copyfileobj(f, self.archivo, BLOQUE)
+        self.archivo.write(b"\nendstream\nendobj\n")
+
+    def cerrar(self, raiz: int):
+        inicio_xref = self.archivo.tell()
+        total = max(self.posiciones) + 1
+        self.archivo.write(f"xref\n0 {total}\n0000000000 65535 f \n".encode())
+        for numero in range(1, total):
+            self.archivo.write(f"{self.posiciones[numero]:010d} 00000 n \n".encode())
+        self.archivo.write(
+            f"trailer\n<< /Size {total} /Root {raiz} 0 R >>\n"
+            f"startxref\n{inicio_xref}\n%%EOF\n".encode()
+        )
+
+
+def escribir_pdf_jpgs(imagenes, destino: Path) -> int:
+    """
+    Escribe un PDF con una página por imagen, en orden.
+    Se escribe en un temporal y reemplaza a `destino` al terminar.
+
+    Returns:
+        Número de páginas
+    """
+    destino = Path(destino)
+    temporal = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    # 1 = catálogo, 2 = árbol de páginas; cada página usa 3 objetos
+    hijos = []
+    try:
+        with open(temporal, "wb") as f:
+            pdf = _EscritorPdf(f)
+            numero = 3
+            for ruta in imagenes:
+                ancho, alto, modo, origen = _imagen(Path(ruta))
+                imagen, contenido, pagina = numero, numero + 1, numero + 2
+                numero += 3
+
+                decode = " /Decode [1 0 1 0 1 0 1 0]" if modo == "CMYK" else ""
+                largo = len(origen) if isinstance(origen, bytes) else os.path.getsize(origen)
+                pdf.objeto(
+                    imagen,
+                    f"<< /Type /XObject /Subtype /Image /Width {ancho} /Height {alto} "
+                    f"/ColorSpace {ESPACIOS_COLOR[modo]} /BitsPerComponent 8 "
+                    f"/Filter /DCTDecode{decode} >>",
+                    flujo=origen,
+                    largo=largo,
+                )
+                dibujo = f"q {ancho} 0 0 {alto} 0 0 cm /Im0 Do Q".encode()
+                pdf.objeto(contenido, "<< >>", flujo=dibujo, largo=len(dibujo))
+                pdf.objeto(
+                    pagina,
+                    f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ancho} {alto}] "
+                    f"/Resources << /XObject << /Im0 {imagen} 0 R >> >> "
+                    f"/Contents {contenido} 0 R >>",
+                )
+                hijos.append(pagina)
+
+            if not hijos:
+                raise ValueError("No hay imágenes para el PDF")
+            kids = " ".join(f"{n} 0 R" for n in hijos)
+            pdf.objeto(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(hijos)} >>")
+            pdf.objeto(1, "<< /Type /Catalog /Pages 2 0 R >>")
+            pdf.cerrar(raiz=1)
+        os.replace(temporal, destino)
+    finally:
+        temporal.unlink(missing_ok=True)
+    return len(hijos)
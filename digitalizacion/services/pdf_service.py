@@ -7,15 +7,23 @@ Prioridad:
 
 Estructura de archivos:
 digitalizacion/{colección}/access/segment_pdfs/
+
+Un PDF cacheado vale mientras su huella (cached_pdf_huella) coincida con la
+de las fuentes actuales: reimportar los TIFF o reemplazar el PDF de la
+colección lo deja desactualizado aunque el archivo siga existiendo.
 """
 
+import hashlib
 from pathlib import Path
 from django.conf import settings
 from django.utils import timezone
-from PIL import Image
+
+from digitalizacion.services.cache_derivados import registrar_uso
+from digitalizacion.services.pdf_acceso import encolar_optimizacion_segmento
+from digitalizacion.services.pdf_jpeg import escribir_pdf_jpgs
 
 
-def _get_segment_output_dir(ds) -> Path:
+def get_segment_output_dir(ds) -> Path:
     """
     Obtiene el directorio de salida para PDFs de segmentos.
     Usa la carpeta de la colección para mantener la jerarquía.
@@ -35,7 +43,99 @@ def _get_segment_output_dir(ds) -> Path:
     return output_dir
 
 
-def get_or_create_segment_pdf(segment) -> str | None:
+def segment_pdf_name(segment) -> str:
+    """Nombre del PDF de un segmento extraído del PDF de la colección."""
+    return f"segment_{segment.id}_p{segment.start_page}-{segment.end_page}.pdf"
+
+
+def firmas_paginas(ds, desde: int | None = None, hasta: int | None = None) -> dict:
+    """
+    Firma de cada página con JPG derivado (ruta + SHA-256 del master), en
+    una sola consulta. Reimportar un TIFF cambia su SHA y con él la firma.
+
+    Returns:
+        dict: {page_number: (derivative_path, master_sha256)}
+    """
+    from digitalizacion.models import DigitalPage
+
+    qs = DigitalPage.objects.filter(digital_set=ds).exclude(derivative_path="")
+    if desde is not None:
+        qs = qs.filter(page_number__gte=desde)
+    if hasta is not None:
+        qs = qs.filter(page_number__lte=hasta)
+    return {
+        n: (ruta, sha)
+        for n, ruta, sha in qs.values_list("page_number", "derivative_path", "master_sha256")
+    }
+
+
+def huella_segmento(segment, firmas: dict | None = None) -> str:
+    """
+    Huella de las fuentes del PDF de un segmento: rango, y según la fuente
+    que usaría get_segment_pdf, las firmas de sus JPG o el tamaño y mtime
+    del PDF de la colección.
+
+    Args:
+        firmas: Resultado de firmas_paginas (de todo el DigitalSet o del
+            rango); si no se pasa se consulta el rango del segmento
+    """
+    ds = segment.digital_set
+    if firmas is None:
+        firmas = firmas_paginas(ds, segment.start_page, segment.end_page)
+
+    partes = [f"{segment.start_page}-{segment.end_page}"]
+    en_rango = [
+        n for n in range(segment.start_page, segment.end_page + 1) if n in firmas
+    ]
+    if en_rango:
+        partes.append("jpg")
+        partes += [f"{n}:{firmas[n][0]}:{firmas[n][1]}" for n in en_rango]
+    elif ds.pdf_path:
+        partes += ["pdf", ds.pdf_path]
+        try:
+            st = (Path(settings.MEDIA_ROOT) / ds.pdf_path).stat()
+            partes += [str(st.st_size), str(st.st_mtime_ns)]
+        except FileNotFoundError:
+            pass
+    return hashlib.sha256("\n".join(partes).encode()).hexdigest()
+
+
+def pdf_segmento_vigente(segment, huella: str | None = None) -> str | None:
+    """
+    Ruta relativa del PDF cacheado del segmento si existe y se generó con
+    las fuentes actuales; None si falta o está desactualizado.
+    """
+    if not segment.cached_pdf_path:
+        return None
+    if huella is None:
+        huella = huella_segmento(segment)
+    if segment.cached_pdf_huella != huella:
+        return None
+    if not (Path(settings.MEDIA_ROOT) / segment.cached_pdf_path).exists():
+        return None
+    return segment.cached_pdf_path
+
+
+def register_segment_pdf(segment, output_path: Path, huella: str | None = None) -> str:
+    """
+    Guarda en el segmento la ruta y la huella del PDF generado y encola su
+    optimización. Si el anterior tenía otro nombre (cambió la fuente) se borra.
+    Retorna ruta relativa del PDF.
+    """
+    rel_path = str(output_path.relative_to(Path(settings.MEDIA_ROOT))).replace("\\", "/")
+    if segment.cached_pdf_path and segment.cached_pdf_path != rel_path:
+        (Path(settings.MEDIA_ROOT) / segment.cached_pdf_path).unlink(missing_ok=True)
+    segment.cached_pdf_path = rel_path
+    segment.cached_pdf_generated_at = timezone.now()
+    segment.cached_pdf_huella = huella if huella is not None else huella_segmento(segment)
+    segment.save(
+        update_fields=["cached_pdf_path", "cached_pdf_generated_at", "cached_pdf_huella"]
+    )
+    encolar_optimizacion_segmento(segment)
+    return rel_path
+
+
+def get_or_create_segment_pdf(segment, huella: str | None = None) -> str | None:
     """
     Extrae páginas del PDF de la colección para crear PDF del segmento.
     Retorna ruta relativa del PDF generado.
@@ -51,14 +151,15 @@ def get_or_create_segment_pdf(segment) -> str | None:
         return None
 
     # Verificar cache existente
-    if segment.cached_pdf_path:
-        cached = Path(settings.MEDIA_ROOT) / segment.cached_pdf_path
-        if cached.exists():
-            return segment.cached_pdf_path
+    if huella is None:
+        huella = huella_segmento(segment)
+    vigente = pdf_segmento_vigente(segment, huella)
+    if vigente:
+        return vigente
 
     # Generar PDF parcial dentro de la carpeta de la colección
-    output_dir = _get_segment_output_dir(ds)
-    output_name = f"segment_{segment.id}_p{segment.start_page}-{segment.end_page}.pdf"
+    output_dir = get_segment_output_dir(ds)
+    output_name = segment_pdf_name(segment)
     output_path = output_dir / output_name
 
     reader = PdfReader(str(source_pdf))
@@ -71,47 +172,35 @@ def get_or_create_segment_pdf(segment) -> str | None:
     with open(output_path, "wb") as f:
         writer.write(f)
 
-    # Guardar en modelo
-    rel_path = str(output_path.relative_to(Path(settings.MEDIA_ROOT))).replace("\\", "/")
-    segment.cached_pdf_path = rel_path
-    segment.cached_pdf_generated_at = timezone.now()
-    segment.save(update_fields=["cached_pdf_path", "cached_pdf_generated_at"])
-
-    return rel_path
+    return register_segment_pdf(segment, output_path, huella)
 
 
-def get_or_create_segment_pdf_from_images(segment) -> str | None:
+def get_or_create_segment_pdf_from_images(
+    segment, firmas: dict | None = None, huella: str | None = None
+) -> str | None:
     """
     Genera PDF a partir de imágenes JPG (derivative_path).
     Retorna ruta relativa del PDF generado.
     """
-    from digitalizacion.models import DigitalPage
-
     ds = segment.digital_set
     if not ds:
         return None
 
+    if firmas is None:
+        firmas = firmas_paginas(ds, segment.start_page, segment.end_page)
+    if huella is None:
+        huella = huella_segmento(segment, firmas)
+
     # Verificar cache existente
-    if segment.cached_pdf_path:
-        cached = Path(settings.MEDIA_ROOT) / segment.cached_pdf_path
-        if cached.exists():
-            return segment.cached_pdf_path
-
-    # Obtener imágenes del rango
-    pages = DigitalPage.objects.filter(
-        digital_set=ds,
-        page_number__gte=segment.start_page,
-        page_number__lte=segment.end_page
-    ).order_by("page_number")
-
-    if not pages.exists():
-        return None
+    vigente = pdf_segmento_vigente(segment, huella)
+    if vigente:
+        return vigente
 
     # Recolectar rutas de imágenes existentes
     image_paths = []
-    for p in pages:
-        if p.derivative_path:
-            img_path = Path(settings.MEDIA_ROOT) / p.derivative_path
+    for n in range(segment.start_page, segment.end_page + 1):
+        if n in firmas:
+            img_path = Path(settings.MEDIA_ROOT) / firmas[n][0]
             if img_path.exists():
                 image_paths.append(img_path)
 
@@ -119,62 +208,54 @@ def get_or_create_segment_pdf_from_images(segment) -> str | None:
         return None
 
     # Generar PDF dentro de la carpeta de la colección
-    output_dir = _get_segment_output_dir(ds)
+    output_dir = get_segment_output_dir(ds)
     output_name = f"segment_{segment.id}_p{segment.start_page}-{segment.end_page}_fromjpg.pdf"
     output_path = output_dir / output_name
 
-    # Convertir imágenes a PDF
-    images = []
-    for img_path in image_paths:
-        img = Image.open(img_path)
-        if img.mode == "RGBA":
-            img = img.convert("RGB")
-        images.append(img)
-
-    if images:
-        # Guardar primera imagen como PDF, agregar el resto
-        images[0].save(
-            output_path,
-            "PDF",
-            save_all=True,
-            append_images=images[1:] if len(images) > 1 else []
-        )
-
-    # Guardar en modelo
-    rel_path = str(output_path.relative_to(Path(settings.MEDIA_ROOT))).replace("\\", "/")
-    segment.cached_pdf_path = rel_path
-    segment.cached_pdf_generated_at = timezone.now()
-    segment.save(update_fields=["cached_pdf_path", "cached_pdf_generated_at"])
+    # Los JPG se incrustan sin decodificar, página a página (memoria constante)
+    escribir_pdf_jpgs(image_paths, output_path)
 
-    return rel_path
+    return register_segment_pdf(segment, output_path, huella)
 
 
-def get_segment_pdf(segment) -> str | None:
+def get_segment_pdf(segment, construir: bool = True) -> str | None:
     """
     Obtiene PDF del segmento.
 
     Prioridad:
     1. Generar desde imágenes JPG (derivative_path)
     2. Extraer del PDF de la colección (fallback)
-    """
-    from digitalizacion.models import DigitalPage
 
+    Args:
+        construir: Si el PDF falta o está desactualizado, generarlo aquí; con
+            False se encola para el worker `construir_segmentos` y se
+            retorna None (vistas públicas)
+    """
     ds = segment.digital_set
     if not ds:
         return None
 
-    # Prioridad 1: Generar desde imágenes si existen
-    has_images = DigitalPage.objects.filter(
-        digital_set=ds,
-        page_number__gte=segment.start_page,
-        page_number__lte=segment.end_page
-    ).exclude(derivative_path="").exists()
+    # Una consulta por el rango: firmas de la huella y fuente a usar
+    firmas = firmas_paginas(ds, segment.start_page, segment.end_page)
+    huella = huella_segmento(segment, firmas)
+    vigente = pdf_segmento_vigente(segment, huella)
+    if vigente:
+        registrar_uso(segment, acierto=True)
+        return vigente
 
-    if has_images:
-        return get_or_create_segment_pdf_from_images(segment)
+    if not firmas and not ds.pdf_path:
+        return None
 
-    # Prioridad 2: Extraer del PDF si existe
-    if ds.pdf_path:
-        return get_or_create_segment_pdf(segment)
+    registrar_uso(segment, acierto=False)
+    if not construir:
+        from digitalizacion.services.segmentos_lote import encolar_construccion_segmentos
+
+        encolar_construccion_segmentos(ds)
+        return None
 
-    return None
+    # Prioridad 1: Generar desde imágenes si existen
+    if firmas:
+        return get_or_create_segment_pdf_from_images(segment, firmas, huella)
+
+    # Prioridad 2: Extraer del PDF si existe
+    return get_or_create_segment_pdf(segment, huella)
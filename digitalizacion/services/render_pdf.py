@@ -0,0 +1,137 @@
+"""
+Render a demanda de páginas del PDF de un DigitalSet (PyMuPDF).
+
+Para obras cuyo único objeto digital es un PDF: los visores muestran página
+a página sin extraer ni reconstruir PDFs de segmento. Cada página se
+renderiza una vez por ancho y se guarda en una caché de disco con tope de
+tamaño y expulsión LRU (cache_disco.py). Los renders simultáneos de un
+proceso se limitan con un semáforo para que una ráfaga no agote la CPU.
+
+Uso:
+    ruta = renderizar_pagina(ds, numero=12, ancho=1200)
+    # GET /digitalizacion/pdf/<ds_id>/p12.jpg?ancho=1200
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+from digitalizacion.services.cache_disco import CacheDisco
+
+# Los anchos se redondean hacia arriba a múltiplos de este paso para que la
+# caché no guarde una variante por cada ancho de pantalla
+PASO_ANCHO = 100
+ANCHO_MINIMO = 100
+
+# Segundos que una petición espera turno antes de responder 503
+ESPERA_TURNO = 10
+
+
+class PaginaInexistente(Exception):
+    pass
+
+
+class RenderOcupado(Exception):
+    """Todos los turnos de render siguen ocupados tras ESPERA_TURNO."""
+
+
+_semaforo = threading.BoundedSemaphore(getattr(settings, "PDF_RENDER_CONCURRENCIA", 2))
+_cache = None
+
+
+def cache_render() -> CacheDisco:
+    global _cache
+    if _cache is None:
+        _cache = CacheDisco(
+            Path(settings.PDF_RENDER_CACHE_DIR),
+            limite_bytes=getattr(settings, "PDF_RENDER_CACHE_MB", 1024) * 1024 * 1024,
+        )
+    return _cache
+
+
+def normalizar_ancho(ancho: int) -> int:
+    maximo = getattr(settings, "PDF_RENDER_ANCHO_MAXIMO", 2000)
+    ancho = max(ANCHO_MINIMO, min(ancho, maximo))
+    return min(maximo, -(-ancho // PASO_ANCHO) * PASO_ANCHO)
+
+
+def ruta_pdf(ds) -> Path:
+    if not ds.pdf_path:
+        raise FileNotFoundError("El DigitalSet no tiene PDF")
+    pdf = Path(settings.MEDIA_ROOT) / ds.pdf_path
+    if not pdf.exists():
+        raise FileNotFoundError(pdf)
+    return pdf
+
+
+def version_pdf(ds) -> str:
+    """Cambia al reemplazar u optimizar el PDF (ruta, tamaño y mtime)."""
+    st = ruta_pdf(ds).stat()
+    firma = f"{ds.pdf_path}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha1(firma.encode()).hexdigest()[:16]
+
+
+def dimensiones_paginas(ds, desde: int, hasta: int) -> dict:
+    """
+    Ancho y alto (en puntos) de las páginas desde..hasta del PDF; basta para
+    la proporción con que los visores reservan espacio.
+
+    Returns:
+        dict: {numero: (ancho, alto)} solo de las páginas que existen
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(ruta_pdf(ds)) as doc:
+        hasta = min(hasta, doc.page_count)
+        dimensiones = {}
+        for numero in range(max(1, desde), hasta + 1):
+            # page.rect aplica /Rotate, igual que renderizar_pagina
+            caja = doc[numero - 1].rect
+            dimensiones[numero] = (round(caja.width), round(caja.height))
+        return dimensiones
+
+
+def renderizar_pagina(ds, numero: int, ancho: int) -> Path:
+    """
+    JPG de la página `numero` (desde 1) del PDF del DigitalSet a `ancho` px.
+
+    Raises:
+        FileNotFoundError: el DigitalSet no tiene PDF
+        PaginaInexistente: `numero` fuera del PDF
+        RenderOcupado: no hubo turno de render en ESPERA_TURNO segundos
+    """
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    ancho = normalizar_ancho(ancho)
+    pdf = ruta_pdf(ds)
+    cache = cache_render()
+    relativa = f"{ds.id}/{version_pdf(ds)}/w{ancho}/p{numero}.jpg"
+
+    ruta = cache.obtener(relativa)
+    if ruta:
+        return ruta
+
+    if not _semaforo.acquire(timeout=ESPERA_TURNO):
+        raise RenderOcupado()
+    try:
+        # Otra petición pudo renderizarla mientras se esperaba turno
+        ruta = cache.obtener(relativa)
+        if ruta:
+            return ruta
+
+        with fitz.open(pdf) as doc:
+            if not 1 <= numero <= doc.page_count:
+                raise PaginaInexistente(f"El PDF tiene {doc.page_count} páginas")
+            page = doc[numero - 1]
+            escala = ancho / page.rect.width
+            pix = page.get_pixmap(matrix=fitz.Matrix(escala, escala), alpha=False)
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+        return cache.guardar(
+            relativa, lambda destino: img.save(destino, "JPEG", quality=80, optimize=True)
+        )
+    finally:
+        _semaforo.release()
@@ -0,0 +1,196 @@
+"""
+Construcción en lote de los PDFs y thumbnails de los segmentos de una colección.
+
+Generar cada segmento por separado vuelve a abrir y parsear el PDF completo de
+la colección por segmento (80 segmentos = 80 lecturas de un PDF de 600
+páginas). Aquí el PDF se abre una sola vez con PyMuPDF y en la misma pasada
+se extraen los rangos de páginas y se renderizan las portadas.
+
+Los segmentos con JPG derivados siguen generándose desde las imágenes
+(misma prioridad que get_segment_pdf).
+
+Uso:
+    encolar_construccion_segmentos(ds)   # tras segmentar una colección
+    construir_segmentos(ds, force=True)  # directo, sin cola
+"""
+
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from digitalizacion.services.cache_derivados import podar_derivados
+from digitalizacion.services.cola import registrar_resultado
+
+logger = logging.getLogger("catalogacion")
+
+
+def _vigente(rel_path: str) -> bool:
+    return bool(rel_path) and (Path(settings.MEDIA_ROOT) / rel_path).exists()
+
+
+def _rel_media(path: Path) -> str:
+    return str(path.relative_to(Path(settings.MEDIA_ROOT))).replace("\\", "/")
+
+
+def construir_segmentos(ds, force: bool = False, pdfs: bool = True, thumbs: bool = True) -> dict:
+    """
+    Genera los PDFs y thumbnails faltantes de todos los segmentos de un DigitalSet.
+
+    Args:
+        ds: DigitalSet de la colección
+        force: Regenerar aunque ya existan
+        pdfs: Generar los PDFs de los segmentos
+        thumbs: Generar los thumbnails (primera página de cada segmento)
+
+    Returns:
+        dict: pdfs y thumbs generados
+    """
+    from digitalizacion.models import ThumbnailJob
+    from digitalizacion.services.pdf_service import (
+        firmas_paginas,
+        get_or_create_segment_pdf_from_images,
+        get_segment_output_dir,
+        huella_segmento,
+        pdf_segmento_vigente,
+        register_segment_pdf,
+        segment_pdf_name,
+    )
+    from digitalizacion.services.thumbnail_service import (
+        get_segment_thumb_output_dir,
+        render_page_thumbnail,
+        thumbnail_name,
+    )
+
+    generados = {"pdfs": 0, "thumbs": 0}
+    segmentos = list(ds.segments.order_by("start_page", "end_page"))
+    if not segmentos:
+        return generados
+
+    # Una consulta para las firmas de todas las páginas de la colección
+    firmas = firmas_paginas(ds)
+    huellas = {seg.id: huella_segmento(seg, firmas) for seg in segmentos} if pdfs else {}
+
+    def _desde_imagenes(seg):
+        return any(n in firmas for n in range(seg.start_page, seg.end_page + 1))
+
+    faltan_pdf = [
+        seg
+        for seg in segmentos
+        if pdfs and (force or not pdf_segmento_vigente(seg, huellas[seg.id]))
+    ]
+    faltan_thumb = [
+        seg
+        for seg in segmentos
+        if thumbs and ds.pdf_path and (force or not _vigente(seg.cached_thumb_path))
+    ]
+
+    # 1) Segmentos con JPG derivados: no necesitan el PDF de la colección
+    for seg in [s for s in faltan_pdf if _desde_imagenes(s)]:
+        if force:
+            seg.cached_pdf_huella = ""
+        if get_or_create_segment_pdf_from_images(seg, firmas, huellas[seg.id]):
+            generados["pdfs"] += 1
+    extraer = [s for s in faltan_pdf if not _desde_imagenes(s)] if ds.pdf_path else []
+
+    source_pdf = Path(settings.MEDIA_ROOT) / ds.pdf_path if ds.pdf_path else None
+    if not (extraer or faltan_thumb) or not source_pdf.exists():
+        return generados
+
+    import fitz  # PyMuPDF
+
+    # 2) Una sola apertura del PDF de la colección para todo lo demás
+    with fitz.open(str(source_pdf)) as doc:
+        total = doc.page_count
+
+        # Thumbnails primero: al guardar el PDF del segmento ya tiene portada
+        # y la señal post_save no encola un ThumbnailJob redundante
+        if faltan_thumb:
+            thumb_dir = get_segment_thumb_output_dir(ds)
+        for seg in faltan_thumb:
+            if seg.start_page > total:
+                continue
+            output_path = thumb_dir / thumbnail_name(source_pdf, seg.start_page)
+            render_page_thumbnail(doc[seg.start_page - 1], output_path)
+            seg.cached_thumb_path = _rel_media(output_path)
+            seg.save(update_fields=["cached_thumb_path"])
+            generados["thumbs"] += 1
+
+        if extraer:
+            output_dir = get_segment_output_dir(ds)
+        for seg in extraer:
+            if seg.start_page > total:
+                logger.warning(
+                    f"Segmento {seg.id} fuera del PDF ({seg.start_page} > {total} páginas)"
+                )
+                continue
+            output_path = output_dir / segment_pdf_name(seg)
+            with fitz.open() as parcial:
+                parcial.insert_pdf(
+                    doc, from_page=seg.start_page - 1, to_page=min(seg.end_page, total) - 1
+                )
+                parcial.save(str(output_path), garbage=3, deflate=True)
+            register_segment_pdf(seg, output_path, huellas[seg.id])
+            generados["pdfs"] += 1
+
+    # Los thumbnails de segmento ya encolados quedaron resueltos en esta pasada
+    ThumbnailJob.objects.filter(
+        segment__in=[s for s in faltan_thumb if s.cached_thumb_path], estado="PENDIENTE"
+    ).update(estado="HECHO", finished_at=timezone.now())
+
+    return generados
+
+
+# ===========================================
+# COLA
+# ===========================================
+
+def encolar_construccion_segmentos(ds, force: bool = False):
+    """
+    Encola la construcción de los segmentos de una colección. Si ya hay un
+    trabajo pendiente se reutiliza (segmentar varias obras seguidas = una pasada).
+
+    Returns:
+        ConstruccionSegmentosJob o None si no hay DigitalSet
+    """
+    from digitalizacion.models import ConstruccionSegmentosJob
+
+    if not ds:
+        return None
+    pendiente = ConstruccionSegmentosJob.objects.filter(
+        estado="PENDIENTE", digital_set=ds
+    ).first()
+    if pendiente:
+        if force and not pendiente.force:
+            pendiente.force = True
+            pendiente.save(update_fields=["force"])
+        return pendiente
+    return ConstruccionSegmentosJob.objects.create(digital_set=ds, force=force)
+
+
+def procesar_trabajo(job) -> bool:
+    """
+    Construye los segmentos de un trabajo ya reclamado y registra el resultado.
+
+    Returns:
+        True si la pasada terminó sin errores
+    """
+    try:
+        generados = construir_segmentos(job.digital_set, force=job.force)
+        logger.info(
+            f"Segmentos de DigitalSet {job.digital_set_id}: "
+            f"{generados['pdfs']} PDFs, {generados['thumbs']} thumbnails"
+        )
+        ok, error = True, ""
+    except Exception as e:
+        ok, error = False, str(e)
+
+    registrar_resultado(job, ok, error)
+
+    # Los PDFs recién generados pueden haber pasado el presupuesto de disco
+    try:
+        podar_derivados()
+    except OSError as e:
+        logger.warning(f"No se pudo podar la caché de derivados: {e}")
+    return ok
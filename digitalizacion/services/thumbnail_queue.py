@@ -0,0 +1,78 @@
+"""
+Cola persistente (en BD) para la generación de thumbnails de PDF.
+
+Las vistas solo encolan trabajos; el comando `procesar_thumbnails` los consume
+con uno o varios procesos. Cada trabajo se reclama con un UPDATE condicionado
+al estado PENDIENTE, así dos procesos nunca generan el mismo thumbnail.
+
+Uso:
+    encolar_thumbnail_digital_set(ds, force=True)   # tras subir un PDF
+    encolar_thumbnail_segmento(segment)             # tras crear un segmento
+"""
+
+from digitalizacion.services.cola import registrar_resultado
+
+
+def _encolar(force=False, **objetivo):
+    from digitalizacion.models import ThumbnailJob
+
+    pendiente = ThumbnailJob.objects.filter(estado="PENDIENTE", **objetivo).first()
+    if pendiente:
+        if force and not pendiente.force:
+            pendiente.force = True
+            pendiente.save(update_fields=["force"])
+        return pendiente
+    return ThumbnailJob.objects.create(force=force, **objetivo)
+
+
+def encolar_thumbnail_digital_set(ds, force: bool = False):
+    """
+    Encola la generación del thumbnail de la página 1 del PDF de un DigitalSet.
+
+    Returns:
+        ThumbnailJob o None si el DigitalSet no tiene PDF
+    """
+    if not ds or not ds.pdf_path:
+        return None
+    return _encolar(force=force, digital_set=ds)
+
+
+def encolar_thumbnail_segmento(segment, force: bool = False):
+    """
+    Encola la generación del thumbnail de la primera página de un segmento.
+
+    Returns:
+        ThumbnailJob o None si la colección no tiene PDF
+    """
+    ds = segment.digital_set
+    if not ds or not ds.pdf_path:
+        return None
+    return _encolar(force=force, segment=segment)
+
+
+def procesar_trabajo(job) -> bool:
+    """
+    Genera el thumbnail de un trabajo ya reclamado y registra el resultado.
+
+    Returns:
+        True si el thumbnail quedó generado
+    """
+    from digitalizacion.services.thumbnail_service import (
+        get_pdf_thumbnail_for_digital_set,
+        get_pdf_thumbnail_for_segment,
+    )
+
+    try:
+        if job.segment_id:
+            thumb_path = get_pdf_thumbnail_for_segment(job.segment, force=job.force)
+        else:
+            thumb_path = get_pdf_thumbnail_for_digital_set(
+                job.digital_set, force=job.force
+            )
+        error = "" if thumb_path else "No se pudo generar el thumbnail"
+    except Exception as e:
+        thumb_path = None
+        error = str(e)
+
+    registrar_resultado(job, bool(thumb_path), error)
+    return bool(thumb_path)
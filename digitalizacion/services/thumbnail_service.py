@@ -1,23 +1,93 @@
 """
-Servicio para generar thumbnails de PDFs.
+Servicio para generar thumbnails de PDFs y miniaturas de páginas.
 
 Genera previsualizaciones de la primera página de PDFs para usar como portadas
-en el catálogo público cuando no hay imágenes derivadas de TIFF.
+en el catálogo público cuando no hay imágenes derivadas de TIFF, y las
+miniaturas de 200 y 600 px de cada DigitalPage (grillas, portadas, visores).
 
 Estructura de archivos:
 - Thumbnail de PDF principal: {colección}/access/thumbs/
 - Thumbnail de segmentos: {colección}/access/segment_thumbs/
+- Miniaturas de páginas: {colección}/iiif/thumbs/{página}_200.jpg y _600.jpg
 """
 
 from pathlib import Path
 from django.conf import settings
 
+# Lado mayor de las miniaturas de páginas (thumb_path y preview_path)
+MINIATURA_CHICA = 200
+MINIATURA_MEDIANA = 600
+
+
+def thumbnail_name(source_pdf: Path, page_number: int) -> str:
+    """Nombre del thumbnail de una página (ej: coleccion_p012_thumb.jpg)."""
+    return f"{source_pdf.stem}_p{page_number:03d}_thumb.jpg"
+
+
+def render_page_thumbnail(page, output_path: Path, max_size: int = 400) -> None:
+    """
+    Renderiza una página ya abierta de PyMuPDF como JPG.
+    Permite generar varios thumbnails abriendo el PDF una sola vez.
+    """
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    rect = page.rect
+    scale = max_size / max(rect.width, rect.height)
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
+
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    img.save(output_path, "JPEG", quality=85, optimize=True)
+
+
+def rutas_miniaturas(thumbs_dir: Path, base_name: str) -> tuple[Path, Path]:
+    """Rutas de las miniaturas chica y mediana de una página."""
+    return (
+        thumbs_dir / f"{base_name}_{MINIATURA_CHICA}.jpg",
+        thumbs_dir / f"{base_name}_{MINIATURA_MEDIANA}.jpg",
+    )
+
+
+def guardar_miniaturas(im, chica: Path, mediana: Path) -> None:
+    """
+    Guarda las miniaturas de una imagen PIL ya abierta (p. ej. al importar,
+    con el derivado todavía en memoria). La chica sale de la mediana.
+    Se escriben con guardar_atomico: en un blob compartido otro proceso
+    puede estar sirviéndolas o generándolas a la vez.
+    """
+    from PIL import Image
+
+    from digitalizacion.services.almacen import guardar_atomico
+
+    if im.mode not in ("RGB", "L"):
+        im = im.convert("RGB")
+    im = im.copy()
+    im.thumbnail((MINIATURA_MEDIANA, MINIATURA_MEDIANA), Image.Resampling.LANCZOS)
+    guardar_atomico(mediana, lambda ruta: im.save(ruta, "JPEG", quality=80, optimize=True))
+    im.thumbnail((MINIATURA_CHICA, MINIATURA_CHICA), Image.Resampling.LANCZOS)
+    guardar_atomico(chica, lambda ruta: im.save(ruta, "JPEG", quality=80, optimize=True))
+
+
+def generar_miniaturas_pagina(origen: str, chica: str, mediana: str) -> None:
+    """
+    Genera las miniaturas de una página desde su derivado (o su master).
+    Se ejecuta en procesos del pool: solo toca archivos.
+    """
+    from PIL import Image
+
+    Path(chica).parent.mkdir(parents=True, exist_ok=True)
+    with Image.open(origen) as im:
+        # JPEG: decodifica ya reducido (mucho más rápido que a tamaño completo)
+        im.draft("RGB", (MINIATURA_MEDIANA, MINIATURA_MEDIANA))
+        guardar_miniaturas(im, Path(chica), Path(mediana))
+
 
 def get_or_create_pdf_thumbnail(
     pdf_path: str,
     page_number: int = 1,
     output_dir: Path = None,
-    max_size: int = 400
+    max_size: int = 400,
+    overwrite: bool = False
 ) -> str | None:
     """
     Genera thumbnail de una página del PDF.
@@ -27,6 +97,7 @@ def get_or_create_pdf_thumbnail(
         page_number: Número de página (1-based)
         output_dir: Directorio de salida (opcional)
         max_size: Tamaño máximo del lado mayor en píxeles
+        overwrite: Regenerar aunque el archivo ya exista (PDF reemplazado)
 
     Returns:
         Ruta relativa del thumbnail o None si falla
@@ -50,11 +121,11 @@ def get_or_create_pdf_thumbnail(
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Nombre del archivo
-    thumb_name = f"{source_pdf.stem}_p{page_number:03d}_thumb.jpg"
+    thumb_name = thumbnail_name(source_pdf, page_number)
     output_path = output_dir / thumb_name
 
     # Si ya existe, retornarlo
-    if output_path.exists():
+    if output_path.exists() and not overwrite:
         return str(output_path.relative_to(Path(settings.MEDIA_ROOT))).replace("\\", "/")
 
     try:
@@ -65,15 +136,7 @@ def get_or_create_pdf_thumbnail(
             doc.close()
             return None
 
-        page = doc[page_idx]
-        rect = page.rect
-        scale = max_size / max(rect.width, rect.height)
-        matrix = fitz.Matrix(scale, scale)
-        pix = page.get_pixmap(matrix=matrix)
-
-        from PIL import Image
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        img.save(output_path, "JPEG", quality=85, optimize=True)
+        render_page_thumbnail(doc[page_idx], output_path, max_size=max_size)
         doc.close()
 
         return str(output_path.relative_to(Path(settings.MEDIA_ROOT))).replace("\\", "/")
@@ -84,7 +147,7 @@ def get_or_create_pdf_thumbnail(
         return None
 
 
-def _get_segment_thumb_output_dir(ds) -> Path:
+def get_segment_thumb_output_dir(ds) -> Path:
     """
     Obtiene el directorio de salida para thumbnails de segmentos.
     Usa la carpeta de la colección para mantener la jerarquía.
@@ -104,12 +167,13 @@ def _get_segment_thumb_output_dir(ds) -> Path:
     return output_dir
 
 
-def get_pdf_thumbnail_for_digital_set(ds) -> str | None:
+def get_pdf_thumbnail_for_digital_set(ds, force: bool = False) -> str | None:
     """
     Obtiene o genera thumbnail para un DigitalSet con PDF.
 
     Args:
         ds: Instancia de DigitalSet
+        force: Regenerar ignorando el thumbnail cacheado
 
     Returns:
         Ruta relativa del thumbnail o None
@@ -118,13 +182,15 @@ def get_pdf_thumbnail_for_digital_set(ds) -> str | None:
         return None
 
     # Verificar cache existente
-    if getattr(ds, 'pdf_thumb_path', '') and ds.pdf_thumb_path:
+    if not force and getattr(ds, 'pdf_thumb_path', '') and ds.pdf_thumb_path:
         cached = Path(settings.MEDIA_ROOT) / ds.pdf_thumb_path
         if cached.exists():
             return ds.pdf_thumb_path
 
     # Generar thumbnail (se guardará en {colección}/access/thumbs/)
-    thumb_path = get_or_create_pdf_thumbnail(ds.pdf_path, page_number=1)
+    thumb_path = get_or_create_pdf_thumbnail(
+        ds.pdf_path, page_number=1, overwrite=force
+    )
 
     if thumb_path and hasattr(ds, 'pdf_thumb_path'):
         ds.pdf_thumb_path = thumb_path
@@ -133,13 +199,14 @@ def get_pdf_thumbnail_for_digital_set(ds) -> str | None:
     return thumb_path
 
 
-def get_pdf_thumbnail_for_segment(segment) -> str | None:
+def get_pdf_thumbnail_for_segment(segment, force: bool = False) -> str | None:
     """
     Obtiene o genera thumbnail para un WorkSegment.
     Usa la primera página del rango del segmento.
 
     Args:
         segment: Instancia de WorkSegment
+        force: Regenerar ignorando el thumbnail cacheado
 
     Returns:
         Ruta relativa del thumbnail o None
@@ -149,19 +216,20 @@ def get_pdf_thumbnail_for_segment(segment) -> str | None:
         return None
 
     # Verificar cache existente
-    if getattr(segment, 'cached_thumb_path', '') and segment.cached_thumb_path:
+    if not force and getattr(segment, 'cached_thumb_path', '') and segment.cached_thumb_path:
         cached = Path(settings.MEDIA_ROOT) / segment.cached_thumb_path
         if cached.exists():
             return segment.cached_thumb_path
 
     # Directorio de salida dentro de la carpeta de la colección
-    output_dir = _get_segment_thumb_output_dir(ds)
+    output_dir = get_segment_thumb_output_dir(ds)
 
     # Generar thumbnail usando la página de inicio del segmento
     thumb_path = get_or_create_pdf_thumbnail(
         ds.pdf_path,
         page_number=segment.start_page,
-        output_dir=output_dir
+        output_dir=output_dir,
+        overwrite=force
     )
 
     if thumb_path and hasattr(segment, 'cached_thumb_path'):
@@ -1,12 +1,14 @@
 """
-Signals para invalidar cache de PDFs y thumbnails de segmentos.
+Signals para invalidar cache de PDFs y thumbnails de segmentos y encolar
+la generación de thumbnails.
 """
 
-from django.db.models.signals import pre_save, pre_delete
+from django.db.models.signals import post_save, pre_save, pre_delete
 from django.dispatch import receiver
 from pathlib import Path
 from django.conf import settings
 from .models import WorkSegment, DigitalSet
+from .services.thumbnail_queue import encolar_thumbnail_segmento
 
 
 def _delete_cached_file(path: str) -> None:
@@ -36,6 +38,7 @@ def invalidate_segment_cache_on_change(sender, instance, **kwargs):
                 _delete_cached_file(old.cached_pdf_path)
                 instance.cached_pdf_path = ""
                 instance.cached_pdf_generated_at = None
+                instance.cached_pdf_huella = ""
                 # Invalidar thumbnail cache
                 _delete_cached_file(old.cached_thumb_path)
                 instance.cached_thumb_path = ""
@@ -43,6 +46,15 @@ def invalidate_segment_cache_on_change(sender, instance, **kwargs):
             pass
 
 
+@receiver(post_save, sender=WorkSegment)
+def enqueue_segment_thumb(sender, instance, **kwargs):
+    """
+    Encola el thumbnail del segmento al crearlo o tras invalidar su cache.
+    """
+    if not instance.cached_thumb_path:
+        encolar_thumbnail_segmento(instance)
+
+
 @receiver(pre_delete, sender=WorkSegment)
 def delete_segment_cache_on_delete(sender, instance, **kwargs):
     """
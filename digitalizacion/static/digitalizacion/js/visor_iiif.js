@@ -0,0 +1,34 @@
+// Zoom profundo sobre el servicio IIIF Image de cada página (OpenSeadragon).
+// Botones: <button data-iiif-info="/digitalizacion/iiif/<id>/info.json">
+(function () {
+  const modalEl = document.getElementById("iiifZoomModal");
+  if (!modalEl || typeof OpenSeadragon === "undefined") return;
+
+  const modal = new bootstrap.Modal(modalEl);
+  const titulo = modalEl.querySelector(".modal-title");
+  let viewer = null;
+
+  document.addEventListener("click", function (e) {
+    const boton = e.target.closest("[data-iiif-info]");
+    if (!boton) return;
+    e.preventDefault();
+
+    titulo.textContent = boton.dataset.iiifLabel || "Zoom";
+    if (viewer) viewer.destroy();
+    viewer = OpenSeadragon({
+      element: document.getElementById("iiifZoomViewer"),
+      prefixUrl: "https://cdn.jsdelivr.net/npm/openseadragon@4.1.1/build/openseadragon/images/",
+      tileSources: boton.dataset.iiifInfo,
+      showNavigator: true,
+      maxZoomPixelRatio: 2,
+    });
+    modal.show();
+  });
+
+  modalEl.addEventListener("hidden.bs.modal", function () {
+    if (viewer) {
+      viewer.destroy();
+      viewer = null;
+    }
+  });
+})();
@@ -0,0 +1,144 @@
+// Visor virtualizado de páginas: solo existen en el DOM (y se descargan) las
+// páginas visibles y unas pocas alrededor; el alto del resto lo reserva el
+// contenedor. Las páginas se piden por tandas a la API de rangos.
+// <div data-visor-paginas data-url="/digitalizacion/api/set/<id>/paginas/"
+//      data-primera="1" data-ultima="800"></div>
+(function () {
+  const TANDA = 50;       // páginas por petición a la API
+  const MARGEN = 2;       // páginas renderizadas fuera de pantalla (arriba y abajo)
+  const ETIQUETA = 30;    // alto de la fila "p001 · Zoom"
+  const SEPARACION = 16;  // espacio entre páginas
+  const ANCHO_MAXIMO = 1200;
+
+  const pad = (n) => String(n).padStart(3, "0");
+
+  class VisorPaginas {
+    constructor(el) {
+      this.el = el;
+      this.url = el.dataset.url;
+      this.primera = parseInt(el.dataset.primera, 10);
+      this.total = parseInt(el.dataset.ultima, 10) - this.primera + 1;
+      this.paginas = new Map(); // page_number -> página (null si falta)
+      this.tandas = new Map();  // inicio de tanda -> Promise
+      this.slots = new Map();   // page_number -> elemento
+      this.proporcion = 1.4;    // alto/ancho hasta conocer la primera página
+      this.alto = 0;
+      this.pendiente = false;
+
+      el.style.position = "relative";
+      this.cargarTanda(this.primera).then(() => {
+        const conMedidas = [...this.paginas.values()].find((p) => p && p.ancho && p.alto);
+        if (conMedidas) this.proporcion = conMedidas.alto / conMedidas.ancho;
+        this.actualizar();
+        window.addEventListener("scroll", () => this.programar(), { passive: true });
+        window.addEventListener("resize", () => this.programar());
+      });
+    }
+
+    cargarTanda(numero) {
+      const inicio = numero - ((numero - this.primera) % TANDA);
+      if (!this.tandas.has(inicio)) {
+        const fin = Math.min(inicio + TANDA - 1, this.primera + this.total - 1);
+        const url = `${this.url}?desde=${inicio}&hasta=${fin}&limite=${TANDA}`;
+        const promesa = fetch(url, { headers: { Accept: "application/json" } })
+          .then((r) => (r.ok ? r.json() : { paginas: [] }))
+          .then((datos) => {
+            for (let n = inicio; n <= fin; n++) this.paginas.set(n, null);
+            datos.paginas.forEach((p) => this.paginas.set(p.page_number, p));
+          })
+          .catch(() => this.tandas.delete(inicio));
+        this.tandas.set(inicio, promesa);
+      }
+      return this.tandas.get(inicio);
+    }
+
+    programar() {
+      if (this.pendiente) return;
+      this.pendiente = true;
+      window.requestAnimationFrame(() => {
+        this.pendiente = false;
+        this.actualizar();
+      });
+    }
+
+    actualizar() {
+      const ancho = Math.min(this.el.clientWidth, ANCHO_MAXIMO);
+      const alto = Math.round(ancho * this.proporcion) + ETIQUETA + SEPARACION;
+      if (alto !== this.alto) {
+        // Cambió el ancho: se recolocan todas las páginas
+        this.slots.forEach((slot) => slot.remove());
+        this.slots.clear();
+        this.alto = alto;
+        this.el.style.height = `${this.total * alto}px`;
+      }
+
+      const arriba = -this.el.getBoundingClientRect().top;
+      const desde = Math.max(0, Math.floor(arriba / alto) - MARGEN);
+      const hasta = Math.min(
+        this.total - 1,
+        Math.floor((arriba + window.innerHeight) / alto) + MARGEN
+      );
+
+      this.slots.forEach((slot, numero) => {
+        const i = numero - this.primera;
+        if (i < desde || i > hasta) {
+          slot.remove(); // al salir del DOM el navegador cancela la descarga
+          this.slots.delete(numero);
+        }
+      });
+      for (let i = desde; i <= hasta; i++) {
+        const numero = this.primera + i;
+        if (!this.slots.has(numero)) this.crearSlot(numero, i * alto);
+      }
+    }
+
+    crearSlot(numero, top) {
+      const slot = document.createElement("div");
+      slot.style.cssText = `position:absolute;left:0;right:0;top:${top}px;`;
+      slot.innerHTML = `<div class="small text-muted mb-1">p${pad(numero)}</div>`;
+      this.el.appendChild(slot);
+      this.slots.set(numero, slot);
+
+      if (this.paginas.has(numero)) {
+        this.pintar(slot, numero);
+      } else {
+        this.cargarTanda(numero).then(() => {
+          if (this.slots.get(numero) === slot) this.pintar(slot, numero);
+        });
+      }
+    }
+
+    pintar(slot, numero) {
+      const pagina = this.paginas.get(numero);
+      const etiqueta = slot.firstElementChild;
+      if (!pagina || !pagina.imagen) {
+        slot.insertAdjacentHTML(
+          "beforeend",
+          `<div class="alert alert-warning">p${pad(numero)} sin derivado JPG.</div>`
+        );
+        return;
+      }
+
+      // Las páginas renderizadas de un PDF no tienen servicio IIIF
+      if (pagina.info) {
+        const zoom = document.createElement("button");
+        zoom.type = "button";
+        zoom.className = "btn btn-sm btn-link p-0 ms-2";
+        zoom.dataset.iiifInfo = pagina.info;
+        zoom.dataset.iiifLabel = `p${pad(numero)}`;
+        zoom.innerHTML = '<i class="bi bi-zoom-in"></i> Zoom';
+        etiqueta.appendChild(zoom);
+      }
+
+      const img = document.createElement("img");
+      img.src = pagina.imagen;
+      img.alt = `p${pad(numero)}`;
+      img.className = "border rounded bg-light";
+      img.style.cssText = `display:block;width:100%;max-width:${ANCHO_MAXIMO}px;` +
+        `height:${this.alto - ETIQUETA - SEPARACION}px;object-fit:contain;`;
+      slot.appendChild(img);
+    }
+  }
+
+  document.querySelectorAll("[data-visor-paginas]").forEach((el) => new VisorPaginas(el));
+})();
@@ -0,0 +1,15 @@
+"""
+Tests de digitalización.
+
+- utils: MEDIA_ROOT temporal y PDFs/TIFF de prueba
+- test_almacen: almacén de blobs por contenido y limpiar_blobs
+- test_cache_derivados: presupuesto y expulsión LRU de las cachés de derivados
+- test_colas: colas persistentes de trabajos (reclamar, reintentos, workers)
+- test_iiif: parámetros, pirámide de teselas y vistas del servicio IIIF Image
+- test_importacion: importación de los TIFF del INBOX al almacén de blobs
+- test_pdf_acceso: optimización de las copias de acceso de PDFs
+- test_pdf_jpeg: PDF de segmentos a partir de JPG sin recomprimir
+- test_pdf_segmentos: validez del PDF cacheado de un segmento y contadores de uso
+- test_render_pdf: render a demanda de páginas de PDF sin imágenes
+- test_segmentos_lote: construcción en lote de los segmentos de una colección
+"""
@@ -0,0 +1,87 @@
+import os
+import stat
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from digitalizacion.models import DigitalPage, DigitalSet, ImportacionJob
+from digitalizacion.services.almacen import (
+    blob_de,
+    blobs_huerfanos,
+    dir_blob,
+    guardar_master,
+    rutas_blob,
+)
+
+from .utils import MediaTemporalMixin, crear_obra, crear_tiff
+
+SHA_USADO = "aa" + "1" * 62
+SHA_HUERFANO = "bb" + "2" * 62
+
+
+class AlmacenBlobsTest(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ds = DigitalSet.objects.create(obra=crear_obra())
+
+    def _blob(self, sha, horas=2):
+        """Blob con su master, modificado hace `horas`."""
+        rutas = rutas_blob(sha)
+        crear_tiff(rutas["master"])
+        antiguo = time.time() - horas * 3600
+        os.utime(dir_blob(sha), (antiguo, antiguo))
+        return dir_blob(sha)
+
+    def test_guardar_master_una_sola_vez(self):
+        origen = crear_tiff(self.media / "inbox" / "p001.tif")
+        destino = rutas_blob(SHA_USADO)["master"]
+
+        self.assertFalse(guardar_master(origen, destino))
+        self.assertEqual(destino.read_bytes(), origen.read_bytes())
+        self.assertFalse(destino.stat().st_mode & stat.S_IWUSR)
+
+        antes = time.time() - 7200
+        os.utime(destino.parent, (antes, antes))
+        self.assertTrue(guardar_master(origen, destino))
+        # Reutilizarlo renueva el blob para que limpiar_blobs no lo tome por huérfano
+        self.assertGreater(destino.parent.stat().st_mtime, antes)
+        self.assertEqual([p.name for p in destino.parent.iterdir()], ["master.tif"])
+
+    def test_blob_de(self):
+        blob = dir_blob(SHA_USADO)
+        self.assertEqual(blob_de(blob / "tiles" / "1" / "0_0.jpg"), blob)
+        self.assertIsNone(blob_de(self.media / "master" / "p001.tif"))
+        self.assertIsNone(blob_de(self.media / "blobs" / "aa"))
+
+    def test_huerfanos(self):
+        usado = self._blob(SHA_USADO)
+        huerfano = self._blob(SHA_HUERFANO)
+        reciente = self._blob("cc" + "3" * 62, horas=0)
+        DigitalPage.objects.create(
+            digital_set=self.ds,
+            page_number=1,
+            master_path=f"blobs/aa/{SHA_USADO}/master.tif",
+        )
+
+        self.assertEqual(list(blobs_huerfanos()), [huerfano])
+        self.assertTrue(usado.exists() and reciente.exists())
+
+    def test_nada_con_importacion_en_proceso(self):
+        self._blob(SHA_HUERFANO)
+        ImportacionJob.objects.create(digital_set=self.ds, estado="EN_PROCESO")
+        self.assertEqual(list(blobs_huerfanos()), [])
+
+    def test_limpiar_blobs(self):
+        huerfano = self._blob(SHA_HUERFANO)
+
+        salida = StringIO()
+        call_command("limpiar_blobs", dry_run=True, stdout=salida)
+        self.assertIn("Blobs huérfanos: 1", salida.getvalue())
+        self.assertTrue(huerfano.exists())
+
+        salida = StringIO()
+        call_command("limpiar_blobs", stdout=salida)
+        self.assertIn("Blobs eliminados: 1", salida.getvalue())
+        self.assertFalse(huerfano.exists())
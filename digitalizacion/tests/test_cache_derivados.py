@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from digitalizacion.models import DigitalSet, UsoCacheDerivados, WorkSegment
+from digitalizacion.services.cache_derivados import podar_derivados, pdfs_segmentos
+from digitalizacion.services.cache_disco import CacheDisco
+from digitalizacion.services.pdf_service import get_segment_pdf
+
+from .utils import MediaTemporalMixin, crear_obra, crear_pdf
+
+PDF = "digitalizacion/UNL/access/pdf/coleccion.pdf"
+
+
+def _envejecer(ruta, horas):
+    antes = time.time() - horas * 3600
+    os.utime(ruta, (antes, antes))
+
+
+class CacheDiscoTest(SimpleTestCase):
+    def setUp(self):
+        self.raiz = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.raiz, ignore_errors=True)
+        # Sin podas automáticas al guardar
+        self.cache = CacheDisco(self.raiz, limite_bytes=1000, intervalo_poda=3600, fraccion_poda=10)
+
+    def _guardar(self, relativa, tamano, horas):
+        ruta = self.cache.guardar(relativa, lambda destino: destino.write_bytes(b"x" * tamano))
+        _envejecer(ruta, horas)
+        return ruta
+
+    def test_poda_los_usados_hace_mas_tiempo(self):
+        viejo = self._guardar("1/v1/p1.jpg", 400, horas=3)
+        medio = self._guardar("2/p1.jpg", 400, horas=2)
+        nuevo = self._guardar("3/p1.jpg", 400, horas=1)
+        # Un acierto lo renueva: pasa a ser el más reciente
+        self.assertEqual(self.cache.obtener("1/v1/p1.jpg"), viejo)
+
+        self.assertEqual(self.cache.podar(), (1, 400))
+        self.assertTrue(viejo.exists() and nuevo.exists())
+        self.assertFalse(medio.exists())
+        self.assertFalse((self.raiz / "2").exists())
+
+        self.assertEqual(self.cache.podar(), (0, 0))
+
+    def test_guardar_poda_al_superar_la_fraccion(self):
+        self.cache.fraccion_poda = 0.5
+        viejo = self._guardar("viejo.jpg", 600, horas=2)
+        self._guardar("nuevo.jpg", 600, horas=1)
+        self.assertFalse(viejo.exists())
+        self.assertEqual(self.cache.tamano(), 600)
+
+
+class PodarDerivadosTest(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        crear_pdf(self.media / PDF, paginas=4)
+        self.ds = DigitalSet.objects.create(obra=crear_obra(), pdf_path=PDF, total_pages=4)
+        self.segmentos = []
+        for horas, (inicio, fin) in zip((2, 3, 1), ((1, 1), (2, 2), (3, 4))):
+            segmento = WorkSegment.objects.create(
+                obra=crear_obra(f"Obra {inicio}", nivel_bibliografico="m"),
+                digital_set=self.ds,
+                start_page=inicio,
+                end_page=fin,
+            )
+            _envejecer(self.media / get_segment_pdf(segmento), horas)
+            self.segmentos.append(segmento)
+        self.total = sum(tamano for _, tamano, _, _, _ in pdfs_segmentos())
+
+    def test_dentro_del_presupuesto(self):
+        self.assertEqual(podar_derivados(self.total), (0, 0))
+        self.assertFalse(WorkSegment.objects.filter(cached_pdf_path="").exists())
+
+    def test_expulsa_el_usado_hace_mas_tiempo(self):
+        medio = self.segmentos[1]
+        ruta = self.media / medio.cached_pdf_path
+        tamano = ruta.stat().st_size
+
+        with mock.patch(
+            "catalogo_publico.services.cache_service.programar_invalidacion_obras"
+        ) as invalidar:
+            self.assertEqual(podar_derivados(self.total - 1), (1, tamano))
+
+        self.assertFalse(ruta.exists())
+        medio.refresh_from_db()
+        self.assertEqual((medio.cached_pdf_path, medio.cached_pdf_huella), ("", ""))
+        self.assertEqual(
+            WorkSegment.objects.exclude(cached_pdf_path="").count(), 2
+        )
+        self.assertEqual(UsoCacheDerivados.objects.get(digital_set=self.ds).expulsados, 1)
+        self.assertEqual(list(invalidar.call_args.args[0]), [medio.obra_id])
+
+        # Se vuelve a construir la próxima vez que se pide
+        self.assertTrue(get_segment_pdf(medio))
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command("cache_derivados", podar=True, limite_mb=0, stdout=salida)
+        self.assertIn("PDFs expulsados: 3", salida.getvalue())
+        self.assertFalse(WorkSegment.objects.exclude(cached_pdf_path="").exists())
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from digitalizacion.models import DigitalSet, ThumbnailJob
+from digitalizacion.services.cola import (
+    MAX_INTENTOS,
+    liberar_colgados,
+    procesar_cola,
+    reclamar,
+    registrar_resultado,
+)
+from digitalizacion.services.thumbnail_queue import (
+    encolar_thumbnail_digital_set,
+    procesar_trabajo,
+)
+
+from .utils import MediaTemporalMixin, crear_obra, crear_pdf
+
+PDF = "digitalizacion/UNL/access/pdf/coleccion.pdf"
+
+
+class ColaTest(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ds = DigitalSet.objects.create(obra=crear_obra(), pdf_path=PDF)
+        ThumbnailJob.objects.all().delete()
+
+    def _fallar(self, job):
+        registrar_resultado(job, False, "fallo")
+        return False
+
+    def test_reclamar_en_orden_y_una_sola_vez(self):
+        primero = ThumbnailJob.objects.create(digital_set=self.ds)
+        segundo = ThumbnailJob.objects.create(digital_set=self.ds, force=True)
+
+        reclamado = reclamar(ThumbnailJob, "digital_set")
+        self.assertEqual(reclamado, primero)
+        self.assertEqual((reclamado.estado, reclamado.intentos), ("EN_PROCESO", 1))
+        self.assertIsNotNone(reclamado.started_at)
+
+        self.assertEqual(reclamar(ThumbnailJob), segundo)
+        self.assertIsNone(reclamar(ThumbnailJob))
+
+    def test_reintentos_hasta_error(self):
+        job = ThumbnailJob.objects.create(digital_set=self.ds)
+
+        self.assertEqual(procesar_cola(ThumbnailJob, self._fallar, max_trabajos=1), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.intentos), ("PENDIENTE", 1))
+
+        self.assertEqual(procesar_cola(ThumbnailJob, self._fallar), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.intentos), ("ERROR", MAX_INTENTOS))
+        self.assertEqual(job.error, "fallo")
+
+    def test_liberar_colgados(self):
+        viejo = ThumbnailJob.objects.create(
+            digital_set=self.ds,
+            estado="EN_PROCESO",
+            started_at=timezone.now() - timedelta(minutes=45),
+        )
+        reciente = ThumbnailJob.objects.create(
+            digital_set=self.ds, estado="EN_PROCESO", started_at=timezone.now()
+        )
+
+        self.assertEqual(liberar_colgados(ThumbnailJob, minutos=30), 1)
+        viejo.refresh_from_db()
+        reciente.refresh_from_db()
+        self.assertEqual(viejo.estado, "PENDIENTE")
+        self.assertEqual(reciente.estado, "EN_PROCESO")
+
+    def test_encolar_reutiliza_el_pendiente(self):
+        job = encolar_thumbnail_digital_set(self.ds)
+        self.assertEqual(encolar_thumbnail_digital_set(self.ds, force=True), job)
+        job.refresh_from_db()
+        self.assertTrue(job.force)
+        self.assertEqual(ThumbnailJob.objects.count(), 1)
+
+    def test_genera_el_thumbnail_del_pdf(self):
+        crear_pdf(self.media / PDF)
+        job = encolar_thumbnail_digital_set(self.ds)
+
+        self.assertEqual(procesar_cola(ThumbnailJob, procesar_trabajo, ("digital_set",)), 1)
+        job.refresh_from_db()
+        self.ds.refresh_from_db()
+        self.assertEqual(job.estado, "HECHO")
+        self.assertTrue((self.media / self.ds.pdf_thumb_path).is_file())
+
+    def test_comando_worker(self):
+        ThumbnailJob.objects.create(
+            digital_set=self.ds,
+            estado="EN_PROCESO",
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        crear_pdf(self.media / PDF)
+
+        salida = StringIO()
+        call_command("procesar_thumbnails", stdout=salida)
+        self.assertIn("Trabajos colgados liberados: 1", salida.getvalue())
+        self.assertIn("Thumbnails generados: 1", salida.getvalue())
+        self.assertEqual(ThumbnailJob.objects.get().estado, "HECHO")
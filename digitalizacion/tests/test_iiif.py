@@ -0,0 +1,168 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from digitalizacion.models import DigitalPage, DigitalSet
+from digitalizacion.services import iiif_imagen
+from digitalizacion.services.iiif_imagen import (
+    TAMANO_MAXIMO,
+    TAMANO_TESELA,
+    SolicitudInvalida,
+    factores_escala,
+    generar_piramide,
+    parsear_calidad_formato,
+    parsear_region,
+    parsear_tamano,
+)
+
+from .utils import MediaTemporalMixin, crear_obra, crear_tiff
+
+
+class ParametrosIIIFTest(SimpleTestCase):
+    def test_regiones(self):
+        casos = [
+            ("full", (0, 0, 1000, 800)),
+            ("square", (100, 0, 800, 800)),
+            ("10,20,300,400", (10, 20, 300, 400)),
+            # Se recorta a la imagen
+            ("900,700,500,500", (900, 700, 100, 100)),
+            ("pct:50,50,50,50", (500, 400, 500, 400)),
+            ("pct:0,0,12.5,25", (0, 0, 125, 200)),
+        ]
+        for region, esperado in casos:
+            with self.subTest(region=region):
+                self.assertEqual(parsear_region(region, 1000, 800), esperado)
+
+    def test_regiones_invalidas(self):
+        for region in ("", "1,2,3", "0,0,0,10", "1000,0,10,10", "pct:a,0,1,1", "-1,0,5,5"):
+            with self.subTest(region=region), self.assertRaises(SolicitudInvalida):
+                parsear_region(region, 1000, 800)
+
+    def test_tamanos(self):
+        casos = [
+            ("max", (1000, 800)),
+            ("500,", (500, 400)),
+            (",200", (250, 200)),
+            ("300,300", (300, 300)),
+            ("!500,500", (500, 400)),
+            ("pct:25", (250, 200)),
+        ]
+        for tamano, esperado in casos:
+            with self.subTest(tamano=tamano):
+                self.assertEqual(parsear_tamano(tamano, 1000, 800), esperado)
+
+    def test_max_respeta_el_tope(self):
+        w, h = parsear_tamano("max", TAMANO_MAXIMO * 2, TAMANO_MAXIMO)
+        self.assertEqual((w, h), (TAMANO_MAXIMO, TAMANO_MAXIMO // 2))
+
+    def test_tamanos_invalidos(self):
+        for tamano in ("", ",", "0,", "x,10", "!0,10", "pct:0", "pct:150", "^max", "2000,", "!a,b"):
+            with self.subTest(tamano=tamano), self.assertRaises(SolicitudInvalida):
+                parsear_tamano(tamano, 1000, 800)
+
+    def test_calidad_y_formato(self):
+        parsear_calidad_formato("0", "default", "jpg")
+        for argumentos in (("90", "default", "jpg"), ("0", "bitonal", "jpg"), ("0", "gray", "tif")):
+            with self.subTest(argumentos=argumentos), self.assertRaises(SolicitudInvalida):
+                parsear_calidad_formato(*argumentos)
+
+    def test_factores_escala(self):
+        self.assertEqual(factores_escala(400, 300), [1])
+        self.assertEqual(factores_escala(3000, 2000), [1, 2, 4, 8])
+
+
+class ImagenIIIFTest(MediaTemporalMixin, TestCase):
+    """Pirámide de teselas y vistas del servicio IIIF Image."""
+
+    ANCHO, ALTO = 1200, 700
+
+    def setUp(self):
+        super().setUp()
+        # La caché de disco se crea una vez por proceso con el directorio vigente
+        ajustes = override_settings(IIIF_CACHE_DIR=self.media / "cache" / "iiif")
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        iiif_imagen._cache = None
+        self.addCleanup(setattr, iiif_imagen, "_cache", None)
+
+        master = crear_tiff(self.media / "master" / "p001.tif", tamano=(self.ANCHO, self.ALTO))
+        self.teselas = self.media / "iiif" / "tiles" / "p001"
+        self.assertEqual(generar_piramide(master, self.teselas), (self.ANCHO, self.ALTO))
+
+        self.obra = crear_obra(publicada=True)
+        ds = DigitalSet.objects.create(obra=self.obra)
+        self.page = DigitalPage.objects.create(
+            digital_set=ds,
+            page_number=1,
+            tiles_path="iiif/tiles/p001",
+            width=self.ANCHO,
+            height=self.ALTO,
+        )
+
+    def _url(self, region, tamano, calidad="default", fmt="jpg"):
+        return reverse(
+            "digitalizacion:iiif_imagen",
+            kwargs={
+                "page_id": self.page.pk, "region": region, "size": tamano,
+                "rotation": "0", "quality": calidad, "fmt": fmt,
+            },
+        )
+
+    def test_piramide(self):
+        from PIL import Image
+
+        self.assertEqual(
+            sorted(int(p.name) for p in self.teselas.iterdir()), [1, 2, 4]
+        )
+        self.assertEqual(
+            sorted(p.name for p in (self.teselas / "1").iterdir()),
+            ["0_0.jpg", "0_1.jpg", "1_0.jpg", "1_1.jpg", "2_0.jpg", "2_1.jpg"],
+        )
+        with Image.open(self.teselas / "1" / "2_1.jpg") as borde:
+            self.assertEqual(borde.size, (self.ANCHO - 2 * TAMANO_TESELA, self.ALTO - TAMANO_TESELA))
+        with Image.open(self.teselas / "4" / "0_0.jpg") as minima:
+            self.assertEqual(minima.size, (300, 175))
+
+    def test_info_json(self):
+        url = reverse("digitalizacion:iiif_info", kwargs={"page_id": self.page.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        info = response.json()
+        self.assertEqual((info["width"], info["height"]), (self.ANCHO, self.ALTO))
+        self.assertEqual(info["tiles"], [{"width": TAMANO_TESELA, "scaleFactors": [1, 2, 4]}])
+        self.assertTrue(info["id"].endswith(f"/iiif/{self.page.pk}"))
+        self.assertEqual(response["Access-Control-Allow-Origin"], "*")
+        self.assertIn("public", response["Cache-Control"])
+
+        repetida = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_tesela_alineada_se_sirve_tal_cual(self):
+        response = self.client.get(self._url("512,0,512,512", "512,"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            (self.teselas / "1" / "1_0.jpg").read_bytes(),
+        )
+        self.assertFalse((self.media / "cache" / "iiif").exists())
+
+    def test_region_compuesta_va_a_la_cache(self):
+        from io import BytesIO
+
+        from PIL import Image
+
+        response = self.client.get(self._url("pct:25,25,50,50", "300,", calidad="gray", fmt="png"))
+        self.assertEqual(response.status_code, 200)
+        with Image.open(BytesIO(b"".join(response.streaming_content))) as im:
+            self.assertEqual((im.size, im.mode, im.format), ((300, 175), "L", "PNG"))
+        self.assertEqual(len(list((self.media / "cache" / "iiif").rglob("*.png"))), 1)
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get(self._url("full", "2400,")).status_code, 400)
+        self.assertEqual(self.client.get(self._url("full", "max", fmt="gif")).status_code, 400)
+
+    def test_obra_no_publicada(self):
+        self.obra.publicada = False
+        self.obra.save()
+        url = reverse("digitalizacion:iiif_info", kwargs={"page_id": self.page.pk})
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,96 @@
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from digitalizacion.models import DigitalSet, ImportacionJob
+from digitalizacion.services.cola import procesar_cola
+from digitalizacion.services.importacion import encolar_importacion, procesar_trabajo
+
+from .utils import MediaTemporalMixin, crear_obra, crear_tiff
+
+
+class ImportacionTiffTest(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.inbox = self.media / "inbox" / "coleccion"
+        crear_tiff(self.inbox / "p002.tif", color=(10, 10, 10))
+        crear_tiff(self.inbox / "p001.tif", color=(90, 90, 90))
+        crear_tiff(self.inbox / "p003.TIFF", color=(170, 170, 170))
+        (self.inbox / "notas.txt").write_text("no es una página")
+        self.ds = DigitalSet.objects.create(obra=crear_obra(), inbox_path=str(self.inbox))
+
+    def _importar(self, ds=None):
+        encolar_importacion(ds or self.ds)
+        call_command("importar_tiffs", procesos=1, stdout=StringIO())
+        return ImportacionJob.objects.order_by("-id").first()
+
+    def test_encolar_reutiliza_la_pendiente(self):
+        job = encolar_importacion(self.ds)
+        self.assertEqual(encolar_importacion(self.ds), job)
+        job.estado = "HECHO"
+        job.save()
+        self.assertNotEqual(encolar_importacion(self.ds), job)
+
+    def test_importa_paginas_en_orden_de_nombre(self):
+        job = self._importar()
+        self.assertEqual(job.estado, "HECHO")
+        self.assertEqual(
+            (job.total_paginas, job.paginas_procesadas, job.paginas_nuevas), (3, 3, 3)
+        )
+
+        self.ds.refresh_from_db()
+        self.assertEqual((self.ds.estado, self.ds.total_pages), ("IMPORTADO", 3))
+        paginas = list(self.ds.pages.order_by("page_number"))
+        self.assertEqual([p.page_number for p in paginas], [1, 2, 3])
+        # p001.tif es la primera página aunque se creó después
+        with open(self.inbox / "p001.tif", "rb") as f, open(
+            self.media / paginas[0].master_path, "rb"
+        ) as master:
+            self.assertEqual(f.read(), master.read())
+        for pagina in paginas:
+            self.assertTrue(pagina.master_path.startswith("blobs/"))
+            self.assertEqual((pagina.width, pagina.height), (120, 160))
+            for campo in ("derivative_path", "thumb_path", "preview_path", "tiles_path"):
+                self.assertTrue((self.media / getattr(pagina, campo)).exists(), campo)
+
+    def test_reimportar_omite_paginas_sin_cambios(self):
+        self._importar()
+        sha_previo = dict(self.ds.pages.values_list("page_number", "master_sha256"))
+
+        crear_tiff(self.inbox / "p002.tif", color=(250, 0, 0))
+        job = self._importar()
+
+        self.assertEqual(
+            (job.paginas_procesadas, job.paginas_omitidas, job.paginas_nuevas), (3, 2, 0)
+        )
+        sha_nuevo = dict(self.ds.pages.values_list("page_number", "master_sha256"))
+        self.assertEqual(sha_nuevo[1], sha_previo[1])
+        self.assertEqual(sha_nuevo[3], sha_previo[3])
+        self.assertNotEqual(sha_nuevo[2], sha_previo[2])
+
+    def test_mismo_escaneo_en_otra_obra_comparte_blob(self):
+        self._importar()
+        otro = DigitalSet.objects.create(
+            obra=crear_obra("Otra"), inbox_path=str(self.inbox)
+        )
+        self._importar(otro)
+
+        self.assertEqual(
+            set(self.ds.pages.values_list("master_path", flat=True)),
+            set(otro.pages.values_list("master_path", flat=True)),
+        )
+        self.assertEqual(len(list((self.media / "blobs").glob("*/*"))), 3)
+
+    def test_inbox_vacio_se_reintenta(self):
+        vacio = DigitalSet.objects.create(
+            obra=crear_obra("Vacía"), inbox_path=str(self.media / "inbox" / "vacia")
+        )
+        job = encolar_importacion(vacio)
+
+        self.assertEqual(procesar_cola(ImportacionJob, procesar_trabajo, max_trabajos=1), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.intentos), ("PENDIENTE", 1))
+        self.assertIn("No se encontraron imágenes TIFF", job.error)
+        self.assertFalse(Path(vacio.inbox_path).exists())
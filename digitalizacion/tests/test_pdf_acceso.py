@@ -0,0 +1,63 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from digitalizacion.models import DigitalSet, OptimizacionPdfJob
+from digitalizacion.services.cola import procesar_cola
+from digitalizacion.services.pdf_acceso import (
+    encolar_optimizacion_digital_set,
+    linealizador_disponible,
+    optimizar_pdf,
+    procesar_trabajo,
+)
+
+from .utils import MediaTemporalMixin, crear_obra, crear_pdf
+
+PDF = "digitalizacion/UNL/access/pdf/coleccion.pdf"
+
+
+class OptimizacionPdfTest(MediaTemporalMixin, TestCase):
+    def test_optimizar_conserva_las_paginas(self):
+        origen = crear_pdf(self.media / "origen.pdf", paginas=4)
+        datos = optimizar_pdf(origen, self.media / "destino.pdf")
+
+        self.assertEqual(datos["paginas"], 4)
+        self.assertEqual(datos["bytes_destino"], (self.media / "destino.pdf").stat().st_size)
+        self.assertEqual(datos["linealizado"], linealizador_disponible() is not None)
+
+    def test_trabajo_de_digital_set(self):
+        crear_pdf(self.media / PDF)
+        ds = DigitalSet.objects.create(obra=crear_obra(), pdf_path=PDF)
+        job = encolar_optimizacion_digital_set(ds)
+        self.assertEqual(encolar_optimizacion_digital_set(ds), job)
+
+        self.assertEqual(
+            procesar_cola(OptimizacionPdfJob, procesar_trabajo, ("digital_set", "segment")), 1
+        )
+        job.refresh_from_db()
+        ds.refresh_from_db()
+        self.assertEqual(job.estado, "HECHO")
+        self.assertIsNotNone(ds.pdf_optimizado_at)
+        # El original pasa a master/ y la copia de acceso sigue en su ruta
+        self.assertEqual(ds.pdf_master_path, "digitalizacion/UNL/master/pdf/coleccion.pdf")
+        self.assertTrue((self.media / ds.pdf_master_path).is_file())
+        self.assertTrue((self.media / PDF).is_file())
+
+    def test_sin_pdf_se_reintenta(self):
+        ds = DigitalSet.objects.create(obra=crear_obra(), pdf_path=PDF)
+        job = encolar_optimizacion_digital_set(ds)
+
+        procesar_cola(OptimizacionPdfJob, procesar_trabajo, max_trabajos=1)
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.error), ("PENDIENTE", "No hay PDF que optimizar"))
+
+    def test_el_comando_avisa_si_no_puede_linealizar(self):
+        salida = StringIO()
+        with mock.patch(
+            "digitalizacion.management.commands.optimizar_pdfs.linealizador_disponible",
+            return_value=None,
+        ):
+            call_command("optimizar_pdfs", stdout=salida)
+        self.assertIn("no se linealizarán", salida.getvalue())
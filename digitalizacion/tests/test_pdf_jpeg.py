@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from digitalizacion.services.pdf_jpeg import escribir_pdf_jpgs
+
+
+class EscribirPdfJpgsTest(SimpleTestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def _imagen(self, nombre, modo, tamano, color, formato="JPEG"):
+        from PIL import Image
+
+        ruta = self.dir / nombre
+        Image.new(modo, tamano, color).save(ruta, formato)
+        return ruta
+
+    def test_paginas_abren_con_pymupdf(self):
+        import pymupdf
+
+        imagenes = [
+            self._imagen("p001.jpg", "RGB", (200, 300), (200, 30, 30)),
+            self._imagen("p002.jpg", "L", (320, 240), 90),
+            self._imagen("p003.jpg", "CMYK", (100, 100), (255, 0, 0, 0)),
+            self._imagen("p004.png", "RGBA", (50, 80), (0, 0, 255, 255), formato="PNG"),
+        ]
+        destino = self.dir / "segmento.pdf"
+
+        self.assertEqual(escribir_pdf_jpgs(imagenes, destino), 4)
+
+        with pymupdf.open(destino) as doc:
+            self.assertFalse(doc.is_repaired)
+            self.assertEqual(
+                [(p.rect.width, p.rect.height) for p in doc],
+                [(200, 300), (320, 240), (100, 100), (50, 80)],
+            )
+            # El JPG se incrusta sin recomprimir
+            xref = doc[0].get_images()[0][0]
+            self.assertEqual(doc.extract_image(xref)["image"], imagenes[0].read_bytes())
+
+            colores = []
+            for pagina in doc:
+                pix = pagina.get_pixmap(clip=pymupdf.Rect(10, 10, 11, 11))
+                colores.append(pix.pixel(0, 0))
+        rojo, gris, cian, azul = colores
+        self.assertGreater(rojo[0], 150)
+        self.assertLess(rojo[2], 80)
+        self.assertTrue(abs(gris[0] - 90) < 10 and gris[0] == gris[1] == gris[2])
+        self.assertLess(cian[0], 80)
+        self.assertGreater(cian[2], 150)
+        self.assertGreater(azul[2], 150)
+        self.assertLess(azul[0], 80)
+
+    def test_sin_imagenes(self):
+        destino = self.dir / "vacio.pdf"
+        with self.assertRaises(ValueError):
+            escribir_pdf_jpgs([], destino)
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+    def test_reemplaza_el_anterior(self):
+        import pymupdf
+
+        destino = self.dir / "segmento.pdf"
+        destino.write_bytes(b"no es un pdf")
+        escribir_pdf_jpgs([self._imagen("p001.jpg", "RGB", (60, 60), "white")], destino)
+        with pymupdf.open(destino) as doc:
+            self.assertEqual(doc.page_count, 1)
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["p001.jpg", "segmento.pdf"])
@@ -0,0 +1,151 @@
+import os
+import time
+
+import pymupdf
+from django.test import TestCase
+
+from digitalizacion.models import (
+    ConstruccionSegmentosJob,
+    DigitalPage,
+    DigitalSet,
+    UsoCacheDerivados,
+    WorkSegment,
+)
+from digitalizacion.services import cache_derivados
+from digitalizacion.services.cache_derivados import registrar_uso
+from digitalizacion.services.cache_disco import RENOVAR_USO
+from digitalizacion.services.pdf_service import get_segment_pdf, pdf_segmento_vigente
+
+from .utils import MediaTemporalMixin, crear_obra, crear_pdf
+
+PDF = "digitalizacion/UNL/access/pdf/coleccion.pdf"
+
+
+class SegmentoMixin(MediaTemporalMixin):
+    def setUp(self):
+        super().setUp()
+        crear_pdf(self.media / PDF, paginas=4)
+        self.ds = DigitalSet.objects.create(obra=crear_obra(), pdf_path=PDF, total_pages=4)
+        self.segmento = WorkSegment.objects.create(
+            obra=crear_obra("Obra", nivel_bibliografico="m"),
+            digital_set=self.ds,
+            start_page=1,
+            end_page=2,
+        )
+
+    def _texto(self, rel_path):
+        with pymupdf.open(self.media / rel_path) as doc:
+            return [pagina.get_text().strip() for pagina in doc]
+
+
+class HuellaSegmentoTest(SegmentoMixin, TestCase):
+    """El PDF cacheado de un segmento vale mientras no cambien sus fuentes."""
+
+    def _reemplazar_pdf(self, texto):
+        ruta = self.media / PDF
+        with pymupdf.open() as doc:
+            for numero in range(1, 5):
+                doc.new_page(width=300, height=400).insert_text((40, 60), f"{texto} {numero}")
+            doc.save(ruta)
+        # Mismo tamaño posible: se fuerza otro mtime
+        antes = time.time() - 10
+        os.utime(ruta, (antes, antes))
+
+    def test_pdf_de_la_coleccion_reemplazado(self):
+        ruta = get_segment_pdf(self.segmento)
+        self.assertEqual(self._texto(ruta), ["Página 1", "Página 2"])
+        generado = self.segmento.cached_pdf_generated_at
+        self.assertEqual(get_segment_pdf(self.segmento), ruta)
+        self.assertEqual(self.segmento.cached_pdf_generated_at, generado)
+
+        self._reemplazar_pdf("Corregida")
+        self.assertIsNone(pdf_segmento_vigente(self.segmento))
+        self.assertTrue((self.media / ruta).exists())
+
+        self.assertEqual(get_segment_pdf(self.segmento), ruta)
+        self.assertEqual(self._texto(ruta), ["Corregida 1", "Corregida 2"])
+        self.assertGreater(self.segmento.cached_pdf_generated_at, generado)
+
+    def test_paginas_reimportadas(self):
+        from PIL import Image
+
+        extraido = get_segment_pdf(self.segmento)
+        for numero in (1, 2):
+            ruta = f"blobs/p{numero}/derivado.jpg"
+            (self.media / ruta).parent.mkdir(parents=True)
+            Image.new("RGB", (60, 80), "white").save(self.media / ruta)
+            DigitalPage.objects.create(
+                digital_set=self.ds,
+                page_number=numero,
+                derivative_path=ruta,
+                master_sha256=f"sha{numero}",
+            )
+
+        # Con JPG la fuente cambia y el PDF extraído se reemplaza
+        desde_jpg = get_segment_pdf(self.segmento)
+        self.assertTrue(desde_jpg.endswith("_fromjpg.pdf"))
+        self.assertFalse((self.media / extraido).exists())
+        huella = self.segmento.cached_pdf_huella
+
+        DigitalPage.objects.filter(digital_set=self.ds, page_number=2).update(
+            master_sha256="otro"
+        )
+        self.assertIsNone(pdf_segmento_vigente(self.segmento))
+        self.assertEqual(get_segment_pdf(self.segmento), desde_jpg)
+        self.assertNotEqual(self.segmento.cached_pdf_huella, huella)
+
+    def test_vistas_publicas_encolan_la_construccion(self):
+        ConstruccionSegmentosJob.objects.all().delete()
+        self.assertIsNone(get_segment_pdf(self.segmento, construir=False))
+        self.assertEqual(self.segmento.cached_pdf_path, "")
+        self.assertTrue(
+            ConstruccionSegmentosJob.objects.filter(
+                digital_set=self.ds, estado="PENDIENTE"
+            ).exists()
+        )
+
+
+class RegistrarUsoTest(SegmentoMixin, TestCase):
+    """Contadores de aciertos acumulados en memoria del proceso."""
+
+    def setUp(self):
+        super().setUp()
+        get_segment_pdf(self.segmento)
+        # Sin el fallo de construirlo
+        for pendientes in (cache_derivados._aciertos_pendientes, cache_derivados._ultima_escritura):
+            pendientes.clear()
+            self.addCleanup(pendientes.clear)
+        self.pdf = self.media / self.segmento.cached_pdf_path
+        self.antiguo = time.time() - 2 * RENOVAR_USO
+        os.utime(self.pdf, (self.antiguo, self.antiguo))
+        UsoCacheDerivados.objects.all().delete()
+
+    def _contadores(self):
+        uso = UsoCacheDerivados.objects.filter(digital_set=self.ds).first()
+        return (uso.aciertos, uso.fallos) if uso else (0, 0)
+
+    def test_aciertos_se_escriben_una_vez_por_intervalo(self):
+        registrar_uso(self.segmento, acierto=True)
+        self.assertEqual(self._contadores(), (1, 0))
+        self.assertGreater(self.pdf.stat().st_mtime, self.antiguo)
+
+        os.utime(self.pdf, (self.antiguo, self.antiguo))
+        registrar_uso(self.segmento, acierto=True)
+        registrar_uso(self.segmento, acierto=True)
+        self.assertEqual(self._contadores(), (1, 0))
+        self.assertEqual(self.pdf.stat().st_mtime, self.antiguo)
+
+        # Pasado el intervalo se escriben los pendientes y se renueva el PDF
+        cache_derivados._ultima_escritura[self.ds.pk] -= RENOVAR_USO + 1
+        registrar_uso(self.segmento, acierto=True)
+        self.assertEqual(self._contadores(), (4, 0))
+        self.assertGreater(self.pdf.stat().st_mtime, self.antiguo)
+
+    def test_fallo_arrastra_los_aciertos_pendientes(self):
+        registrar_uso(self.segmento, acierto=True)
+        registrar_uso(self.segmento, acierto=True)
+        self.assertEqual(self._contadores(), (1, 0))
+
+        registrar_uso(self.segmento, acierto=False)
+        self.assertEqual(self._contadores(), (2, 1))
+        self.assertEqual(cache_derivados._aciertos_pendientes, {})
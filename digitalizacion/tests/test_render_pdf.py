@@ -0,0 +1,99 @@
+import threading
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from digitalizacion.models import DigitalSet
+from digitalizacion.services import render_pdf
+
+from .utils import MediaTemporalMixin, crear_obra, crear_pdf
+
+PDF = "digitalizacion/UNL/access/pdf/coleccion.pdf"
+
+
+class PaginaPdfTest(MediaTemporalMixin, TestCase):
+    """Render a demanda de páginas del PDF (/digitalizacion/pdf/<ds>/p<n>.jpg)."""
+
+    def setUp(self):
+        super().setUp()
+        self.cache = self.media / "cache" / "pdf"
+        ajustes = override_settings(PDF_RENDER_CACHE_DIR=self.cache)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        render_pdf._cache = None
+        self.addCleanup(setattr, render_pdf, "_cache", None)
+
+        crear_pdf(self.media / PDF)
+        self.obra = crear_obra(publicada=True)
+        self.ds = DigitalSet.objects.create(obra=self.obra, pdf_path=PDF)
+
+    def _url(self, numero, ancho=None):
+        url = reverse("digitalizacion:pdf_pagina", kwargs={"ds_id": self.ds.pk, "numero": numero})
+        return f"{url}?ancho={ancho}" if ancho is not None else url
+
+    def _imagen(self, response):
+        from PIL import Image
+
+        return Image.open(BytesIO(b"".join(response.streaming_content)))
+
+    def test_render_y_cache(self):
+        response = self.client.get(self._url(2, ancho=250))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("public", response["Cache-Control"])
+        # El ancho se redondea al paso de la caché; 300x400 pt mantiene la proporción
+        with self._imagen(response) as im:
+            self.assertEqual(im.size, (300, 400))
+
+        self.assertEqual(self.client.get(self._url(2, ancho=300)).status_code, 200)
+        self.assertEqual(len(list(self.cache.rglob("*.jpg"))), 1)
+
+        repetida = self.client.get(self._url(2, ancho=300), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_listado_sin_imagenes_usa_el_pdf(self):
+        from digitalizacion.services.paginas import listar_paginas
+
+        datos = listar_paginas(self.ds, desde=1, limite=2)
+        self.assertEqual(datos["siguiente"], 3)
+        self.assertEqual([p["page_number"] for p in datos["paginas"]], [1, 2])
+        primera = datos["paginas"][0]
+        self.assertEqual((primera["ancho"], primera["alto"]), (300, 400))
+        self.assertEqual(primera["imagen"], self._url(1, ancho=1200))
+        self.assertIsNone(primera["info"])
+
+        resto = listar_paginas(self.ds, desde=3, limite=2)
+        self.assertEqual([p["page_number"] for p in resto["paginas"]], [3])
+        self.assertIsNone(resto["siguiente"])
+
+    def test_paginas_fuera_del_pdf(self):
+        self.assertEqual(self.client.get(self._url(4)).status_code, 404)
+        self.assertEqual(self.client.get(self._url(0)).status_code, 404)
+        self.assertEqual(self.client.get(self._url(1, ancho="x")).status_code, 400)
+
+    def test_sin_pdf(self):
+        self.ds.pdf_path = ""
+        self.ds.save()
+        self.assertEqual(self.client.get(self._url(1)).status_code, 404)
+
+    def test_obra_no_publicada_solo_con_sesion(self):
+        self.obra.publicada = False
+        self.obra.save()
+        self.assertEqual(self.client.get(self._url(1)).status_code, 404)
+
+        usuario = get_user_model().objects.create_user("catalogador@example.com", password="clave")
+        self.client.force_login(usuario)
+        response = self.client.get(self._url(1))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_sin_turno_de_render(self):
+        with mock.patch.object(render_pdf, "_semaforo", threading.Semaphore(0)), \
+                mock.patch.object(render_pdf, "ESPERA_TURNO", 0.01):
+            response = self.client.get(self._url(1))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "2")
+        self.assertFalse(self.cache.exists() and any(self.cache.rglob("*.jpg")))
@@ -0,0 +1,75 @@
+from io import StringIO
+
+import pymupdf
+from django.core.management import call_command
+from django.test import TestCase
+
+from digitalizacion.models import (
+    ConstruccionSegmentosJob,
+    DigitalSet,
+    ThumbnailJob,
+    WorkSegment,
+)
+from digitalizacion.services.segmentos_lote import (
+    construir_segmentos,
+    encolar_construccion_segmentos,
+)
+
+from .utils import MediaTemporalMixin, crear_obra, crear_pdf
+
+PDF = "digitalizacion/UNL/access/pdf/coleccion.pdf"
+
+
+class ConstruirSegmentosTest(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        crear_pdf(self.media / PDF, paginas=6)
+        coleccion = crear_obra()
+        self.ds = DigitalSet.objects.create(obra=coleccion, pdf_path=PDF, total_pages=6)
+        self.segmentos = [
+            WorkSegment.objects.create(
+                obra=crear_obra(f"Obra {inicio}", nivel_bibliografico="m"),
+                digital_set=self.ds,
+                start_page=inicio,
+                end_page=fin,
+            )
+            for inicio, fin in ((1, 2), (3, 6))
+        ]
+
+    def _texto_paginas(self, rel_path):
+        with pymupdf.open(self.media / rel_path) as doc:
+            return [pagina.get_text().strip() for pagina in doc]
+
+    def test_una_pasada_genera_pdfs_y_thumbnails(self):
+        self.assertEqual(construir_segmentos(self.ds), {"pdfs": 2, "thumbs": 2})
+
+        primero, segundo = (WorkSegment.objects.get(pk=s.pk) for s in self.segmentos)
+        self.assertEqual(self._texto_paginas(primero.cached_pdf_path), ["Página 1", "Página 2"])
+        self.assertEqual(len(self._texto_paginas(segundo.cached_pdf_path)), 4)
+        self.assertTrue((self.media / segundo.cached_thumb_path).is_file())
+        # Los thumbnails encolados al crear los segmentos quedan resueltos
+        self.assertFalse(ThumbnailJob.objects.filter(estado="PENDIENTE").exists())
+
+        # Sin cambios no se regenera nada
+        self.assertEqual(construir_segmentos(self.ds), {"pdfs": 0, "thumbs": 0})
+
+    def test_worker_procesa_la_cola(self):
+        job = encolar_construccion_segmentos(self.ds)
+        self.assertEqual(encolar_construccion_segmentos(self.ds, force=True), job)
+
+        salida = StringIO()
+        call_command("construir_segmentos", stdout=salida)
+        job.refresh_from_db()
+        self.assertEqual(job.estado, "HECHO")
+        self.assertIn("Colecciones procesadas: 1", salida.getvalue())
+        self.assertFalse(WorkSegment.objects.filter(cached_pdf_path="").exists())
+
+    def test_error_se_reintenta(self):
+        (self.media / PDF).write_bytes(b"no es un PDF")
+        job = encolar_construccion_segmentos(self.ds)
+
+        call_command("construir_segmentos", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.estado, "ERROR")
+        self.assertEqual(job.intentos, 3)
+        self.assertTrue(job.error)
@@ -0,0 +1,54 @@
+"""
+Utilidades compartidas por los tests de digitalización.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+
+from catalogacion.models import ObraGeneral
+
+
+class MediaTemporalMixin:
+    """MEDIA_ROOT en un directorio temporal que se borra al terminar cada test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=str(self.media))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+
+def crear_obra(titulo="Colección", **campos):
+    datos = {
+        "tipo_registro": "d",
+        "nivel_bibliografico": "c",
+        "centro_catalogador": "UNL",
+        **campos,
+    }
+    return ObraGeneral.objects.create(titulo_principal=titulo, **datos)
+
+
+def crear_pdf(ruta: Path, paginas: int = 3) -> Path:
+    """PDF con una línea de texto distinta por página."""
+    import pymupdf
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with pymupdf.open() as doc:
+        for numero in range(1, paginas + 1):
+            doc.new_page(width=300, height=400).insert_text((40, 60), f"Página {numero}")
+        doc.save(ruta)
+    return ruta
+
+
+def crear_tiff(ruta: Path, color=(200, 200, 200), tamano=(120, 160)) -> Path:
+    """TIFF liso (cada color es un escaneo distinto)."""
+    from PIL import Image
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", tamano, color).save(ruta, "TIFF")
+    return ruta
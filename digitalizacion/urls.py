@@ -26,6 +26,11 @@ urlpatterns = [
         views.ImportarObraView.as_view(),
         name="importar",
     ),
+    path(
+        "obra/<int:pk>/importar/progreso/",
+        views.ProgresoImportacionView.as_view(),
+        name="importar_progreso",
+    ),
 
     # Segmentar (solo para colecciones)
     path(
@@ -41,6 +46,13 @@ urlpatterns = [
         name="segmento_eliminar",
     ),
 
+    # API páginas de un DigitalSet por rangos (visores)
+    path(
+        "api/set/<int:ds_id>/paginas/",
+        views.PaginasDigitalSetView.as_view(),
+        name="api_paginas",
+    ),
+
     # API búsqueda de obras
     path("api/buscar-obras/", views.api_buscar_obras, name="api_buscar_obras"),
 
@@ -84,4 +96,40 @@ urlpatterns = [
         views.VisorObraSegmentoView.as_view(),
         name="visor_obra",
     ),
+
+    # IIIF Image API 3.0 (nivel 1) por página
+    path(
+        "iiif/<int:page_id>",
+        views.IIIFBaseView.as_view(),
+        name="iiif_base",
+    ),
+    path(
+        "iiif/<int:page_id>/info.json",
+        views.IIIFInfoView.as_view(),
+        name="iiif_info",
+    ),
+    path(
+        "iiif/<int:page_id>/<str:region>/<str:size>/<str:rotation>/<str:quality>.<str:fmt>",
+        views.IIIFImagenView.as_view(),
+        name="iiif_imagen",
+    ),
+
+    # IIIF Presentation API 3.0: manifiestos por conjunto y por segmento
+    path(
+        "iiif/set/<int:ds_id>/manifest.json",
+        views.ManifiestoDigitalSetView.as_view(),
+        name="iiif_manifiesto",
+    ),
+    path(
+        "iiif/segmento/<int:segment_id>/manifest.json",
+        views.ManifiestoSegmentoView.as_view(),
+        name="iiif_manifiesto_segmento",
+    ),
+
+    # Render a demanda de páginas de PDF (conjuntos sin imágenes)
+    path(
+        "pdf/<int:ds_id>/p<int:numero>.jpg",
+        views.PaginaPdfView.as_view(),
+        name="pdf_pagina",
+    ),
 ]
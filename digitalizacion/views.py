@@ -3,12 +3,11 @@ from django.conf import settings
 from django.contrib import messages
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
 from catalogacion.models.obra_general import (
     ObraGeneral,
 )
 from django.shortcuts import get_object_or_404, redirect
-from django.http import HttpResponseBadRequest
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest
 from django.views import View
 from django.urls import reverse
 from .models import DigitalSet, DigitalPage, WorkSegment
@@ -16,12 +15,17 @@ from django.views.decorators.http import require_POST
 from pypdf import PdfReader
 
 from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 
 import os
 import shutil
-from PIL import Image
 
 from catalogacion.models.utils import signatura_para_archivo
+from catalogacion.services.busqueda import filtrar_por_busqueda
+from digitalizacion.services.cache_derivados import registrar_uso
+from digitalizacion.services.paginas import rango_paginas, rango_paginas_pdf
+from digitalizacion.services.pdf_service import pdf_segmento_vigente
 
 # Path(settings.MEDIA_ROOT) es backend/media/
 
@@ -83,12 +87,7 @@ class DigitalizacionDashboardView(LoginRequiredMixin, TemplateView):
         # else: "todos" - mostrar todo lo que tiene o puede tener DigitalSet
 
         if q:
-            qs = qs.filter(
-                Q(titulo_principal__icontains=q)
-                | Q(num_control__icontains=q)
-                | Q(centro_catalogador__icontains=q)
-                | Q(compositor__apellidos_nombres__icontains=q)
-            )
+            qs = filtrar_por_busqueda(qs, q)
 
         ctx["q"] = q
         ctx["filtro_tipo"] = filtro_tipo
@@ -122,6 +121,8 @@ class ImportarObraView(LoginRequiredMixin, TemplateView):
         return get_object_or_404(ObraGeneral, pk=self.kwargs["pk"])
 
     def get_context_data(self, **kwargs):
+        from digitalizacion.services.importacion import ultima_importacion
+
         ctx = super().get_context_data(**kwargs)
 
         obra = self.get_obra()
@@ -141,17 +142,21 @@ class ImportarObraView(LoginRequiredMixin, TemplateView):
                 "digital_set": digital_set,
                 "pages_count": digital_set.pages.count() if digital_set else 0,
                 "es_coleccion": es_coleccion,
+                "importacion": ultima_importacion(digital_set),
             }
         )
         return ctx
 
     def post(self, request, *args, **kwargs):
         """
-        POST = ejecutar importación de TIFF.
-        Flujo: TIFF → copiar a master/ → generar JPG derivado en iiif/jpg/
+        POST = encolar importación de TIFF.
+        Flujo (worker `importar_tiffs`): TIFF → almacén por contenido (blobs/,
+        sin copiar si ya está) → JPG derivado, miniaturas y teselas. El avance
+        se consulta en ProgresoImportacionView.
         """
+        from digitalizacion.services.importacion import encolar_importacion, listar_tiffs
+
         obra = self.get_obra()
-        nombre_carpeta = nombre_carpeta_obra(obra)
         inbox = default_inbox_for_obra(obra)
         repo = default_repo_for_obra(obra)
         es_coleccion = obra.nivel_bibliografico == "c"
@@ -161,13 +166,7 @@ class ImportarObraView(LoginRequiredMixin, TemplateView):
             return redirect("digitalizacion:importar", pk=obra.id)
 
         # Buscar TIFF en la carpeta INBOX
-        tiffs = sorted(
-            [
-                p
-                for p in inbox.iterdir()
-                if p.is_file() and p.suffix.lower() in [".tif", ".tiff"]
-            ]
-        )
+        tiffs = listar_tiffs(inbox)
 
         if not tiffs:
             messages.warning(request, "No se encontraron imágenes TIFF en la carpeta INBOX.")
@@ -181,65 +180,63 @@ class ImportarObraView(LoginRequiredMixin, TemplateView):
         )
         digital_set.inbox_path = str(inbox)
         digital_set.repository_path = str(repo)
+        digital_set.save()
 
-        # Crear directorios
-        master_dir = repo / "master"
-        iiif_dir = repo / "iiif" / "jpg"
-        master_dir.mkdir(parents=True, exist_ok=True)
-        iiif_dir.mkdir(parents=True, exist_ok=True)
+        encolar_importacion(digital_set)
 
-        created = 0
-        for idx, src in enumerate(tiffs, start=1):
-            # Nombres de archivo
-            base_name = f"{nombre_carpeta}_p{idx:03d}"
-            master_name = f"{base_name}.tif"
-            deriv_name = f"{base_name}.jpg"
+        messages.info(
+            request,
+            f"Importación en cola: {len(tiffs)} imágenes TIFF. "
+            "El avance se muestra en esta página.",
+        )
+        return redirect("digitalizacion:importar", pk=obra.id)
 
-            dst_master = master_dir / master_name
-            dst_deriv = iiif_dir / deriv_name
 
-            # 1) Copiar TIFF a master/
-            shutil.copy2(src, dst_master)
+class ProgresoImportacionView(LoginRequiredMixin, View):
+    """Avance de la última importación de TIFF de una obra (JSON para sondeo)."""
 
-            # 2) Generar JPG derivado para visor (menor calidad/tamaño)
-            deriv_ok = False
-            try:
-                im = Image.open(dst_master)
-                if im.mode not in ("RGB", "L"):
-                    im = im.convert("RGB")
-                # Redimensionar si es muy grande (max 2000px en el lado mayor)
-                max_size = 2000
-                if max(im.size) > max_size:
-                    im.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                im.save(dst_deriv, "JPEG", quality=85, optimize=True)
-                deriv_ok = True
-            except Exception as e:
-                messages.warning(request, f"No se pudo generar derivado para p{idx:03d}: {e}")
-
-            # 3) Guardar en BD (rutas relativas a MEDIA_ROOT)
-            master_rel = to_media_relpath(dst_master)
-            deriv_rel = to_media_relpath(dst_deriv) if deriv_ok else ""
-
-            obj, was_created = DigitalPage.objects.update_or_create(
-                digital_set=digital_set,
-                page_number=idx,
-                defaults={
-                    "master_path": master_rel,
-                    "derivative_path": deriv_rel,
-                },
-            )
-            if was_created:
-                created += 1
+    def get(self, request, pk):
+        from digitalizacion.services.importacion import ultima_importacion
 
-        digital_set.total_pages = digital_set.pages.count()
-        digital_set.estado = "IMPORTADO"
-        digital_set.save()
+        obra = get_object_or_404(ObraGeneral, pk=pk)
+        ds = DigitalSet.objects.filter(obra=obra).first()
+        job = ultima_importacion(ds)
+        if job is None:
+            return JsonResponse({"estado": None})
 
-        messages.success(
-            request,
-            f"Importación completa. Páginas procesadas: {len(tiffs)}. Nuevas: {created}.",
+        return JsonResponse(
+            {
+                "estado": job.estado,
+                "total": job.total_paginas,
+                "procesadas": job.paginas_procesadas,
+                "omitidas": job.paginas_omitidas,
+                "nuevas": job.paginas_nuevas,
+                "porcentaje": job.porcentaje,
+                "avisos": job.avisos.splitlines(),
+                "error": job.error,
+                "terminado": job.estado in ("HECHO", "ERROR"),
+            }
         )
-        return redirect("digitalizacion:importar", pk=obra.id)
+
+
+class PaginasDigitalSetView(LoginRequiredMixin, View):
+    """
+    Páginas de un DigitalSet por rango de page_number (JSON para los visores).
+    Parámetros: desde, hasta (opcional) y limite.
+    """
+
+    def get(self, request, ds_id):
+        from digitalizacion.services.paginas import LIMITE_PAGINAS, listar_paginas
+
+        ds = get_object_or_404(DigitalSet, pk=ds_id)
+        try:
+            desde = int(request.GET.get("desde") or 1)
+            hasta = int(request.GET["hasta"]) if request.GET.get("hasta") else None
+            limite = int(request.GET.get("limite") or LIMITE_PAGINAS)
+        except ValueError:
+            return HttpResponseBadRequest("desde, hasta y limite deben ser enteros")
+
+        return JsonResponse(listar_paginas(ds, desde=desde, hasta=hasta, limite=limite))
 
 
 class SegmentarObraView(LoginRequiredMixin, TemplateView):
@@ -261,7 +258,6 @@ class SegmentarObraView(LoginRequiredMixin, TemplateView):
 
         ctx["obra"] = obra
         ctx["digital_set"] = ds
-        ctx["pages"] = ds.pages.all() if ds else []
         ctx["segments"] = ds.segments.select_related("obra").all() if ds else []
         ctx["max_pages"] = max_pages
 
@@ -311,6 +307,12 @@ class SegmentarObraView(LoginRequiredMixin, TemplateView):
             tipo=tipo,
         )
 
+        # PDFs y thumbnails de los segmentos se generan en lote (una lectura del
+        # PDF por colección) con el worker `construir_segmentos`; los segmentos
+        # creados seguidos comparten el trabajo pendiente
+        from digitalizacion.services.segmentos_lote import encolar_construccion_segmentos
+        encolar_construccion_segmentos(ds)
+
         messages.success(
             request,
             f"Segmento creado: Obra {obra_id} ({start_page}-{end_page}) [{tipo}].",
@@ -330,7 +332,8 @@ class VisorObraDigitalView(LoginRequiredMixin, TemplateView):
 
         ctx["obra"] = obra
         ctx["digital_set"] = ds
-        ctx["pages"] = ds.pages.all() if ds else []
+        # Las páginas las pide el visor por rangos (PaginasDigitalSetView)
+        ctx["primera_pagina"], ctx["ultima_pagina"] = rango_paginas(ds) if ds else (0, 0)
         ctx["segments"] = ds.segments.select_related("obra").all() if ds and es_coleccion else []
         ctx["es_coleccion"] = es_coleccion
         return ctx
@@ -374,30 +377,46 @@ class SubirPdfObraView(LoginRequiredMixin, TemplateView):
             messages.error(request, "El archivo debe ser PDF.")
             return redirect("digitalizacion:subir_pdf", pk=obra.id)
 
-        # Guardar PDF en access/pdf/ (nueva estructura)
-        access_dir = repo / "access" / "pdf"
-        access_dir.mkdir(parents=True, exist_ok=True)
+        from digitalizacion.services.pdf_acceso import (
+            encolar_optimizacion_digital_set,
+            preparar_copia_acceso,
+        )
+
+        # Original en master/pdf/ (preservación); copia de acceso en access/pdf/
+        master_dir = repo / "master" / "pdf"
+        master_dir.mkdir(parents=True, exist_ok=True)
 
         # Nombre del PDF usando signatura (ej: UNL-BLMP-EC-Ms-M000001.pdf)
         nombre_carpeta = nombre_carpeta_obra(obra)
         pdf_name = f"{nombre_carpeta}.pdf"
-        dst = access_dir / pdf_name
+        master = master_dir / pdf_name
+        dst = repo / "access" / "pdf" / pdf_name
 
-        with open(dst, "wb+") as out:
+        with open(master, "wb+") as out:
             for chunk in f.chunks():
                 out.write(chunk)
 
-        ds.pdf_path = to_media_relpath(dst)
-        ds.save()
+        # La copia de acceso es idéntica hasta que el worker `optimizar_pdfs`
+        # la reemplaza por la versión optimizada
+        preparar_copia_acceso(master, dst)
 
-        reader = PdfReader(str(dst))
+        reader = PdfReader(str(master))
         ds.pdf_total_pages = len(reader.pages)
+        ds.pdf_master_path = to_media_relpath(master)
         ds.pdf_path = to_media_relpath(dst)
+        ds.pdf_optimizado_at = None
         ds.save()
+        encolar_optimizacion_digital_set(ds)
 
-        # Generar thumbnail de la primera página del PDF
-        from digitalizacion.services.thumbnail_service import get_pdf_thumbnail_for_digital_set
-        get_pdf_thumbnail_for_digital_set(ds)
+        # Encolar thumbnails (PDF principal y segmentos); los genera el worker
+        # `procesar_thumbnails`. force=True porque el PDF puede conservar el nombre.
+        from digitalizacion.services.thumbnail_queue import (
+            encolar_thumbnail_digital_set,
+            encolar_thumbnail_segmento,
+        )
+        encolar_thumbnail_digital_set(ds, force=True)
+        for seg in ds.segments.select_related("digital_set"):
+            encolar_thumbnail_segmento(seg, force=True)
 
         messages.success(request, "PDF cargado correctamente.")
         return redirect("digitalizacion:visor_digital", pk=obra.id)
@@ -418,13 +437,15 @@ class VisorObraSegmentoView(LoginRequiredMixin, TemplateView):
         ds_propio = DigitalSet.objects.filter(obra=obra).first()
         if ds_propio:
             # La obra tiene su propio DigitalSet - usarlo
+            primera, ultima = rango_paginas(ds_propio)
             ctx.update(
                 {
                     "obra": obra,
                     "segments": [],
                     "digital_set": ds_propio,
                     "coleccion_padre": None,
-                    "pages": ds_propio.pages.all(),
+                    "primera_pagina": primera,
+                    "ultima_pagina": ultima,
                     "start_page": 1,
                     "end_page": ds_propio.total_pages or ds_propio.pdf_total_pages,
                     "es_obra_suelta": True,
@@ -447,7 +468,8 @@ class VisorObraSegmentoView(LoginRequiredMixin, TemplateView):
                     "segments": [],
                     "digital_set": None,
                     "coleccion_padre": None,
-                    "pages": [],
+                    "primera_pagina": 0,
+                    "ultima_pagina": 0,
                     "start_page": None,
                     "es_obra_suelta": False,
                 }
@@ -463,27 +485,37 @@ class VisorObraSegmentoView(LoginRequiredMixin, TemplateView):
         start_page = first_seg.start_page
         end_page = first_seg.end_page
 
-        pages = DigitalPage.objects.filter(
-            digital_set=ds, page_number__gte=start_page, page_number__lte=end_page
-        ).order_by("page_number")
+        primera, ultima = rango_paginas(ds, start_page, end_page)
+        # Sin imágenes del rango: páginas renderizadas a demanda del PDF
+        paginas_pdf = not ultima and bool(ds.pdf_path)
+        if paginas_pdf:
+            primera, ultima = rango_paginas_pdf(ds, start_page, end_page)
 
-        # Generar PDF segmentado (prioridad: imágenes > PDF de colección)
+        # PDF segmentado solo si ya está generado; si no, se encola para el
+        # worker `construir_segmentos` y mientras tanto se ven las páginas
         segment_pdf_url = None
         segment_total_pages = None
-        from digitalizacion.services.pdf_service import get_segment_pdf
-        segment_pdf_path = get_segment_pdf(first_seg)
+        segment_pdf_path = pdf_segmento_vigente(first_seg)
         if segment_pdf_path:
             from django.core.files.storage import default_storage
             segment_pdf_url = default_storage.url(segment_pdf_path)
             segment_total_pages = end_page - start_page + 1
+            registrar_uso(first_seg, acierto=True)
+        elif ultima:
+            from digitalizacion.services.segmentos_lote import encolar_construccion_segmentos
+            encolar_construccion_segmentos(ds)
+            registrar_uso(first_seg, acierto=False)
 
         ctx.update(
             {
                 "obra": obra,
                 "segments": segments,
+                "segment": first_seg,
                 "digital_set": ds,
                 "coleccion_padre": coleccion_padre,
-                "pages": pages,
+                "primera_pagina": primera,
+                "ultima_pagina": ultima,
+                "paginas_pdf": paginas_pdf,
                 "start_page": start_page,
                 "end_page": end_page,
                 "es_obra_suelta": False,
@@ -507,12 +539,7 @@ def api_buscar_obras(request):
     except ValueError:
         obra_id = None
 
-    qs = ObraGeneral.objects.exclude(nivel_bibliografico="c").filter(
-        Q(num_control__icontains=q)
-        | Q(centro_catalogador__icontains=q)
-        | Q(titulo_principal__icontains=q)
-        | Q(compositor__apellidos_nombres__icontains=q)
-    )
+    qs = ObraGeneral.objects.exclude(nivel_bibliografico="c")
 
     # Excluir obras ya segmentadas en esta colección (si hay DS)
     if obra_id:
@@ -523,7 +550,7 @@ def api_buscar_obras(request):
             )
             qs = qs.exclude(id__in=segmented_ids)
 
-    qs = qs.order_by("-id")[:20]
+    qs = filtrar_por_busqueda(qs, q)[:20]
 
     results = [
         {
@@ -561,9 +588,15 @@ class EliminarPdfObraView(LoginRequiredMixin, View):
             pdf_file = Path(settings.MEDIA_ROOT) / ds.pdf_path
             if pdf_file.exists():
                 pdf_file.unlink()
+            if ds.pdf_master_path:
+                master_file = Path(settings.MEDIA_ROOT) / ds.pdf_master_path
+                if master_file.exists():
+                    master_file.unlink()
 
             # Limpiar campos en BD
             ds.pdf_path = ""
+            ds.pdf_master_path = ""
+            ds.pdf_optimizado_at = None
             ds.pdf_total_pages = 0
             ds.save()
             messages.success(request, "PDF eliminado correctamente.")
@@ -601,9 +634,236 @@ class EliminarDigitalSetView(LoginRequiredMixin, View):
 
         if repo_dir.exists():
             shutil.rmtree(repo_dir)
+        # Las imágenes en blobs/ pueden estar compartidas: las huérfanas las
+        # borra el comando `limpiar_blobs`
 
         # Eliminar DigitalSet (CASCADE elimina DigitalPages automáticamente)
         ds.delete()
         messages.success(request, "Digitalización eliminada completamente.")
 
         return redirect("digitalizacion:obra_home", pk=pk)
+
+
+# ===========================================
+# IIIF IMAGE API
+# ===========================================
+
+def pagina_publica(digital_set_id, page_number) -> bool:
+    """
+    True si la página pertenece a una obra publicada: la obra del DigitalSet o
+    la de un segmento (no excluido) que contiene la página.
+    """
+    if DigitalSet.objects.filter(pk=digital_set_id, obra__publicada=True).exists():
+        return True
+    return (
+        WorkSegment.objects.filter(
+            digital_set_id=digital_set_id,
+            obra__publicada=True,
+            start_page__lte=page_number,
+            end_page__gte=page_number,
+        )
+        .exclude(tipo="EXCLUIDO")
+        .exists()
+    )
+
+
+class IIIFImagenMixin:
+    """
+    Carga la página y agrega las cabeceras comunes del servicio IIIF Image.
+
+    Solo las páginas de obras publicadas son públicas; el resto solo para
+    usuarios autenticados (404 para los demás, como DescargarPDFObraView).
+    """
+
+    publico = True
+
+    def verificar_acceso(self, es_publico):
+        """es_publico: callable que decide si el recurso es de una obra publicada."""
+        self.publico = es_publico()
+        if not self.publico and not self.request.user.is_authenticated:
+            raise Http404("Recurso no disponible")
+
+    def get_fuente(self, page_id):
+        from digitalizacion.services.iiif_imagen import FuenteImagen
+
+        page = get_object_or_404(DigitalPage, pk=page_id)
+        self.verificar_acceso(lambda: pagina_publica(page.digital_set_id, page.page_number))
+        try:
+            return FuenteImagen(page)
+        except FileNotFoundError:
+            raise Http404("La página no tiene imagen")
+
+    def finalizar(self, response):
+        # Cualquier visor IIIF (de otro dominio) puede consumir el servicio
+        response["Access-Control-Allow-Origin"] = "*"
+        # Lo no publicado no debe quedar en cachés compartidas
+        patch_cache_control(
+            response,
+            max_age=getattr(settings, "IIIF_CACHE_SEGUNDOS", 86400),
+            **({"public": True} if self.publico else {"private": True}),
+        )
+        return response
+
+
+class IIIFBaseView(IIIFImagenMixin, View):
+    """URI base del servicio: redirige a info.json (baseUriRedirect)."""
+
+    def get(self, request, page_id):
+        page = get_object_or_404(DigitalPage, pk=page_id)
+        self.verificar_acceso(lambda: pagina_publica(page.digital_set_id, page.page_number))
+        return redirect("digitalizacion:iiif_info", page_id=page_id)
+
+
+class IIIFInfoView(IIIFImagenMixin, View):
+    """info.json (IIIF Image API 3.0) de una página."""
+
+    def get(self, request, page_id):
+        from digitalizacion.services.iiif_imagen import CONTEXTO_IMAGE_API, info_json
+
+        fuente = self.get_fuente(page_id)
+        etag = quote_etag(fuente.version)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            id_servicio = request.build_absolute_uri(
+                reverse("digitalizacion:iiif_base", kwargs={"page_id": page_id})
+            )
+            response = JsonResponse(info_json(fuente, id_servicio))
+            if "application/ld+json" in request.headers.get("Accept", ""):
+                response["Content-Type"] = (
+                    f'application/ld+json;profile="{CONTEXTO_IMAGE_API}"'
+                )
+        response["ETag"] = etag
+        return self.finalizar(response)
+
+
+class IIIFImagenView(IIIFImagenMixin, View):
+    """
+    Imagen IIIF: {region}/{size}/{rotation}/{quality}.{format}.
+    Las teselas alineadas se sirven tal cual; el resto sale de la caché de disco.
+    """
+
+    def get(self, request, page_id, region, size, rotation, quality, fmt):
+        from digitalizacion.services.iiif_imagen import (
+            FORMATOS,
+            SolicitudInvalida,
+            obtener_imagen,
+        )
+
+        fuente = self.get_fuente(page_id)
+        etag = quote_etag(f"{fuente.version}:{region}/{size}/{rotation}/{quality}.{fmt}")
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            try:
+                ruta = obtener_imagen(fuente, region, size, rotation, quality, fmt)
+            except SolicitudInvalida as e:
+                return self.finalizar(HttpResponseBadRequest(str(e)))
+            response = FileResponse(open(ruta, "rb"), content_type=FORMATOS[fmt][1])
+        response["ETag"] = etag
+        return self.finalizar(response)
+
+
+# ===========================================
+# IIIF PRESENTATION API
+# ===========================================
+
+class ManifiestoMixin(IIIFImagenMixin):
+    """Respuesta común de los manifiestos (ETag por versión del DigitalSet)."""
+
+    def responder(self, request, obtener, objeto, clave):
+        from digitalizacion.services.iiif_manifiesto import CONTEXTO_PRESENTATION
+
+        base_url = request.build_absolute_uri("/").rstrip("/")
+        manifiesto, version = obtener(objeto, base_url)
+        if manifiesto is None:
+            raise Http404("No hay páginas con imagen")
+
+        etag = quote_etag(f"{clave}:{version}")
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(manifiesto, json_dumps_params={"ensure_ascii": False})
+            response["Content-Type"] = (
+                f'application/ld+json;profile="{CONTEXTO_PRESENTATION}"'
+            )
+        response["ETag"] = etag
+        return self.finalizar(response)
+
+    def finalizar(self, response):
+        response = super().finalizar(response)
+        # El manifiesto cambia con los datos; se revalida con el ETag
+        patch_cache_control(response, max_age=0, must_revalidate=True)
+        return response
+
+
+class ManifiestoDigitalSetView(ManifiestoMixin, View):
+    """Manifiesto IIIF de todas las páginas de un DigitalSet."""
+
+    def get(self, request, ds_id):
+        from digitalizacion.services.iiif_manifiesto import obtener_manifiesto_digital_set
+
+        ds = get_object_or_404(DigitalSet.objects.select_related("obra"), pk=ds_id)
+        # Lista todas las páginas: solo es público si la obra del conjunto lo es
+        self.verificar_acceso(lambda: ds.obra.publicada)
+        return self.responder(request, obtener_manifiesto_digital_set, ds, f"ds{ds.id}")
+
+
+class ManifiestoSegmentoView(ManifiestoMixin, View):
+    """Manifiesto IIIF de las páginas start_page..end_page de un segmento."""
+
+    def get(self, request, segment_id):
+        from digitalizacion.services.iiif_manifiesto import obtener_manifiesto_segmento
+
+        segment = get_object_or_404(
+            WorkSegment.objects.select_related("digital_set__obra", "obra"), pk=segment_id
+        )
+        self.verificar_acceso(
+            lambda: segment.obra.publicada or segment.digital_set.obra.publicada
+        )
+        return self.responder(
+            request, obtener_manifiesto_segmento, segment, f"seg{segment.id}"
+        )
+
+
+# ===========================================
+# RENDER DE PÁGINAS DE PDF
+# ===========================================
+
+class PaginaPdfView(IIIFImagenMixin, View):
+    """
+    Página N del PDF de un DigitalSet como JPG (?ancho=W), renderizada a
+    demanda y cacheada en disco. Para conjuntos que solo tienen PDF.
+    """
+
+    def get(self, request, ds_id, numero):
+        from digitalizacion.services.render_pdf import (
+            PaginaInexistente,
+            RenderOcupado,
+            normalizar_ancho,
+            renderizar_pagina,
+            version_pdf,
+        )
+
+        ds = get_object_or_404(DigitalSet, pk=ds_id)
+        self.verificar_acceso(lambda: pagina_publica(ds.id, numero))
+        try:
+            ancho = normalizar_ancho(int(request.GET.get("ancho") or 1200))
+        except ValueError:
+            return HttpResponseBadRequest("ancho debe ser un entero")
+        try:
+            version = version_pdf(ds)
+        except FileNotFoundError:
+            raise Http404("El DigitalSet no tiene PDF")
+
+        etag = quote_etag(f"{version}:{numero}:{ancho}")
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            try:
+                ruta = renderizar_pagina(ds, numero, ancho)
+            except PaginaInexistente as e:
+                raise Http404(str(e))
+            except RenderOcupado:
+                response = HttpResponse("Servidor ocupado renderizando páginas", status=503)
+                response["Retry-After"] = "2"
+                return response
+            response = FileResponse(open(ruta, "rb"), content_type="image/jpeg")
+        response["ETag"] = etag
+        return self.finalizar(response)
@@ -93,6 +93,45 @@ DATABASES = {
 }
 
 
+# Caché
+# CATALOGO_CACHE_BACKEND elige dónde se guardan las páginas públicas de obras
+# y las versiones con que se invalidan: "file" (compartida entre procesos del
+# mismo servidor: workers web, comandos y colas), "redis" (cualquier servidor
+# compatible con Redis; requiere el paquete redis; para varios servidores) o
+# "locmem" (memoria de cada proceso: solo para desarrollo con un proceso, las
+# invalidaciones de otros procesos no llegan). CATALOGO_CACHE_LOCATION
+# sobrescribe la ubicación.
+
+CATALOGO_CACHE_BACKEND = os.environ.get("CATALOGO_CACHE_BACKEND", "file")
+
+_CATALOGO_CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "catalogo-publico"),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        str(BASE_DIR / "cache" / "catalogo_publico"),
+    ),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/1"),
+}
+_catalogo_backend, _catalogo_location = _CATALOGO_CACHE_BACKENDS[CATALOGO_CACHE_BACKEND]
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalogo_publico": {
+        "BACKEND": _catalogo_backend,
+        "LOCATION": os.environ.get("CATALOGO_CACHE_LOCATION", _catalogo_location),
+        "TIMEOUT": 60 * 60 * 24,
+        "KEY_PREFIX": "catalogo",
+        **(
+            {}
+            if CATALOGO_CACHE_BACKEND == "redis"
+            else {"OPTIONS": {"MAX_ENTRIES": 5000}}
+        ),
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,6 +175,54 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Entrega de PDFs grandes (catalogo_publico.services.descarga_service):
+# "" (Django transmite el archivo), "x-sendfile" (Apache/lighttpd) o
+# "x-accel-redirect" (nginx, con una location internal que apunte a MEDIA_ROOT)
+ARCHIVOS_OFFLOAD = os.environ.get("ARCHIVOS_OFFLOAD", "")
+ARCHIVOS_ACCEL_PREFIJO = os.environ.get("ARCHIVOS_ACCEL_PREFIJO", "/media-protegida/")
+
+# Copias de acceso de los PDFs (digitalizacion.services.pdf_acceso, comando
+# optimizar_pdfs): el original queda en master/pdf/ y access/pdf/ se reescribe
+# compactado (y linealizado si qpdf está instalado). PDF_ACCESO_DPI limita la
+# resolución de las imágenes; vacío = no recomprimir
+PDF_ACCESO_OPTIMIZAR = os.environ.get("PDF_ACCESO_OPTIMIZAR", "1") == "1"
+PDF_ACCESO_DPI = int(os.environ["PDF_ACCESO_DPI"]) if os.environ.get("PDF_ACCESO_DPI") else None
+PDF_ACCESO_CALIDAD = int(os.environ.get("PDF_ACCESO_CALIDAD", "75"))
+
+# Procesos del comando importar_tiffs para convertir las páginas de una importación
+DIGITALIZACION_IMPORTACION_PROCESOS = int(
+    os.environ.get("DIGITALIZACION_IMPORTACION_PROCESOS", "4")
+)
+
+# Servicio IIIF Image (digitalizacion.services.iiif_imagen): caché LRU en disco
+# de las imágenes compuestas (tope en MB) y max-age de las respuestas
+IIIF_CACHE_DIR = Path(os.environ.get("IIIF_CACHE_DIR", MEDIA_ROOT / "cache" / "iiif"))
+IIIF_CACHE_MB = int(os.environ.get("IIIF_CACHE_MB", "2048"))
+IIIF_CACHE_SEGUNDOS = int(os.environ.get("IIIF_CACHE_SEGUNDOS", str(7 * 24 * 3600)))
+
+# Render a demanda de páginas de PDF (digitalizacion.services.render_pdf):
+# caché LRU en disco con tope en MB y renders simultáneos por proceso
+PDF_RENDER_CACHE_DIR = Path(
+    os.environ.get("PDF_RENDER_CACHE_DIR", MEDIA_ROOT / "cache" / "pdf")
+)
+PDF_RENDER_CACHE_MB = int(os.environ.get("PDF_RENDER_CACHE_MB", "1024"))
+PDF_RENDER_CONCURRENCIA = int(os.environ.get("PDF_RENDER_CONCURRENCIA", "2"))
+PDF_RENDER_ANCHO_MAXIMO = int(os.environ.get("PDF_RENDER_ANCHO_MAXIMO", "2000"))
+
+# Presupuesto de disco de los PDFs de segmento regenerables
+# (digitalizacion.services.cache_derivados, comando cache_derivados): al
+# superarlo se expulsan los usados hace más tiempo
+DERIVADOS_CACHE_MB = int(os.environ.get("DERIVADOS_CACHE_MB", "10240"))
+
+# Proveedor OAI-PMH (catalogo_publico.services.oai_service): identificadores
+# oai:<OAI_DOMINIO>:<id>, datos de Identify, registros por página y URL
+# pública del catálogo para el dc:identifier de cada obra
+OAI_DOMINIO = os.environ.get("OAI_DOMINIO", "catalogo-musical")
+OAI_NOMBRE_REPOSITORIO = os.environ.get("OAI_NOMBRE_REPOSITORIO", "Catálogo musical MARC21")
+OAI_EMAIL_ADMIN = os.environ.get("OAI_EMAIL_ADMIN", "")
+OAI_TAMANO_PAGINA = int(os.environ.get("OAI_TAMANO_PAGINA", "100"))
+OAI_URL_CATALOGO = os.environ.get("OAI_URL_CATALOGO", "")
 # DEFAULT_FILE_STORAGE  para manejar archivos media (como los covers) usando el sistema de archivos remoto
 
 